@@ -0,0 +1,91 @@
+"""
+Recall vs latency benchmark for the in-memory RAG vector index
+
+Compares exact (argpartition) search with the IVF index at several n_probe
+settings on synthetic clustered embeddings.
+
+Usage:
+    python benchmarks/ann_benchmark.py --size 100000 --dim 384 --queries 200
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from rag.vector_index import IVFIndex, exact_search
+
+
+def make_corpus(size: int, dim: int, clusters: int, seed: int) -> np.ndarray:
+    """Unit vectors drawn around random topic centres, like incident embeddings"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(clusters, size=size)]
+    vectors += 0.5 * rng.normal(size=(size, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def percentiles(latencies):
+    """p50/p99 in milliseconds"""
+    ms = np.asarray(latencies) * 1000
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ANN recall vs latency benchmark')
+    parser.add_argument('--size', type=int, default=100000, help='Number of indexed vectors')
+    parser.add_argument('--dim', type=int, default=384, help='Embedding dimension')
+    parser.add_argument('--clusters', type=int, default=200, help='Topics in the synthetic corpus')
+    parser.add_argument('--queries', type=int, default=200, help='Number of queries')
+    parser.add_argument('--top-k', type=int, default=5, help='Neighbours per query')
+    parser.add_argument('--n-probe', type=int, nargs='+', default=[1, 4, 8, 16, 32])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Corpus: {args.size} x {args.dim}, {args.queries} queries, top_k={args.top_k}")
+    vectors = make_corpus(args.size + args.queries, args.dim, args.clusters, args.seed)
+    corpus, queries = vectors[:args.size], vectors[args.size:]
+    alive = np.ones(args.size, dtype=bool)
+
+    # Exact baseline (also the ground truth)
+    truth, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        rows, _ = exact_search(corpus, query, args.top_k, alive)
+        latencies.append(time.perf_counter() - start)
+        truth.append(set(rows))
+
+    print()
+    print(f"{'index':<16}{'recall@k':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    print("-" * 46)
+    p50, p99 = percentiles(latencies)
+    print(f"{'exact':<16}{1.0:>10.3f}{p50:>10.2f}{p99:>10.2f}")
+
+    index = IVFIndex(seed=args.seed)
+    start = time.perf_counter()
+    index.build(corpus, alive)
+    build_seconds = time.perf_counter() - start
+
+    for n_probe in args.n_probe:
+        index.n_probe = n_probe
+        hits, latencies = 0, []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            rows, _ = index.search(query, args.top_k, corpus, alive)
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected & set(rows))
+
+        p50, p99 = percentiles(latencies)
+        recall = hits / (len(queries) * args.top_k)
+        print(f"{'ivf nprobe=' + str(n_probe):<16}{recall:>10.3f}{p50:>10.2f}{p99:>10.2f}")
+
+    print()
+    print(f"IVF build: {build_seconds:.2f}s, {len(index.centroids)} lists")
+
+
+if __name__ == '__main__':
+    main()
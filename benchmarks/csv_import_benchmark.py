@@ -0,0 +1,73 @@
+"""
+Throughput benchmark for CSVIncidentImporter serial vs process pool imports
+
+Writes a synthetic CSV and times normalisation + validation with an
+increasing number of worker processes.
+
+Usage:
+    python benchmarks/csv_import_benchmark.py --rows 200000 --workers 1 2 4 8
+"""
+
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from csv_importer import CSVIncidentImporter
+from data_validation import DataValidator
+
+
+def write_csv(path: str, rows: int) -> None:
+    """Incidents with mixed date formats and some invalid rows"""
+    date_formats = ['2024-01-{day:02d} 10:30:00', '{day:02d}/01/2024 10:30', 'Jan {day} 2024 10:30AM']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['number', 'short_description', 'description', 'category',
+                         'resolution_notes', 'sys_created_on', 'resolved_at'])
+        for i in range(rows):
+            day = i % 28 + 1
+            created = date_formats[i % 3].format(day=day)
+            writer.writerow([
+                f'INC{i:08d}', f'Service {i % 50} degraded',
+                f'Users report that service {i % 50} responds slowly or times out',
+                ['Network', 'Database', 'Email', 'Hardware'][i % 4],
+                'short' if i % 10 == 0 else 'Restarted the affected service and cleared the request queue',
+                created, created
+            ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV import throughput benchmark')
+    parser.add_argument('--rows', type=int, default=200000, help='Rows in the synthetic CSV')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4], help='Worker counts to time')
+    parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per pool task')
+    args = parser.parse_args()
+
+    validator = DataValidator(required_fields=['number', 'short_description'])
+    importer = CSVIncidentImporter(validator=validator)
+
+    fd, path = tempfile.mkstemp(suffix='.csv')
+    os.close(fd)
+    try:
+        write_csv(path, args.rows)
+        print(f"{args.rows} rows, {os.cpu_count()} cores")
+
+        baseline = None
+        for workers in args.workers:
+            start = time.perf_counter()
+            incidents, _, warnings = importer.import_from_csv(path, workers=workers, chunk_size=args.chunk_size)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            print(f"workers={workers:<3} {elapsed:7.2f}s  {args.rows / elapsed:9.0f} rows/s  "
+                  f"speed-up {baseline / elapsed:4.2f}x  ({len(incidents)} ok, {len(warnings)} skipped)")
+    finally:
+        os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Page latency benchmark for skip/limit vs keyset pagination
+
+Fills a scratch collection with synthetic incidents and times fetching a
+page at increasing depths, once with get_all_incidents (skip) and once by
+following get_incidents_page cursors. Needs a running MongoDB; the
+scratch collection is dropped afterwards.
+
+Usage:
+    python benchmarks/pagination_benchmark.py --docs 200000 --page-size 100
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.mongodb import MongoDBClient
+
+
+def fill(client: MongoDBClient, docs: int) -> None:
+    """Incidents created a few per second, so sys_created_on has ties"""
+    batch = []
+    for i in range(docs):
+        seconds = i // 3
+        batch.append({
+            'number': f'INC{i:08d}',
+            'short_description': f'Service {i % 50} degraded',
+            'category': ['Network', 'Database', 'Email', 'Hardware'][i % 4],
+            'sys_created_on': f'2024-01-{1 + seconds // 86400 % 28:02d} '
+                              f'{seconds // 3600 % 24:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}'
+        })
+        if len(batch) == 10000:
+            client.collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        client.collection.insert_many(batch, ordered=False)
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='skip/limit vs keyset page latency')
+    parser.add_argument('--uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--docs', type=int, default=200000, help='Synthetic incidents to insert')
+    parser.add_argument('--page-size', type=int, default=100, help='Incidents per page')
+    parser.add_argument('--depths', type=int, nargs='+', default=[0, 10, 100, 500, 1000, 1900],
+                        help='Page numbers to time (0-based)')
+    parser.add_argument('--repeat', type=int, default=5, help='Timings per measurement')
+    args = parser.parse_args()
+
+    client = MongoDBClient(args.uri, database_name='incident_analyzer_benchmark',
+                           collection_name='pagination_benchmark')
+    try:
+        client.collection.delete_many({})
+        fill(client, args.docs)
+        print(f"{args.docs} incidents, {args.page_size} per page")
+
+        # Walk the cursors once to know the token of every timed page
+        depths = sorted(d for d in args.depths if d * args.page_size < args.docs)
+        cursors, cursor, page = {}, None, 0
+        while depths and page <= depths[-1]:
+            cursors[page] = cursor
+            _, cursor = client.get_incidents_page(limit=args.page_size, cursor=cursor)
+            page += 1
+
+        print(f"{'page':>6} {'skip ms':>9} {'keyset ms':>10}")
+        for depth in depths:
+            skip_ms = timed(lambda: client.get_all_incidents(skip=depth * args.page_size,
+                                                             limit=args.page_size), args.repeat)
+            keyset_ms = timed(lambda: client.get_incidents_page(limit=args.page_size,
+                                                                cursor=cursors[depth]), args.repeat)
+            print(f"{depth:>6} {skip_ms:9.2f} {keyset_ms:10.2f}")
+    finally:
+        client.collection.drop()
+        client.client.close()
+
+
+if __name__ == '__main__':
+    main()
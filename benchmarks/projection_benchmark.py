@@ -0,0 +1,99 @@
+"""
+Payload and latency benchmark for named projections
+
+Fills a scratch collection with synthetic incidents carrying realistic
+long text fields (description, work_notes, close_notes) and, for each
+projection, times loading a listing with get_all_incidents and measures
+the BSON bytes sent by the server and the JSON bytes the web endpoints
+would return. Needs a running MongoDB; the scratch collection is dropped
+afterwards.
+
+Usage:
+    python benchmarks/projection_benchmark.py --docs 20000 --limit 1000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import bson
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+
+from database.mongodb import MongoDBClient
+from database.projections import PROJECTIONS
+
+
+def fill(client: MongoDBClient, docs: int, text_size: int) -> None:
+    """Incidents whose free-text fields dominate the document size"""
+    filler = "Checked service logs, restarted the worker pool and verified queue depth. "
+    text = (filler * (text_size // len(filler) + 1))[:text_size]
+    batch = []
+    for i in range(docs):
+        batch.append({
+            'number': f'INC{i:08d}',
+            'short_description': f'Service {i % 50} degraded',
+            'description': text,
+            'work_notes': text,
+            'close_notes': text[:text_size // 4],
+            'resolution_notes': text[:text_size // 2],
+            'category': ['Network', 'Database', 'Email', 'Hardware'][i % 4],
+            'subcategory': 'General',
+            'priority': str(1 + i % 4),
+            'state': 'Closed',
+            'assignment_group': 'Service Desk',
+            'assigned_to': 'oncall',
+            'sys_created_on': f'2024-01-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00',
+            'sys_updated_on': f'2024-02-{1 + i % 28:02d} {i % 24:02d}:{i % 60:02d}:00'
+        })
+        if len(batch) == 5000:
+            client.collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        client.collection.insert_many(batch, ordered=False)
+
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of fn in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return sorted(samples)[len(samples) // 2]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Payload size and latency per projection')
+    parser.add_argument('--uri', default=os.getenv('MONGODB_URI', 'mongodb://localhost:27017/'))
+    parser.add_argument('--docs', type=int, default=20000, help='Synthetic incidents to insert')
+    parser.add_argument('--limit', type=int, default=1000, help='Incidents per listing')
+    parser.add_argument('--text-size', type=int, default=2000,
+                        help='Characters in description and work_notes')
+    parser.add_argument('--repeat', type=int, default=5, help='Timings per measurement')
+    args = parser.parse_args()
+
+    client = MongoDBClient(args.uri, database_name='incident_analyzer_benchmark',
+                           collection_name='projection_benchmark')
+    try:
+        client.collection.delete_many({})
+        fill(client, args.docs, args.text_size)
+        print(f"{args.docs} incidents, listing {args.limit}")
+
+        print(f"{'fields':>8} {'BSON KB':>9} {'JSON KB':>9} {'ms':>8}")
+        for name in PROJECTIONS:
+            incidents = client.get_all_incidents(limit=args.limit, fields=name)
+            bson_kb = sum(len(bson.encode(inc)) for inc in incidents) / 1024
+            json_kb = len(json.dumps(incidents, default=str)) / 1024
+            ms = timed(lambda: client.get_all_incidents(limit=args.limit, fields=name), args.repeat)
+            print(f"{name:>8} {bson_kb:9.1f} {json_kb:9.1f} {ms:8.2f}")
+    finally:
+        client.collection.drop()
+        client.client.close()
+
+
+if __name__ == '__main__':
+    main()
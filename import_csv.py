@@ -39,6 +39,8 @@ def import_csv_to_mongodb(csv_file: str, connection_string: str = None):
     print(f"Successfully Imported: {result.get('imported', 0)}")
     print(f"Skipped (duplicates): {result.get('skipped', 0)}")
     print(f"Errors: {result.get('errors', 0)}")
+    if result.get('unknown'):
+        print(f"Unknown (batch interrupted, may be stored): {result['unknown']}")
     
     if 'error_message' in result:
         print(f"\nError Message: {result['error_message']}")
@@ -11,18 +11,23 @@ import yaml
 import argparse
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, List
 from dotenv import load_dotenv
 from loguru import logger
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
+sys.path.insert(0, str(Path(__file__).parent / "src"))
 
-from src.servicenow import create_client_from_env
-from src.data_validation import create_validator_from_config
+from embeddings import configure_embeddings_from_config
+from src.servicenow import create_client_from_env, SyncWatermark
+# Imported from src/ like the modules that use it, so date_parsing (and
+# its caches) is loaded once rather than also as src.data_validation
+from data_validation import create_validator_from_config
+from data_validation.date_parsing import DATE_FIELDS, TIMESTAMP_SUFFIX
 from src.categorization import create_categorizer_from_config
 from src.sop_generation import create_generator_from_config
-from src.database import get_db_client
+from src.database import configure_mongo_pool_from_config, get_db_client
 
 
 class SOPOrchestrator:
@@ -47,10 +52,13 @@ class SOPOrchestrator:
         
         # Initialize components
         logger.info("Initializing SOP Orchestrator")
+        configure_embeddings_from_config(self.config)
         self.servicenow_client = None
+        self.last_sync_stats = {}
         self.validator = create_validator_from_config(self.config)
         self.categorizer = create_categorizer_from_config(self.config)
         self.sop_generator = create_generator_from_config(self.config)
+        configure_mongo_pool_from_config(self.config)
         self.db_client = get_db_client()
         
         # Setup directories
@@ -58,6 +66,13 @@ class SOPOrchestrator:
         self.output_dir = Path(os.getenv("OUTPUT_DIR", "./output"))
         self._create_directories()
         
+        # High-water mark for incremental ServiceNow syncs
+        sync_config = self.config.get("servicenow", {}).get("sync", {})
+        self.sync_watermark = SyncWatermark(
+            sync_config.get("state_file", str(self.data_dir / "servicenow_sync_state.json")),
+            overlap_minutes=sync_config.get("overlap_minutes", 60)
+        )
+        
     def _setup_logging(self):
         """Setup logging configuration"""
         log_config = self.config.get("logging", {})
@@ -96,16 +111,18 @@ class SOPOrchestrator:
         for directory in directories:
             directory.mkdir(parents=True, exist_ok=True)
     
-    def fetch_incidents(self, days_back: int = 90, limit: int = None) -> List[Dict]:
+    def fetch_incidents(self, days_back: int = 90, limit: int = None, incremental: bool = False) -> List[Dict]:
         """
-        Fetch incidents from ServiceNow
+        Fetch incidents from ServiceNow and upsert them into MongoDB
         
         Args:
-            days_back: Number of days to look back
+            days_back: Number of days to look back (first sync / full fetch)
             limit: Maximum number of incidents to fetch
+            incremental: Only fetch incidents updated since the last sync's
+                sys_updated_on watermark
             
         Returns:
-            List of incidents
+            List of fetched (new or changed) incidents
         """
         logger.info("=== STEP 1: Fetching Incidents ===")
         
@@ -116,12 +133,19 @@ class SOPOrchestrator:
         if not self.servicenow_client.test_connection():
             raise ConnectionError("Failed to connect to ServiceNow")
         
+        updated_since = None
+        if incremental:
+            updated_since = self.sync_watermark.updated_since()
+            if updated_since is None:
+                logger.info(f"No previous sync recorded, fetching the last {days_back} days")
+        
         # Fetch incidents
         fields = self.config["servicenow"]["fields"]
         incidents = self.servicenow_client.fetch_incidents(
             fields=fields,
             days_back=days_back,
-            limit=limit
+            limit=limit,
+            updated_since=updated_since
         )
         
         # Save raw data
@@ -133,19 +157,35 @@ class SOPOrchestrator:
         
         logger.info(f"Saved {len(incidents)} incidents to {output_file}")
         
-        # Save to MongoDB
+        # Save to MongoDB (existing incidents are updated in place)
         logger.info("Saving incidents to MongoDB...")
-        inserted_count = self.db_client.insert_many_incidents(incidents)
-        logger.info(f"Inserted {inserted_count} incidents into MongoDB")
+        stats = self.db_client.upsert_incidents(incidents)
+        logger.info(f"Upserted incidents into MongoDB: {stats}")
+        
+        # A truncated or partly failed sync must be repeated, so the
+        # watermark only advances when every storable incident was stored.
+        # Records without a number can never be stored; retrying them would
+        # stall every later sync, so they are reported and left behind.
+        if stats["skipped"]:
+            logger.warning(f"Skipped {stats['skipped']} incidents without a number (see {output_file})")
+        if stats["errors"]:
+            logger.warning("Sync watermark not advanced: some incidents failed to save")
+        elif limit and len(incidents) >= limit:
+            logger.warning("Sync watermark not advanced: fetch was truncated by --limit")
+        else:
+            stored = [incident for incident in incidents if incident.get("number")]
+            watermark = self.sync_watermark.advance(stored, stats)
+            logger.info(f"Sync watermark: {watermark}")
         
+        self.last_sync_stats = stats
         return incidents
     
-    def validate_incidents(self, incidents: List[Dict]) -> tuple:
+    def validate_incidents(self, incidents: Iterable[Dict]) -> tuple:
         """
         Validate incidents
         
         Args:
-            incidents: List of incidents to validate
+            incidents: List or stream of incidents to validate
             
         Returns:
             Tuple of (valid_incidents, invalid_incidents)
@@ -289,6 +329,11 @@ class SOPOrchestrator:
         logger.info(f"Generated {len(sop_files)} SOPs")
         return sop_files
     
+    def _analysis_fields(self) -> List[str]:
+        """Incident fields read for analysis: the configured ServiceNow fields plus stored timestamps"""
+        fields = list(self.config["servicenow"]["fields"])
+        return fields + [field + TIMESTAMP_SUFFIX for field in DATE_FIELDS]
+    
     def analyze_from_mongodb(self, limit: int = 5000) -> Dict:
         """
         Analyze incidents directly from MongoDB and generate SOPs
@@ -306,18 +351,24 @@ class SOPOrchestrator:
         start_time = datetime.now()
         
         try:
-            # Step 1: Load incidents from MongoDB
+            # Steps 1-2: Stream incidents from MongoDB through validation, so
+            # only the analysed fields of each incident are ever held
             logger.info("=== STEP 1: Loading Incidents from MongoDB ===")
-            incidents = self.db_client.get_all_incidents(limit=limit)
+            mongo_config = self.config.get("database", {}).get("mongodb", {})
+            incidents = self.db_client.iter_incidents(
+                projection=self._analysis_fields(),
+                batch_size=mongo_config.get("read_batch_size", 1000),
+                limit=limit,
+                sort=[("sys_created_on", -1)]
+            )
+            valid, invalid = self.validate_incidents(incidents)
+            total_incidents = len(valid) + len(invalid)
             
-            if not incidents:
+            if not total_incidents:
                 logger.error("No incidents in MongoDB. Exiting.")
                 return {"status": "error", "message": "No incidents in MongoDB"}
             
-            logger.info(f"Loaded {len(incidents)} incidents from MongoDB")
-            
-            # Step 2: Validate incidents
-            valid, invalid = self.validate_incidents(incidents)
+            logger.info(f"Loaded {total_incidents} incidents from MongoDB")
             
             if not valid:
                 logger.error("No valid incidents. Exiting.")
@@ -339,7 +390,7 @@ class SOPOrchestrator:
             logger.info("=" * 60)
             logger.info("Analysis Completed Successfully")
             logger.info(f"Duration: {duration:.2f} seconds")
-            logger.info(f"Total Incidents: {len(incidents)}")
+            logger.info(f"Total Incidents: {total_incidents}")
             logger.info(f"Valid Incidents: {len(valid)}")
             logger.info(f"Clusters: {len(clusters)}")
             logger.info(f"SOPs Generated: {len(sop_files)}")
@@ -347,7 +398,7 @@ class SOPOrchestrator:
             
             return {
                 "status": "success",
-                "total_incidents": len(incidents),
+                "total_incidents": total_incidents,
                 "valid_incidents": len(valid),
                 "invalid_incidents": len(invalid),
                 "clusters": len(clusters),
@@ -489,6 +540,12 @@ def main():
         help="Analyze incidents from MongoDB (skip fetch)"
     )
     
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Sync incidents changed since the last sync into MongoDB (no SOP generation)"
+    )
+    
     args = parser.parse_args()
     
     # Initialize orchestrator
@@ -509,6 +566,23 @@ def main():
         
         return
     
+    # Incremental sync: fetch and upsert only what changed since the last run
+    if args.incremental:
+        start_time = datetime.now()
+        try:
+            incidents = orchestrator.fetch_incidents(days_back=args.days, limit=args.limit, incremental=True)
+        except Exception as e:
+            print(f"\n✗ Sync failed: {e}")
+            sys.exit(1)
+        
+        stats = orchestrator.last_sync_stats
+        print("\n✓ Incremental sync completed successfully!")
+        print(f"  Fetched {len(incidents)} new or changed incidents")
+        print(f"  Inserted {stats.get('inserted', 0)}, updated {stats.get('updated', 0)}, "
+              f"unchanged {stats.get('unchanged', 0)}")
+        print(f"  Duration: {(datetime.now() - start_time).total_seconds():.2f} seconds")
+        return
+    
     # If no specific steps specified, run full pipeline
     if not any([args.fetch, args.validate, args.categorize, args.generate]):
         args.fetch = args.validate = args.categorize = args.generate = True
@@ -4,13 +4,18 @@ Incident Categorization Module
 Uses ML to group incidents based on similar resolutions.
 """
 
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional
+from pathlib import Path
+import sys
 import numpy as np
 from sklearn.cluster import HDBSCAN
 from sklearn.preprocessing import normalize
-from sentence_transformers import SentenceTransformer
 from loguru import logger
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from embeddings import get_embedding_registry
+from data_validation.date_parsing import incident_timestamp
+
 
 class IncidentCategorizer:
     """Categorizes incidents using machine learning"""
@@ -20,7 +25,8 @@ class IncidentCategorizer:
         embedding_model: str = "all-MiniLM-L6-v2",
         min_cluster_size: int = 5,
         min_samples: int = 3,
-        similarity_threshold: float = 0.75
+        similarity_threshold: float = 0.75,
+        device: Optional[str] = None
     ):
         """
         Initialize incident categorizer
@@ -30,13 +36,14 @@ class IncidentCategorizer:
             min_cluster_size: Minimum size for a cluster
             min_samples: Minimum samples for core points
             similarity_threshold: Threshold for similarity matching
+            device: Torch device for the embedding model (None = auto)
         """
         self.min_cluster_size = min_cluster_size
         self.min_samples = min_samples
         self.similarity_threshold = similarity_threshold
         
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.model = SentenceTransformer(embedding_model)
+        # Shared, lazily loaded model (see embeddings.registry)
+        self.model = get_embedding_registry().acquire(embedding_model, device)
         
         self.clusterer = None
         self.embeddings = None
@@ -63,9 +70,9 @@ class IncidentCategorizer:
         # Extract text features for clustering
         texts = self._extract_features(incidents)
         
-        # Generate embeddings
+        # Generate embeddings (unchanged texts come from the persistent cache)
         logger.info("Generating embeddings...")
-        self.embeddings = self.model.encode(texts, show_progress_bar=True)
+        self.embeddings = self.model.encode_cached(texts, show_progress_bar=True)
         
         # Normalize embeddings
         self.embeddings = normalize(self.embeddings)
@@ -257,23 +264,25 @@ class IncidentCategorizer:
     
     def _calculate_avg_resolution_time(self, incidents: List[Dict]) -> float:
         """Calculate average resolution time in hours"""
-        from datetime import datetime
-        
         times = []
         for inc in incidents:
-            created = inc.get("sys_created_on")
-            resolved = inc.get("resolved_at") or inc.get("closed_at")
+            # Stored *_ts epoch seconds are used when present; otherwise the
+            # (cached) parse happens once per distinct date string
+            created = incident_timestamp(inc, "sys_created_on")
+            resolved = incident_timestamp(inc, "resolved_at")
+            if resolved is None:
+                resolved = incident_timestamp(inc, "closed_at")
             
-            if created and resolved:
-                try:
-                    created_dt = datetime.fromisoformat(created.replace("Z", "+00:00"))
-                    resolved_dt = datetime.fromisoformat(resolved.replace("Z", "+00:00"))
-                    diff = (resolved_dt - created_dt).total_seconds() / 3600
-                    times.append(diff)
-                except:
-                    continue
+            if created is not None and resolved is not None:
+                times.append((resolved - created) / 3600)
         
         return sum(times) / len(times) if times else 0.0
+    
+    def close(self):
+        """Release the shared embedding model"""
+        if self.model is not None:
+            get_embedding_registry().release(self.model)
+            self.model = None
 
 
 def create_categorizer_from_config(config: Dict) -> IncidentCategorizer:
@@ -284,5 +293,6 @@ def create_categorizer_from_config(config: Dict) -> IncidentCategorizer:
         embedding_model=cat_config.get("embedding_model", "all-MiniLM-L6-v2"),
         min_cluster_size=cat_config.get("min_cluster_size", 5),
         min_samples=cat_config.get("min_samples", 3),
-        similarity_threshold=cat_config.get("similarity_threshold", 0.75)
+        similarity_threshold=cat_config.get("similarity_threshold", 0.75),
+        device=cat_config.get("embedding_device")
     )
@@ -0,0 +1,214 @@
+"""
+CSV Column Mapping
+
+Resolves a CSV header row once into a plan of column positions per
+incident field, so importers apply the mapping to each row by index
+instead of probing header spellings row after row.
+"""
+
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+# Layouts understood by get_mapping_plan()
+LAYOUT_EXACT = 'exact'
+LAYOUT_SUBSTRING = 'substring'
+
+# Exact header spellings per field, best first (ServiceNow and common exports)
+EXACT_FIELD_COLUMNS: Dict[str, List[str]] = {
+    'number': ['number', 'Number', 'incident_number', 'Incident Number',
+               'Incident_Number', 'incident_id', 'ID'],
+    'short_description': ['short_description', 'Short description', 'Short Description',
+                          'short_desc', 'summary', 'Summary', 'Title', 'title'],
+    'description': ['description', 'Description', 'details', 'Details',
+                    'long_description', 'Long Description'],
+    'contact_type': ['contact_type', 'Contact type', 'Contact Type', 'contacttype'],
+    'service_offering': ['service_offering', 'Service offering', 'Service Offering', 'serviceoffering'],
+    'category': ['category', 'Category'],
+    'subcategory': ['subcategory', 'Subcategory', 'sub_category', 'Sub Category'],
+    'priority': ['priority', 'Priority', 'pri'],
+    'state': ['state', 'State', 'status', 'Status', 'incident_state', 'Incident state', 'incident state'],
+    'resolution_notes': ['resolution_notes', 'Resolution notes', 'Resolution Notes',
+                         'resolution', 'Resolution', 'fix', 'Fix', 'solution', 'Solution',
+                         'resolutionnotes'],
+    'close_notes': ['close_notes', 'Close Notes', 'Close notes', 'closing_notes', 'closenotes'],
+    'closed_by': ['closed_by', 'Closed by', 'Closed By', 'closedby'],
+    'work_notes': ['work_notes', 'Work Notes', 'Work notes', 'notes', 'Notes', 'worknotes'],
+    'assignment_group': ['assignment_group', 'Assignment group', 'Assignment Group', 'group', 'assignmentgroup'],
+    'assigned_to': ['assigned_to', 'Assigned to', 'Assigned To', 'assignee', 'Assignee', 'assignedto'],
+    'sys_created_on': ['sys_created_on', 'Created', 'created_on', 'created', 'Created On'],
+    'sys_updated_on': ['sys_updated_on', 'Updated', 'updated_on', 'modified', 'Updated On'],
+    'resolved_at': ['resolved_at', 'Resolved', 'Resolved At', 'resolved', 'resolution_date', 'Resolved at'],
+}
+
+# Substrings of a lowercased header per field; the first field that matches wins
+SUBSTRING_FIELD_VARIATIONS: Dict[str, List[str]] = {
+    'number': ['ticket', 'incident', 'incident_number', 'ticket_number', 'id', 'number'],
+    'short_description': ['short_description', 'summary', 'title', 'subject', 'brief'],
+    'description': ['description', 'details', 'problem', 'problem_statement'],
+    'category': ['category', 'type', 'incident_type', 'classification'],
+    'subcategory': ['subcategory', 'sub_category', 'subtype'],
+    'priority': ['priority', 'severity', 'impact'],
+    'resolution_notes': ['resolution', 'resolution_notes', 'solution', 'fix', 'fix_description'],
+    'assignment_group': ['assignment_group', 'assigned_group', 'team'],
+    'assigned_to': ['assigned_to', 'assignee', 'owner'],
+    'status': ['status', 'state', 'incident_state'],
+    'sys_created_on': ['created_date', 'created_on', 'date_created', 'sys_created_on'],
+    'resolved_at': ['resolved_date', 'resolved_at', 'date_resolved']
+}
+
+
+class ColumnMappingPlan:
+    """Header row compiled to incident field -> column indices in precedence order"""
+
+    def __init__(
+        self,
+        headers: Sequence[str],
+        columns: Dict[str, Tuple[int, ...]],
+        null_values: FrozenSet[str] = frozenset({''})
+    ):
+        """
+        Initialize plan (use get_mapping_plan() or plan_from_mapping())
+
+        Args:
+            headers: Header row the plan was compiled from
+            columns: Field -> indices of the columns that feed it, best first
+            null_values: Stripped cell values treated as empty
+        """
+        self.headers = tuple(headers)
+        self.columns = columns
+        self.null_values = null_values
+        self._steps = tuple(columns.items())
+
+    @property
+    def fields(self) -> List[str]:
+        """Incident fields with at least one column"""
+        return list(self.columns)
+
+    def field_mapping(self) -> Dict[str, str]:
+        """
+        Mapping of header -> incident field, e.g. for logging
+
+        Returns:
+            Dictionary of CSV column name -> incident field
+        """
+        columns = sorted((i, field) for field, indices in self._steps for i in indices)
+        return {self.headers[i]: field for i, field in columns}
+
+    def apply(self, values: Sequence[str]) -> Dict[str, str]:
+        """
+        Map one CSV row (as read by csv.reader) to incident fields
+
+        Each field takes the first non-empty value among its columns, in
+        precedence order; fields whose columns are all empty get ''.
+
+        Args:
+            values: Row values in header order (short rows are fine)
+
+        Returns:
+            Dictionary of field -> stripped value for every mapped field
+        """
+        size = len(values)
+        null_values = self.null_values
+        result = {}
+
+        for field, indices in self._steps:
+            value = ''
+            for i in indices:
+                if i < size:
+                    candidate = values[i].strip()
+                    if candidate not in null_values:
+                        value = candidate
+                        break
+            result[field] = value
+
+        return result
+
+
+def _compile_exact(headers: Tuple[str, ...]) -> ColumnMappingPlan:
+    """Match stripped headers against EXACT_FIELD_COLUMNS spellings"""
+    # A repeated header resolves to its last column, as with csv.DictReader
+    position = {(header or '').strip(): i for i, header in enumerate(headers)}
+
+    columns = {}
+    for field, names in EXACT_FIELD_COLUMNS.items():
+        indices = tuple(dict.fromkeys(position[name] for name in names if name in position))
+        if indices:
+            columns[field] = indices
+
+    return ColumnMappingPlan(headers, columns, null_values=frozenset({'', 'None'}))
+
+
+def _compile_substring(headers: Tuple[str, ...]) -> ColumnMappingPlan:
+    """Match lowercased headers against SUBSTRING_FIELD_VARIATIONS"""
+    mapping = {}
+    for header in headers:
+        header_lower = (header or '').lower().strip()
+
+        for incident_field, variations in SUBSTRING_FIELD_VARIATIONS.items():
+            if any(var in header_lower for var in variations):
+                mapping[header] = incident_field
+                break
+
+    return plan_from_mapping(headers, mapping)
+
+
+_COMPILERS = {
+    LAYOUT_EXACT: _compile_exact,
+    LAYOUT_SUBSTRING: _compile_substring,
+}
+
+
+@lru_cache(maxsize=128)
+def get_mapping_plan(headers: Tuple[str, ...], layout: str = LAYOUT_EXACT) -> ColumnMappingPlan:
+    """
+    Compile (or reuse) the mapping plan for a header row
+
+    Plans are cached per (header row, layout), so repeat imports of the
+    same export layout skip header detection.
+
+    Args:
+        headers: CSV header row as a tuple
+        layout: LAYOUT_EXACT (known header spellings) or LAYOUT_SUBSTRING
+            (keyword matching, e.g. for ad-hoc spreadsheets)
+
+    Returns:
+        ColumnMappingPlan instance (shared; do not modify)
+    """
+    if layout not in _COMPILERS:
+        raise ValueError(f"Unknown column mapping layout: {layout}")
+    return _COMPILERS[layout](tuple(headers))
+
+
+def plan_from_mapping(
+    headers: Iterable[str],
+    field_mapping: Dict[str, str],
+    null_values: Optional[FrozenSet[str]] = None
+) -> ColumnMappingPlan:
+    """
+    Compile an explicit header -> field mapping
+
+    When several columns map to the same field the rightmost non-empty
+    one wins. The importer's former column-by-column copy let the
+    rightmost column win even when it was empty, blanking a value an
+    earlier column supplied; empty duplicates no longer do that.
+
+    Args:
+        headers: CSV header row
+        field_mapping: CSV column name -> incident field
+        null_values: Stripped cell values treated as empty (default: '')
+
+    Returns:
+        ColumnMappingPlan instance
+    """
+    headers = tuple(headers)
+    columns: Dict[str, List[int]] = {}
+    for i, header in enumerate(headers):
+        if header in field_mapping:
+            columns.setdefault(field_mapping[header], []).insert(0, i)
+
+    return ColumnMappingPlan(
+        headers,
+        {field: tuple(indices) for field, indices in columns.items()},
+        null_values=null_values if null_values is not None else frozenset({''})
+    )
@@ -5,14 +5,20 @@ Handles importing incidents from CSV files and updating MongoDB knowledge base
 
 import csv
 import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, islice
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional
 from datetime import datetime
 
-try:
-    from dateutil import parser as dateutil_parser
-except ImportError:
-    dateutil_parser = None
+sys.path.insert(0, str(Path(__file__).parent))
+from column_mapping import (
+    LAYOUT_SUBSTRING, ColumnMappingPlan, get_mapping_plan, plan_from_mapping
+)
+from data_validation.date_parsing import DateNormalizer
 
 # Import MongoDB handler
 try:
@@ -21,9 +27,133 @@ try:
 except ImportError:
     MONGODB_AVAILABLE = False
 
+# Row outcomes produced by _process_row
+ROW_OK = 'ok'
+ROW_INVALID = 'invalid'
+ROW_ERROR = 'error'
+
+
+def _convert_csv_row_to_incident(fields: Dict[str, str],
+                                 row_number: int,
+                                 dates: Optional[DateNormalizer] = None) -> Dict:
+    """
+    Convert a mapped CSV row to incident format
+    
+    Args:
+        fields: Incident field -> stripped value from ColumnMappingPlan.apply()
+        row_number: Row number for error tracking
+        dates: Date normalizer with the file's inferred formats
+        
+    Returns:
+        Incident dictionary
+    """
+    incident = dict(fields)
+    
+    # Ensure required fields exist
+    if 'number' not in incident or not incident['number']:
+        incident['number'] = f"IMP_{row_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
+    
+    if 'short_description' not in incident:
+        # Try to use description or other fields as fallback
+        incident['short_description'] = incident.get('description', '')[:100] or f"Imported Incident {row_number}"
+    
+    # Add metadata
+    incident['imported_at'] = datetime.now().isoformat()
+    incident['source'] = 'CSV Import'
+    
+    # Standardize date fields (ISO string + <field>_ts epoch seconds);
+    # unparseable values are kept as they are
+    (dates or DateNormalizer()).normalize(incident)
+    
+    return incident
+
+
+def _process_row(row: List[str],
+                 plan: ColumnMappingPlan,
+                 row_number: int,
+                 validator=None,
+                 dates: Optional[DateNormalizer] = None) -> Tuple[str, object]:
+    """
+    Normalise and validate one CSV row
+    
+    Args:
+        row: CSV row values, as read by csv.reader
+        plan: Compiled column mapping for the file's header
+        row_number: Row number for error messages
+        validator: Optional DataValidator
+        dates: Date normalizer with the file's inferred formats
+        
+    Returns:
+        (ROW_OK, incident), or (ROW_INVALID / ROW_ERROR, message)
+    """
+    try:
+        incident = _convert_csv_row_to_incident(plan.apply(row), row_number, dates)
+        
+        if validator:
+            validation_result = validator.validate_incident(incident)
+            
+            if not validation_result['is_valid']:
+                error_msg = f"Row {row_number}: Invalid incident - "
+                error_msg += "; ".join([str(e) for e in validation_result.get('errors', [])])
+                return ROW_INVALID, error_msg
+        
+        return ROW_OK, incident
+        
+    except Exception as e:
+        return ROW_ERROR, f"Row {row_number}: {str(e)}"
+
+
+# Per-process state of pool workers, set once by _init_worker
+_worker_plan: Optional[ColumnMappingPlan] = None
+_worker_validator = None
+_worker_dates: Optional[DateNormalizer] = None
+
+
+def _init_worker(plan: ColumnMappingPlan, validator, dates: DateNormalizer) -> None:
+    """Pool initializer: ship the mapping plan, validator and date formats once per process"""
+    global _worker_plan, _worker_validator, _worker_dates
+    _worker_plan = plan
+    _worker_validator = validator
+    _worker_dates = dates
+
+
+def _process_chunk(chunk: Tuple[int, List[List[str]]]) -> List[Tuple[str, object]]:
+    """
+    Pool task: process consecutive rows
+    
+    Args:
+        chunk: (row number of the first row, rows)
+        
+    Returns:
+        Outcome of each row, in order
+    """
+    first_row_number, rows = chunk
+    return [
+        _process_row(row, _worker_plan, first_row_number + offset, _worker_validator, _worker_dates)
+        for offset, row in enumerate(rows)
+    ]
+
+
+def _iter_chunks(rows: Iterable[List[str]],
+                 chunk_size: int,
+                 first_row_number: int = 2) -> Iterator[Tuple[int, List[List[str]]]]:
+    """Split rows into (first row number, rows) chunks"""
+    rows = iter(rows)
+    row_number = first_row_number
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield row_number, chunk
+        row_number += len(chunk)
+
+
 class CSVIncidentImporter:
     """Import incidents from CSV files"""
     
+    # Rows read up front to infer the format of each date column
+    date_sample_size = 200
+    
     def __init__(self, validator=None, mongodb_uri: str = None):
         """
         Initialize CSV importer
@@ -50,15 +180,24 @@ class CSVIncidentImporter:
     def import_from_csv(self, 
                        file_path: str,
                        field_mapping: Optional[Dict[str, str]] = None,
-                       skip_invalid: bool = True) -> Tuple[List[Dict], List[Dict], List[str]]:
+                       skip_invalid: bool = True,
+                       workers: Optional[int] = 1,
+                       chunk_size: int = 1000) -> Tuple[List[Dict], List[Dict], List[str]]:
         """
         Import incidents from CSV file
         
+        With workers > 1 rows are normalised and validated in a process
+        pool, chunk_size rows per task; results are reassembled in file
+        order, so incidents, errors and warnings match a serial import.
+        
         Args:
             file_path: Path to CSV file
             field_mapping: Optional mapping of CSV columns to incident fields
                           Example: {'Incident Number': 'number', 'Description': 'short_description'}
             skip_invalid: If True, skip invalid incidents; if False, raise error
+            workers: Processes for normalisation/validation; 1 runs in this
+                     process, None uses every core
+            chunk_size: Rows per pool task
             
         Returns:
             Tuple of (imported_incidents, errors, warnings)
@@ -67,53 +206,38 @@ class CSVIncidentImporter:
         self.import_errors = []
         self.import_warnings = []
         
+        workers = workers or os.cpu_count() or 1
+        
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                csv_reader = csv.DictReader(f)
+            with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                csv_reader = csv.reader(f)
+                headers = next(csv_reader, None)
                 
-                if not csv_reader.fieldnames:
+                if not headers:
                     raise ValueError("CSV file is empty or has no headers")
                 
-                # Auto-detect field mapping if not provided
+                # Resolve the header once; auto-detected plans are cached per layout
                 if field_mapping is None:
-                    field_mapping = self._auto_detect_mapping(csv_reader.fieldnames)
+                    plan = get_mapping_plan(tuple(headers), LAYOUT_SUBSTRING)
+                else:
+                    plan = plan_from_mapping(headers, field_mapping)
                 
-                row_number = 1
-                for row in csv_reader:
-                    row_number += 1
-                    
-                    try:
-                        # Convert CSV row to incident format
-                        incident = self._convert_csv_row_to_incident(
-                            row, 
-                            field_mapping,
-                            row_number
-                        )
-                        
-                        # Validate if validator is available
-                        if self.validator:
-                            validation_result = self.validator.validate_incident(incident)
-                            
-                            if not validation_result['is_valid']:
-                                error_msg = f"Row {row_number}: Invalid incident - "
-                                error_msg += "; ".join([str(e) for e in validation_result.get('errors', [])])
-                                
-                                if skip_invalid:
-                                    self.import_warnings.append(error_msg)
-                                    continue
-                                else:
-                                    self.import_errors.append(error_msg)
-                                    raise ValueError(error_msg)
-                        
-                        self.imported_incidents.append(incident)
-                        
-                    except Exception as e:
-                        error_msg = f"Row {row_number}: {str(e)}"
-                        if skip_invalid:
-                            self.import_warnings.append(error_msg)
-                        else:
-                            self.import_errors.append(error_msg)
-                            raise ValueError(error_msg)
+                # Blank lines are skipped without taking a row number
+                rows = (row for row in csv_reader if row)
+                
+                # Infer each date column's format from the first rows
+                sample = list(islice(rows, self.date_sample_size))
+                dates = DateNormalizer()
+                dates.infer(plan.apply(row) for row in sample)
+                rows = chain(sample, rows)
+                
+                if workers > 1:
+                    self._import_rows_parallel(rows, plan, dates, skip_invalid, workers, chunk_size)
+                else:
+                    # Data rows start at 2 (row 1 is the header)
+                    for row_number, row in enumerate(rows, 2):
+                        status, value = _process_row(row, plan, row_number, self.validator, dates)
+                        self._record_row(status, value, skip_invalid)
             
             return self.imported_incidents, self.import_errors, self.import_warnings
             
@@ -121,114 +245,78 @@ class CSVIncidentImporter:
             self.import_errors.append(f"Failed to read CSV file: {str(e)}")
             return [], self.import_errors, self.import_warnings
     
-    def _auto_detect_mapping(self, csv_headers: List[str]) -> Dict[str, str]:
+    def _record_row(self, status: str, value, skip_invalid: bool) -> None:
         """
-        Auto-detect field mapping from CSV headers
+        Record the outcome of one row
         
         Args:
-            csv_headers: List of CSV column headers
-            
-        Returns:
-            Mapping of CSV columns to incident fields
+            status: ROW_OK, ROW_INVALID or ROW_ERROR
+            value: Incident for ROW_OK, otherwise the message
+            skip_invalid: If False, a failed row raises ValueError
         """
-        mapping = {}
-        
-        # Common field variations
-        field_variations = {
-            'number': ['ticket', 'incident', 'incident_number', 'ticket_number', 'id', 'number'],
-            'short_description': ['short_description', 'summary', 'title', 'subject', 'brief'],
-            'description': ['description', 'details', 'problem', 'problem_statement'],
-            'category': ['category', 'type', 'incident_type', 'classification'],
-            'subcategory': ['subcategory', 'sub_category', 'subtype'],
-            'priority': ['priority', 'severity', 'impact'],
-            'resolution_notes': ['resolution', 'resolution_notes', 'solution', 'fix', 'fix_description'],
-            'assignment_group': ['assignment_group', 'assigned_group', 'team'],
-            'assigned_to': ['assigned_to', 'assignee', 'owner'],
-            'status': ['status', 'state', 'incident_state'],
-            'sys_created_on': ['created_date', 'created_on', 'date_created', 'sys_created_on'],
-            'resolved_at': ['resolved_date', 'resolved_at', 'date_resolved']
-        }
-        
-        for header in csv_headers:
-            header_lower = header.lower().strip()
-            
-            for incident_field, variations in field_variations.items():
-                if any(var in header_lower for var in variations):
-                    mapping[header] = incident_field
-                    break
-        
-        return mapping
+        if status == ROW_OK:
+            self.imported_incidents.append(value)
+        elif skip_invalid:
+            self.import_warnings.append(value)
+        else:
+            self.import_errors.append(value)
+            raise ValueError(value)
     
-    def _convert_csv_row_to_incident(self, 
-                                     row: Dict[str, str],
-                                     field_mapping: Dict[str, str],
-                                     row_number: int) -> Dict:
+    def _import_rows_parallel(self,
+                              rows: Iterable[List[str]],
+                              plan: ColumnMappingPlan,
+                              dates: DateNormalizer,
+                              skip_invalid: bool,
+                              workers: int,
+                              chunk_size: int) -> None:
         """
-        Convert a CSV row to incident format
+        Normalise and validate rows in a process pool
+        
+        At most two chunks per worker are in flight, so the file is read
+        only as fast as the pool keeps up.
         
         Args:
-            row: CSV row as dictionary
-            field_mapping: Mapping of CSV columns to incident fields
-            row_number: Row number for error tracking
-            
-        Returns:
-            Incident dictionary
+            rows: CSV rows (data rows, starting at row 2)
+            plan: Compiled column mapping
+            dates: Date normalizer with inferred formats
+            skip_invalid: If False, stop at the first failed row
+            workers: Number of processes
+            chunk_size: Rows per task
         """
-        incident = {}
-        
-        # Map CSV fields to incident format
-        for csv_column, csv_value in row.items():
-            if csv_column in field_mapping:
-                incident_field = field_mapping[csv_column]
-                incident[incident_field] = csv_value.strip() if csv_value else ""
-        
-        # Ensure required fields exist
-        if 'number' not in incident or not incident['number']:
-            incident['number'] = f"IMP_{row_number}_{datetime.now().strftime('%Y%m%d%H%M%S')}"
-        
-        if 'short_description' not in incident:
-            # Try to use description or other fields as fallback
-            incident['short_description'] = incident.get('description', '')[:100] or f"Imported Incident {row_number}"
-        
-        # Add metadata
-        incident['imported_at'] = datetime.now().isoformat()
-        incident['source'] = 'CSV Import'
-        
-        # Standardize date fields
-        if 'sys_created_on' in incident and incident['sys_created_on']:
-            try:
-                incident['sys_created_on'] = self._parse_date(incident['sys_created_on'])
-            except:
-                pass  # Keep original if parsing fails
-        
-        if 'resolved_at' in incident and incident['resolved_at']:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(plan, self.validator, dates)
+        ) as pool:
+            pending = deque()
+            chunks = _iter_chunks(rows, chunk_size)
+            
             try:
-                incident['resolved_at'] = self._parse_date(incident['resolved_at'])
-            except:
-                pass
-        
-        return incident
+                for chunk in chunks:
+                    pending.append(pool.submit(_process_chunk, chunk))
+                    while len(pending) >= workers * 2:
+                        for status, value in pending.popleft().result():
+                            self._record_row(status, value, skip_invalid)
+                
+                while pending:
+                    for status, value in pending.popleft().result():
+                        self._record_row(status, value, skip_invalid)
+            finally:
+                # Stopped early (skip_invalid=False): drop queued chunks
+                for future in pending:
+                    future.cancel()
     
-    def _parse_date(self, date_string: str) -> str:
+    def _auto_detect_mapping(self, csv_headers: List[str]) -> Dict[str, str]:
         """
-        Parse various date formats to ISO format
+        Auto-detect field mapping from CSV headers
         
         Args:
-            date_string: Date string in various formats
+            csv_headers: List of CSV column headers
             
         Returns:
-            ISO format date string
+            Mapping of CSV columns to incident fields
         """
-        if dateutil_parser is None:
-            # Return as-is if dateutil not available
-            return date_string
-        
-        try:
-            parsed_date = dateutil_parser.parse(date_string)
-            return parsed_date.isoformat()
-        except:
-            # Return as-is if parsing fails
-            return date_string
+        return get_mapping_plan(tuple(csv_headers), LAYOUT_SUBSTRING).field_mapping()
     
     def add_to_knowledge_base(self, 
                              incidents: List[Dict],
@@ -284,19 +372,25 @@ class CSVIncidentImporter:
         count_added = 0
         
         try:
+            # Only add incidents with resolution notes to knowledge base
+            resolved = []
             for incident in incidents:
-                incident_number = incident.get('number')
-                
-                # Only add incidents with resolution notes to knowledge base
                 if incident.get('resolution_notes') and len(incident.get('resolution_notes', '')) > 20:
-                    if self.mongodb.add_incident(incident):
-                        count_added += 1
-                    else:
-                        errors.append(f"Incident {incident_number} already exists in MongoDB KB")
+                    resolved.append(incident)
                 else:
-                    errors.append(f"Incident {incident_number} has no resolution - skipped")
+                    errors.append(f"Incident {incident.get('number')} has no resolution - skipped")
+            
+            # One bulk upsert per batch; incidents already in the KB are refreshed
+            count_updated = 0
+            for outcome in self.mongodb.upsert_incidents(resolved):
+                if outcome['status'] == 'inserted':
+                    count_added += 1
+                elif outcome['status'] == 'updated':
+                    count_updated += 1
+                else:
+                    errors.append(f"Incident {outcome['number']} could not be saved to MongoDB KB: {outcome['error']}")
             
-            print(f"[INFO] Added {count_added} incidents to MongoDB knowledge base")
+            print(f"[INFO] Added {count_added} incidents to MongoDB knowledge base ({count_updated} existing updated)")
             return count_added, errors
             
         except Exception as e:
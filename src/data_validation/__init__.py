@@ -1,5 +1,6 @@
 """Data validation package"""
 
 from .validator import DataValidator, create_validator_from_config
+from .date_parsing import DateNormalizer
 
-__all__ = ["DataValidator", "create_validator_from_config"]
+__all__ = ["DataValidator", "create_validator_from_config", "DateNormalizer"]
@@ -0,0 +1,270 @@
+"""
+Date Normalisation Module
+
+Parses incident dates with a per-column format inferred from a sample,
+keeping dateutil only for values that do not fit, and records epoch
+seconds next to the ISO strings so analytics never parse dates again.
+"""
+
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Sequence
+
+try:
+    from dateutil import parser as dateutil_parser
+except ImportError:
+    dateutil_parser = None
+
+
+# Incident fields holding dates
+DATE_FIELDS = ['sys_created_on', 'sys_updated_on', 'resolved_at', 'closed_at']
+
+# Suffix of the epoch seconds field stored next to each date field
+TIMESTAMP_SUFFIX = '_ts'
+
+# Pseudo-format for datetime.fromisoformat (fastest, covers ServiceNow exports)
+ISO_FORMAT = 'iso'
+
+# Candidate formats, tried in order; month-first before day-first like dateutil
+CANDIDATE_FORMATS = [
+    ISO_FORMAT,
+    '%m/%d/%Y %H:%M:%S',
+    '%m/%d/%Y %H:%M',
+    '%m/%d/%Y %I:%M:%S %p',
+    '%m/%d/%Y %I:%M %p',
+    '%m/%d/%Y',
+    '%d/%m/%Y %H:%M:%S',
+    '%d/%m/%Y %H:%M',
+    '%d/%m/%Y',
+    '%d-%m-%Y %H:%M:%S',
+    '%d-%m-%Y %H:%M',
+    '%d-%m-%Y',
+    '%d.%m.%Y %H:%M:%S',
+    '%d.%m.%Y',
+    '%d-%b-%Y %H:%M:%S',
+    '%d-%b-%Y',
+    '%b %d %Y %I:%M%p',
+    '%b %d %Y',
+    '%d %b %Y %H:%M',
+    '%d %b %Y',
+]
+
+
+@lru_cache(maxsize=65536)
+def parse_with_format(value: str, fmt: str) -> Optional[datetime]:
+    """
+    Parse a date with one fixed format (cached; exports repeat values a lot)
+
+    Args:
+        value: Stripped date string
+        fmt: strptime format or ISO_FORMAT
+
+    Returns:
+        datetime, or None if the value does not match
+    """
+    try:
+        if fmt == ISO_FORMAT:
+            # fromisoformat only accepts a trailing Z from Python 3.11
+            if value.endswith('Z'):
+                value = value[:-1] + '+00:00'
+            return datetime.fromisoformat(value)
+        return datetime.strptime(value, fmt)
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_fallback(value: str) -> Optional[datetime]:
+    """
+    Parse a date in any format dateutil understands (slow path, cached)
+
+    Args:
+        value: Stripped date string
+
+    Returns:
+        datetime, or None if unparseable or dateutil is not installed
+    """
+    if dateutil_parser is None:
+        return None
+    try:
+        return dateutil_parser.parse(value)
+    except (ValueError, OverflowError):
+        return None
+
+
+def to_timestamp(value: datetime) -> float:
+    """
+    Epoch seconds of a datetime; naive values are taken as UTC
+
+    Args:
+        value: datetime to convert
+
+    Returns:
+        Seconds since the epoch
+    """
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def utc_now() -> datetime:
+    """
+    Current time as a naive UTC datetime, the convention of stored dates
+
+    Returns:
+        datetime without tzinfo
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def infer_format(values: Iterable[str], formats: Sequence[str] = CANDIDATE_FORMATS) -> Optional[str]:
+    """
+    Pick the format that parses most of a sample of one column
+
+    Args:
+        values: Sample of date strings (blanks are ignored)
+        formats: Candidate formats in order of preference
+
+    Returns:
+        Best format, or None if none parses at least half of the sample
+    """
+    sample = [value.strip() for value in values if value and value.strip()]
+    if not sample:
+        return None
+
+    best, best_hits = None, 0
+    for fmt in formats:
+        hits = sum(1 for value in sample if parse_with_format(value, fmt) is not None)
+        if hits == len(sample):
+            return fmt
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+
+    return best if best_hits * 2 >= len(sample) else None
+
+
+class DateNormalizer:
+    """Normalises incident date fields to ISO strings plus epoch seconds"""
+
+    def __init__(
+        self,
+        fields: Optional[List[str]] = None,
+        formats: Optional[Sequence[str]] = None
+    ):
+        """
+        Initialize date normalizer
+
+        Args:
+            fields: Incident fields to normalise (default: DATE_FIELDS)
+            formats: Candidate formats for inference (default: CANDIDATE_FORMATS)
+        """
+        self.fields = fields or DATE_FIELDS
+        self.formats = formats or CANDIDATE_FORMATS
+        self.column_formats: Dict[str, Optional[str]] = {}
+
+    def infer(self, incidents: Iterable[Dict]) -> Dict[str, Optional[str]]:
+        """
+        Infer the format of each date field from sample incidents
+
+        Args:
+            incidents: Sample incidents (e.g. the first rows of an import)
+
+        Returns:
+            Dictionary of field -> inferred format (None if not inferred)
+        """
+        incidents = list(incidents)
+        for field in self.fields:
+            values = [inc.get(field) for inc in incidents if isinstance(inc.get(field), str)]
+            self.column_formats[field] = infer_format(values, self.formats)
+        return self.column_formats
+
+    def parse(self, value: str, field: Optional[str] = None) -> Optional[datetime]:
+        """
+        Parse a date, using the field's inferred format first
+
+        Args:
+            value: Date string
+            field: Field the value came from
+
+        Returns:
+            datetime, or None if unparseable
+        """
+        value = (value or '').strip()
+        if not value:
+            return None
+
+        fmt = self.column_formats.get(field) if field else None
+        parsed = parse_with_format(value, fmt) if fmt else None
+        if parsed is None and fmt != ISO_FORMAT:
+            parsed = parse_with_format(value, ISO_FORMAT)
+        if parsed is None:
+            parsed = parse_fallback(value)
+        return parsed
+
+    def normalize(self, incident: Dict) -> Dict:
+        """
+        Rewrite date fields as ISO strings and add <field>_ts epoch seconds
+
+        Values that cannot be parsed are left as they are, without a
+        timestamp.
+
+        Args:
+            incident: Incident dictionary (modified in place)
+
+        Returns:
+            The same incident
+        """
+        for field in self.fields:
+            value = incident.get(field)
+            if not value or not isinstance(value, str):
+                continue
+
+            parsed = self.parse(value, field)
+            if parsed is not None:
+                incident[field] = parsed.isoformat()
+                incident[field + TIMESTAMP_SUFFIX] = to_timestamp(parsed)
+
+        return incident
+
+
+def incident_timestamp(incident: Dict, field: str) -> Optional[float]:
+    """
+    Epoch seconds of an incident date, from <field>_ts when stored
+
+    Args:
+        incident: Incident dictionary
+        field: Date field name
+
+    Returns:
+        Seconds since the epoch, or None if missing or unparseable
+    """
+    stored = incident.get(field + TIMESTAMP_SUFFIX)
+    if stored is not None:
+        return stored
+
+    value = incident.get(field)
+    if not value or not isinstance(value, str):
+        return None
+
+    value = value.strip()
+    parsed = parse_with_format(value, ISO_FORMAT) or parse_fallback(value)
+    return to_timestamp(parsed) if parsed is not None else None
+
+
+def add_timestamps(incident: Dict, fields: Iterable[str] = DATE_FIELDS) -> Dict:
+    """
+    Fill in <field>_ts for date fields that do not have one yet
+
+    Args:
+        incident: Incident dictionary (modified in place)
+        fields: Date fields to stamp
+
+    Returns:
+        The same incident
+    """
+    for field in fields:
+        if incident.get(field + TIMESTAMP_SUFFIX) is None:
+            stamp = incident_timestamp(incident, field)
+            if stamp is not None:
+                incident[field + TIMESTAMP_SUFFIX] = stamp
+    return incident
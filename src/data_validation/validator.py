@@ -4,7 +4,7 @@ Data Validation Module
 Detects missing or inconsistent data in incident tickets.
 """
 
-from typing import List, Dict, Set, Tuple
+from typing import Iterable, List, Dict, Set, Tuple
 from datetime import datetime
 from loguru import logger
 
@@ -30,17 +30,19 @@ class DataValidator:
         self.min_description_length = min_description_length
         self.min_resolution_length = min_resolution_length
         
-    def validate_incidents(self, incidents: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+    def validate_incidents(self, incidents: Iterable[Dict]) -> Tuple[List[Dict], List[Dict]]:
         """
         Validate all incidents and separate valid from invalid
         
         Args:
-            incidents: List of incident dictionaries
+            incidents: List or stream (e.g. a database cursor) of incident
+                dictionaries; it is consumed once
             
         Returns:
             Tuple of (valid_incidents, invalid_incidents)
         """
-        logger.info(f"Validating {len(incidents)} incidents")
+        if isinstance(incidents, list):
+            logger.info(f"Validating {len(incidents)} incidents")
         
         valid = []
         invalid = []
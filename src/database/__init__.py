@@ -1,5 +1,18 @@
 """Database module for MongoDB operations"""
 
 from .mongodb import MongoDBClient, get_db_client
+from .incident_cache import IncidentCache
+from .connection import (
+    get_mongo_client, get_connection_health, configure_mongo_pool_from_config, close_mongo_clients
+)
+from .connection_health import ConnectionHealth
+from .async_mongodb import AsyncMongoDBClient, get_async_db_client, get_db_loop
+from .event_loop import BackgroundEventLoop
+from .projections import PROJECTIONS, resolve_projection
 
-__all__ = ['MongoDBClient', 'get_db_client']
+__all__ = [
+    'MongoDBClient', 'get_db_client', 'IncidentCache', 'ConnectionHealth',
+    'AsyncMongoDBClient', 'get_async_db_client', 'get_db_loop', 'BackgroundEventLoop',
+    'PROJECTIONS', 'resolve_projection',
+    'get_mongo_client', 'get_connection_health', 'configure_mongo_pool_from_config', 'close_mongo_clients'
+]
@@ -0,0 +1,430 @@
+"""
+Async MongoDB Database Module
+
+Coroutine counterpart of MongoDBClient for the read-heavy web endpoints.
+Uses Motor when it is installed, otherwise PyMongo's own async client
+(PyMongo 4.10+); the pool settings are the ones of database.connection.
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from pymongo.errors import DuplicateKeyError
+from loguru import logger
+
+from .connection import client_options
+from .event_loop import BackgroundEventLoop
+from .pagination import (
+    INCIDENT_PAGE_KEYS, combine_filters, decode_cursor, encode_cursor, keyset_filter, page_position
+)
+from .projections import Projection, resolve_projection
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from data_validation.date_parsing import TIMESTAMP_SUFFIX, add_timestamps, to_timestamp, utc_now
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient as AsyncClient
+    ASYNC_DRIVER = "motor"
+except ImportError:
+    try:
+        from pymongo import AsyncMongoClient as AsyncClient
+        ASYNC_DRIVER = "pymongo"
+    except ImportError:
+        AsyncClient = None
+        ASYNC_DRIVER = None
+
+ASYNC_MONGODB_AVAILABLE = AsyncClient is not None
+
+
+class AsyncMongoDBClient:
+    """Async MongoDB client for incident reads and writes"""
+
+    def __init__(
+        self,
+        connection_string: str = None,
+        database_name: str = "incident_analyzer",
+        collection_name: str = "incidents",
+        client=None
+    ):
+        """
+        Initialize async MongoDB client
+
+        The driver client is created on first use, on the event loop that
+        uses it; await every method from that same loop (see
+        BackgroundEventLoop). Indexes are managed by MongoDBClient.
+
+        Args:
+            connection_string: MongoDB connection string
+            database_name: Name of the database
+            collection_name: Name of the collection
+            client: Existing async client to use instead (e.g. in tests)
+
+        Raises:
+            ImportError: If neither Motor nor PyMongo's async client is available
+        """
+        if client is None and not ASYNC_MONGODB_AVAILABLE:
+            raise ImportError("Async MongoDB needs motor or pymongo>=4.10")
+
+        self.connection_string = connection_string or os.getenv(
+            "MONGODB_URI",
+            "mongodb://localhost:27017/"
+        )
+        self.database_name = database_name
+        self.collection_name = collection_name
+        self._client = client
+        self._owns_client = client is None
+        self._pid = os.getpid()
+
+    @property
+    def client(self):
+        """Async driver client, created on first use (and again after fork)"""
+        if self._owns_client and (self._client is None or self._pid != os.getpid()):
+            self._client = AsyncClient(self.connection_string, **client_options())
+            self._pid = os.getpid()
+            logger.info(f"Created async MongoDB client ({ASYNC_DRIVER}, pid {self._pid})")
+        return self._client
+
+    @property
+    def collection(self):
+        """Incident collection"""
+        return self.client[self.database_name][self.collection_name]
+
+    async def _find(self, query: Dict, projection=None, sort=None, skip: int = 0, limit: int = 0) -> List[Dict]:
+        """Run a find and return the documents with _id as a string"""
+        cursor = self.collection.find(query, projection)
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+
+        incidents = await cursor.to_list(length=limit or None)
+        for incident in incidents:
+            if '_id' in incident:
+                incident['_id'] = str(incident['_id'])
+        return incidents
+
+    async def get_incident_by_number(self, number: str) -> Optional[Dict]:
+        """
+        Get incident by incident number
+
+        Args:
+            number: Incident number
+
+        Returns:
+            Incident dictionary or None if not found
+        """
+        incident = await self.collection.find_one({"number": number})
+        if incident:
+            incident['_id'] = str(incident['_id'])
+        return incident
+
+    async def get_incidents_by_numbers(
+        self,
+        numbers: List[str],
+        fields: Projection = None
+    ) -> Optional[List[Dict]]:
+        """
+        Get several incidents by incident number
+
+        Args:
+            numbers: Incident numbers
+            fields: Projection name or explicit projection (default: whole documents)
+
+        Returns:
+            List of incident dictionaries (missing numbers are ignored), or
+                None if the read failed
+
+        Raises:
+            ValueError: If the projection name is unknown
+        """
+        if not numbers:
+            return []
+
+        projection = resolve_projection(fields)
+        try:
+            return await self._find({"number": {"$in": list(numbers)}}, projection)
+        except Exception as e:
+            logger.error(f"Error fetching incidents by number: {e}")
+            return None
+
+    async def get_all_incidents(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        sort_by: str = "sys_created_on",
+        sort_order: int = -1,
+        fields: Projection = None
+    ) -> List[Dict]:
+        """
+        Get all incidents with pagination
+
+        Args:
+            skip: Number of documents to skip
+            limit: Maximum number of documents to return
+            sort_by: Field to sort by
+            sort_order: 1 for ascending, -1 for descending
+            fields: Projection name or explicit projection (default: whole documents)
+
+        Returns:
+            List of incident dictionaries
+
+        Raises:
+            ValueError: If the projection name is unknown
+        """
+        projection = resolve_projection(fields)
+        try:
+            return await self._find({}, projection, sort=[(sort_by, sort_order)], skip=skip, limit=limit)
+        except Exception as e:
+            logger.error(f"Error fetching incidents: {e}")
+            return []
+
+    async def get_incidents_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_order: int = -1,
+        query: Optional[Dict] = None,
+        fields: Projection = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of incidents ordered by (sys_created_on, number)
+
+        Same keyset pagination and cursors as MongoDBClient.get_incidents_page.
+
+        Args:
+            limit: Maximum number of incidents per page
+            cursor: next_cursor of the previous page (None for the first page)
+            sort_order: 1 for ascending, -1 for descending (ignored when a
+                cursor is given; the cursor keeps its own order)
+            query: Optional additional MongoDB filter
+            fields: Projection name or explicit projection (default: whole
+                documents); the sort keys are always included
+
+        Returns:
+            Tuple of (incidents, next_cursor or None on the last page)
+
+        Raises:
+            ValueError: If the cursor is malformed or the projection name
+                is unknown
+        """
+        projection = resolve_projection(fields, required=INCIDENT_PAGE_KEYS)
+        position = None
+        if cursor:
+            decoded = decode_cursor(cursor)
+            sort_order = decoded['sort_order']
+            position = keyset_filter(INCIDENT_PAGE_KEYS, decoded['values'], sort_order)
+
+        try:
+            # One extra document tells whether another page follows
+            documents = await self._find(
+                combine_filters(query, position),
+                projection,
+                sort=[(key, sort_order) for key in INCIDENT_PAGE_KEYS],
+                limit=limit + 1
+            )
+        except Exception as e:
+            logger.error(f"Error fetching incidents page: {e}")
+            return [], None
+
+        incidents = documents[:limit]
+        next_cursor = None
+        if len(documents) > limit and incidents:
+            next_cursor = encode_cursor(page_position(incidents[-1]), sort_order)
+        return incidents, next_cursor
+
+    async def search_incidents(
+        self,
+        query: str = None,
+        category: str = None,
+        priority: str = None,
+        limit: int = 100,
+        fields: Projection = None
+    ) -> List[Dict]:
+        """
+        Search incidents by text query and filters
+
+        Args:
+            query: Text search query
+            category: Filter by category
+            priority: Filter by priority
+            limit: Maximum number of results
+            fields: Projection name or explicit projection (default: whole documents)
+
+        Returns:
+            List of matching incidents
+
+        Raises:
+            ValueError: If the projection name is unknown
+        """
+        projection = resolve_projection(fields)
+        try:
+            filter_dict = {}
+            if query:
+                filter_dict['$text'] = {'$search': query}
+            if category:
+                filter_dict['category'] = category
+            if priority:
+                filter_dict['priority'] = priority
+
+            return await self._find(filter_dict, projection, limit=limit)
+        except Exception as e:
+            logger.error(f"Error searching incidents: {e}")
+            return []
+
+    async def insert_incident(self, incident: Dict) -> Optional[str]:
+        """
+        Insert a single incident
+
+        Args:
+            incident: Incident dictionary
+
+        Returns:
+            Inserted document ID or None if the number already exists or
+            the insert failed
+        """
+        try:
+            incident.setdefault('sys_created_on', utc_now().isoformat())
+            incident.setdefault('sys_updated_on', incident['sys_created_on'])
+            add_timestamps(incident)
+
+            result = await self.collection.insert_one(incident)
+            logger.info(f"Inserted incident: {incident.get('number')}")
+            return str(result.inserted_id)
+        except DuplicateKeyError:
+            logger.warning(f"Incident already exists: {incident.get('number')}")
+            return None
+        except Exception as e:
+            logger.error(f"Error inserting incident: {e}")
+            return None
+
+    async def update_incident(self, number: str, update_data: Dict) -> bool:
+        """
+        Update an incident
+
+        Args:
+            number: Incident number
+            update_data: Dictionary of fields to update
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            update_data.pop('_id', None)
+            now = utc_now()
+            update_data['sys_updated_on'] = now.isoformat()
+            update_data['sys_updated_on' + TIMESTAMP_SUFFIX] = to_timestamp(now)
+
+            result = await self.collection.update_one({"number": number}, {"$set": update_data})
+            if result.modified_count > 0:
+                logger.info(f"Updated incident: {number}")
+                return True
+            logger.warning(f"No changes made to incident: {number}")
+            return False
+        except Exception as e:
+            logger.error(f"Error updating incident: {e}")
+            return False
+
+    async def delete_incident(self, number: str) -> bool:
+        """
+        Delete an incident
+
+        Args:
+            number: Incident number
+
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            result = await self.collection.delete_one({"number": number})
+            if result.deleted_count > 0:
+                logger.info(f"Deleted incident: {number}")
+                return True
+            logger.warning(f"Incident not found: {number}")
+            return False
+        except Exception as e:
+            logger.error(f"Error deleting incident: {e}")
+            return False
+
+    async def get_incident_count(self) -> int:
+        """
+        Get total count of incidents
+
+        Returns:
+            Total number of incidents
+        """
+        try:
+            return await self.collection.count_documents({})
+        except Exception as e:
+            logger.error(f"Error counting incidents: {e}")
+            return 0
+
+    async def get_categories(self) -> List[str]:
+        """
+        Get distinct categories
+
+        Returns:
+            List of unique categories
+        """
+        try:
+            return await self.collection.distinct("category")
+        except Exception as e:
+            logger.error(f"Error fetching categories: {e}")
+            return []
+
+    async def close(self):
+        """Close the driver client if this instance created it"""
+        if self._owns_client and self._client is not None and self._pid == os.getpid():
+            result = self._client.close()
+            if result is not None:
+                # PyMongo's async client closes with a coroutine, Motor's does not
+                await result
+        self._client = None
+        logger.info("Async MongoDB connection closed")
+
+
+_async_db_client = None
+_db_loop = None
+
+
+def get_async_db_client(
+    connection_string: str = None,
+    database_name: str = "incident_analyzer"
+) -> Optional[AsyncMongoDBClient]:
+    """
+    Get or create global async database client instance
+
+    Args:
+        connection_string: MongoDB connection string
+        database_name: Name of the database
+
+    Returns:
+        AsyncMongoDBClient instance, or None without an async driver
+    """
+    global _async_db_client
+
+    if _async_db_client is None and ASYNC_MONGODB_AVAILABLE:
+        _async_db_client = AsyncMongoDBClient(
+            connection_string=connection_string,
+            database_name=database_name
+        )
+
+    return _async_db_client
+
+
+def get_db_loop() -> BackgroundEventLoop:
+    """
+    Get the process-wide loop on which the global async client runs
+
+    Returns:
+        BackgroundEventLoop instance
+    """
+    global _db_loop
+
+    if _db_loop is None:
+        _db_loop = BackgroundEventLoop()
+
+    return _db_loop
@@ -0,0 +1,294 @@
+"""
+Incident Change Watcher
+
+Follows writes to the incidents collection made by any process (web
+workers, import scripts, main.py) and reports them as deltas, so
+in-process caches and indexes converge without full reloads.
+
+Uses a MongoDB change stream when the server supports it (replica sets,
+Atlas) and otherwise polls on `sys_updated_on_ts`, with a count check to
+catch deletes and inserts that carry an old timestamp. The epoch seconds
+field is polled rather than `sys_updated_on` because the strings come in
+several formats (web edits, ServiceNow, CSV) that do not compare in time
+order.
+"""
+
+import threading
+from typing import Callable, Dict, List, Optional, Set
+from loguru import logger
+
+
+# Field polled for changes: epoch seconds of sys_updated_on (UTC)
+POLL_FIELD = 'sys_updated_on_ts'
+
+# Events passed to the listener with the affected incident numbers
+UPSERT = 'upsert'
+REMOVE = 'remove'
+RELOAD = 'reload'
+
+
+class IncidentChangeWatcher:
+    """Background thread that turns collection writes into (event, numbers) deltas"""
+
+    def __init__(
+        self,
+        collection,
+        listener: Callable[[str, List[str]], None],
+        poll_interval: float = 5.0,
+        use_change_streams: bool = True,
+        batch_size: int = 500
+    ):
+        """
+        Initialize watcher (call start() to begin watching)
+
+        Args:
+            collection: pymongo collection holding incidents
+            listener: Called with (event, numbers); event is 'upsert',
+                'remove' or 'reload' (numbers is empty for 'reload')
+            poll_interval: Seconds between polls in polling mode, also the
+                longest a change stream waits before flushing a batch
+            use_change_streams: Try change streams before falling back to polling
+            batch_size: Maximum change stream events delivered in one call
+        """
+        self.collection = collection
+        self.listener = listener
+        self.poll_interval = poll_interval
+        self.use_change_streams = use_change_streams
+        self.batch_size = batch_size
+
+        self.mode: Optional[str] = None
+        self.events_delivered = 0
+
+        self._ids: Dict[object, str] = {}
+        self._watermark = None
+        self._resume_token = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the watcher thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start watching in a daemon thread"""
+        if self.is_running:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="incident-change-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Stop the watcher thread
+
+        Args:
+            timeout: Seconds to wait for the thread to exit
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _emit(self, event: str, numbers: List[str]) -> None:
+        """Deliver a delta to the listener"""
+        if event != RELOAD and not numbers:
+            return
+        try:
+            self.listener(event, numbers)
+            self.events_delivered += 1
+        except Exception as e:
+            logger.error(f"Incident change listener failed on {event}: {e}")
+
+    def _snapshot_ids(self) -> Dict[object, str]:
+        """Map of _id -> number for every incident (deletes only carry _id)"""
+        return {doc['_id']: doc.get('number') for doc in self.collection.find({}, {'number': 1})}
+
+    def prime(self) -> None:
+        """Record the current state; only later changes are reported"""
+        self._ids = self._snapshot_ids()
+        self._watermark = self._latest_update()
+
+    def _run(self) -> None:
+        """Thread body: change stream if possible, else polling"""
+        try:
+            self.prime()
+        except Exception as e:
+            logger.error(f"Incident change watcher could not start: {e}")
+            return
+
+        if self.use_change_streams and self._watch_change_stream():
+            return
+
+        self.mode = 'polling'
+        logger.info(f"Watching incidents by polling every {self.poll_interval}s")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning(f"Incident poll failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Change streams
+    # ------------------------------------------------------------------
+
+    def _watch_change_stream(self) -> bool:
+        """
+        Follow the collection's change stream until stopped
+
+        Returns:
+            True if the watcher ran until stopped, False if change streams
+            are unsupported and polling should be used instead
+        """
+        failures = 0
+
+        while not self._stop.is_set():
+            try:
+                with self.collection.watch(
+                    full_document='updateLookup',
+                    resume_after=self._resume_token,
+                    max_await_time_ms=int(self.poll_interval * 1000)
+                ) as stream:
+                    if self.mode != 'change_stream':
+                        self.mode = 'change_stream'
+                        logger.info("Watching incidents with a MongoDB change stream")
+                    failures = 0
+                    self._consume(stream)
+
+            except Exception as e:
+                if self.mode != 'change_stream':
+                    logger.info(f"Change streams unavailable ({e}), falling back to polling")
+                    return False
+
+                # Transient error: resume from the last token after a backoff
+                failures += 1
+                logger.warning(f"Incident change stream interrupted: {e}")
+                if self._stop.wait(min(2 ** failures, 60)):
+                    break
+
+        return True
+
+    def _consume(self, stream) -> None:
+        """Read change events, delivering them in batches"""
+        upserts: Dict[str, None] = {}
+        removes: Dict[str, None] = {}
+
+        def flush():
+            self._emit(UPSERT, list(upserts))
+            self._emit(REMOVE, list(removes))
+            upserts.clear()
+            removes.clear()
+
+        while not self._stop.is_set() and stream.alive:
+            change = stream.try_next()
+            if change is not None:
+                self._resume_token = stream.resume_token
+                if not self._apply_change(change, upserts, removes):
+                    flush()
+                    self._emit(RELOAD, [])
+                    return  # Stream was invalidated; reopen
+
+            # Deliver when the stream goes idle or the batch is full
+            if change is None or len(upserts) + len(removes) >= self.batch_size:
+                flush()
+
+        flush()
+
+    def _apply_change(self, change: Dict, upserts: Dict, removes: Dict) -> bool:
+        """
+        Record one change event
+
+        Returns:
+            False if the collection was dropped/renamed and a reload is needed
+        """
+        operation = change.get('operationType')
+        doc_id = change.get('documentKey', {}).get('_id')
+
+        if operation in ('insert', 'update', 'replace'):
+            number = (change.get('fullDocument') or {}).get('number') or self._ids.get(doc_id)
+            if number:
+                old_number = self._ids.get(doc_id)
+                if old_number and old_number != number:
+                    removes[old_number] = None
+                self._ids[doc_id] = number
+                removes.pop(number, None)
+                upserts[number] = None
+        elif operation == 'delete':
+            number = self._ids.pop(doc_id, None)
+            if number:
+                upserts.pop(number, None)
+                removes[number] = None
+        elif operation in ('drop', 'rename', 'dropDatabase', 'invalidate'):
+            self._ids = {}
+            self._resume_token = None
+            return False
+
+        return True
+
+    # ------------------------------------------------------------------
+    # Polling
+    # ------------------------------------------------------------------
+
+    def _latest_update(self):
+        """Highest sys_updated_on_ts currently stored"""
+        latest = self.collection.find_one(
+            {POLL_FIELD: {'$type': 'number'}},
+            {POLL_FIELD: 1},
+            sort=[(POLL_FIELD, -1)]
+        )
+        return latest.get(POLL_FIELD) if latest else None
+
+    def poll_once(self) -> Dict[str, List[str]]:
+        """
+        Check for changes since the last poll and deliver them
+
+        Returns:
+            Dictionary with the upserted and removed numbers
+        """
+        # Without a watermark (nothing stored carries POLL_FIELD yet, e.g. a
+        # database written before it existed) only timestamped documents are
+        # new; untimestamped inserts are caught by the count check below
+        if self._watermark is not None:
+            query = {POLL_FIELD: {'$gt': self._watermark}}
+        else:
+            query = {POLL_FIELD: {'$type': 'number'}}
+        changed: Dict[str, None] = {}
+        for doc in self.collection.find(query, {'number': 1, POLL_FIELD: 1}):
+            self._ids[doc['_id']] = doc.get('number')
+            changed[doc.get('number')] = None
+            updated = doc.get(POLL_FIELD)
+            if isinstance(updated, (int, float)) and (self._watermark is None or updated > self._watermark):
+                self._watermark = updated
+        changed.pop(None, None)
+
+        # Deletes and back-dated inserts do not move the watermark; a count
+        # mismatch means the id snapshot needs to be diffed
+        removed: List[str] = []
+        if self.collection.count_documents({}) != len(self._ids):
+            current = self._snapshot_ids()
+            known: Set[object] = set(self._ids)
+            removed = [self._ids[doc_id] for doc_id in known - set(current) if self._ids[doc_id]]
+            for doc_id in set(current) - known:
+                if current[doc_id]:
+                    changed[current[doc_id]] = None
+            self._ids = current
+
+        upserts = list(changed)
+        self._emit(UPSERT, upserts)
+        self._emit(REMOVE, removed)
+        return {'upserted': upserts, 'removed': removed}
+
+    def stats(self) -> Dict:
+        """
+        Get watcher status
+
+        Returns:
+            Dictionary with mode, running flag and delivered event count
+        """
+        return {
+            'mode': self.mode,
+            'running': self.is_running,
+            'tracked_incidents': len(self._ids),
+            'events_delivered': self.events_delivered
+        }
@@ -7,9 +7,15 @@ import chromadb
 from chromadb.config import Settings
 from pathlib import Path
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+import sys
+import time
+import numpy as np
 from loguru import logger
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from embeddings import get_embedding_registry, hash_text, SharedEmbeddingModel
+
 
 class ChromaDBClient:
     """ChromaDB client for storing and retrieving incident embeddings"""
@@ -18,7 +24,11 @@ class ChromaDBClient:
         self,
         collection_name: str = "incident_resolutions",
         persist_directory: str = None,
-        embedding_model: str = "all-MiniLM-L6-v2"
+        embedding_model: str = "all-MiniLM-L6-v2",
+        shared_model: Optional[SharedEmbeddingModel] = None,
+        batch_size: int = 500,
+        encode_batch_size: int = 64,
+        normalize_embeddings: bool = False
     ):
         """
         Initialize ChromaDB client
@@ -27,8 +37,16 @@ class ChromaDBClient:
             collection_name: Name of the collection
             persist_directory: Directory to store ChromaDB data
             embedding_model: Sentence transformer model for embeddings
+            shared_model: Already acquired model handle to reuse (optional)
+            batch_size: Incidents per encode/write batch in add_incidents_bulk
+            encode_batch_size: Texts per forward pass of the embedding model
+            normalize_embeddings: L2-normalise document and query embeddings
         """
         self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.encode_batch_size = encode_batch_size
+        self.normalize_embeddings = normalize_embeddings
+        self.last_ingest_stats = {}
         
         # Set persist directory
         if persist_directory is None:
@@ -45,9 +63,12 @@ class ChromaDBClient:
             )
         )
         
-        # Initialize embedding model
-        logger.info(f"Loading embedding model: {embedding_model}")
-        self.embedding_model = SentenceTransformer(embedding_model)
+        # Shared embedding model; take our own reference so close() is symmetric
+        registry = get_embedding_registry()
+        if shared_model is not None:
+            self.embedding_model = registry.acquire(shared_model.model_name, shared_model.device)
+        else:
+            self.embedding_model = registry.acquire(embedding_model)
         
         # Get or create collection
         try:
@@ -80,14 +101,15 @@ class ChromaDBClient:
             text = self._create_embedding_text(incident)
             
             # Generate embedding
-            embedding = self.embedding_model.encode(text).tolist()
+            embedding = self._encode([text])[0].tolist()
             
             # Prepare metadata (only store simple types in metadata)
             metadata = {
                 "number": incident.get('number', 'Unknown'),
                 "category": incident.get('category', 'Unknown'),
                 "short_description": incident.get('short_description', '')[:500],  # Limit length
-                "priority": str(incident.get('priority', '3'))
+                "priority": str(incident.get('priority', '3')),
+                "text_hash": hash_text(text)
             }
             
             # Add to collection
@@ -105,12 +127,16 @@ class ChromaDBClient:
             logger.error(f"Error adding incident to ChromaDB: {e}")
             return False
     
-    def add_incidents_bulk(self, incidents: List[Dict]) -> int:
+    def add_incidents_bulk(self, incidents: List[Dict], batch_size: int = None) -> int:
         """
         Add multiple incidents to ChromaDB in bulk
         
+        Incidents are encoded batch by batch; while batch N is being written
+        to Chroma on a background thread, batch N+1 is already being encoded.
+        
         Args:
             incidents: List of incident dictionaries
+            batch_size: Incidents per encode/write batch (defaults to self.batch_size)
             
         Returns:
             Number of successfully added incidents
@@ -126,62 +152,239 @@ class ChromaDBClient:
             logger.warning("No incidents with resolutions or descriptions to add")
             return 0
         
+        return self._ingest(valid_incidents, batch_size, method='add')
+    
+    def upsert_incidents(self, incidents: List[Dict], batch_size: int = None) -> Dict[str, int]:
+        """
+        Insert or update incidents, re-embedding only those whose text changed
+        
+        The hash of the embedded text is stored in each record's metadata, so
+        change detection works across restarts without re-encoding anything.
+        
+        Args:
+            incidents: Incident dictionaries (must have a 'number')
+            batch_size: Incidents per encode/write batch (defaults to self.batch_size)
+            
+        Returns:
+            Dictionary with added/updated/unchanged counts
+        """
+        stats = {'added': 0, 'updated': 0, 'unchanged': 0}
+        
+        # Last occurrence wins if a number appears twice
+        by_number = {inc['number']: inc for inc in incidents if inc.get('number')}
+        if not by_number:
+            return stats
+        
+        existing = {}
+        numbers = list(by_number)
+        lookup_size = batch_size or self.batch_size
+        for i in range(0, len(numbers), lookup_size):
+            found = self.collection.get(ids=numbers[i:i + lookup_size], include=['metadatas'])
+            existing.update(zip(found['ids'], found['metadatas']))
+        
+        to_embed = []
+        metadata_only = []
+        for number, incident in by_number.items():
+            text_hash = hash_text(self._create_embedding_text(incident))
+            stored = existing.get(number)
+            
+            if stored is None:
+                stats['added'] += 1
+                to_embed.append(incident)
+            elif stored.get('text_hash') != text_hash:
+                stats['updated'] += 1
+                to_embed.append(incident)
+            else:
+                document, metadata = self._document_and_metadata(incident, text_hash)
+                if stored != metadata:
+                    metadata_only.append((number, document, metadata))
+                stats['unchanged'] += 1
+        
+        if to_embed:
+            self._ingest(to_embed, batch_size, method='upsert')
+        
+        if metadata_only:
+            # Resolution / metadata edits keep the stored embedding
+            self.collection.update(
+                ids=[item[0] for item in metadata_only],
+                documents=[item[1] for item in metadata_only],
+                metadatas=[item[2] for item in metadata_only]
+            )
+        
+        logger.info(
+            f"ChromaDB upsert: {stats['added']} added, {stats['updated']} re-embedded, "
+            f"{stats['unchanged']} unchanged ({len(metadata_only)} metadata updates)"
+        )
+        return stats
+    
+    def delete_incidents(self, incident_numbers: List[str]) -> int:
+        """
+        Delete several incidents from ChromaDB
+        
+        Args:
+            incident_numbers: Incident numbers to delete
+            
+        Returns:
+            Number of ids submitted for deletion
+        """
+        if not incident_numbers:
+            return 0
+        
         try:
-            # Prepare batch data
-            ids = []
-            embeddings = []
-            documents = []
-            metadatas = []
+            self.collection.delete(ids=list(incident_numbers))
+            logger.info(f"Deleted {len(incident_numbers)} incidents from ChromaDB")
+            return len(incident_numbers)
+        except Exception as e:
+            logger.error(f"Error deleting incidents: {e}")
+            return 0
+    
+    def _ingest(self, incidents: List[Dict], batch_size: int = None, method: str = 'add') -> int:
+        """
+        Encode and write incidents in pipelined batches
+        
+        Args:
+            incidents: Incidents to write
+            batch_size: Incidents per encode/write batch
+            method: Collection method used for writing ('add' or 'upsert')
             
-            for incident in valid_incidents:
-                # Create text for embedding
-                text = self._create_embedding_text(incident)
-                
-                # Generate embedding
-                embedding = self.embedding_model.encode(text).tolist()
+        Returns:
+            Number of incidents written
+        """
+        batch_size = batch_size or self.batch_size
+        total = len(incidents)
+        total_added = 0
+        start_time = time.perf_counter()
+        
+        # One writer thread: Chroma writes stay ordered, encoding overlaps them
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            pending = None
+            
+            for i in range(0, total, batch_size):
+                batch = incidents[i:i + batch_size]
+                payload = self._prepare_batch(batch)
                 
-                # Use resolution if available, otherwise use description
-                resolution_text = incident.get('resolution_notes', '')
-                if not resolution_text or len(resolution_text) < 20:
-                    resolution_text = incident.get('description', 'No resolution available')
+                if pending is not None:
+                    total_added += pending.result()
+                    logger.info(f"Added {total_added}/{total} incidents")
                 
-                # Prepare data
-                ids.append(incident.get('number', f"INC_{id(incident)}"))
-                embeddings.append(embedding)
-                documents.append(resolution_text)
-                metadatas.append({
-                    "number": incident.get('number', 'Unknown'),
-                    "category": incident.get('category', 'Unknown'),
-                    "short_description": incident.get('short_description', '')[:500],
-                    "priority": str(incident.get('priority', '3')),
-                    "has_resolution": 'yes' if incident.get('resolution_notes') else 'no'
-                })
+                pending = writer.submit(self._write_batch, payload, method)
+            
+            if pending is not None:
+                total_added += pending.result()
+        
+        elapsed = time.perf_counter() - start_time
+        rate = total_added / elapsed if elapsed > 0 else 0.0
+        self.last_ingest_stats = {
+            'incidents': total_added,
+            'seconds': round(elapsed, 3),
+            'incidents_per_second': round(rate, 1),
+            'batch_size': batch_size
+        }
+        
+        logger.info(
+            f"Successfully added {total_added} incidents to ChromaDB "
+            f"in {elapsed:.1f}s ({rate:.1f} incidents/sec)"
+        )
+        return total_added
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode incident texts through the shared model and embedding cache
+        
+        Normalisation is applied after the cache lookup so cached vectors stay
+        valid whatever the normalize_embeddings setting is.
+        
+        Args:
+            texts: Texts to embed
             
-            # Add to collection in smaller batches to avoid timeout
-            batch_size = 500
-            total_added = 0
+        Returns:
+            float32 embedding matrix
+        """
+        embeddings = self.embedding_model.encode_cached(texts, batch_size=self.encode_batch_size)
+        
+        if self.normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            embeddings = embeddings / norms
+        
+        return embeddings
+    
+    def _prepare_batch(self, incidents: List[Dict]) -> Dict[str, list]:
+        """
+        Encode a batch of incidents and build the Chroma add() payload
+        
+        Args:
+            incidents: Batch of incident dictionaries
             
-            for i in range(0, len(ids), batch_size):
-                batch_end = min(i + batch_size, len(ids))
-                self.collection.add(
-                    ids=ids[i:batch_end],
-                    embeddings=embeddings[i:batch_end],
-                    documents=documents[i:batch_end],
-                    metadatas=metadatas[i:batch_end]
-                )
-                total_added += (batch_end - i)
-                logger.info(f"Added batch {i//batch_size + 1}: {total_added}/{len(ids)} incidents")
+        Returns:
+            Dictionary with ids, embeddings, documents and metadatas lists
+        """
+        texts = [self._create_embedding_text(incident) for incident in incidents]
+        embeddings = self._encode(texts)
+        
+        payload = {'ids': [], 'embeddings': embeddings.tolist(), 'documents': [], 'metadatas': []}
+        
+        for incident, text in zip(incidents, texts):
+            document, metadata = self._document_and_metadata(incident, hash_text(text))
+            payload['ids'].append(incident.get('number', f"INC_{id(incident)}"))
+            payload['documents'].append(document)
+            payload['metadatas'].append(metadata)
+        
+        return payload
+    
+    def _document_and_metadata(self, incident: Dict, text_hash: str) -> tuple:
+        """
+        Build the stored document and metadata for an incident
+        
+        Args:
+            incident: Incident dictionary
+            text_hash: Hash of the incident's embedding text
             
-            logger.info(f"Successfully added {len(valid_incidents)} incidents to ChromaDB")
-            return len(valid_incidents)
+        Returns:
+            Tuple of (document, metadata)
+        """
+        # Use resolution if available, otherwise use description
+        resolution_text = incident.get('resolution_notes', '')
+        if not resolution_text or len(resolution_text) < 20:
+            resolution_text = incident.get('description', 'No resolution available')
+        
+        metadata = {
+            "number": incident.get('number', 'Unknown'),
+            "category": incident.get('category', 'Unknown'),
+            "short_description": incident.get('short_description', '')[:500],
+            "priority": str(incident.get('priority', '3')),
+            "has_resolution": 'yes' if incident.get('resolution_notes') else 'no',
+            "text_hash": text_hash
+        }
+        return resolution_text, metadata
+    
+    def _write_batch(self, payload: Dict[str, list], method: str = 'add') -> int:
+        """
+        Write a prepared batch to the collection
+        
+        If the batch write fails, the rows are retried one by one with the
+        same method and the already computed embeddings.
+        
+        Args:
+            payload: Output of _prepare_batch
+            method: Collection method used for writing ('add' or 'upsert')
             
+        Returns:
+            Number of incidents written
+        """
+        write = getattr(self.collection, method)
+        try:
+            write(**payload)
+            return len(payload['ids'])
         except Exception as e:
-            logger.error(f"Error in bulk add: {e}")
-            # Try adding one by one if bulk fails
+            logger.error(f"Error in bulk {method}: {e}")
             count = 0
-            for incident in valid_incidents:
-                if self.add_incident(incident):
+            for i, incident_id in enumerate(payload['ids']):
+                try:
+                    write(**{key: [values[i]] for key, values in payload.items()})
                     count += 1
+                except Exception as row_error:
+                    logger.error(f"Error writing incident {incident_id} to ChromaDB: {row_error}")
             return count
     
     def search_similar(
@@ -203,7 +406,10 @@ class ChromaDBClient:
         """
         try:
             # Generate query embedding
-            query_embedding = self.embedding_model.encode(problem_description).tolist()
+            query_embedding = self.embedding_model.encode(problem_description)
+            if self.normalize_embeddings:
+                query_embedding = query_embedding / (np.linalg.norm(query_embedding) or 1.0)
+            query_embedding = query_embedding.tolist()
             
             # Prepare where filter for category
             where_filter = None
@@ -292,6 +498,19 @@ class ChromaDBClient:
             logger.error(f"Error getting count: {e}")
             return 0
     
+    def get_incident_numbers(self) -> List[str]:
+        """
+        Get the numbers of all incidents stored in ChromaDB
+        
+        Returns:
+            List of incident numbers (the collection ids)
+        """
+        try:
+            return list(self.collection.get(include=[])['ids'])
+        except Exception as e:
+            logger.error(f"Error listing incidents: {e}")
+            return []
+    
     def clear_collection(self) -> bool:
         """
         Clear all data from the collection
@@ -312,6 +531,12 @@ class ChromaDBClient:
             logger.error(f"Error clearing collection: {e}")
             return False
     
+    def close(self):
+        """Release the shared embedding model"""
+        if self.embedding_model is not None:
+            get_embedding_registry().release(self.embedding_model)
+            self.embedding_model = None
+    
     def _create_embedding_text(self, incident: Dict) -> str:
         """
         Create text for embedding from incident
@@ -332,7 +557,8 @@ class ChromaDBClient:
 
 def get_chromadb_client(
     collection_name: str = "incident_resolutions",
-    persist_directory: str = None
+    persist_directory: str = None,
+    **options
 ) -> ChromaDBClient:
     """
     Factory function to get ChromaDB client
@@ -340,11 +566,13 @@ def get_chromadb_client(
     Args:
         collection_name: Name of the collection
         persist_directory: Directory to store ChromaDB data
+        **options: Ingest settings (batch_size, encode_batch_size, normalize_embeddings)
         
     Returns:
         ChromaDBClient instance
     """
     return ChromaDBClient(
         collection_name=collection_name,
-        persist_directory=persist_directory
+        persist_directory=persist_directory,
+        **options
     )
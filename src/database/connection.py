@@ -0,0 +1,222 @@
+"""
+MongoDB Connection Factory
+
+Hands out one MongoClient per connection string and process, tuned from
+the `database.mongodb.pool` section of config.yaml. MongoDBClient and
+MongoDBHandler share it, so each (gunicorn) worker keeps a single,
+bounded connection pool instead of one per component, and clients
+inherited across fork() are never reused.
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from pymongo import MongoClient
+from loguru import logger
+
+from .connection_health import ConnectionHealth
+
+
+# config.yaml pool keys -> MongoClient options
+POOL_OPTIONS = {
+    "max_pool_size": "maxPoolSize",
+    "min_pool_size": "minPoolSize",
+    "max_idle_time_ms": "maxIdleTimeMS",
+    "connect_timeout_ms": "connectTimeoutMS",
+    "server_selection_timeout_ms": "serverSelectionTimeoutMS",
+    "socket_timeout_ms": "socketTimeoutMS",
+    "wait_queue_timeout_ms": "waitQueueTimeoutMS",
+    "read_preference": "readPreference",
+    "app_name": "appname",
+}
+
+# Defaults sized for a few web workers per host (pymongo's own default is 100)
+DEFAULT_POOL_SETTINGS = {
+    "max_pool_size": 20,
+    "min_pool_size": 0,
+    "max_idle_time_ms": 300000,
+    "connect_timeout_ms": 10000,
+    "server_selection_timeout_ms": 5000,
+    "wait_queue_timeout_ms": 10000,
+    "read_preference": "primary",
+    "compressors": ["zstd", "snappy"],
+    "probe_interval_seconds": 5.0,
+}
+
+# Python package each wire compressor needs (zlib ships with Python)
+_COMPRESSOR_MODULES = {"zstd": "zstandard", "snappy": "snappy", "zlib": "zlib"}
+
+_settings: Dict = dict(DEFAULT_POOL_SETTINGS)
+_clients: Dict[str, MongoClient] = {}
+_health: Dict[str, ConnectionHealth] = {}
+_owner_pid = os.getpid()
+_lock = threading.Lock()
+
+
+def available_compressors(preferred: Sequence[str]) -> List[str]:
+    """
+    Keep the compressors whose Python package is installed
+
+    Args:
+        preferred: Compressor names in order of preference
+
+    Returns:
+        Usable compressor names, same order
+    """
+    usable = []
+    for name in preferred:
+        module = _COMPRESSOR_MODULES.get(name)
+        if module is None:
+            logger.warning(f"Unknown MongoDB compressor ignored: {name}")
+            continue
+        try:
+            __import__(module)
+        except ImportError:
+            continue
+        usable.append(name)
+    return usable
+
+
+def client_options(settings: Optional[Dict] = None) -> Dict:
+    """
+    MongoClient keyword arguments for pool settings
+
+    Args:
+        settings: Pool settings (default: the configured ones)
+
+    Returns:
+        Dictionary of MongoClient options
+    """
+    settings = _settings if settings is None else settings
+    options = {
+        option: settings[key]
+        for key, option in POOL_OPTIONS.items()
+        if settings.get(key) is not None
+    }
+    compressors = available_compressors(settings.get("compressors") or [])
+    if compressors:
+        options["compressors"] = ",".join(compressors)
+    return options
+
+
+def configure_mongo_pool(settings: Dict) -> Dict:
+    """
+    Set the pool settings used for clients created from now on
+
+    Args:
+        settings: Pool settings (see DEFAULT_POOL_SETTINGS); missing keys
+            keep their defaults
+
+    Returns:
+        The effective settings
+    """
+    global _settings
+
+    with _lock:
+        _settings = dict(DEFAULT_POOL_SETTINGS, **settings)
+        if _clients:
+            logger.warning("MongoDB pool settings changed after clients were created; "
+                           "existing clients keep their settings")
+    return _settings
+
+
+def configure_mongo_pool_from_config(config: Dict) -> Dict:
+    """
+    Apply the `database.mongodb.pool` section of config.yaml
+
+    Args:
+        config: Full application configuration
+
+    Returns:
+        The effective settings
+    """
+    pool_config = config.get("database", {}).get("mongodb", {}).get("pool", {})
+    return configure_mongo_pool(pool_config or {})
+
+
+def _key(uri: Optional[str]) -> str:
+    """Normalised connection string used as the client cache key"""
+    uri = uri or os.getenv("MONGODB_URI", "mongodb://localhost:27017/")
+    return uri.rstrip("/")
+
+
+def _check_pid() -> None:
+    """Forget clients inherited from a parent process (caller holds _lock)"""
+    global _owner_pid
+
+    if os.getpid() != _owner_pid:
+        # The parent's sockets and monitor threads are unusable here;
+        # drop them without close(), which would talk on those sockets
+        _clients.clear()
+        _health.clear()
+        _owner_pid = os.getpid()
+
+
+def _reset_after_fork() -> None:
+    """Fork hook: fresh lock and no inherited clients in the child"""
+    global _lock
+
+    _lock = threading.Lock()
+    _check_pid()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_mongo_client(uri: Optional[str] = None) -> MongoClient:
+    """
+    Get the shared MongoClient for a connection string
+
+    The client is created on first use with the configured pool settings
+    and a ConnectionHealth heartbeat listener. Creating it does not
+    contact the server.
+
+    Args:
+        uri: MongoDB connection string (default: MONGODB_URI or localhost)
+
+    Returns:
+        MongoClient shared by every caller in this process
+    """
+    key = _key(uri)
+    with _lock:
+        _check_pid()
+        client = _clients.get(key)
+        if client is None:
+            health = ConnectionHealth(probe_interval=_settings.get("probe_interval_seconds", 5.0))
+            options = client_options()
+            client = MongoClient(key, event_listeners=[health], **options)
+            _clients[key] = client
+            _health[key] = health
+            logger.info(f"Created shared MongoDB client (pid {os.getpid()}, "
+                        f"maxPoolSize={options.get('maxPoolSize')}, "
+                        f"compressors={options.get('compressors', 'none')})")
+        return client
+
+
+def get_connection_health(uri: Optional[str] = None) -> ConnectionHealth:
+    """
+    Get the ConnectionHealth of the shared client for a connection string
+
+    Args:
+        uri: MongoDB connection string
+
+    Returns:
+        ConnectionHealth fed by that client's heartbeats
+    """
+    get_mongo_client(uri)
+    with _lock:
+        return _health[_key(uri)]
+
+
+def close_mongo_clients() -> None:
+    """Close every shared client of this process (e.g. at shutdown or between tests)"""
+    with _lock:
+        _check_pid()
+        clients = list(_clients.values())
+        _clients.clear()
+        _health.clear()
+
+    for client in clients:
+        client.close()
@@ -0,0 +1,160 @@
+"""
+MongoDB Connection Health
+Tracks server liveness from the driver's heartbeats so operations can
+check a cached state instead of pinging the server before each call
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, Optional, Tuple
+
+from pymongo.monitoring import (
+    ServerHeartbeatFailedEvent,
+    ServerHeartbeatListener,
+    ServerHeartbeatStartedEvent,
+    ServerHeartbeatSucceededEvent,
+)
+from loguru import logger
+
+
+# Connection states
+STATE_UNKNOWN = "unknown"
+STATE_UP = "up"
+STATE_DOWN = "down"
+
+
+class ConnectionHealth(ServerHeartbeatListener):
+    """Cached MongoDB liveness, fed by heartbeat events and operation outcomes"""
+
+    def __init__(self, probe_interval: float = 5.0):
+        """
+        Initialize connection health
+
+        Register the instance with MongoClient(event_listeners=[health]).
+
+        Args:
+            probe_interval: Minimum seconds between on-demand probes while
+                the connection is down or not yet confirmed; callers fail
+                fast in between
+        """
+        self.probe_interval = probe_interval
+
+        self.state = STATE_UNKNOWN
+        self.last_success: Optional[datetime] = None
+        self.last_failure: Optional[datetime] = None
+        self.last_error: Optional[str] = None
+        self.flaps = 0
+        self.heartbeat_failures = 0
+
+        self._servers: Dict[Tuple[str, int], bool] = {}
+        self._lock = threading.Lock()
+        self._probe_lock = threading.Lock()
+        self._last_probe = 0.0
+
+    # --- ServerHeartbeatListener (called from the driver's monitor threads) ---
+
+    def started(self, event: ServerHeartbeatStartedEvent) -> None:
+        pass
+
+    def succeeded(self, event: ServerHeartbeatSucceededEvent) -> None:
+        self._record(event.connection_id, True)
+
+    def failed(self, event: ServerHeartbeatFailedEvent) -> None:
+        self._record(event.connection_id, False, event.reply)
+
+    # --- Outcomes reported by the application ---
+
+    def mark_up(self) -> None:
+        """Record a successful operation or probe"""
+        self._record(None, True)
+
+    def mark_down(self, error: Exception) -> None:
+        """Record a connection failure seen by an operation"""
+        self._record(None, False, error)
+
+    def _record(self, server: Optional[Tuple[str, int]], ok: bool, error: Optional[Exception] = None) -> None:
+        """Update per-server liveness and the overall state"""
+        with self._lock:
+            if server is not None:
+                self._servers[server] = ok
+                if not ok:
+                    self.heartbeat_failures += 1
+            else:
+                # An operation outcome does not name its server; apply it to all
+                self._servers = {address: ok for address in self._servers}
+
+            now = datetime.now()
+            if ok:
+                self.last_success = now
+            else:
+                self.last_failure = now
+                self.last_error = str(error) if error is not None else None
+
+            # Up while any known server answers (the driver fails over between them)
+            up = any(self._servers.values()) if self._servers else ok
+            previous, self.state = self.state, STATE_UP if up else STATE_DOWN
+            if previous == STATE_UP and not up:
+                self.flaps += 1
+
+        if previous == STATE_UP and not up:
+            logger.warning(f"MongoDB connection lost: {self.last_error}")
+        elif previous == STATE_DOWN and up:
+            logger.info("✓ MongoDB connection restored")
+
+    def is_available(self, probe: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Whether operations should be attempted
+
+        Answers from the cached state while the connection is up. While it
+        is down or unconfirmed, at most one caller per probe_interval runs
+        the probe; everyone else gets False immediately instead of waiting
+        for server selection to time out.
+
+        Args:
+            probe: Callable that raises if the server is unreachable
+                (e.g. a ping)
+
+        Returns:
+            True if the connection is (believed to be) up
+        """
+        if self.state == STATE_UP:
+            return True
+        if probe is None:
+            return self.state == STATE_UNKNOWN
+
+        now = time.monotonic()
+        if now - self._last_probe < self.probe_interval or not self._probe_lock.acquire(blocking=False):
+            return False
+        try:
+            self._last_probe = now
+            probe()
+            self.mark_up()
+            return True
+        except Exception as e:
+            self.mark_down(e)
+            return False
+        finally:
+            self._probe_lock.release()
+
+    def snapshot(self) -> Dict:
+        """
+        Health metrics for stats endpoints and logging
+
+        Returns:
+            Dictionary with state, last success/failure times, last error,
+            flap count and per-server liveness
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "last_success": self.last_success.isoformat() if self.last_success else None,
+                "last_failure": self.last_failure.isoformat() if self.last_failure else None,
+                "last_error": self.last_error,
+                "flaps": self.flaps,
+                "heartbeat_failures": self.heartbeat_failures,
+                "servers": {
+                    f"{host}:{port}": STATE_UP if ok else STATE_DOWN
+                    for (host, port), ok in self._servers.items()
+                }
+            }
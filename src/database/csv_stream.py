@@ -0,0 +1,146 @@
+"""
+Streaming CSV Reading
+Decodes CSV uploads incrementally so an import only holds an encoding
+sample and a few batches of rows in memory, whatever the file size
+"""
+
+import codecs
+import io
+import queue
+import threading
+from typing import BinaryIO, Iterable, Iterator, Tuple
+
+
+# Bytes read up front to pick an encoding
+DEFAULT_SAMPLE_SIZE = 64 * 1024
+
+# Tried in order on the sample; latin-1 accepts any byte so it comes last
+CANDIDATE_ENCODINGS = ['utf-8', 'cp1252', 'latin-1']
+
+
+def detect_encoding(sample: bytes) -> str:
+    """
+    Pick the encoding of a CSV file from its first bytes
+
+    Args:
+        sample: Prefix of the file
+
+    Returns:
+        Codec name usable with open()/TextIOWrapper
+    """
+    if sample.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # final=False: the sample may end in the middle of a character
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+
+    return 'latin-1'
+
+
+class _PrefixedStream(io.RawIOBase):
+    """Replays an already-read sample, then continues with the source stream"""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if len(self._prefix):
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def open_text_stream(
+    stream: BinaryIO,
+    sample_size: int = DEFAULT_SAMPLE_SIZE
+) -> Tuple[io.TextIOWrapper, str]:
+    """
+    Wrap a binary stream for incremental CSV decoding
+
+    The encoding is detected on the first sample_size bytes. Bytes later
+    in the file that do not decode are replaced rather than failing the
+    whole import. The source stream is not closed with the wrapper.
+
+    Args:
+        stream: Binary file object (open file, upload stream)
+        sample_size: Bytes used for encoding detection
+
+    Returns:
+        Tuple of (text stream for csv.reader, detected encoding)
+    """
+    sample = stream.read(sample_size)
+    encoding = detect_encoding(sample)
+
+    raw = io.BufferedReader(_PrefixedStream(sample, stream))
+    return io.TextIOWrapper(raw, encoding=encoding, errors='replace', newline=''), encoding
+
+
+_DONE = object()
+
+
+def iter_prefetched(items: Iterable, max_pending: int = 2) -> Iterator:
+    """
+    Produce items in a background thread while the caller consumes them
+
+    At most max_pending items wait in the queue; the producer blocks when
+    it is full, so a slow consumer (e.g. database writes) throttles
+    reading instead of letting parsed rows pile up in memory. Errors
+    raised by the producer are re-raised in the consumer.
+
+    Args:
+        items: Iterable to produce from (e.g. a generator of row batches)
+        max_pending: Maximum items produced ahead of the consumer
+
+    Yields:
+        Items of `items`, in order
+    """
+    pending: queue.Queue = queue.Queue(maxsize=max_pending)
+    stop = threading.Event()
+
+    def put(value) -> bool:
+        while not stop.is_set():
+            try:
+                pending.put(value, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+            put((_DONE, None))
+        except BaseException as e:
+            put((_DONE, e))
+
+    thread = threading.Thread(target=produce, name="csv-stream-reader", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = pending.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Consumer finished or failed: release a producer blocked on put()
+        stop.set()
+        thread.join()
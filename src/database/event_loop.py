@@ -0,0 +1,122 @@
+"""
+Background Event Loop
+
+Runs one asyncio event loop in a daemon thread per process. Motor clients
+are tied to the loop they first ran on, while Flask runs every async view
+in a loop of its own; submitting all database coroutines to this loop lets
+them share one client and one connection pool. A view that gathers several
+queries has them in flight at once, and with a threaded WSGI server the
+queries of all requests a worker is handling share the loop. Each request
+itself still occupies its thread until it returns.
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Awaitable, Optional
+
+from loguru import logger
+
+
+async def _gather(*coros: Awaitable) -> list:
+    """asyncio.gather, created inside the loop that runs it"""
+    return list(await asyncio.gather(*coros))
+
+
+class BackgroundEventLoop:
+    """An asyncio loop in a daemon thread, started on first use"""
+
+    def __init__(self, name: str = "mongodb-async-loop"):
+        """
+        Initialize the (not yet started) loop
+
+        Args:
+            name: Name of the loop thread
+        """
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop; started again in a forked child (threads do not survive fork)"""
+        with self._lock:
+            if self._loop is None or self._pid != os.getpid():
+                self._start()
+            return self._loop
+
+    def _start(self) -> None:
+        """Start the loop thread (caller holds _lock)"""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True)
+        self._thread.start()
+        self._pid = os.getpid()
+        logger.info(f"Started event loop thread {self.name} (pid {self._pid})")
+
+    def submit(self, coro: Awaitable) -> concurrent.futures.Future:
+        """
+        Schedule a coroutine on the loop
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            concurrent.futures.Future with its result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable, timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and wait for it (from synchronous code)
+
+        Args:
+            coro: Coroutine to run
+            timeout: Seconds to wait (None waits indefinitely)
+
+        Returns:
+            The coroutine's result
+
+        Raises:
+            Whatever the coroutine raises; concurrent.futures.TimeoutError
+                if it does not finish in time
+        """
+        return self.submit(coro).result(timeout)
+
+    async def call(self, coro: Awaitable) -> Any:
+        """
+        Await a coroutine that runs on the loop (from another event loop)
+
+        Args:
+            coro: Coroutine to run
+
+        Returns:
+            The coroutine's result
+        """
+        return await asyncio.wrap_future(self.submit(coro))
+
+    async def gather(self, *coros: Awaitable) -> list:
+        """
+        Run several coroutines concurrently on the loop and await all results
+
+        Args:
+            *coros: Coroutines to run
+
+        Returns:
+            List of results, in argument order
+        """
+        return await self.call(_gather(*coros))
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop the loop and wait for its thread"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+
+        if loop is None or self._pid != os.getpid():
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout)
+        loop.close()
@@ -0,0 +1,323 @@
+"""
+Delta-aware Incident Cache
+In-process copy of the incidents collection that applies single changes
+locally instead of re-reading the collection after every write
+"""
+
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional
+from loguru import logger
+
+
+class IncidentCache:
+    """Incidents keyed by number, with a generation counter and change listeners"""
+
+    def __init__(
+        self,
+        loader: Callable[[], List[Dict]],
+        fetcher: Optional[Callable[[List[str]], List[Dict]]] = None,
+        counter: Optional[Callable[[], int]] = None,
+        limit: Optional[int] = None,
+        drift_check_interval: float = 60.0
+    ):
+        """
+        Initialize cache (nothing is loaded until first use)
+
+        Args:
+            loader: Returns all incidents for a full (re)load
+            fetcher: Returns the current version of incidents by number,
+                used by apply_changes(); it must raise or return None when
+                the read fails, so that failure is not taken for deletion
+            counter: Returns the number of incidents in the database, used
+                to detect drift
+            limit: Maximum number of incidents the loader returns
+            drift_check_interval: Minimum seconds between drift checks
+        """
+        self._loader = loader
+        self._fetcher = fetcher
+        self._counter = counter
+        self.limit = limit
+        self.drift_check_interval = drift_check_interval
+
+        self._incidents: Optional[Dict[str, Dict]] = None
+        self._snapshot: Optional[List[Dict]] = None
+        self._listeners: List[Callable[[str, object], None]] = []
+        self._lock = threading.RLock()
+        # Events wait here until the cache lock is released, so slow
+        # listeners (re-encoding, index updates) never block readers
+        self._pending = deque()
+        self._dispatch_lock = threading.Lock()
+        self._last_drift_check = 0.0
+        # Database incidents left out by the last load (beyond the limit)
+        self._uncached = 0
+
+        self.generation = 0
+        self.last_loaded: Optional[datetime] = None
+        self.reloads = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the cache has been loaded"""
+        return self._incidents is not None
+
+    def __len__(self) -> int:
+        """Number of cached incidents (0 before the first load)"""
+        return len(self._incidents) if self._incidents is not None else 0
+
+    def add_listener(self, listener: Callable[[str, object], None]) -> None:
+        """
+        Register a callback for cache changes
+
+        The callback receives (event, payload): ('reload', incidents),
+        ('upsert', incidents), ('remove', numbers) or ('clear', None).
+        Callbacks run after the cache lock is released, one event at a
+        time and in order, possibly on another writer's thread.
+
+        Args:
+            listener: Callable to notify
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, payload) -> None:
+        """Bump the generation and queue the event (caller holds the lock)"""
+        self.generation += 1
+        self._snapshot = None
+        if self._listeners:
+            self._pending.append((event, payload))
+
+    def _dispatch(self) -> None:
+        """Deliver queued events (caller must not hold the cache lock)"""
+        while self._pending:
+            if not self._dispatch_lock.acquire(blocking=False):
+                return  # Another thread is delivering; it drains the queue
+            try:
+                while self._pending:
+                    event, payload = self._pending.popleft()
+                    for listener in self._listeners:
+                        try:
+                            listener(event, payload)
+                        except Exception as e:
+                            logger.error(f"Incident cache listener failed on {event}: {e}")
+            finally:
+                self._dispatch_lock.release()
+
+    def reload(self) -> int:
+        """
+        Reload every incident from the database
+
+        Returns:
+            Number of cached incidents
+        """
+        with self._lock:
+            count = self._reload_locked()
+        self._dispatch()
+        return count
+
+    def _reload_locked(self) -> int:
+        """reload() without dispatching (caller holds the lock)"""
+        incidents = self._loader()
+        self._incidents = {inc.get('number'): inc for inc in incidents}
+        self._uncached = self._count_uncached()
+        self.last_loaded = datetime.now()
+        self.reloads += 1
+        self._last_drift_check = time.monotonic()
+        logger.info(f"Incident cache loaded with {len(self._incidents)} incidents")
+        self._notify('reload', list(self._incidents.values()))
+        return len(self._incidents)
+
+    def _count_uncached(self) -> int:
+        """Database incidents the loader did not return (caller holds the lock)"""
+        if self._counter is None or self.limit is None or len(self._incidents) < self.limit:
+            return 0
+        try:
+            return max(self._counter() - len(self._incidents), 0)
+        except Exception as e:
+            logger.warning(f"Incident cache count failed: {e}")
+            return 0
+
+    def _ensure_loaded(self) -> None:
+        """Load on first use, and reload if the database count has drifted (caller holds the lock)"""
+        if self._incidents is None:
+            self._reload_locked()
+            return
+
+        if self._counter is None or time.monotonic() - self._last_drift_check < self.drift_check_interval:
+            return
+
+        self._last_drift_check = time.monotonic()
+        if self.has_drifted():
+            logger.warning("Incident cache drifted from the database, reloading")
+            self._reload_locked()
+
+    def has_drifted(self) -> bool:
+        """
+        Compare the cache size with the database count
+
+        Changes applied since the last load move both numbers alike, so
+        incidents the load left out (beyond the limit) are not drift.
+
+        Returns:
+            True if the cache no longer matches the database
+        """
+        if self._counter is None or self._incidents is None:
+            return False
+
+        try:
+            expected = self._counter()
+        except Exception as e:
+            logger.warning(f"Incident cache drift check failed: {e}")
+            return False
+
+        return expected - self._uncached != len(self._incidents)
+
+    def get_all(self) -> List[Dict]:
+        """
+        Get all cached incidents (loads on first use)
+
+        Returns:
+            List of incidents; treat it as read-only
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if self._snapshot is None:
+                self._snapshot = list(self._incidents.values())
+            snapshot = self._snapshot
+        self._dispatch()
+        return snapshot
+
+    def get(self, number: str) -> Optional[Dict]:
+        """
+        Get a cached incident by number
+
+        Args:
+            number: Incident number
+
+        Returns:
+            Incident dictionary or None
+        """
+        with self._lock:
+            self._ensure_loaded()
+            incident = self._incidents.get(number)
+        self._dispatch()
+        return incident
+
+    def upsert(self, incidents: Iterable[Dict]) -> int:
+        """
+        Insert or replace incidents by number
+
+        Args:
+            incidents: Current versions of the incidents
+
+        Returns:
+            Number of incidents applied
+        """
+        with self._lock:
+            count = self._upsert_locked(incidents)
+        self._dispatch()
+        return count
+
+    def _upsert_locked(self, incidents: Iterable[Dict]) -> int:
+        """upsert() without dispatching (caller holds the lock)"""
+        incidents = [inc for inc in incidents if inc.get('number')]
+        if self._incidents is None or not incidents:
+            return 0  # Picked up by the first load
+        for incident in incidents:
+            self._incidents[incident['number']] = incident
+        self._notify('upsert', incidents)
+        return len(incidents)
+
+    def remove(self, numbers: Iterable[str]) -> int:
+        """
+        Remove incidents by number
+
+        Args:
+            numbers: Incident numbers
+
+        Returns:
+            Number of incidents removed
+        """
+        with self._lock:
+            count = self._remove_locked(numbers)
+        self._dispatch()
+        return count
+
+    def _remove_locked(self, numbers: Iterable[str]) -> int:
+        """remove() without dispatching (caller holds the lock)"""
+        if self._incidents is None:
+            return 0
+        removed = [number for number in numbers if self._incidents.pop(number, None) is not None]
+        if removed:
+            self._notify('remove', removed)
+        return len(removed)
+
+    def clear(self) -> None:
+        """Empty the cache (e.g. after every incident was deleted)"""
+        with self._lock:
+            if self._incidents is not None:
+                self._incidents = {}
+                self._uncached = 0
+                self._notify('clear', None)
+        self._dispatch()
+
+    def apply_changes(self, numbers: Iterable[str]) -> Dict[str, int]:
+        """
+        Re-read changed incidents from the database and apply them
+
+        Numbers that no longer exist in the database are removed. If the
+        read fails nothing is changed, and the next access runs a drift
+        check instead.
+
+        Args:
+            numbers: Numbers of inserted, updated or deleted incidents
+
+        Returns:
+            Dictionary with upserted/removed counts (and failed, the number
+            of incidents that could not be re-read)
+        """
+        numbers = list(dict.fromkeys(numbers))
+
+        with self._lock:
+            delta = self._apply_changes_locked(numbers)
+        self._dispatch()
+        return delta
+
+    def _apply_changes_locked(self, numbers: List[str]) -> Dict[str, int]:
+        """apply_changes() without dispatching (caller holds the lock)"""
+        if self._incidents is None or not numbers:
+            return {'upserted': 0, 'removed': 0}
+
+        if self._fetcher is None:
+            return {'upserted': self._reload_locked(), 'removed': 0}
+
+        try:
+            current = self._fetcher(numbers)
+        except Exception as e:
+            logger.error(f"Incident cache could not re-read {len(numbers)} incidents: {e}")
+            current = None
+        if current is None:
+            self._last_drift_check = 0.0
+            return {'upserted': 0, 'removed': 0, 'failed': len(numbers)}
+
+        found = {inc.get('number') for inc in current}
+        return {
+            'upserted': self._upsert_locked(current),
+            'removed': self._remove_locked(number for number in numbers if number not in found)
+        }
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with size, generation and reload information
+        """
+        return {
+            'loaded': self.is_loaded,
+            'count': len(self),
+            'generation': self.generation,
+            'reloads': self.reloads,
+            'last_loaded': self.last_loaded.isoformat() if self.last_loaded else None
+        }
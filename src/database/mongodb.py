@@ -5,13 +5,27 @@ Handles all database operations for incident storage and retrieval.
 """
 
 import os
-from typing import List, Dict, Optional
+import sys
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator, List, Dict, Optional, Tuple
 from datetime import datetime
-from pymongo import MongoClient, ASCENDING, DESCENDING
-from pymongo.errors import DuplicateKeyError
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from loguru import logger
 import csv
 import json
+import textwrap
+
+from .connection import get_connection_health, get_mongo_client
+from .csv_stream import iter_prefetched, open_text_stream
+from .pagination import (
+    INCIDENT_PAGE_KEYS, combine_filters, decode_cursor, encode_cursor, keyset_filter, page_position
+)
+from .projections import Projection, resolve_projection
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from column_mapping import LAYOUT_EXACT, get_mapping_plan
+from data_validation.date_parsing import TIMESTAMP_SUFFIX, add_timestamps, to_timestamp, utc_now
 
 
 class MongoDBClient:
@@ -21,7 +35,8 @@ class MongoDBClient:
         self,
         connection_string: str = None,
         database_name: str = "incident_analyzer",
-        collection_name: str = "incidents"
+        collection_name: str = "incidents",
+        bulk_batch_size: int = 1000
     ):
         """
         Initialize MongoDB client
@@ -30,6 +45,7 @@ class MongoDBClient:
             connection_string: MongoDB connection string
             database_name: Name of the database
             collection_name: Name of the collection
+            bulk_batch_size: Documents per insert_many round-trip in bulk inserts
         """
         self.connection_string = connection_string or os.getenv(
             "MONGODB_URI", 
@@ -37,15 +53,44 @@ class MongoDBClient:
         )
         self.database_name = database_name
         self.collection_name = collection_name
+        self.bulk_batch_size = bulk_batch_size
         
-        # Initialize client
+        # Initialize client (shared pool, see database.connection)
         logger.info(f"Connecting to MongoDB: {self.database_name}")
-        self.client = MongoClient(self.connection_string)
-        self.db = self.client[self.database_name]
-        self.collection = self.db[self.collection_name]
+        self._bind()
         
         # Create indexes
         self._create_indexes()
+    
+    def _bind(self):
+        """Attach to this process's shared client"""
+        self._client = get_mongo_client(self.connection_string)
+        self._collection = self._client[self.database_name][self.collection_name]
+        self._pid = os.getpid()
+    
+    @property
+    def client(self):
+        """Shared MongoClient; re-bound after fork (e.g. gunicorn --preload)"""
+        if self._pid != os.getpid():
+            self._bind()
+        return self._client
+    
+    @property
+    def db(self):
+        """Incident database"""
+        return self.client[self.database_name]
+    
+    @property
+    def collection(self):
+        """Incident collection"""
+        if self._pid != os.getpid():
+            self._bind()
+        return self._collection
+    
+    @property
+    def health(self):
+        """ConnectionHealth of the shared client (state, last failure, flaps)"""
+        return get_connection_health(self.connection_string)
         
     def _create_indexes(self):
         """Create necessary indexes for better performance"""
@@ -59,8 +104,14 @@ class MongoDBClient:
             # Index on priority
             self.collection.create_index("priority")
             
-            # Index on created date
-            self.collection.create_index([("sys_created_on", DESCENDING)])
+            # Keyset pagination order (also serves sorting by created date)
+            self.collection.create_index([("sys_created_on", DESCENDING), ("number", DESCENDING)])
+            
+            # Index on updated date
+            self.collection.create_index([("sys_updated_on", DESCENDING)])
+            
+            # Index on updated epoch seconds (change polling)
+            self.collection.create_index([("sys_updated_on" + TIMESTAMP_SUFFIX, DESCENDING)])
             
             # Text index for search
             self.collection.create_index([
@@ -100,9 +151,12 @@ class MongoDBClient:
             Inserted document ID or None if failed
         """
         try:
-            # Add timestamp if not present
+            # Add timestamps if not present (UTC, plus <field>_ts epoch seconds)
             if "sys_created_on" not in incident:
-                incident["sys_created_on"] = datetime.now().isoformat()
+                incident["sys_created_on"] = utc_now().isoformat()
+            if "sys_updated_on" not in incident:
+                incident["sys_updated_on"] = incident["sys_created_on"]
+            add_timestamps(incident)
             
             result = self.collection.insert_one(incident)
             logger.info(f"Inserted incident: {incident.get('number')}")
@@ -114,12 +168,13 @@ class MongoDBClient:
             logger.error(f"Error inserting incident: {e}")
             return None
     
-    def insert_many_incidents(self, incidents: List[Dict]) -> int:
+    def insert_many_incidents(self, incidents: List[Dict], batch_size: int = None) -> int:
         """
         Insert multiple incidents
         
         Args:
             incidents: List of incident dictionaries
+            batch_size: Documents per round-trip (default: bulk_batch_size)
             
         Returns:
             Number of successfully inserted incidents
@@ -127,19 +182,167 @@ class MongoDBClient:
         if not incidents:
             return 0
         
-        inserted_count = 0
-        errors = 0
+        result = self.bulk_insert_incidents(incidents, batch_size=batch_size)
+        
+        logger.info(
+            f"Bulk insert completed: {result['inserted']} inserted, "
+            f"{result['duplicates'] + result['errors']} errors, {result['unknown']} unknown"
+        )
+        return result['inserted']
+    
+    def bulk_insert_incidents(self, incidents: List[Dict], batch_size: int = None) -> Dict:
+        """
+        Insert incidents with unordered insert_many, one round-trip per batch
+        
+        Rows that fail (e.g. duplicate numbers) do not stop the rest of the
+        batch; they are reported individually from the BulkWriteError details.
+        If a batch fails outright (e.g. connection lost), part of it may
+        already be stored: the batch's _ids are looked up, and rows whose
+        outcome cannot be determined are counted as unknown, not as errors.
+        
+        Args:
+            incidents: List of incident dictionaries
+            batch_size: Documents per round-trip (default: bulk_batch_size)
+            
+        Returns:
+            Dictionary with inserted/duplicates/errors/unknown counts, the
+            inserted numbers and per-row failures (position in `incidents`,
+            number, error code and message; unknown rows have code 'unknown')
+        """
+        batch_size = batch_size or self.bulk_batch_size
+        result = {
+            'inserted': 0,
+            'duplicates': 0,
+            'errors': 0,
+            'unknown': 0,
+            'inserted_numbers': [],
+            'failures': []
+        }
         
+        now = utc_now().isoformat()
         for incident in incidents:
-            if self.insert_incident(incident):
-                inserted_count += 1
-            else:
-                errors += 1
+            # Same timestamp defaults as insert_incident
+            incident.setdefault("sys_created_on", now)
+            incident.setdefault("sys_updated_on", incident["sys_created_on"])
+            add_timestamps(incident)
+        
+        for start in range(0, len(incidents), batch_size):
+            batch = incidents[start:start + batch_size]
+            failed = {}
+            
+            try:
+                self.collection.insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details.get('writeErrors', []):
+                    failed[error['index']] = error
+            except Exception as e:
+                # Batch interrupted (e.g. connection lost): keep what was stored
+                logger.error(f"Error inserting batch at row {start}: {e}")
+                failed = self._unconfirmed_rows(batch, str(e))
+            
+            for i, incident in enumerate(batch):
+                error = failed.get(i)
+                if error is None:
+                    result['inserted'] += 1
+                    result['inserted_numbers'].append(incident.get('number'))
+                    continue
+                
+                if error.get('code') == 11000:
+                    result['duplicates'] += 1
+                elif error.get('code') == 'unknown':
+                    result['unknown'] += 1
+                else:
+                    result['errors'] += 1
+                result['failures'].append({
+                    'row': start + i,
+                    'number': incident.get('number'),
+                    'code': error.get('code'),
+                    'message': error.get('errmsg')
+                })
+        
+        return result
+    
+    def _unconfirmed_rows(self, batch: List[Dict], message: str) -> Dict[int, Dict]:
+        """
+        Rows of an interrupted insert_many that are not stored
+        
+        insert_many assigns every document its _id before sending, so the
+        rows that made it are the ones whose _id is now in the collection.
+        
+        Args:
+            batch: Documents passed to insert_many
+            message: Error message of the interrupted insert
+            
+        Returns:
+            Dictionary of batch position -> error ({'code', 'errmsg'}); code
+            is 'unknown' for every row if the lookup fails as well
+        """
+        ids = [doc['_id'] for doc in batch if '_id' in doc]
+        try:
+            stored = {doc['_id'] for doc in self.collection.find({'_id': {'$in': ids}}, {'_id': 1})} if ids else set()
+        except Exception as e:
+            logger.error(f"Could not check which rows of the batch were stored: {e}")
+            return {i: {'code': 'unknown', 'errmsg': message} for i in range(len(batch))}
+        
+        return {
+            i: {'code': None, 'errmsg': message}
+            for i, doc in enumerate(batch) if doc.get('_id') not in stored
+        }
+    
+    def upsert_incidents(self, incidents: List[Dict], batch_size: int = None) -> Dict:
+        """
+        Insert new incidents and update existing ones, matched by number
+        
+        Uses unordered bulk writes of UpdateOne(upsert=True), one
+        round-trip per batch, so re-syncing a record never fails on the
+        unique number index.
+        
+        Args:
+            incidents: Incident dictionaries (each needs a number)
+            batch_size: Documents per round-trip (default: bulk_batch_size)
+            
+        Returns:
+            Dictionary with inserted/updated/unchanged counts, skipped
+            (records without a number, which can never be stored) and
+            errors (failed writes, worth retrying)
+        """
+        batch_size = batch_size or self.bulk_batch_size
+        result = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'skipped': 0, 'errors': 0}
+        
+        operations = []
+        for incident in incidents:
+            if not incident.get('number'):
+                result['skipped'] += 1
+                continue
+            fields = {k: v for k, v in incident.items() if k != '_id'}
+            fields.setdefault("sys_updated_on", fields.get("sys_created_on") or utc_now().isoformat())
+            add_timestamps(fields)
+            operations.append(UpdateOne({'number': fields['number']}, {'$set': fields}, upsert=True))
+        
+        for start in range(0, len(operations), batch_size):
+            batch = operations[start:start + batch_size]
+            try:
+                outcome = self.collection.bulk_write(batch, ordered=False)
+                details = outcome.bulk_api_result
+            except BulkWriteError as e:
+                details = e.details
+                result['errors'] += len(details.get('writeErrors', []))
+            except Exception as e:
+                logger.error(f"Error upserting batch at row {start}: {e}")
+                result['errors'] += len(batch)
+                continue
+            
+            upserted = details.get('nUpserted', 0)
+            modified = details.get('nModified', 0)
+            result['inserted'] += upserted
+            result['updated'] += modified
+            result['unchanged'] += details.get('nMatched', 0) - modified
         
         logger.info(
-            f"Bulk insert completed: {inserted_count} inserted, {errors} errors"
+            f"Upsert completed: {result['inserted']} inserted, {result['updated']} updated, "
+            f"{result['unchanged']} unchanged, {result['skipped']} without number, {result['errors']} errors"
         )
-        return inserted_count
+        return result
     
     def get_incident_by_number(self, number: str) -> Optional[Dict]:
         """
@@ -156,12 +359,85 @@ class MongoDBClient:
             incident['_id'] = str(incident['_id'])
         return incident
     
+    def get_incidents_by_numbers(self, numbers: List[str], fields: Projection = None) -> Optional[List[Dict]]:
+        """
+        Get several incidents by incident number
+        
+        Args:
+            numbers: Incident numbers
+            fields: Projection name ('summary', 'rag', 'full') or explicit
+                projection (default: whole documents)
+            
+        Returns:
+            List of incident dictionaries (missing numbers are ignored), or
+                None if the read failed
+            
+        Raises:
+            ValueError: If the projection name is unknown
+        """
+        if not numbers:
+            return []
+        
+        projection = resolve_projection(fields)
+        try:
+            return list(self.iter_incidents({"number": {"$in": list(numbers)}}, projection))
+        except Exception as e:
+            logger.error(f"Error fetching incidents by number: {e}")
+            return None
+    
+    def iter_incidents(
+        self,
+        query: Optional[Dict] = None,
+        projection: Projection = None,
+        batch_size: int = 1000,
+        limit: int = 0,
+        skip: int = 0,
+        sort: Optional[List[Tuple[str, int]]] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream incidents from a server-side cursor
+        
+        Only one batch is held in memory at a time; the cursor is closed
+        when the iterator is exhausted or discarded.
+        
+        Args:
+            query: MongoDB filter (default: all incidents)
+            projection: Fields to return, as a projection name ('summary',
+                'rag', 'full'), a list of names or a projection document
+                (default: all fields)
+            batch_size: Documents per round-trip
+            limit: Maximum number of documents (0 for no limit)
+            skip: Number of documents to skip
+            sort: List of (field, direction) pairs
+            
+        Yields:
+            Incident dictionaries with _id as a string
+            
+        Raises:
+            pymongo.errors.PyMongoError: Database errors are not swallowed,
+                so a failed read cannot pass for a complete one
+        """
+        cursor = self.collection.find(query or {}, resolve_projection(projection)).batch_size(batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        if skip:
+            cursor = cursor.skip(skip)
+        if limit:
+            cursor = cursor.limit(limit)
+        
+        with cursor:
+            for incident in cursor:
+                if '_id' in incident:
+                    incident['_id'] = str(incident['_id'])
+                yield incident
+    
     def get_all_incidents(
         self,
         skip: int = 0,
         limit: int = 100,
         sort_by: str = "sys_created_on",
-        sort_order: int = -1
+        sort_order: int = -1,
+        fields: Projection = None
     ) -> List[Dict]:
         """
         Get all incidents with pagination
@@ -171,25 +447,85 @@ class MongoDBClient:
             limit: Maximum number of documents to return
             sort_by: Field to sort by
             sort_order: 1 for ascending, -1 for descending
+            fields: Projection name ('summary', 'rag', 'full') or explicit
+                projection (default: whole documents)
             
         Returns:
-            List of incident dictionaries
+            List of incident dictionaries (see iter_incidents() to stream)
+            
+        Raises:
+            ValueError: If the projection name is unknown
         """
+        projection = resolve_projection(fields)
         try:
-            cursor = self.collection.find().skip(skip).limit(limit).sort(
-                sort_by, sort_order
-            )
-            incidents = list(cursor)
-            
-            # Convert ObjectId to string
-            for incident in incidents:
-                incident['_id'] = str(incident['_id'])
-            
-            return incidents
+            return list(self.iter_incidents(
+                projection=projection, skip=skip, limit=limit, sort=[(sort_by, sort_order)]
+            ))
         except Exception as e:
             logger.error(f"Error fetching incidents: {e}")
             return []
     
+    def get_incidents_page(
+        self,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_order: int = -1,
+        query: Optional[Dict] = None,
+        fields: Projection = None
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Get one page of incidents ordered by (sys_created_on, number)
+        
+        Keyset pagination: each page continues after the last incident of
+        the previous one, so deep pages cost the same as the first and
+        concurrent inserts neither skip nor repeat incidents.
+        
+        Args:
+            limit: Maximum number of incidents per page
+            cursor: next_cursor of the previous page (None for the first page)
+            sort_order: 1 for ascending, -1 for descending (ignored when a
+                cursor is given; the cursor keeps its own order)
+            query: Optional additional MongoDB filter
+            fields: Projection name ('summary', 'rag', 'full') or explicit
+                projection (default: whole documents); the sort keys are
+                always included
+            
+        Returns:
+            Tuple of (incidents, next_cursor or None on the last page)
+            
+        Raises:
+            ValueError: If the cursor is malformed or the projection name
+                is unknown
+        """
+        projection = resolve_projection(fields, required=INCIDENT_PAGE_KEYS)
+        position = None
+        if cursor:
+            decoded = decode_cursor(cursor)
+            sort_order = decoded['sort_order']
+            position = keyset_filter(INCIDENT_PAGE_KEYS, decoded['values'], sort_order)
+        
+        try:
+            # One extra document tells whether another page follows
+            documents = list(
+                self.collection.find(combine_filters(query, position), projection)
+                .sort([(key, sort_order) for key in INCIDENT_PAGE_KEYS])
+                .limit(limit + 1)
+            )
+        except Exception as e:
+            logger.error(f"Error fetching incidents page: {e}")
+            return [], None
+        
+        incidents = documents[:limit]
+        next_cursor = None
+        if len(documents) > limit and incidents:
+            next_cursor = encode_cursor(page_position(incidents[-1]), sort_order)
+        
+        for incident in incidents:
+            if '_id' in incident:
+                incident['_id'] = str(incident['_id'])
+        
+        return incidents, next_cursor
+    
     def update_incident(self, number: str, update_data: Dict) -> bool:
         """
         Update an incident
@@ -205,8 +541,10 @@ class MongoDBClient:
             # Remove _id if present
             update_data.pop('_id', None)
             
-            # Add updated timestamp
-            update_data['sys_updated_on'] = datetime.now().isoformat()
+            # Add updated timestamp (the change watcher polls on the _ts field)
+            now = utc_now()
+            update_data['sys_updated_on'] = now.isoformat()
+            update_data['sys_updated_on' + TIMESTAMP_SUFFIX] = to_timestamp(now)
             
             result = self.collection.update_one(
                 {"number": number},
@@ -251,7 +589,8 @@ class MongoDBClient:
         query: str = None,
         category: str = None,
         priority: str = None,
-        limit: int = 100
+        limit: int = 100,
+        fields: Projection = None
     ) -> List[Dict]:
         """
         Search incidents by text query and filters
@@ -261,10 +600,16 @@ class MongoDBClient:
             category: Filter by category
             priority: Filter by priority
             limit: Maximum number of results
+            fields: Projection name ('summary', 'rag', 'full') or explicit
+                projection (default: whole documents)
             
         Returns:
             List of matching incidents
+            
+        Raises:
+            ValueError: If the projection name is unknown
         """
+        projection = resolve_projection(fields)
         try:
             filter_dict = {}
             
@@ -280,14 +625,7 @@ class MongoDBClient:
             if priority:
                 filter_dict['priority'] = priority
             
-            cursor = self.collection.find(filter_dict).limit(limit)
-            incidents = list(cursor)
-            
-            # Convert ObjectId to string
-            for incident in incidents:
-                incident['_id'] = str(incident['_id'])
-            
-            return incidents
+            return list(self.iter_incidents(filter_dict, projection, limit=limit))
         except Exception as e:
             logger.error(f"Error searching incidents: {e}")
             return []
@@ -330,74 +668,143 @@ class MongoDBClient:
         """
         logger.info(f"Importing incidents from CSV: {csv_file_path}")
         
+        try:
+            with open(csv_file_path, 'rb') as f:
+                return self.import_from_stream(f)
+        except OSError as e:
+            logger.error(f"Error importing CSV: {e}")
+            return {
+                'imported': 0,
+                'skipped': 0,
+                'errors': 1,
+                'error_message': str(e),
+                'total': 1,
+                'imported_numbers': []
+            }
+    
+    def import_from_stream(
+        self,
+        stream: BinaryIO,
+        batch_size: int = None,
+        max_pending_batches: int = 2,
+        on_imported: Optional[Callable[[List[str]], None]] = None
+    ) -> Dict:
+        """
+        Import incidents from a binary CSV stream without reading it whole
+        
+        The encoding is detected on a prefix sample and the rest is decoded
+        incrementally. Rows are parsed in a reader thread into batches that
+        are bulk inserted as they arrive; the reader stops when
+        max_pending_batches are waiting, so memory stays bounded however
+        large the file is.
+        
+        Args:
+            stream: Binary file object (open file, upload stream)
+            batch_size: Rows per bulk insert (default: bulk_batch_size)
+            max_pending_batches: Parsed batches allowed to wait for the database
+            on_imported: Called with the numbers inserted by each batch; when
+                given, the numbers are not collected in the result
+            
+        Returns:
+            Dictionary with import statistics (imported_numbers lists every
+            inserted number unless on_imported was given; unknown counts rows
+            of interrupted batches whose outcome could not be checked)
+        """
+        batch_size = batch_size or self.bulk_batch_size
+        
         imported = 0
         skipped = 0
         errors = 0
+        unknown = 0
+        imported_numbers = []
         
-        try:
-            # Try multiple encodings to handle different CSV formats
-            encodings = ['utf-8', 'utf-8-sig', 'latin-1', 'cp1252', 'iso-8859-1']
-            file_content = None
-            successful_encoding = None
-            
-            for encoding in encodings:
-                try:
-                    with open(csv_file_path, 'r', encoding=encoding) as f:
-                        file_content = f.read()
-                        successful_encoding = encoding
-                        break
-                except (UnicodeDecodeError, UnicodeError):
-                    continue
-            
-            if file_content is None:
-                raise ValueError("Could not decode CSV file with any known encoding. Please save the file as UTF-8.")
-            
-            logger.info(f"Successfully decoded CSV with encoding: {successful_encoding}")
-            
-            # Parse CSV with detected encoding
-            from io import StringIO
-            csv_data = StringIO(file_content)
-            reader = csv.DictReader(csv_data)
-            
-            # Log CSV column headers for debugging
-            if reader.fieldnames:
-                logger.info(f"CSV columns found: {reader.fieldnames}")
-            
+        def read_batches():
+            """Yield (incidents, empty rows, invalid rows) per batch (reader thread)"""
+            text, encoding = open_text_stream(stream)
+            logger.info(f"Streaming CSV with detected encoding: {encoding}")
+            
+            reader = csv.reader(text)
+            headers = next(reader, None)
+            if not headers:
+                return
+            
+            # Resolve the header row once; rows are then mapped by position
+            plan = get_mapping_plan(tuple(headers), LAYOUT_EXACT)
+            logger.info(f"CSV columns found: {headers}")
+            logger.info(f"CSV column mapping: {plan.field_mapping()}")
+            
+            batch, empty, invalid = [], 0, 0
             row_count = 0
-            for row in reader:
+            for values in reader:
+                if not values:
+                    continue  # Blank line
+                
                 row_count += 1
                 
                 # Log first row for debugging
                 if row_count == 1:
-                    logger.info(f"First row sample: {dict(list(row.items())[:3])}")
+                    logger.info(f"First row sample: {dict(zip(headers[:3], values[:3]))}")
                 
                 # Skip completely empty rows
-                if not any(v and str(v).strip() for v in row.values()):
-                    skipped += 1
+                if not any(v.strip() for v in values):
+                    empty += 1
                     continue
                 
                 # Convert row to incident format
-                incident = self._csv_row_to_incident(row)
+                incident = self._csv_row_to_incident(plan.apply(values))
                 
                 if incident:
-                    if self.insert_incident(incident):
-                        imported += 1
-                        if imported <= 3:
-                            logger.info(f"Successfully imported: {incident['number']}")
-                    else:
-                        skipped += 1
-                        logger.debug(f"Skipped duplicate: {incident.get('number', 'unknown')}")
+                    batch.append(incident)
                 else:
-                    errors += 1
+                    invalid += 1
+                
+                if len(batch) >= batch_size:
+                    yield batch, empty, invalid
+                    batch, empty, invalid = [], 0, 0
+            
+            if batch or empty or invalid:
+                yield batch, empty, invalid
+        
+        try:
+            for batch, empty, invalid in iter_prefetched(read_batches(), max_pending_batches):
+                skipped += empty
+                errors += invalid
+                if not batch:
+                    continue
+                
+                # Duplicates count as skipped
+                outcome = self.bulk_insert_incidents(batch, batch_size=batch_size)
+                
+                for number in outcome['inserted_numbers']:
+                    imported += 1
+                    if imported <= 3:
+                        logger.info(f"Successfully imported: {number}")
+                if on_imported is None:
+                    imported_numbers.extend(outcome['inserted_numbers'])
+                elif outcome['inserted_numbers']:
+                    on_imported(outcome['inserted_numbers'])
+                for failure in outcome['failures']:
+                    if failure['code'] == 11000:
+                        logger.debug(f"Skipped duplicate: {failure['number'] or 'unknown'}")
+                    else:
+                        logger.warning(f"Failed to import {failure['number']}: {failure['message']}")
+                
+                skipped += outcome['duplicates']
+                errors += outcome['errors']
+                unknown += outcome['unknown']
             
             result = {
                 'imported': imported,
                 'skipped': skipped,
                 'errors': errors,
-                'total': imported + skipped + errors
+                'unknown': unknown,
+                'total': imported + skipped + errors + unknown,
+                'imported_numbers': imported_numbers
             }
             
-            logger.info(f"CSV import completed: {result}")
+            logger.info(
+                f"CSV import completed: {imported} imported, {skipped} skipped, {errors} errors, {unknown} unknown"
+            )
             return result
             
         except Exception as e:
@@ -406,53 +813,31 @@ class MongoDBClient:
                 'imported': imported,
                 'skipped': skipped,
                 'errors': errors + 1,
+                'unknown': unknown,
                 'error_message': str(e),
-                'total': imported + skipped + errors + 1
+                'total': imported + skipped + errors + unknown + 1,
+                'imported_numbers': imported_numbers
             }
     
-    def _csv_row_to_incident(self, row: Dict) -> Optional[Dict]:
+    def _csv_row_to_incident(self, fields: Dict[str, str]) -> Optional[Dict]:
         """
-        Convert CSV row to incident format
+        Convert a mapped CSV row to incident format
         
         Args:
-            row: CSV row dictionary
+            fields: Incident field -> stripped CSV value, as produced by a
+                ColumnMappingPlan (unmapped fields may be missing)
             
         Returns:
             Incident dictionary or None if invalid
         """
         try:
-            # Strip whitespace from keys and values, handle None
-            cleaned_row = {}
-            for k, v in row.items():
-                if k:
-                    key = str(k).strip()
-                    if v is None:
-                        cleaned_row[key] = ''
-                    elif isinstance(v, str):
-                        cleaned_row[key] = v.strip()
-                    else:
-                        cleaned_row[key] = str(v).strip()
+            def get_value(field):
+                """Mapped value of a field, '' if the CSV has no such column"""
+                return fields.get(field) or ''
             
-            row = cleaned_row
-            
-            # Helper function to get values with multiple key attempts
-            def get_value(*keys):
-                """Try multiple key variations and return first non-empty value"""
-                for key in keys:
-                    val = row.get(key, '')
-                    if val and val != 'None':
-                        return val
-                return ''
-            
-            # Extract fields with multiple column name variations
-            number = get_value('number', 'Number', 'incident_number', 'Incident Number', 
-                              'Incident_Number', 'incident_id', 'ID')
-            
-            short_desc = get_value('short_description', 'Short description', 'Short Description', 
-                                  'short_desc', 'summary', 'Summary', 'Title', 'title')
-            
-            description = get_value('description', 'Description', 'details', 'Details',
-                                   'long_description', 'Long Description')
+            number = get_value('number')
+            short_desc = get_value('short_description')
+            description = get_value('description')
             
             # If description is empty but short_description exists, use short_description
             if not description and short_desc:
@@ -467,23 +852,21 @@ class MongoDBClient:
                 'number': number,
                 'short_description': short_desc or description[:100] if description else 'Imported incident',
                 'description': description or short_desc or 'No description provided',
-                'contact_type': get_value('contact_type', 'Contact type', 'Contact Type', 'contacttype') or '',
-                'service_offering': get_value('service_offering', 'Service offering', 'Service Offering', 'serviceoffering') or '',
-                'category': get_value('category', 'Category') or 'General',
-                'subcategory': get_value('subcategory', 'Subcategory', 'sub_category', 'Sub Category') or '',
-                'priority': get_value('priority', 'Priority', 'pri') or '3',
-                'state': get_value('state', 'State', 'status', 'Status', 'incident_state', 'Incident state', 'incident state') or 'Closed',
-                'resolution_notes': get_value('resolution_notes', 'Resolution notes', 'Resolution Notes', 
-                                             'resolution', 'Resolution', 'fix', 'Fix', 'solution', 'Solution',
-                                             'resolutionnotes') or '',
-                'close_notes': get_value('close_notes', 'Close Notes', 'Close notes', 'closing_notes', 'closenotes') or '',
-                'closed_by': get_value('closed_by', 'Closed by', 'Closed By', 'closedby') or '',
-                'work_notes': get_value('work_notes', 'Work Notes', 'Work notes', 'notes', 'Notes', 'worknotes') or '',
-                'assignment_group': get_value('assignment_group', 'Assignment group', 'Assignment Group', 'group', 'assignmentgroup') or '',
-                'assigned_to': get_value('assigned_to', 'Assigned to', 'Assigned To', 'assignee', 'Assignee', 'assignedto') or '',
-                'sys_created_on': get_value('sys_created_on', 'Created', 'created_on', 'created', 'Created On') or datetime.now().isoformat(),
-                'sys_updated_on': get_value('sys_updated_on', 'Updated', 'updated_on', 'modified', 'Updated On') or datetime.now().isoformat(),
-                'resolved_at': get_value('resolved_at', 'Resolved', 'Resolved At', 'resolved', 'resolution_date', 'Resolved at') or '',
+                'contact_type': get_value('contact_type'),
+                'service_offering': get_value('service_offering'),
+                'category': get_value('category') or 'General',
+                'subcategory': get_value('subcategory'),
+                'priority': get_value('priority') or '3',
+                'state': get_value('state') or 'Closed',
+                'resolution_notes': get_value('resolution_notes'),
+                'close_notes': get_value('close_notes'),
+                'closed_by': get_value('closed_by'),
+                'work_notes': get_value('work_notes'),
+                'assignment_group': get_value('assignment_group'),
+                'assigned_to': get_value('assigned_to'),
+                'sys_created_on': get_value('sys_created_on') or datetime.now().isoformat(),
+                'sys_updated_on': get_value('sys_updated_on') or datetime.now().isoformat(),
+                'resolved_at': get_value('resolved_at'),
             }
             
             # Final validation - must have at least a description
@@ -511,12 +894,17 @@ class MongoDBClient:
             True if successful, False otherwise
         """
         try:
-            incidents = self.get_all_incidents(limit=10000)
-            
+            count = 0
             with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(incidents, f, indent=2, ensure_ascii=False)
-            
-            logger.info(f"Exported {len(incidents)} incidents to {output_file}")
+                # Written one incident at a time; same layout as json.dump(indent=2)
+                f.write('[')
+                for incident in self.iter_incidents(sort=[("sys_created_on", DESCENDING)]):
+                    f.write(',\n' if count else '\n')
+                    f.write(textwrap.indent(json.dumps(incident, indent=2, ensure_ascii=False), '  '))
+                    count += 1
+                f.write('\n]' if count else ']')
+            
+            logger.info(f"Exported {count} incidents to {output_file}")
             return True
             
         except Exception as e:
@@ -524,10 +912,13 @@ class MongoDBClient:
             return False
     
     def close(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
-            logger.info("MongoDB connection closed")
+        """
+        Release the MongoDB connection
+        
+        The pool is shared with other components, so it stays open; use
+        database.connection.close_mongo_clients() at shutdown.
+        """
+        logger.info("MongoDB client released")
 
 
 # Global database client instance
@@ -0,0 +1,128 @@
+"""
+Keyset Pagination Helpers
+
+Builds MongoDB filters that continue a sorted scan after the last
+document of the previous page, and packs that position into an opaque
+cursor token for API clients. Unlike skip(), the cost of a page does not
+grow with its depth, and rows inserted meanwhile never shift a page.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Sequence
+
+
+# Sort keys of incident listings; number is unique, so the position is exact
+INCIDENT_PAGE_KEYS = ('sys_created_on', 'number')
+
+
+def encode_cursor(values: Sequence[Any], sort_order: int) -> str:
+    """
+    Pack a page position into a URL-safe token
+
+    Args:
+        values: Sort key values of the last document returned
+        sort_order: 1 for ascending, -1 for descending
+
+    Returns:
+        Opaque cursor string
+    """
+    payload = json.dumps({'k': list(values), 'o': sort_order}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token: str, key_count: int = len(INCIDENT_PAGE_KEYS)) -> Dict[str, Any]:
+    """
+    Unpack a token from encode_cursor()
+
+    Args:
+        token: Cursor string
+        key_count: Number of sort keys expected
+
+    Returns:
+        Dictionary with 'values' (list) and 'sort_order'
+
+    Raises:
+        ValueError: If the token is malformed
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values, sort_order = payload['k'], payload['o']
+    except (ValueError, TypeError, KeyError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {token!r}") from e
+
+    if not isinstance(values, list) or len(values) != key_count or sort_order not in (1, -1):
+        raise ValueError(f"Invalid cursor: {token!r}")
+
+    return {'values': values, 'sort_order': sort_order}
+
+
+def _after(field: str, value: Any, sort_order: int) -> List[Dict]:
+    """Conditions matching values of one field that sort strictly after value"""
+    # BSON orders null/missing before strings: first ascending, last descending
+    if value is None:
+        return [{field: {'$ne': None}}] if sort_order == 1 else []
+    if sort_order == 1:
+        return [{field: {'$gt': value}}]
+    return [{field: {'$lt': value}}, {field: None}]
+
+
+def keyset_filter(keys: Sequence[str], values: Sequence[Any], sort_order: int) -> Dict:
+    """
+    Filter for documents after a position in a (keys..., sort_order) scan
+
+    Produces one $or branch per key prefix, e.g. for (created, number)
+    descending: created < c, created missing, or created == c and
+    number < n. Each branch is a bounded range on the compound index.
+    Comparison operators only match values of the same BSON type, so the
+    keys must be stored consistently (incident dates are strings).
+
+    Args:
+        keys: Sort fields, most significant first
+        values: Their values in the last document of the previous page
+        sort_order: 1 for ascending, -1 for descending (all keys)
+
+    Returns:
+        MongoDB filter document
+    """
+    branches = []
+    for i, field in enumerate(keys):
+        equal = {keys[j]: values[j] for j in range(i)}
+        for condition in _after(field, values[i], sort_order):
+            branches.append({**equal, **condition})
+
+    # Nothing sorts after the position: match no documents
+    return {'$or': branches} if branches else {'_id': {'$exists': False}}
+
+
+def page_position(document: Dict, keys: Sequence[str] = INCIDENT_PAGE_KEYS) -> List[Any]:
+    """
+    Sort key values of a document, None where a key is missing
+
+    Args:
+        document: Last document of a page
+        keys: Sort fields
+
+    Returns:
+        List of values in key order
+    """
+    return [document.get(key) for key in keys]
+
+
+def combine_filters(*filters: Optional[Dict]) -> Dict:
+    """
+    AND together the non-empty filters
+
+    Args:
+        filters: MongoDB filter documents (None or {} are skipped)
+
+    Returns:
+        Single filter document
+    """
+    active = [f for f in filters if f]
+    if not active:
+        return {}
+    if len(active) == 1:
+        return active[0]
+    return {'$and': active}
@@ -0,0 +1,73 @@
+"""
+Named Field Projections
+
+List views and caches rarely need whole incidents; description,
+work_notes and close_notes can be most of a document. Queries take a
+projection name instead of spelling out fields, so the server only sends
+(and the driver only decodes) what the caller uses.
+"""
+
+from typing import Dict, List, Optional, Sequence, Union
+
+
+PROJECTION_SUMMARY = 'summary'
+PROJECTION_RAG = 'rag'
+PROJECTION_FULL = 'full'
+
+# Fields per projection name (None = whole document)
+PROJECTIONS: Dict[str, Optional[tuple]] = {
+    # Incident tables and pickers
+    PROJECTION_SUMMARY: (
+        'number', 'short_description', 'category', 'priority', 'state',
+        'sys_created_on', 'sys_updated_on'
+    ),
+    # Resolution search: lexical index, embeddings and the knowledge base
+    PROJECTION_RAG: (
+        'number', 'short_description', 'description', 'category', 'subcategory',
+        'priority', 'resolution_notes', 'close_notes', 'sys_created_on', 'sys_updated_on'
+    ),
+    PROJECTION_FULL: None,
+}
+
+Projection = Union[str, Sequence[str], Dict, None]
+
+
+def resolve_projection(fields: Projection, required: Sequence[str] = ()) -> Union[List[str], Dict, None]:
+    """
+    Turn a projection name (or explicit projection) into a find() projection
+
+    Named projections leave out _id. Field lists and projection documents
+    are passed through, as pymongo takes them.
+
+    Args:
+        fields: Projection name, list of field names, projection document,
+            or None for whole documents
+        required: Fields the caller needs whatever the projection (e.g.
+            pagination keys); added to inclusion projections
+
+    Returns:
+        Projection for Collection.find(), or None for whole documents
+
+    Raises:
+        ValueError: If the projection name is unknown
+    """
+    if isinstance(fields, str):
+        if fields not in PROJECTIONS:
+            raise ValueError(f"Unknown projection '{fields}' "
+                             f"(expected one of: {', '.join(PROJECTIONS)})")
+        names = PROJECTIONS[fields]
+        if names is None:
+            return None
+        projection = {'_id': 0}
+        projection.update((name, 1) for name in names)
+        fields = projection
+
+    if not required or fields is None:
+        return fields
+
+    if isinstance(fields, dict):
+        if not any(value for key, value in fields.items() if key != '_id'):
+            return fields  # Exclusion projection: required fields are kept anyway
+        return dict(fields, **{key: 1 for key in required if not fields.get(key)})
+
+    return list(fields) + [key for key in required if key not in fields]
@@ -1,5 +1,5 @@
 """Database module for MongoDB integration"""
 
-from .mongodb_handler import MongoDBHandler, get_mongodb_handler
+from .mongodb_handler import ConnectionHealth, MongoDBHandler, get_mongodb_handler
 
-__all__ = ['MongoDBHandler', 'get_mongodb_handler']
+__all__ = ['MongoDBHandler', 'get_mongodb_handler', 'ConnectionHealth']
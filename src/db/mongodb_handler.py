@@ -3,13 +3,26 @@ MongoDB Handler for Knowledge Base Management
 Manages incident storage and retrieval from MongoDB
 """
 
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure, ServerSelectionTimeoutError
-from typing import Dict, List, Optional
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, PyMongoError, ServerSelectionTimeoutError
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import os
+import sys
 from datetime import datetime
+from pathlib import Path
 from loguru import logger
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from database.connection import get_connection_health, get_mongo_client
+from database.connection_health import ConnectionHealth
+
+
+# Incidents whose resolution notes are usable for SOPs and RAG
+RESOLVED_FILTER = {
+    "resolution_notes": {"$exists": True, "$ne": ""},
+    "resolution_length": {"$gte": 30}
+}
+
 
 class MongoDBHandler:
     """MongoDB handler for knowledge base operations"""
@@ -35,6 +48,10 @@ class MongoDBHandler:
         self.db = None
         self.collection = None
         
+        # Liveness from driver heartbeats; replaces a ping per operation.
+        # Replaced by the shared client's instance once connected.
+        self.health = ConnectionHealth()
+        
         self._connect()
     
     def _connect(self) -> bool:
@@ -45,13 +62,16 @@ class MongoDBHandler:
             True if connected successfully, False otherwise
         """
         try:
-            self.client = MongoClient(self.uri, serverSelectionTimeoutMS=5000)
-            # Test connection
-            self.client.admin.command('ping')
-            
+            # Shared, pooled client (see database.connection)
+            self.client = get_mongo_client(self.uri)
+            self.health = get_connection_health(self.uri)
             self.db = self.client[self.db_name]
             self.collection = self.db[self.collection_name]
             
+            # Test connection
+            self._ping()
+            self.health.mark_up()
+            
             # Create indexes for better performance
             self._create_indexes()
             
@@ -59,6 +79,7 @@ class MongoDBHandler:
             return True
             
         except (ConnectionFailure, ServerSelectionTimeoutError) as e:
+            self.health.mark_down(e)
             logger.error(f"✗ Failed to connect to MongoDB: {str(e)}")
             logger.warning("MongoDB not available. Using fallback mode.")
             return False
@@ -90,16 +111,31 @@ class MongoDBHandler:
         except Exception as e:
             logger.warning(f"Note: Some indexes may already exist: {str(e)}")
     
+    def _ping(self):
+        """Round-trip to the server; raises if it is unreachable"""
+        self.client.admin.command('ping')
+    
     def is_connected(self) -> bool:
-        """Check if MongoDB is connected"""
+        """
+        Check if MongoDB is connected
+        
+        Answers from the cached connection health, so it costs no
+        round-trip while the server is up. While it is down, a ping is sent
+        at most once per probe_interval and other calls return False at once.
+        """
         if not self.client:
             return False
         
-        try:
-            self.client.admin.command('ping')
-            return True
-        except:
-            return False
+        return self.health.is_available(probe=self._ping)
+    
+    def connection_stats(self) -> Dict:
+        """
+        Connection health metrics (state, last failure, flap count)
+        
+        Returns:
+            Dictionary from ConnectionHealth.snapshot()
+        """
+        return self.health.snapshot()
     
     def add_incident(self, incident: Dict) -> bool:
         """
@@ -141,12 +177,16 @@ class MongoDBHandler:
             logger.error(f"✗ Failed to add incident: {str(e)}")
             return False
     
-    def add_incidents_batch(self, incidents: List[Dict]) -> tuple:
+    def add_incidents_batch(self, incidents: List[Dict], batch_size: int = 1000) -> tuple:
         """
         Add multiple incidents to knowledge base
         
+        Incidents already in the knowledge base are refreshed rather than
+        reported as failures (see upsert_incidents()).
+        
         Args:
             incidents: List of incident dictionaries
+            batch_size: Incidents per bulk write
             
         Returns:
             Tuple of (count_added, errors)
@@ -155,31 +195,197 @@ class MongoDBHandler:
             logger.error("MongoDB not connected")
             return 0, ["MongoDB not connected"]
         
-        count_added = 0
-        errors = []
-        
-        for incident in incidents:
-            if self.add_incident(incident):
-                count_added += 1
-            else:
-                errors.append(f"Failed to add {incident.get('number')}")
+        outcomes = self._upsert(incidents, batch_size)
+        count_added = sum(1 for outcome in outcomes if outcome["status"] == "inserted")
+        errors = [
+            f"Failed to add {outcome['number']}: {outcome['error']}"
+            for outcome in outcomes if outcome["status"] == "error"
+        ]
         
         logger.info(f"✓ Batch add: {count_added} incidents added, {len(errors)} errors")
         return count_added, errors
     
+    def upsert_incidents(self, incidents: List[Dict], batch_size: int = 1000) -> List[Dict]:
+        """
+        Insert new incidents and refresh existing ones, keyed by number
+        
+        Each batch is one unordered bulk_write of upserts, so loading N
+        incidents costs one connection check plus N / batch_size
+        round-trips. added_at is only set when an incident is first
+        inserted; updated_at and resolution_length are set on every write.
+        The input dictionaries are not modified.
+        
+        Args:
+            incidents: List of incident dictionaries
+            batch_size: Incidents per bulk write
+            
+        Returns:
+            One outcome per incident, in input order: {"number", "status"}
+            with status "inserted", "updated" or "error" (plus "error",
+            the reason)
+        """
+        if not self.is_connected():
+            logger.error("MongoDB not connected")
+            return [
+                {"number": incident.get("number"), "status": "error", "error": "MongoDB not connected"}
+                for incident in incidents
+            ]
+        
+        outcomes = self._upsert(incidents, batch_size)
+        counts = {}
+        for outcome in outcomes:
+            counts[outcome["status"]] = counts.get(outcome["status"], 0) + 1
+        logger.info(
+            f"✓ Upserted incidents: {counts.get('inserted', 0)} inserted, "
+            f"{counts.get('updated', 0)} updated, {counts.get('error', 0)} errors"
+        )
+        return outcomes
+    
+    def _upsert(self, incidents: List[Dict], batch_size: int) -> List[Dict]:
+        """upsert_incidents() without the connection check"""
+        outcomes: List[Optional[Dict]] = [None] * len(incidents)
+        now = datetime.now().isoformat()
+        operations, positions = [], []
+        
+        for i, incident in enumerate(incidents):
+            number = incident.get("number")
+            if not number:
+                outcomes[i] = {"number": number, "status": "error", "error": "Missing incident number"}
+                continue
+            
+            fields = {key: value for key, value in incident.items() if key not in ("_id", "added_at")}
+            # Calculate resolution_length for RAG filtering
+            resolution_notes = fields.get("resolution_notes")
+            fields["resolution_length"] = len(resolution_notes) if resolution_notes else 0
+            fields["updated_at"] = now
+            
+            operations.append(UpdateOne(
+                {"number": number},
+                {"$set": fields, "$setOnInsert": {"added_at": now}},
+                upsert=True
+            ))
+            positions.append(i)
+            
+            if len(operations) >= batch_size:
+                self._write_upserts(operations, positions, incidents, outcomes)
+                operations, positions = [], []
+        
+        if operations:
+            self._write_upserts(operations, positions, incidents, outcomes)
+        
+        return outcomes
+    
+    def _write_upserts(
+        self,
+        operations: List[UpdateOne],
+        positions: List[int],
+        incidents: List[Dict],
+        outcomes: List[Optional[Dict]]
+    ) -> None:
+        """Run one unordered bulk write and record an outcome per operation"""
+        failed = {}
+        try:
+            result = self.collection.bulk_write(operations, ordered=False)
+            upserted = result.upserted_ids or {}
+        except BulkWriteError as e:
+            # Unordered: every other operation in the batch was still applied
+            upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+            failed = {error["index"]: error.get("errmsg", "write error") for error in e.details.get("writeErrors", [])}
+        except PyMongoError as e:
+            if isinstance(e, ConnectionFailure):
+                self.health.mark_down(e)
+            logger.error(f"✗ Bulk upsert failed: {str(e)}")
+            upserted = {}
+            failed = {index: str(e) for index in range(len(operations))}
+        
+        for index, position in enumerate(positions):
+            number = incidents[position].get("number")
+            if index in failed:
+                outcomes[position] = {"number": number, "status": "error", "error": failed[index]}
+            elif index in upserted:
+                outcomes[position] = {"number": number, "status": "inserted"}
+            else:
+                outcomes[position] = {"number": number, "status": "updated"}
+    
+    def iter_incidents(
+        self,
+        query: Optional[Dict] = None,
+        projection: Optional[Union[Sequence[str], Dict]] = None,
+        batch_size: int = 1000,
+        sort: Optional[List[Tuple]] = None
+    ) -> Iterator[Dict]:
+        """
+        Stream incidents from a server-side cursor
+        
+        Only one batch is held in memory at a time, so validation,
+        embedding or export can walk the whole knowledge base.
+        
+        Args:
+            query: MongoDB filter (default: all incidents)
+            projection: Field names or a projection document (default: all
+                fields); _id is left out unless requested
+            batch_size: Documents per round-trip
+            sort: List of (field, direction) pairs
+            
+        Yields:
+            Incident dictionaries (nothing if MongoDB is not connected)
+        """
+        if not self.is_connected():
+            logger.error("MongoDB not connected")
+            return
+        
+        yield from self._stream(query, projection, batch_size, sort)
+    
+    def _stream(
+        self,
+        query: Optional[Dict] = None,
+        projection: Optional[Union[Sequence[str], Dict]] = None,
+        batch_size: int = 1000,
+        sort: Optional[List[Tuple]] = None
+    ) -> Iterator[Dict]:
+        """iter_incidents() without the connection check, for callers that already did it"""
+        if projection is None:
+            projection = {"_id": 0}
+        elif not isinstance(projection, dict):
+            projection = dict({field: 1 for field in projection}, _id=0)
+        
+        cursor = self.collection.find(query or {}, projection).batch_size(batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+        
+        with cursor:
+            yield from cursor
+    
+    def iter_resolved_incidents(
+        self,
+        projection: Optional[Union[Sequence[str], Dict]] = None,
+        batch_size: int = 1000
+    ) -> Iterator[Dict]:
+        """
+        Stream incidents with usable resolution notes
+        
+        Args:
+            projection: Field names or a projection document
+            batch_size: Documents per round-trip
+            
+        Yields:
+            Resolved incident dictionaries
+        """
+        return self.iter_incidents(RESOLVED_FILTER, projection=projection, batch_size=batch_size)
+    
     def get_all_incidents(self) -> List[Dict]:
         """
         Get all incidents from knowledge base
         
         Returns:
-            List of incidents
+            List of incidents (see iter_incidents() to stream)
         """
         if not self.is_connected():
             logger.error("MongoDB not connected")
             return []
         
         try:
-            incidents = list(self.collection.find({}, {"_id": 0}))
+            incidents = list(self._stream())
             logger.info(f"✓ Retrieved {len(incidents)} incidents from KB")
             return incidents
             
@@ -201,11 +407,7 @@ class MongoDBHandler:
             return []
         
         try:
-            incidents = list(self.collection.find(
-                {"category": category},
-                {"_id": 0}
-            ))
-            return incidents
+            return list(self._stream({"category": category}))
             
         except Exception as e:
             logger.error(f"✗ Failed to retrieve incidents by category: {str(e)}")
@@ -216,27 +418,19 @@ class MongoDBHandler:
         Get only resolved incidents (with resolution notes)
         
         Returns:
-            List of resolved incidents
+            List of resolved incidents (see iter_resolved_incidents() to stream)
         """
         if not self.is_connected():
             return []
         
         try:
-            incidents = list(self.collection.find(
-                {
-                    "resolution_notes": {"$exists": True, "$ne": ""},
-                    "resolution_length": {"$gte": 30}
-                },
-                {"_id": 0}
-            ))
-            return incidents
+            return list(self._stream(RESOLVED_FILTER))
             
         except Exception as e:
             # Fallback: filter in Python
             try:
-                all_incidents = self.get_all_incidents()
                 resolved = [
-                    inc for inc in all_incidents
+                    inc for inc in self._stream()
                     if inc.get('resolution_notes') and len(inc.get('resolution_notes', '')) > 20
                 ]
                 return resolved
@@ -254,17 +448,13 @@ class MongoDBHandler:
             return []
         
         try:
-            incidents = list(self.collection.find(
-                {
-                    "$or": [
-                        {"resolution_notes": {"$exists": False}},
-                        {"resolution_notes": ""},
-                        {"resolution_notes": None}
-                    ]
-                },
-                {"_id": 0}
-            ))
-            return incidents
+            return list(self._stream({
+                "$or": [
+                    {"resolution_notes": {"$exists": False}},
+                    {"resolution_notes": ""},
+                    {"resolution_notes": None}
+                ]
+            }))
             
         except Exception as e:
             logger.error(f"✗ Failed to retrieve unresolved incidents: {str(e)}")
@@ -313,21 +503,19 @@ class MongoDBHandler:
             if category:
                 search_filter["category"] = category
             
-            incidents = list(self.collection.find(
+            return list(self._stream(
                 search_filter,
-                {"_id": 0, "score": {"$meta": "textScore"}}
-            ).sort([("score", {"$meta": "textScore"})]))
-            
-            return incidents
+                projection={"_id": 0, "score": {"$meta": "textScore"}},
+                sort=[("score", {"$meta": "textScore"})]
+            ))
             
         except Exception as e:
             # Fallback to simple text search
             logger.warning(f"Text search failed, using fallback: {str(e)}")
-            all_incidents = self.get_all_incidents()
             query_lower = query.lower()
             
             filtered = [
-                inc for inc in all_incidents
+                inc for inc in self._stream()
                 if query_lower in inc.get('short_description', '').lower() or
                    query_lower in inc.get('description', '').lower() or
                    query_lower in inc.get('resolution_notes', '').lower()
@@ -406,7 +594,7 @@ class MongoDBHandler:
             Dictionary with KB stats
         """
         if not self.is_connected():
-            return {"error": "MongoDB not connected"}
+            return {"error": "MongoDB not connected", "connection": self.health.snapshot()}
         
         try:
             total = self.collection.count_documents({})
@@ -430,6 +618,7 @@ class MongoDBHandler:
                 "unresolved_incidents": unresolved,
                 "resolution_rate": round(resolved / total * 100, 2) if total > 0 else 0,
                 "by_category": {cat["_id"]: cat["count"] for cat in categories},
+                "connection": self.health.snapshot(),
                 "last_updated": datetime.now().isoformat()
             }
             
@@ -457,10 +646,14 @@ class MongoDBHandler:
             return False
     
     def close(self):
-        """Close MongoDB connection"""
-        if self.client:
-            self.client.close()
-            logger.info("✓ MongoDB connection closed")
+        """
+        Release the MongoDB connection
+        
+        The pooled client is shared with other components and stays open;
+        database.connection.close_mongo_clients() closes it at shutdown.
+        """
+        self.client = None
+        logger.info("✓ MongoDB connection released")
 
 
 def get_mongodb_handler(uri: str = None) -> MongoDBHandler:
@@ -0,0 +1,20 @@
+"""Shared embedding models package"""
+
+from .cache import EmbeddingCache, FileLock
+from .registry import (
+    SharedEmbeddingModel,
+    EmbeddingModelRegistry,
+    get_embedding_registry,
+    configure_embeddings_from_config
+)
+from .text_hash import hash_text
+
+__all__ = [
+    "EmbeddingCache",
+    "FileLock",
+    "SharedEmbeddingModel",
+    "EmbeddingModelRegistry",
+    "get_embedding_registry",
+    "configure_embeddings_from_config",
+    "hash_text"
+]
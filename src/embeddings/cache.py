@@ -0,0 +1,411 @@
+"""
+Persistent Embedding Cache
+
+Content-addressed, on-disk cache of embeddings so unchanged incident text is
+never re-encoded. Vectors live in a memory-mapped float32 matrix; an
+append-only log maps hash(model name, text) to a row.
+
+The cache directory is shared by web workers, main.py and importers: a
+lock file serialises writers (readers take it shared), and each process
+replays the log records other processes appended since its last look, so
+a row is never handed out twice and a key never points at another text's
+vector. Writing a miss appends one small record instead of rewriting the
+index.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import re
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+from loguru import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Relative cache directories (e.g. from config.yaml) are taken from here
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+DEFAULT_CACHE_DIR = PROJECT_ROOT / "data" / "embedding_cache"
+
+# On-disk layout version (meta.json "format")
+CACHE_FORMAT = 2
+
+# Log record: 16-byte key digest, row number
+_RECORD = struct.Struct("<16sI")
+
+# Rewrite the log once it holds this many records per row
+LOG_COMPACT_FACTOR = 4
+
+
+class FileLock:
+    """Advisory inter-process lock on a file (shared or exclusive)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    @contextmanager
+    def hold(self, shared: bool = False):
+        """Hold the lock for the duration of the with-block"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                # msvcrt has no shared locks; readers lock exclusively too
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.05)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _stat(path: Path) -> Optional[os.stat_result]:
+    """stat() of a file, or None if it does not exist"""
+    try:
+        return path.stat()
+    except FileNotFoundError:
+        return None
+
+
+def _identity(path: Path):
+    """(inode, device, mtime) of a file, or None if it does not exist"""
+    stat = _stat(path)
+    return (stat.st_ino, stat.st_dev, stat.st_mtime_ns) if stat else None
+
+
+class EmbeddingCache:
+    """On-disk embedding cache for a single model"""
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: Optional[str] = None,
+        max_entries: int = 100000
+    ):
+        """
+        Initialize embedding cache (files are created on first write)
+
+        Args:
+            model_name: Embedding model the cached vectors belong to
+            cache_dir: Root cache directory (one sub-directory per model);
+                a relative path is resolved against the project root
+            max_entries: Maximum number of cached vectors before LRU eviction
+        """
+        self.model_name = model_name
+        self.max_entries = max_entries
+
+        root = PROJECT_ROOT / cache_dir if cache_dir else DEFAULT_CACHE_DIR
+        self.directory = root / re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+        self.vectors_path = self.directory / "vectors.f32"
+        self.log_path = self.directory / "keys.log"
+        self.meta_path = self.directory / "meta.json"
+        self.lock_path = self.directory / ".lock"
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(self.lock_path)
+        self._reset()
+
+        with self._lock, self._file_lock.hold(shared=True):
+            self._sync_locked()
+        if self._slots:
+            logger.info(f"Opened embedding cache with {len(self._slots)} entries: {self.directory}")
+
+    def _key(self, text: str) -> bytes:
+        """Content address of a text for this model"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(self.model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(text.encode("utf-8"))
+        return digest.digest()
+
+    def _reset(self) -> None:
+        """Forget all in-memory state"""
+        self._dim = None
+        self._vectors = None
+        self._meta_id = None
+        self._log_id = None
+        self._log_offset = 0
+        self._log_records = 0
+        self._slots: Dict[bytes, int] = {}
+        self._slot_keys: Dict[int, bytes] = {}
+        self._last_used = np.zeros(self.max_entries, dtype=np.int64)
+        self._high_water = 0
+        self._clock = 0
+
+    def _sync_locked(self) -> None:
+        """
+        Catch up with the files on disk (caller holds both locks)
+
+        Reopens the cache if another process rebuilt it, then applies the
+        log records appended since the last call.
+        """
+        meta_id = _identity(self.meta_path)
+        if meta_id != self._meta_id:
+            self._reset()
+            self._meta_id = meta_id
+            if meta_id is not None and not self._open_locked():
+                self._reset()
+                self._meta_id = meta_id  # Rebuilt by the next write, not reopened per call
+                return
+
+        if self._vectors is None:
+            return
+
+        log_stat = _stat(self.log_path)
+        if log_stat is None:
+            return
+        log_id = (log_stat.st_ino, log_stat.st_dev)
+        if log_id != self._log_id or log_stat.st_size < self._log_offset:
+            # New or compacted log: replay it from the start
+            self._slots, self._slot_keys = {}, {}
+            self._high_water = 0
+            self._log_offset = self._log_records = 0
+            self._log_id = log_id
+        if log_stat.st_size == self._log_offset:
+            return
+
+        with open(self.log_path, "rb") as f:
+            f.seek(self._log_offset)
+            data = f.read()
+        usable = len(data) - len(data) % _RECORD.size  # Ignore a torn last record
+        for key, slot in _RECORD.iter_unpack(data[:usable]):
+            self._apply_record(key, slot)
+        self._log_offset += usable
+        self._log_records += usable // _RECORD.size
+
+    def _open_locked(self) -> bool:
+        """Open the vectors described by meta.json; False if incompatible"""
+        try:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+
+            if (meta.get("format") != CACHE_FORMAT or meta.get("model_name") != self.model_name
+                    or meta.get("max_entries") != self.max_entries):
+                logger.warning(f"Embedding cache at {self.directory} has a different layout, "
+                               f"it will be rebuilt on the next write")
+                return False
+
+            self._dim = int(meta["dim"])
+            self._vectors = np.memmap(
+                self.vectors_path, dtype=np.float32, mode="r+",
+                shape=(self.max_entries, self._dim)
+            )
+            return True
+
+        except Exception as e:
+            logger.warning(f"Could not open embedding cache at {self.directory}: {e}")
+            return False
+
+    def _apply_record(self, key: bytes, slot: int) -> None:
+        """Map key to slot, replacing whatever the slot held before"""
+        previous = self._slot_keys.get(slot)
+        if previous is not None and self._slots.get(previous) == slot:
+            del self._slots[previous]
+        self._slots[key] = slot
+        self._slot_keys[slot] = key
+        self._high_water = max(self._high_water, slot + 1)
+        self._clock += 1
+        self._last_used[slot] = self._clock
+
+    def _create_locked(self, dim: int) -> None:
+        """(Re)create the backing files (caller holds the exclusive lock)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._reset()
+        for path in (self.meta_path, self.log_path, self.vectors_path,
+                     self.directory / "keys.npy", self.directory / "last_used.npy"):
+            if path.exists():
+                path.unlink()
+
+        self._dim = dim
+        self._vectors = np.memmap(
+            self.vectors_path, dtype=np.float32, mode="w+",
+            shape=(self.max_entries, dim)
+        )
+        self.log_path.touch()
+
+        tmp_meta = self.meta_path.with_suffix(".tmp")
+        with open(tmp_meta, "w", encoding="utf-8") as f:
+            json.dump({
+                "format": CACHE_FORMAT,
+                "model_name": self.model_name,
+                "dim": dim,
+                "max_entries": self.max_entries
+            }, f)
+        os.replace(tmp_meta, self.meta_path)
+
+        self._meta_id = _identity(self.meta_path)
+        log_stat = self.log_path.stat()
+        self._log_id = (log_stat.st_ino, log_stat.st_dev)
+
+    def _take_slots(self, count: int) -> List[int]:
+        """Get unused slots, evicting least recently used entries if needed"""
+        slots = list(range(self._high_water, min(self._high_water + count, self.max_entries)))
+        shortfall = count - len(slots)
+        if shortfall > 0:
+            occupied = list(self._slots.items())
+            victims = heapq.nsmallest(shortfall, occupied, key=lambda item: self._last_used[item[1]])
+            for key, slot in victims:
+                del self._slots[key]
+                del self._slot_keys[slot]
+                slots.append(slot)
+            self.evictions += len(victims)
+        return slots
+
+    def _append_locked(self, vectors: Dict[bytes, np.ndarray]) -> None:
+        """Write new vectors and their log records (caller holds the exclusive lock)"""
+        keep = [key for key in list(vectors)[-self.max_entries:] if key not in self._slots]
+        if not keep:
+            return
+
+        slots = self._take_slots(len(keep))
+        for key, slot in zip(keep, slots):
+            self._vectors[slot] = vectors[key]
+        # Vectors reach the file before the records that point at them
+        self._vectors.flush()
+
+        records = b"".join(_RECORD.pack(key, slot) for key, slot in zip(keep, slots))
+        with open(self.log_path, "r+b") as f:
+            f.seek(self._log_offset)
+            f.truncate()  # Drop a record torn by a crashed writer
+            f.write(records)
+        for key, slot in zip(keep, slots):
+            self._apply_record(key, slot)
+        self._log_offset += len(records)
+        self._log_records += len(keep)
+
+        if self._log_records > LOG_COMPACT_FACTOR * self.max_entries:
+            self._compact_locked()
+
+    def _compact_locked(self) -> None:
+        """Rewrite the log with one record per live entry, oldest first"""
+        live = sorted(self._slots.items(), key=lambda item: self._last_used[item[1]])
+        records = b"".join(_RECORD.pack(key, slot) for key, slot in live)
+
+        tmp_log = self.log_path.with_suffix(".tmp")
+        with open(tmp_log, "wb") as f:
+            f.write(records)
+        os.replace(tmp_log, self.log_path)
+
+        log_stat = self.log_path.stat()
+        self._log_id = (log_stat.st_ino, log_stat.st_dev)
+        self._log_offset = len(records)
+        self._log_records = len(live)
+        logger.info(f"Compacted embedding cache log to {len(live)} entries")
+
+    def encode(self, model, texts: List[str], **encode_kwargs) -> np.ndarray:
+        """
+        Encode texts, only running the model for texts not already cached
+
+        Args:
+            model: Object with a SentenceTransformer-compatible encode()
+            texts: Texts to embed
+            **encode_kwargs: Passed through to model.encode for cache misses
+
+        Returns:
+            float32 matrix of shape (len(texts), dim)
+        """
+        if not texts:
+            return np.zeros((0, self._dim or 0), dtype=np.float32)
+
+        keys = [self._key(text) for text in texts]
+
+        # Copy hits out under the locks so no writer can reuse their rows meanwhile
+        with self._lock, self._file_lock.hold(shared=True):
+            self._sync_locked()
+            self._clock += 1
+            hit_rows = {}
+            missing = {}
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is not None:
+                    hit_rows[i] = np.array(self._vectors[slot])
+                    self._last_used[slot] = self._clock
+                elif key not in missing:
+                    missing[key] = texts[i]
+
+            self.hits += len(hit_rows)
+            self.misses += len(missing)
+
+        fresh = {}
+        if missing:
+            encode_kwargs["convert_to_numpy"] = True
+            new_vectors = np.asarray(
+                model.encode(list(missing.values()), **encode_kwargs),
+                dtype=np.float32
+            )
+            fresh = dict(zip(missing, new_vectors))
+
+            with self._lock, self._file_lock.hold():
+                self._sync_locked()
+                if self._vectors is None or self._dim != new_vectors.shape[1]:
+                    self._create_locked(new_vectors.shape[1])
+                self._append_locked(fresh)
+
+        dim = len(next(iter(fresh.values()))) if fresh else len(next(iter(hit_rows.values())))
+        result = np.empty((len(texts), dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            result[i] = hit_rows[i] if i in hit_rows else fresh[key]
+
+        logger.debug(f"Embedding cache: {len(hit_rows)} hits, {len(missing)} misses")
+        return result
+
+    def flush(self) -> None:
+        """Make sure written vectors have reached the file"""
+        with self._lock:
+            if self._vectors is not None:
+                self._vectors.flush()
+
+    def clear(self) -> None:
+        """Remove all cached embeddings from memory and disk"""
+        with self._lock, self._file_lock.hold():
+            self._reset()
+            for path in (self.vectors_path, self.log_path, self.meta_path):
+                if path.exists():
+                    path.unlink()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """
+        Get cache statistics
+
+        Returns:
+            Dictionary with hit/miss counters and occupancy
+        """
+        lookups = self.hits + self.misses
+        return {
+            "model_name": self.model_name,
+            "entries": len(self._slots),
+            "capacity": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "directory": str(self.directory)
+        }
@@ -0,0 +1,320 @@
+"""
+Embedding Model Registry
+
+Keeps a single sentence transformer per (model name, device) for the whole
+process so the categorizer, RAG finder and ChromaDB client share weights.
+"""
+
+import atexit
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Callable, Any
+import numpy as np
+from loguru import logger
+
+from .cache import EmbeddingCache
+
+
+def _load_sentence_transformer(model_name: str, device: Optional[str]) -> Any:
+    """Load a sentence transformer (imported lazily, it is a heavy import)"""
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(model_name, device=device)
+
+
+class SharedEmbeddingModel:
+    """Lazily loaded, reference counted handle to an embedding model"""
+
+    def __init__(
+        self,
+        model_name: str,
+        device: Optional[str] = None,
+        loader: Optional[Callable[[str, Optional[str]], Any]] = None
+    ):
+        """
+        Initialize model handle (weights are loaded on first use)
+
+        Args:
+            model_name: Name of sentence transformer model
+            device: Torch device to load the model on (None = auto)
+            loader: Callable (model_name, device) -> model, for custom backends
+        """
+        self.model_name = model_name
+        self.device = device
+        self.ref_count = 0
+        self.cache: Optional[EmbeddingCache] = None
+
+        self._loader = loader or _load_sentence_transformer
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether the underlying model weights are in memory"""
+        return self._model is not None
+
+    def load(self) -> Any:
+        """
+        Load the underlying model if needed
+
+        Returns:
+            The loaded model
+        """
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    logger.info(f"Loading embedding model: {self.model_name}")
+                    self._model = self._loader(self.model_name, self.device)
+        return self._model
+
+    def unload(self) -> None:
+        """Drop the underlying model so its memory can be reclaimed"""
+        with self._lock:
+            if self._model is not None:
+                logger.info(f"Unloading embedding model: {self.model_name}")
+            self._model = None
+
+    def encode(self, sentences, **kwargs):
+        """Encode sentences (same signature as SentenceTransformer.encode)"""
+        return self.load().encode(sentences, **kwargs)
+
+    def encode_cached(self, texts: List[str], **kwargs) -> np.ndarray:
+        """
+        Encode texts through the persistent embedding cache when enabled
+
+        Use this for corpus encoding (incidents); one-off queries should
+        call encode() directly so they do not churn the cache.
+
+        Args:
+            texts: Texts to embed
+            **kwargs: Passed through to encode for cache misses
+
+        Returns:
+            float32 matrix of shape (len(texts), dim)
+        """
+        if self.cache is not None:
+            return self.cache.encode(self, texts, **kwargs)
+
+        kwargs["convert_to_numpy"] = True
+        return np.asarray(self.encode(texts, **kwargs), dtype=np.float32)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Get the embedding dimension of the model"""
+        return self.load().get_sentence_embedding_dimension()
+
+
+class EmbeddingModelRegistry:
+    """Process-wide registry of shared embedding models"""
+
+    def __init__(
+        self,
+        loader: Optional[Callable[[str, Optional[str]], Any]] = None,
+        cache_enabled: bool = False,
+        cache_dir: Optional[str] = None,
+        cache_max_entries: int = 100000
+    ):
+        """
+        Initialize registry
+
+        Args:
+            loader: Optional custom model loader passed to every handle
+            cache_enabled: Attach a persistent EmbeddingCache to each model
+            cache_dir: Root directory for embedding caches
+            cache_max_entries: Maximum cached vectors per model
+        """
+        self._loader = loader
+        self._models: Dict[Tuple[str, Optional[str]], SharedEmbeddingModel] = {}
+        self._pinned: Dict[Tuple[str, Optional[str]], SharedEmbeddingModel] = {}
+        self._caches: Dict[str, EmbeddingCache] = {}
+        self._lock = threading.Lock()
+
+        self.cache_enabled = cache_enabled
+        self.cache_dir = cache_dir
+        self.cache_max_entries = cache_max_entries
+
+    def configure_cache(
+        self,
+        enabled: bool = True,
+        directory: Optional[str] = None,
+        max_entries: Optional[int] = None
+    ) -> None:
+        """
+        Change embedding cache settings
+
+        Handles acquired earlier (e.g. by components built before the
+        configuration was read) are moved to the new cache as well.
+
+        Args:
+            enabled: Whether to use the persistent cache
+            directory: Root directory for embedding caches (relative paths
+                are resolved against the project root)
+            max_entries: Maximum cached vectors per model
+        """
+        with self._lock:
+            self.flush_caches()
+            self.cache_enabled = enabled
+            if directory is not None:
+                self.cache_dir = directory
+            if max_entries is not None:
+                self.cache_max_entries = max_entries
+            self._caches = {}
+            for handle in {*self._models.values(), *self._pinned.values()}:
+                handle.cache = self.get_cache(handle.model_name)
+
+    def get_cache(self, model_name: str) -> Optional[EmbeddingCache]:
+        """
+        Get the embedding cache for a model (None when caching is disabled)
+
+        Args:
+            model_name: Name of sentence transformer model
+
+        Returns:
+            EmbeddingCache instance or None
+        """
+        if not self.cache_enabled:
+            return None
+
+        cache = self._caches.get(model_name)
+        if cache is None:
+            cache = EmbeddingCache(
+                model_name,
+                cache_dir=self.cache_dir,
+                max_entries=self.cache_max_entries
+            )
+            self._caches[model_name] = cache
+        return cache
+
+    def flush_caches(self) -> None:
+        """Persist all embedding caches"""
+        for cache in list(self._caches.values()):
+            cache.flush()
+
+    def acquire(self, model_name: str, device: Optional[str] = None) -> SharedEmbeddingModel:
+        """
+        Get a shared handle for a model, incrementing its reference count
+
+        Args:
+            model_name: Name of sentence transformer model
+            device: Torch device (None = auto)
+
+        Returns:
+            Shared model handle (call release() when done)
+        """
+        key = (model_name, device)
+
+        with self._lock:
+            handle = self._models.get(key)
+            if handle is None:
+                handle = SharedEmbeddingModel(model_name, device, loader=self._loader)
+                self._models[key] = handle
+            handle.cache = self.get_cache(model_name)
+            handle.ref_count += 1
+
+        return handle
+
+    def release(self, handle: SharedEmbeddingModel) -> None:
+        """
+        Release a handle; the model is unloaded when nothing references it
+
+        Args:
+            handle: Handle previously returned by acquire()
+        """
+        key = (handle.model_name, handle.device)
+
+        with self._lock:
+            handle.ref_count = max(0, handle.ref_count - 1)
+            if handle.ref_count > 0:
+                return
+            if self._models.get(key) is handle:
+                del self._models[key]
+
+        handle.unload()
+
+    def warm_up(
+        self,
+        model_names: Iterable[str] = ("all-MiniLM-L6-v2",),
+        device: Optional[str] = None
+    ) -> List[SharedEmbeddingModel]:
+        """
+        Load models eagerly and keep them resident for the process lifetime
+
+        Call this before forking web workers (e.g. gunicorn --preload) so
+        that all workers share the same copy-on-write weights.
+
+        Args:
+            model_names: Models to load
+            device: Torch device (None = auto)
+
+        Returns:
+            List of loaded handles
+        """
+        handles = []
+        for model_name in model_names:
+            key = (model_name, device)
+            handle = self._pinned.get(key)
+            if handle is None:
+                handle = self.acquire(model_name, device)
+                self._pinned[key] = handle
+            handle.load()
+            handles.append(handle)
+
+        return handles
+
+    def stats(self) -> List[Dict]:
+        """
+        Get registry statistics
+
+        Returns:
+            One entry per registered model
+        """
+        with self._lock:
+            return [
+                {
+                    "model_name": handle.model_name,
+                    "device": handle.device,
+                    "ref_count": handle.ref_count,
+                    "loaded": handle.is_loaded,
+                    "pinned": key in self._pinned,
+                    "cache": handle.cache.stats() if handle.cache else None
+                }
+                for key, handle in self._models.items()
+            ]
+
+
+# Global registry instance
+_registry = None
+
+
+def get_embedding_registry() -> EmbeddingModelRegistry:
+    """
+    Get or create the global embedding model registry
+
+    Returns:
+        EmbeddingModelRegistry instance
+    """
+    global _registry
+
+    if _registry is None:
+        _registry = EmbeddingModelRegistry(cache_enabled=True)
+        atexit.register(_registry.flush_caches)
+
+    return _registry
+
+
+def configure_embeddings_from_config(config: Dict) -> EmbeddingModelRegistry:
+    """
+    Apply the `embeddings` section of config.yaml to the global registry
+
+    Args:
+        config: Full application configuration
+
+    Returns:
+        The configured global registry
+    """
+    cache_config = config.get("embeddings", {}).get("cache", {})
+
+    registry = get_embedding_registry()
+    registry.configure_cache(
+        enabled=cache_config.get("enabled", True),
+        directory=cache_config.get("directory"),
+        max_entries=cache_config.get("max_entries")
+    )
+    return registry
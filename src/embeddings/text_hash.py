@@ -0,0 +1,21 @@
+"""
+Embedding Text Hashing
+
+Stable digest of the text an incident is embedded from. Stores keep it
+next to each vector so an unchanged incident is never re-embedded.
+"""
+
+import hashlib
+
+
+def hash_text(text: str) -> str:
+    """
+    Stable hash of an embedding text, used for change detection
+
+    Args:
+        text: Text the embedding is computed from
+
+    Returns:
+        32-character hex digest
+    """
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
@@ -2,6 +2,21 @@
 RAG Module for Resolution Finding
 """
 
+from .embedding_store import EmbeddingStore
+from .vector_index import CategoryPartitions, ExactIndex, IVFIndex, create_vector_index
+from .lexical_index import InvertedIndex
 from .resolution_finder import ResolutionFinder, create_resolution_finder
+from .hybrid_retriever import HybridRetriever, create_hybrid_retriever
 
-__all__ = ['ResolutionFinder', 'create_resolution_finder']
+__all__ = [
+    'EmbeddingStore',
+    'CategoryPartitions',
+    'ExactIndex',
+    'IVFIndex',
+    'create_vector_index',
+    'InvertedIndex',
+    'ResolutionFinder',
+    'create_resolution_finder',
+    'HybridRetriever',
+    'create_hybrid_retriever'
+]
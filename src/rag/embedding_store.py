@@ -0,0 +1,198 @@
+"""
+Append-optimised Embedding Store
+Backs the in-memory RAG knowledge base with a growable float32 matrix
+"""
+
+import numpy as np
+from typing import Dict, Optional
+
+
+class EmbeddingStore:
+    """Contiguous float32 embedding matrix with amortised O(1) appends"""
+
+    def __init__(
+        self,
+        dim: Optional[int] = None,
+        initial_capacity: int = 1024,
+        compact_ratio: float = 0.25
+    ):
+        """
+        Initialize embedding store
+
+        Args:
+            dim: Embedding dimension (inferred from the first append if None)
+            initial_capacity: Rows to preallocate on first use
+            compact_ratio: Fraction of deleted rows that triggers compaction
+        """
+        self.dim = dim
+        self.initial_capacity = max(1, initial_capacity)
+        self.compact_ratio = compact_ratio
+
+        self._data = None
+        self._alive = None
+        self._size = 0
+        self._deleted = 0
+
+    def __len__(self) -> int:
+        """Number of live (non-deleted) rows"""
+        return self._size - self._deleted
+
+    @property
+    def size(self) -> int:
+        """Number of rows in use, including tombstoned ones"""
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of all used rows (tombstoned rows included, see alive_mask)"""
+        if self._data is None:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        return self._data[:self._size]
+
+    @property
+    def alive_mask(self) -> np.ndarray:
+        """Boolean mask of live rows, aligned with vectors"""
+        if self._alive is None:
+            return np.zeros(0, dtype=bool)
+        return self._alive[:self._size]
+
+    @property
+    def deleted_count(self) -> int:
+        """Number of tombstoned rows awaiting compaction"""
+        return self._deleted
+
+    def _reserve(self, rows: int) -> None:
+        """Make room for `rows` more rows, doubling capacity as needed"""
+        needed = self._size + rows
+
+        if self._data is None:
+            capacity = self.initial_capacity
+            while capacity < needed:
+                capacity *= 2
+            self._data = np.zeros((capacity, self.dim), dtype=np.float32)
+            self._alive = np.zeros(capacity, dtype=bool)
+            return
+
+        capacity = self._data.shape[0]
+        if needed <= capacity:
+            return
+
+        while capacity < needed:
+            capacity *= 2
+
+        data = np.zeros((capacity, self.dim), dtype=np.float32)
+        data[:self._size] = self._data[:self._size]
+        alive = np.zeros(capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._data = data
+        self._alive = alive
+
+    def append(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Append one or more vectors
+
+        Args:
+            vectors: Array of shape (dim,) or (n, dim)
+
+        Returns:
+            Row ids assigned to the new vectors
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1)
+
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected embeddings of dimension {self.dim}, got {vectors.shape[1]}")
+
+        count = vectors.shape[0]
+        self._reserve(count)
+
+        start = self._size
+        self._data[start:start + count] = vectors
+        self._alive[start:start + count] = True
+        self._size += count
+
+        return np.arange(start, start + count)
+
+    def set(self, row: int, vector: np.ndarray) -> None:
+        """
+        Overwrite the vector of a live row
+
+        Args:
+            row: Row id
+            vector: New embedding
+        """
+        if not (0 <= row < self._size) or not self._alive[row]:
+            raise IndexError(f"Row {row} is not a live row")
+        self._data[row] = vector
+
+    def delete(self, rows) -> int:
+        """
+        Tombstone rows (their space is reclaimed by compact())
+
+        Args:
+            rows: Row id or iterable of row ids
+
+        Returns:
+            Number of rows newly deleted
+        """
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        rows = rows[(rows >= 0) & (rows < self._size)]
+        rows = rows[self._alive[rows]]
+        rows = np.unique(rows)
+
+        self._alive[rows] = False
+        self._deleted += len(rows)
+        return len(rows)
+
+    def needs_compaction(self) -> bool:
+        """Whether enough rows are tombstoned to make compaction worthwhile"""
+        return self._size > 0 and self._deleted / self._size > self.compact_ratio
+
+    def compact(self) -> np.ndarray:
+        """
+        Drop tombstoned rows and close the gaps
+
+        Returns:
+            Old row ids of the surviving rows; new row i was old row result[i]
+        """
+        kept = np.flatnonzero(self.alive_mask)
+
+        if self._data is not None and self._deleted:
+            count = len(kept)
+            self._data[:count] = self._data[kept]
+            self._alive[:count] = True
+            self._alive[count:self._size] = False
+            self._size = count
+            self._deleted = 0
+
+        return kept
+
+    def clear(self) -> None:
+        """Remove all rows (capacity is released)"""
+        self._data = None
+        self._alive = None
+        self._size = 0
+        self._deleted = 0
+
+    def memory_usage(self) -> Dict:
+        """
+        Get memory usage of the store
+
+        Returns:
+            Dictionary with row counts and allocated/used bytes
+        """
+        capacity = self._data.shape[0] if self._data is not None else 0
+        row_bytes = (self.dim or 0) * 4 + 1  # float32 vector + alive flag
+
+        return {
+            "dim": self.dim,
+            "capacity": capacity,
+            "rows": self._size,
+            "live_rows": len(self),
+            "deleted_rows": self._deleted,
+            "bytes_allocated": capacity * row_bytes,
+            "bytes_used": self._size * row_bytes
+        }
@@ -0,0 +1,134 @@
+"""
+Hybrid Lexical + Semantic Retriever
+Shortlists incidents with BM25, re-scores only the shortlist with
+embeddings and merges both rankings with reciprocal rank fusion
+"""
+
+from typing import Dict, List, Optional
+
+from .lexical_index import InvertedIndex
+from .resolution_finder import ResolutionFinder
+
+
+class HybridRetriever:
+    """Two-stage retrieval over an InvertedIndex and a ResolutionFinder"""
+
+    def __init__(
+        self,
+        lexical_index: InvertedIndex,
+        finder: ResolutionFinder,
+        shortlist_size: int = 100,
+        lexical_weight: float = 0.4,
+        semantic_weight: float = 0.6,
+        rrf_k: int = 60
+    ):
+        """
+        Initialize hybrid retriever
+
+        Args:
+            lexical_index: Keyword index used for the candidate stage
+            finder: Resolution finder whose embedding model re-scores candidates
+            shortlist_size: Number of BM25 candidates re-scored with embeddings
+            lexical_weight: Weight of the BM25 rank in the fused score
+            semantic_weight: Weight of the embedding rank in the fused score
+            rrf_k: Reciprocal rank fusion constant (higher = flatter)
+        """
+        self.lexical_index = lexical_index
+        self.finder = finder
+        self.shortlist_size = shortlist_size
+        self.lexical_weight = lexical_weight
+        self.semantic_weight = semantic_weight
+        self.rrf_k = rrf_k
+
+    def retrieve(
+        self,
+        problem_description: str,
+        category: Optional[str] = None,
+        top_k: int = 5,
+        min_similarity: float = 0.0
+    ) -> List[Dict]:
+        """
+        Find incidents similar to a problem description
+
+        Falls back to pure semantic search when no incident shares a
+        keyword with the query.
+
+        Args:
+            problem_description: Current problem description
+            category: Optional category filter
+            top_k: Number of incidents to return
+            min_similarity: Minimum embedding similarity (0-1)
+
+        Returns:
+            List of incidents with similarity_score, bm25_score and
+            fused_score, best first
+        """
+        candidates = self.lexical_index.shortlist(
+            problem_description, limit=self.shortlist_size, category=category
+        )
+        # Drop incidents removed (e.g. by the change watcher) since the shortlist was taken
+        candidates = [(self.lexical_index.get(number), score) for number, score in candidates]
+        candidates = [(incident, score) for incident, score in candidates if incident is not None]
+
+        if not candidates:
+            results = self.finder.find_similar_incidents(
+                problem_description, category=category,
+                top_k=top_k, min_similarity=min_similarity
+            )
+            for rank, incident in enumerate(results):
+                incident['bm25_score'] = 0.0
+                incident['fused_score'] = self.semantic_weight / (self.rrf_k + rank + 1)
+            return results
+
+        incidents = [incident for incident, _ in candidates]
+        similarities = self.finder.similarity_scores(problem_description, incidents)
+
+        # Rank 1 is best in both lists; candidates are already in BM25 order
+        semantic_order = sorted(range(len(incidents)), key=lambda i: -similarities[i])
+        semantic_rank = {i: rank + 1 for rank, i in enumerate(semantic_order)}
+
+        fused = []
+        for i, (incident, (_, bm25_score)) in enumerate(zip(incidents, candidates)):
+            similarity = float(similarities[i])
+            if similarity < min_similarity:
+                continue
+
+            score = (
+                self.lexical_weight / (self.rrf_k + i + 1) +
+                self.semantic_weight / (self.rrf_k + semantic_rank[i])
+            )
+            result = incident.copy()
+            result['similarity_score'] = similarity
+            result['bm25_score'] = bm25_score
+            result['fused_score'] = score
+            fused.append(result)
+
+        fused.sort(key=lambda inc: inc['fused_score'], reverse=True)
+        return fused[:top_k]
+
+
+def create_hybrid_retriever(
+    lexical_index: InvertedIndex,
+    finder: ResolutionFinder,
+    config: Optional[Dict] = None
+) -> HybridRetriever:
+    """
+    Factory function to create a hybrid retriever
+
+    Args:
+        lexical_index: Keyword index
+        finder: Resolution finder
+        config: Optional settings (the `rag.hybrid` section of config.yaml)
+
+    Returns:
+        HybridRetriever instance
+    """
+    config = config or {}
+    return HybridRetriever(
+        lexical_index,
+        finder,
+        shortlist_size=config.get('shortlist_size', 100),
+        lexical_weight=config.get('lexical_weight', 0.4),
+        semantic_weight=config.get('semantic_weight', 0.6),
+        rrf_k=config.get('rrf_k', 60)
+    )
@@ -0,0 +1,330 @@
+"""
+Lexical Inverted Index
+Keyword lookup over incidents with BM25 scoring, so a query only touches
+the postings of its own keywords instead of scanning every incident
+"""
+
+import heapq
+import math
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from .vector_index import category_key
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into index tokens (lowercase words longer than 3 characters)
+
+    Args:
+        text: Text to tokenize
+
+    Returns:
+        List of tokens, duplicates kept
+    """
+    return [word for word in (text or '').lower().split() if len(word) > 3]
+
+
+class InvertedIndex:
+    """Incremental inverted index of resolved incidents keyed by number"""
+
+    def __init__(
+        self,
+        min_resolution_length: int = 20,
+        k1: float = 1.5,
+        b: float = 0.75
+    ):
+        """
+        Initialize inverted index
+
+        Args:
+            min_resolution_length: Incidents with shorter resolution notes
+                are not indexed (they cannot be suggested)
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalisation
+        """
+        self.min_resolution_length = min_resolution_length
+        self.k1 = k1
+        self.b = b
+
+        self._docs: Dict[str, Dict] = {}
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._categories: Dict[str, Dict[str, None]] = {}
+        self._total_length = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Number of indexed incidents"""
+        return len(self._docs)
+
+    def __contains__(self, number: str) -> bool:
+        """Whether an incident number is indexed"""
+        return number in self._docs
+
+    @staticmethod
+    def document_text(incident: Dict) -> str:
+        """Text of an incident that is matched against queries"""
+        return f"{incident.get('short_description', '')} {incident.get('description', '')}"
+
+    def _is_indexable(self, incident: Dict) -> bool:
+        """Only incidents with a number and a usable resolution are indexed"""
+        resolution = incident.get('resolution_notes') or ''
+        return bool(incident.get('number')) and len(resolution) >= self.min_resolution_length
+
+    def add(self, incident: Dict) -> bool:
+        """
+        Index an incident, replacing any previous version with the same number
+
+        Args:
+            incident: Incident dictionary
+
+        Returns:
+            True if the incident is indexed after the call
+        """
+        with self._lock:
+            number = incident.get('number')
+            if number in self._docs:
+                self.remove(number)
+
+            if not self._is_indexable(incident):
+                return False
+
+            frequencies = Counter(tokenize(self.document_text(incident)))
+            length = sum(frequencies.values())
+
+            self._docs[number] = {
+                'incident': incident,
+                'terms': frequencies,
+                'length': length
+            }
+            for token, count in frequencies.items():
+                self._postings.setdefault(token, {})[number] = count
+            self._categories.setdefault(category_key(incident.get('category')), {})[number] = None
+            self._total_length += length
+
+            return True
+
+    def add_many(self, incidents: List[Dict]) -> int:
+        """
+        Index several incidents
+
+        Args:
+            incidents: Incident dictionaries
+
+        Returns:
+            Number of incidents indexed
+        """
+        with self._lock:
+            return sum(1 for incident in incidents if self.add(incident))
+
+    def remove(self, number: str) -> bool:
+        """
+        Remove an incident from the index
+
+        Args:
+            number: Incident number
+
+        Returns:
+            True if the incident was indexed
+        """
+        with self._lock:
+            doc = self._docs.pop(number, None)
+            if doc is None:
+                return False
+
+            for token in doc['terms']:
+                postings = self._postings[token]
+                del postings[number]
+                if not postings:
+                    del self._postings[token]
+
+            category = category_key(doc['incident'].get('category'))
+            members = self._categories[category]
+            del members[number]
+            if not members:
+                del self._categories[category]
+
+            self._total_length -= doc['length']
+            return True
+
+    def rebuild(self, incidents: List[Dict]) -> int:
+        """
+        Replace the whole index contents
+
+        Args:
+            incidents: All incidents to index
+
+        Returns:
+            Number of incidents indexed
+        """
+        with self._lock:
+            self.clear()
+            return self.add_many(incidents)
+
+    def clear(self) -> None:
+        """Remove all incidents"""
+        with self._lock:
+            self._docs = {}
+            self._postings = {}
+            self._categories = {}
+            self._total_length = 0
+
+    def bm25_scores(self, keywords: Set[str]) -> Dict[str, float]:
+        """
+        BM25 score of every incident containing at least one keyword
+
+        Args:
+            keywords: Query tokens
+
+        Returns:
+            Dictionary of incident number -> BM25 score
+        """
+        with self._lock:
+            total = len(self._docs)
+            if not total:
+                return {}
+
+            avg_length = self._total_length / total or 1.0
+            scores: Dict[str, float] = {}
+
+            for token in keywords:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+
+                idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+                for number, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._docs[number]['length'] / avg_length)
+                    scores[number] = scores.get(number, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+            return scores
+
+    def get(self, number: str) -> Optional[Dict]:
+        """
+        Get an indexed incident by number
+
+        Args:
+            number: Incident number
+
+        Returns:
+            Incident dictionary or None
+        """
+        doc = self._docs.get(number)
+        return doc['incident'] if doc else None
+
+    def shortlist(
+        self,
+        query: str,
+        limit: int = 100,
+        category: Optional[str] = None
+    ) -> List[Tuple[str, float]]:
+        """
+        Top incidents by BM25, e.g. as candidates for a re-ranking stage
+
+        Args:
+            query: Free text query
+            limit: Maximum number of candidates
+            category: Only return incidents of this category
+
+        Returns:
+            List of (incident number, BM25 score), best first
+        """
+        with self._lock:
+            scores = self.bm25_scores(set(tokenize(query)))
+            if category:
+                members = self._categories.get(category_key(category), {})
+                scores = {number: score for number, score in scores.items() if number in members}
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+    def search(
+        self,
+        query: str,
+        category: Optional[str] = None,
+        category_bonus: float = 0.3,
+        min_score: float = 0.01,
+        limit: int = 10
+    ) -> List[Dict]:
+        """
+        Find incidents sharing keywords with a query
+
+        The score is the fraction of query keywords found in the incident,
+        plus category_bonus when the category matches (capped at 1.0). BM25
+        breaks ties between incidents with the same score.
+
+        Args:
+            query: Free text query
+            category: Optional category that earns the bonus
+            category_bonus: Score added for a category match
+            min_score: Matches must score above this
+            limit: Maximum number of matches returned
+
+        Returns:
+            List of {'incident', 'score', 'bm25'} dictionaries, best first
+        """
+        keywords = set(tokenize(query))
+
+        with self._lock:
+            bm25 = self.bm25_scores(keywords)
+            in_category = self._categories.get(category_key(category), {}) if category else {}
+
+            matches = []
+            for number, bm25_score in bm25.items():
+                doc = self._docs[number]
+                score = sum(1 for token in keywords if token in doc['terms']) / len(keywords)
+                if number in in_category:
+                    score += category_bonus
+                matches.append((min(score, 1.0), bm25_score, number))
+
+            # Incidents that only match on category all tie on the bonus, so
+            # at most `limit` of them (in index order) can make the cut
+            if category_bonus > min_score:
+                added = 0
+                for number in in_category:
+                    if added >= limit:
+                        break
+                    if number not in bm25:
+                        matches.append((min(category_bonus, 1.0), 0.0, number))
+                        added += 1
+
+            matches = [m for m in matches if m[0] > min_score]
+            matches.sort(key=lambda m: (m[0], m[1]), reverse=True)
+
+            return [
+                {'incident': self._docs[number]['incident'], 'score': score, 'bm25': bm25_score}
+                for score, bm25_score, number in matches[:limit]
+            ]
+
+    def first_in_category(self, category: str, min_resolution_length: int = 0) -> Optional[Dict]:
+        """
+        First indexed incident of a category with a long enough resolution
+
+        Args:
+            category: Category to look up
+            min_resolution_length: Resolution notes must be longer than this
+
+        Returns:
+            Incident dictionary or None
+        """
+        with self._lock:
+            for number in self._categories.get(category_key(category), {}):
+                incident = self._docs[number]['incident']
+                if len(incident.get('resolution_notes') or '') > min_resolution_length:
+                    return incident
+        return None
+
+    def stats(self) -> Dict:
+        """
+        Get index statistics
+
+        Returns:
+            Dictionary with document, token and category counts
+        """
+        with self._lock:
+            return {
+                'documents': len(self._docs),
+                'tokens': len(self._postings),
+                'categories': len(self._categories),
+                'avg_document_length': round(self._total_length / len(self._docs), 2) if self._docs else 0
+            }
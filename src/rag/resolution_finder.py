@@ -5,12 +5,19 @@ Retrieves similar past incidents and suggests resolutions using ChromaDB
 
 import numpy as np
 from pathlib import Path
+import copy
 import json
-from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import threading
+from typing import Callable, List, Dict, Optional, Iterable
 import sys
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from embeddings import FileLock, get_embedding_registry, hash_text
+
+from .embedding_store import EmbeddingStore
+from .vector_index import CategoryPartitions, IVFIndex, create_vector_index, exact_search
+
 # Import ChromaDB client conditionally
 try:
     sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -22,6 +29,14 @@ except Exception as e:
     CHROMADB_AVAILABLE = False
 
 
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalise embeddings so inner product equals cosine similarity"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
 class ResolutionFinder:
     """Find resolutions from past incidents using RAG with ChromaDB"""
     
@@ -29,7 +44,13 @@ class ResolutionFinder:
         self, 
         embedding_model: str = "all-MiniLM-L6-v2",
         use_chromadb: bool = True,
-        chromadb_persist_dir: str = None
+        chromadb_persist_dir: str = None,
+        device: str = None,
+        chromadb_options: Optional[Dict] = None,
+        ann_backend: str = "ivf",
+        ann_min_size: int = 20000,
+        ann_options: Optional[Dict] = None,
+        ann_index_path: Optional[str] = None
     ):
         """
         Initialize resolution finder with embeddings model
@@ -38,13 +59,47 @@ class ResolutionFinder:
             embedding_model: Name of sentence transformer model
             use_chromadb: Whether to use ChromaDB (True) or in-memory (False)
             chromadb_persist_dir: Directory to persist ChromaDB data
+            device: Torch device for the embedding model (None = auto)
+            chromadb_options: Extra ChromaDBClient settings (batch_size,
+                encode_batch_size, normalize_embeddings)
+            ann_backend: Vector index for in-memory search ('ivf' or 'exact')
+            ann_min_size: Knowledge base size below which search stays exact
+            ann_options: Index settings (n_lists, n_probe, train_sample, ...)
+            ann_index_path: Where the index is persisted (default data/ann_index.npz)
         """
-        self.model = SentenceTransformer(embedding_model)
+        # Shared, lazily loaded model (see embeddings.registry)
+        self.model = get_embedding_registry().acquire(embedding_model, device)
         self.use_chromadb = use_chromadb
         
-        # Legacy in-memory storage (fallback)
+        # Legacy in-memory storage (fallback). knowledge_base is index-aligned
+        # with embedding_store rows; deleted rows hold None until compaction.
+        # Stored embeddings are unit-normalised so dot product = cosine.
         self.knowledge_base = []
-        self.embeddings_cache = []
+        self.embedding_store = EmbeddingStore()
+        
+        # Approximate index over embedding_store, built on a background
+        # thread once the knowledge base reaches ann_min_size incidents
+        self.ann_backend = ann_backend
+        self.ann_min_size = ann_min_size
+        self.ann_options = ann_options or {}
+        self.ann_index_path = Path(ann_index_path) if ann_index_path else (
+            Path(__file__).parent.parent.parent / 'data' / 'ann_index.npz'
+        )
+        self.vector_index = None
+        self._index_builder = None
+        self._index_epoch = 0       # Bumped whenever row ids are renumbered
+        self._build_changes = None  # Rows touched while a build is running
+        
+        # Guards the in-memory store against concurrent writers (e.g. a
+        # change watcher thread) while requests search it
+        self._lock = threading.RLock()
+        
+        # Row ids per category, so filtered queries only score their partition
+        self.category_partitions = CategoryPartitions()
+        
+        # Delta bookkeeping for the in-memory store: number -> row, number -> text hash
+        self._kb_index = {}
+        self._text_hashes = {}
         self.kb_file_path = Path(__file__).parent.parent.parent / 'data' / 'knowledge_base.json'
         
         # Initialize ChromaDB if enabled
@@ -54,7 +109,9 @@ class ResolutionFinder:
                 self.chroma_client = ChromaDBClient(
                     collection_name="incident_resolutions",
                     persist_directory=chromadb_persist_dir,
-                    embedding_model=embedding_model
+                    embedding_model=embedding_model,
+                    shared_model=self.model,
+                    **(chromadb_options or {})
                 )
                 print(f"[INFO] ChromaDB initialized successfully with {self.chroma_client.get_count()} incidents")
             except Exception as e:
@@ -72,30 +129,529 @@ class ResolutionFinder:
         Args:
             incidents: List of resolved incidents with resolution notes
         """
-        # Filter incidents that have resolutions OR good descriptions
-        valid_incidents = [
-            inc for inc in incidents 
-            if (inc.get('resolution_notes') and len(inc.get('resolution_notes', '')) > 20) or
-               (inc.get('description') and len(inc.get('description', '')) > 30)
-        ]
+        with self._lock:
+            # Filter incidents that have resolutions OR good descriptions
+            valid_incidents = [inc for inc in incidents if self._is_kb_candidate(inc)]
+            
+            if self.use_chromadb and self.chroma_client:
+                # Use ChromaDB for storage; unchanged incidents are not re-embedded
+                print(f"[INFO] Syncing {len(valid_incidents)} incidents to ChromaDB...")
+                stats = self.chroma_client.upsert_incidents(valid_incidents)
+                # The fresh load is the whole truth: drop what it no longer has
+                numbers = {inc['number'] for inc in valid_incidents if inc.get('number')}
+                stale = [n for n in self.chroma_client.get_incident_numbers() if n not in numbers]
+                stats['removed'] = self.chroma_client.delete_incidents(stale)
+                print(f"[INFO] ChromaDB sync: {stats}")
+            else:
+                # Use in-memory storage (legacy)
+                self.knowledge_base = list(valid_incidents)
+                self.embedding_store.clear()
+                self.vector_index = None
+                self._index_epoch += 1
+                self.category_partitions.clear()
+            
+                if valid_incidents:
+                    # Create embeddings for quick retrieval
+                    texts = [self._embedding_text(inc) for inc in valid_incidents]
+                    self.embedding_store.append(_normalize_rows(self.model.encode_cached(texts)))
+                    print(f"[INFO] Loaded {len(valid_incidents)} incidents into in-memory storage")
+            
+                self._kb_index = {}
+                self._text_hashes = {}
+                for row, inc in enumerate(valid_incidents):
+                    self.category_partitions.assign(row, inc.get('category'))
+                    if inc.get('number'):
+                        self._kb_index[inc['number']] = row
+                        self._text_hashes[inc['number']] = hash_text(texts[row])
+    
+    def upsert_incidents(self, incidents: List[Dict]) -> Dict[str, int]:
+        """
+        Insert or update incidents by number, embedding only new or changed text
         
-        if self.use_chromadb and self.chroma_client:
-            # Use ChromaDB for storage
-            print(f"[INFO] Adding {len(valid_incidents)} incidents to ChromaDB...")
-            added_count = self.chroma_client.add_incidents_bulk(valid_incidents)
-            print(f"[INFO] Successfully added {added_count} incidents to ChromaDB")
-        else:
-            # Use in-memory storage (legacy)
-            self.knowledge_base = valid_incidents
-            
-            if valid_incidents:
-                # Create embeddings for quick retrieval
-                texts = [
-                    f"{inc.get('short_description', '')} {inc.get('description', '')} {inc.get('category', '')}"
-                    for inc in valid_incidents
-                ]
-                self.embeddings_cache = self.model.encode(texts, convert_to_numpy=True)
-                print(f"[INFO] Loaded {len(valid_incidents)} incidents into in-memory storage")
+        Incidents whose embedded text (short description, description,
+        category) is unchanged keep their embedding; only the stored record
+        is refreshed. Cost scales with the size of the delta, not the KB.
+        
+        Args:
+            incidents: Incidents to insert or update (must have a 'number')
+            
+        Returns:
+            Dictionary with added/updated/unchanged/skipped counts
+        """
+        with self._lock:
+            # Last occurrence wins if a number appears twice
+            by_number = {}
+            skipped = 0
+            for inc in incidents:
+                if inc.get('number') and self._is_kb_candidate(inc):
+                    by_number[inc['number']] = inc
+                else:
+                    skipped += 1
+            
+            if self.use_chromadb and self.chroma_client:
+                stats = self.chroma_client.upsert_incidents(list(by_number.values()))
+                stats['skipped'] = skipped
+                return stats
+            
+            stats = {'added': 0, 'updated': 0, 'unchanged': 0, 'skipped': skipped}
+            
+            to_embed = []
+            for number, inc in by_number.items():
+                text = self._embedding_text(inc)
+                text_hash = hash_text(text)
+                row = self._kb_index.get(number)
+            
+                if row is not None and self._text_hashes.get(number) == text_hash:
+                    self.knowledge_base[row] = inc
+                    self.category_partitions.assign(row, inc.get('category'))
+                    stats['unchanged'] += 1
+                else:
+                    to_embed.append((inc, text, text_hash))
+            
+            if not to_embed:
+                return stats
+            
+            vectors = _normalize_rows(self.model.encode_cached([text for _, text, _ in to_embed]))
+            new_vectors = []
+            updated_rows = []
+            
+            for (inc, _, text_hash), vector in zip(to_embed, vectors):
+                number = inc['number']
+                row = self._kb_index.get(number)
+            
+                if row is None:
+                    row = len(self.knowledge_base)
+                    self._kb_index[number] = row
+                    self.knowledge_base.append(inc)
+                    new_vectors.append(vector)
+                    stats['added'] += 1
+                else:
+                    self.knowledge_base[row] = inc
+                    self.embedding_store.set(row, vector)
+                    updated_rows.append(row)
+                    stats['updated'] += 1
+            
+                self._text_hashes[number] = text_hash
+                self.category_partitions.assign(row, inc.get('category'))
+            
+            if new_vectors:
+                new_rows = self.embedding_store.append(np.asarray(new_vectors))
+                self._index_rows(new_rows)
+            self._index_rows(updated_rows)
+            
+            print(f"[INFO] Knowledge base delta: {stats}")
+            return stats
+    
+    def delete_incidents(self, incident_numbers: Iterable[str]) -> int:
+        """
+        Remove incidents from the knowledge base by number
+        
+        Args:
+            incident_numbers: Incident numbers to remove
+            
+        Returns:
+            Number of incidents removed
+        """
+        with self._lock:
+            incident_numbers = list(incident_numbers)
+            
+            if self.use_chromadb and self.chroma_client:
+                return self.chroma_client.delete_incidents(incident_numbers)
+            
+            rows = []
+            for number in incident_numbers:
+                row = self._kb_index.pop(number, None)
+                self._text_hashes.pop(number, None)
+                if row is not None:
+                    rows.append(row)
+                    self.knowledge_base[row] = None
+                    self.category_partitions.remove(row)
+            
+            if not rows:
+                return 0
+            
+            # Tombstone now, compact once enough garbage has accumulated
+            self.embedding_store.delete(rows)
+            if self.vector_index is not None:
+                self.vector_index.remove(np.asarray(rows))
+            if self._build_changes is not None:
+                self._build_changes.update(rows)
+            if self.embedding_store.needs_compaction():
+                self.compact()
+            
+            return len(rows)
+
+    def clear_knowledge_base(self) -> List[str]:
+        """
+        Remove every incident from the knowledge base
+
+        Returns:
+            Numbers of the incidents that were removed
+        """
+        with self._lock:
+            if self.use_chromadb and self.chroma_client:
+                numbers = self.chroma_client.get_incident_numbers()
+                self.chroma_client.clear_collection()
+                return numbers
+            
+            # _kb_index only holds live rows; knowledge_base keeps tombstones
+            numbers = list(self._kb_index)
+            self.load_knowledge_base([])
+            return numbers
+
+    def prune_knowledge_base_file(self, incident_numbers: Iterable[str]) -> int:
+        """
+        Remove incidents from the saved knowledge base file
+        
+        Args:
+            incident_numbers: Incident numbers to remove
+            
+        Returns:
+            Number of entries removed
+        """
+        incident_numbers = set(incident_numbers)
+        if not incident_numbers or not self.kb_file_path.exists():
+            return 0
+        
+        removed = 0
+        
+        def drop_numbers(kb_data):
+            nonlocal removed
+            kept = [inc for inc in kb_data if inc.get('number') not in incident_numbers]
+            removed = len(kb_data) - len(kept)
+            return kept if removed else None
+        
+        try:
+            self._update_knowledge_base_file(drop_numbers)
+            if removed:
+                print(f"[INFO] Removed {removed} deleted incidents from knowledge base file")
+            return removed
+            
+        except Exception as e:
+            print(f"[ERROR] Failed to prune knowledge base file: {str(e)}")
+            return 0
+    
+    def append_to_knowledge_base_file(self, incident: Dict) -> bool:
+        """
+        Append an incident to the saved knowledge base file
+        
+        Only the file is written; the searchable knowledge base is updated
+        through upsert_incidents() (e.g. by the web app's cache listener).
+        
+        Args:
+            incident: Incident to append (skipped if its number is already saved)
+            
+        Returns:
+            True if the incident was appended
+        """
+        added = False
+        
+        def append_incident(kb_data):
+            nonlocal added
+            # Add new incident if not already present
+            incident_numbers = [inc.get('number') for inc in kb_data]
+            if incident.get('number') in incident_numbers:
+                return None
+            added = True
+            return kb_data + [incident]
+        
+        try:
+            self._update_knowledge_base_file(append_incident)
+            if added:
+                print(f"[INFO] Added incident {incident.get('number', 'Unknown')} to knowledge base and saved to file")
+            else:
+                print(f"[INFO] Incident {incident.get('number', 'Unknown')} already exists in knowledge base file")
+            return added
+            
+        except Exception as e:
+            print(f"[ERROR] Failed to save to knowledge base file: {str(e)}")
+            return False
+    
+    def _update_knowledge_base_file(self, update: Callable[[List[Dict]], Optional[List[Dict]]]) -> None:
+        """
+        Read, modify and rewrite the saved knowledge base file
+        
+        Every web worker reacts to the same change events, so writers are
+        serialised with a lock file and the new contents replace the file
+        atomically; readers never see half-written JSON.
+        
+        Args:
+            update: Called with the current entries; returns the entries to
+                write, or None to leave the file untouched
+        """
+        path = self.kb_file_path
+        with FileLock(path.with_name(path.name + '.lock')).hold():
+            if path.exists():
+                with open(path, 'r', encoding='utf-8') as f:
+                    kb_data = json.load(f)
+            else:
+                kb_data = []
+            
+            kb_data = update(kb_data)
+            if kb_data is None:
+                return
+            
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(kb_data, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, path)
+    
+    def compact(self) -> None:
+        """Reclaim space of deleted rows in the in-memory store"""
+        with self._lock:
+            kept = self.embedding_store.compact()
+            self.knowledge_base = [self.knowledge_base[row] for row in kept]
+            self._kb_index = {
+                inc['number']: row for row, inc in enumerate(self.knowledge_base) if inc.get('number')
+            }
+            self.category_partitions.clear()
+            for row, inc in enumerate(self.knowledge_base):
+                self.category_partitions.assign(row, inc.get('category'))
+            
+            # Row ids changed: renumber the index and persist it for the new
+            # layout; a build started before compaction is discarded
+            self._index_epoch += 1
+            if self.vector_index is not None:
+                self.vector_index.compact(kept)
+                self.save_index()
+    
+    def _index_rows(self, rows) -> None:
+        """Add new or re-embedded rows to the vector index, if one is built"""
+        with self._lock:
+            if not len(rows):
+                return
+            if self.vector_index is not None:
+                rows = np.asarray(rows)
+                self.vector_index.add(rows, self.embedding_store.vectors[rows])
+            if self._build_changes is not None:
+                self._build_changes.update(int(row) for row in rows)
+    
+    def _row_keys(self) -> np.ndarray:
+        """Incident number of every store row ('' for deleted/unnumbered rows)"""
+        return np.array([(inc or {}).get('number') or '' for inc in self.knowledge_base], dtype=str)
+    
+    def build_index(self) -> None:
+        """
+        Build the vector index over the current in-memory knowledge base
+        
+        Training runs on a snapshot of the store without holding the lock,
+        so searches and updates continue meanwhile; rows they touch are
+        applied to the new index before it replaces the old one, and the
+        result is persisted to ann_index_path.
+        """
+        with self._lock:
+            epoch = self._index_epoch
+            vectors = self.embedding_store.vectors.copy()
+            alive_mask = self.embedding_store.alive_mask.copy()
+            self._build_changes = set()
+        
+        index = create_vector_index(self.ann_backend, **self.ann_options)
+        try:
+            index.build(vectors, alive_mask)
+        except Exception:
+            with self._lock:
+                self._build_changes = None
+            raise
+        
+        with self._lock:
+            changed = np.array(sorted(self._build_changes), dtype=np.int64)
+            self._build_changes = None
+            if epoch != self._index_epoch:
+                print("[INFO] Knowledge base was renumbered during the index build, discarding it")
+                return
+            
+            if len(changed):
+                alive = self.embedding_store.alive_mask[changed]
+                index.remove(changed[~alive])
+                index.add(changed[alive], self.embedding_store.vectors[changed[alive]])
+            self.vector_index = index
+        
+        print(f"[INFO] Built {self.ann_backend} index over {int(alive_mask.sum())} incidents")
+        self.save_index()
+    
+    def _load_or_build_index(self) -> None:
+        """Background job: reuse the persisted index if it still matches, else build"""
+        try:
+            with self._lock:
+                if self.vector_index is None and self.load_index():
+                    return
+            self.build_index()
+        except Exception as e:
+            print(f"[ERROR] Failed to build vector index: {e}")
+    
+    def _schedule_index_build(self) -> None:
+        """Start building the vector index in the background (once at a time)"""
+        with self._lock:
+            if self._index_builder is not None and self._index_builder.is_alive():
+                return
+            self._index_builder = threading.Thread(
+                target=self._load_or_build_index, name="vector-index-build", daemon=True
+            )
+            self._index_builder.start()
+    
+    def wait_for_index(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for a running background index build to finish
+        
+        Args:
+            timeout: Maximum seconds to wait (None = no limit)
+            
+        Returns:
+            True if no build is running any more
+        """
+        builder = self._index_builder
+        if builder is not None:
+            builder.join(timeout)
+            return not builder.is_alive()
+        return True
+    
+    def save_index(self, path: Optional[str] = None) -> bool:
+        """
+        Persist the vector index (with the row order it was built for)
+        
+        The index is snapshotted under the lock and written after releasing
+        it; the file is replaced atomically.
+        
+        Args:
+            path: Target .npz file (default: ann_index_path)
+            
+        Returns:
+            True if an index was saved
+        """
+        with self._lock:
+            index = self.vector_index
+            if not isinstance(index, IVFIndex) or not index.is_trained:
+                return False
+            snapshot = copy.copy(index)
+            snapshot.assignments = index.assignments.copy()
+            row_keys = self._row_keys()
+        
+        path = Path(path) if path else self.ann_index_path
+        tmp_path = path.with_name(path.stem + '.tmp.npz')
+        try:
+            snapshot.save(str(tmp_path), row_keys=row_keys)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"[WARNING] Failed to save vector index: {e}")
+            return False
+        print(f"[INFO] Saved vector index to {path}")
+        return True
+    
+    def load_index(self, path: Optional[str] = None) -> bool:
+        """
+        Load a persisted vector index if it matches the current knowledge base
+        
+        Args:
+            path: .npz file written by save_index (default: ann_index_path)
+            
+        Returns:
+            True if the index was loaded
+        """
+        path = Path(path) if path else self.ann_index_path
+        if self.ann_backend != 'ivf' or not path.exists():
+            return False
+        
+        try:
+            index, extra = IVFIndex.load(str(path))
+        except Exception as e:
+            print(f"[WARNING] Failed to load vector index: {e}")
+            return False
+        
+        # Row ids are only meaningful for the same incidents in the same order
+        if not np.array_equal(extra.get('row_keys'), self._row_keys()):
+            print("[INFO] Persisted vector index is stale, it will be rebuilt")
+            return False
+        
+        index.n_probe = self.ann_options.get('n_probe', index.n_probe)
+        self.vector_index = index
+        return True
+    
+    def _search_rows(self, query: np.ndarray, k: int):
+        """
+        Top-k store rows for a unit-normalised query
+        
+        Small knowledge bases are searched exactly; larger ones go through
+        the vector index. The index is loaded or built in the background on
+        first use (queries are answered exactly until it is ready) and
+        rebuilt once the knowledge base has doubled since it was trained.
+        """
+        store = self.embedding_store
+        
+        if self.ann_backend == 'exact' or len(store) < self.ann_min_size:
+            return exact_search(store.vectors, query, k, store.alive_mask)
+        
+        index = self.vector_index
+        if index is None or len(store) > 2 * max(getattr(index, 'built_size', 0), 1):
+            self._schedule_index_build()
+        if index is None:
+            return exact_search(store.vectors, query, k, store.alive_mask)
+        
+        return index.search(query, k, store.vectors, store.alive_mask)
+    
+    def memory_usage(self) -> Dict:
+        """
+        Get memory usage of the in-memory knowledge base
+        
+        Returns:
+            Dictionary with embedding store usage and incident count
+        """
+        usage = self.embedding_store.memory_usage()
+        usage['incidents'] = len(self.embedding_store)
+        usage['backend'] = 'chromadb' if (self.use_chromadb and self.chroma_client) else 'memory'
+        usage['categories'] = self.category_partitions.sizes()
+        return usage
+    
+    def _is_kb_candidate(self, incident: Dict) -> bool:
+        """Whether an incident has enough content to be worth retrieving"""
+        return bool(
+            (incident.get('resolution_notes') and len(incident.get('resolution_notes', '')) > 20) or
+            (incident.get('description') and len(incident.get('description', '')) > 30)
+        )
+    
+    def _embedding_text(self, incident: Dict) -> str:
+        """Text that is embedded for an incident in the in-memory store"""
+        return f"{incident.get('short_description', '')} {incident.get('description', '')} {incident.get('category', '')}"
+    
+    def similarity_scores(self, problem_description: str, incidents: List[Dict]) -> np.ndarray:
+        """
+        Cosine similarity between a query and specific incidents
+        
+        Incidents already in the in-memory knowledge base with unchanged
+        text reuse their stored embedding; others are encoded through the
+        persistent embedding cache. Nothing else is scored.
+        
+        Args:
+            problem_description: Query text
+            incidents: Incidents to score
+            
+        Returns:
+            Array of similarities aligned with incidents
+        """
+        if not incidents:
+            return np.zeros(0, dtype=np.float32)
+        
+        query_embedding = _normalize_rows(
+            self.model.encode([problem_description], convert_to_numpy=True)
+        )[0]
+        
+        vectors = [None] * len(incidents)
+        missing = []
+        with self._lock:
+            for i, incident in enumerate(incidents):
+                text = self._embedding_text(incident)
+                number = incident.get('number')
+                row = self._kb_index.get(number)
+                if row is not None and self._text_hashes.get(number) == hash_text(text):
+                    vectors[i] = self.embedding_store.vectors[row].copy()
+                else:
+                    missing.append((i, text))
+        
+        if missing:
+            encoded = _normalize_rows(self.model.encode_cached([text for _, text in missing]))
+            for (i, _), vector in zip(missing, encoded):
+                vectors[i] = vector
+        
+        return np.asarray(vectors, dtype=np.float32) @ query_embedding
     
     def find_similar_incidents(self, 
                               problem_description: str, 
@@ -131,27 +687,31 @@ class ResolutionFinder:
             return filtered_results
         else:
             # Use in-memory search (legacy)
-            if not self.knowledge_base:
+            if len(self.embedding_store) == 0:
                 return []
             
             # Create embedding for current problem
-            query_embedding = self.model.encode([problem_description], convert_to_numpy=True)
-            
-            # Calculate similarities
-            similarities = cosine_similarity(query_embedding, self.embeddings_cache)[0]
-            
-            # Get top matches
-            top_indices = np.argsort(similarities)[::-1][:top_k]
-            
-            results = []
-            for idx in top_indices:
-                similarity = float(similarities[idx])
-                if similarity >= min_similarity:
-                    incident = self.knowledge_base[idx].copy()
-                    incident['similarity_score'] = similarity
-                    
-                    # Filter by category if specified
-                    if category is None or incident.get('category', '').lower() == category.lower():
+            query_embedding = _normalize_rows(
+                self.model.encode([problem_description], convert_to_numpy=True)
+            )[0]
+            
+            with self._lock:
+                # Get top matches (deleted rows can never match). A category
+                # filter restricts the search to that category's partition.
+                if category:
+                    top_indices, similarities = self.category_partitions.search(
+                        category, query_embedding, top_k,
+                        self.embedding_store.vectors, self.embedding_store.alive_mask
+                    )
+                else:
+                    top_indices, similarities = self._search_rows(query_embedding, top_k)
+                
+                results = []
+                for idx, similarity in zip(top_indices, similarities):
+                    similarity = float(similarity)
+                    if similarity >= min_similarity:
+                        incident = self.knowledge_base[idx].copy()
+                        incident['similarity_score'] = similarity
                         results.append(incident)
             
             return results
@@ -291,42 +851,27 @@ class ResolutionFinder:
                     print(f"[WARNING] Failed to add incident {incident.get('number', 'Unknown')} to ChromaDB")
             else:
                 # Add to in-memory storage (legacy)
-                self.knowledge_base.append(incident)
-                
-                # Update embeddings
-                text = f"{incident.get('short_description', '')} {incident.get('description', '')} {incident.get('category', '')}"
-                new_embedding = self.model.encode([text], convert_to_numpy=True)
-                
-                if len(self.embeddings_cache) == 0:
-                    self.embeddings_cache = new_embedding
+                if incident.get('number'):
+                    self.upsert_incidents([incident])
                 else:
-                    self.embeddings_cache = np.vstack([self.embeddings_cache, new_embedding])
+                    new_embedding = self.model.encode([self._embedding_text(incident)], convert_to_numpy=True)
+                    with self._lock:
+                        self.knowledge_base.append(incident)
+                        rows = self.embedding_store.append(_normalize_rows(new_embedding))
+                        self._index_rows(rows)
+                        self.category_partitions.assign(int(rows[0]), incident.get('category'))
                 
-                # Save to JSON file
-                try:
-                    # Load existing knowledge base from file
-                    if self.kb_file_path.exists():
-                        with open(self.kb_file_path, 'r', encoding='utf-8') as f:
-                            kb_data = json.load(f)
-                    else:
-                        kb_data = []
-                    
-                    # Add new incident if not already present
-                    incident_numbers = [inc.get('number') for inc in kb_data]
-                    if incident.get('number') not in incident_numbers:
-                        kb_data.append(incident)
-                        
-                        # Save back to file
-                        with open(self.kb_file_path, 'w', encoding='utf-8') as f:
-                            json.dump(kb_data, f, indent=2, ensure_ascii=False)
-                        
-                        print(f"[INFO] Added incident {incident.get('number', 'Unknown')} to knowledge base and saved to file")
-                    else:
-                        print(f"[INFO] Incident {incident.get('number', 'Unknown')} already exists in knowledge base file")
-                        
-                except Exception as e:
-                    print(f"[ERROR] Failed to save to knowledge base file: {str(e)}")
-                    # Still keep in memory even if file save fails
+                # Save to JSON file (still kept in memory if this fails)
+                self.append_to_knowledge_base_file(incident)
+
+    
+    def close(self) -> None:
+        """Release the shared embedding model(s) held by this finder"""
+        if self.chroma_client:
+            self.chroma_client.close()
+        if self.model is not None:
+            get_embedding_registry().release(self.model)
+            self.model = None
 
 
 def create_resolution_finder(config: Optional[Dict] = None) -> ResolutionFinder:
@@ -334,10 +879,23 @@ def create_resolution_finder(config: Optional[Dict] = None) -> ResolutionFinder:
     Factory function to create resolution finder
     
     Args:
-        config: Optional configuration dict
+        config: Optional configuration dict (the `rag` section of config.yaml);
+            `chromadb.enabled` and `chromadb.persist_directory` choose the
+            storage, the other `chromadb` keys go to ChromaDBClient
         
     Returns:
         ResolutionFinder instance
     """
-    embedding_model = config.get('embedding_model', 'all-MiniLM-L6-v2') if config else 'all-MiniLM-L6-v2'
-    return ResolutionFinder(embedding_model=embedding_model)
+    config = config or {}
+    chromadb_options = dict(config.get('chromadb') or {})
+    return ResolutionFinder(
+        embedding_model=config.get('embedding_model', 'all-MiniLM-L6-v2'),
+        use_chromadb=chromadb_options.pop('enabled', True),
+        chromadb_persist_dir=chromadb_options.pop('persist_directory', None),
+        device=config.get('embedding_device'),
+        chromadb_options=chromadb_options,
+        ann_backend=config.get('ann', {}).get('backend', 'ivf'),
+        ann_min_size=config.get('ann', {}).get('min_size', 20000),
+        ann_options=config.get('ann', {}).get('options'),
+        ann_index_path=config.get('ann', {}).get('index_path')
+    )
@@ -0,0 +1,491 @@
+"""
+Vector Indexes for the in-memory RAG store
+Exact (argpartition) and approximate (IVF) nearest-neighbour search over
+unit-normalised embeddings, where inner product equals cosine similarity
+"""
+
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first
+
+    Uses argpartition (O(n)) and only sorts the k winners.
+
+    Args:
+        scores: 1-D score array
+        k: Number of results
+
+    Returns:
+        Index array of length min(k, len(scores))
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    if k < len(scores):
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(len(scores))
+
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def exact_search(
+    vectors: np.ndarray,
+    query: np.ndarray,
+    k: int,
+    alive_mask: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Brute-force inner product search
+
+    Args:
+        vectors: (n, dim) unit-normalised matrix
+        query: (dim,) unit-normalised query
+        k: Number of results
+        alive_mask: Optional boolean mask of searchable rows
+
+    Returns:
+        Tuple of (row ids, scores), best first
+    """
+    if len(vectors) == 0:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+    scores = vectors @ query
+    if alive_mask is not None:
+        scores = np.where(alive_mask, scores, -np.inf)
+        k = min(k, int(alive_mask.sum()))
+
+    rows = top_k(scores, k)
+    return rows, scores[rows]
+
+
+class ExactIndex:
+    """Exact search behind the same interface as the approximate indexes"""
+
+    name = "exact"
+
+    def build(self, vectors: np.ndarray, alive_mask: np.ndarray) -> None:
+        """Nothing to build for exact search"""
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """Nothing to maintain for exact search"""
+
+    def remove(self, rows: np.ndarray) -> None:
+        """Nothing to maintain for exact search"""
+
+    def compact(self, kept: np.ndarray) -> None:
+        """Nothing to maintain for exact search"""
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        vectors: np.ndarray,
+        alive_mask: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Search all live rows"""
+        return exact_search(vectors, query, k, alive_mask)
+
+
+class IVFIndex:
+    """
+    Inverted-file index: spherical k-means partitions the vectors into
+    n_lists cells and a query only scores the n_probe closest cells.
+
+    The index stores row ids only; vectors are read from the embedding
+    store at query time. Each row's current cell is kept in `assignments`;
+    an updated or removed row is taken out of its old cell's list, so the
+    lists only ever hold live rows.
+    """
+
+    name = "ivf"
+
+    def __init__(
+        self,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        train_sample: int = 20000,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        """
+        Initialize IVF index
+
+        Args:
+            n_lists: Number of cells (default: sqrt of the number of vectors)
+            n_probe: Cells scanned per query (higher = better recall, slower)
+            train_sample: Vectors sampled to train the k-means quantizer
+            iterations: k-means iterations
+            seed: Random seed for reproducible training
+        """
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.train_sample = train_sample
+        self.iterations = iterations
+        self.seed = seed
+
+        self.centroids = None
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.built_size = 0
+        self._lists = []
+        self._pending = []
+
+    @property
+    def is_trained(self) -> bool:
+        """Whether the quantizer has been trained"""
+        return self.centroids is not None
+
+    def _kmeans(self, data: np.ndarray, n_lists: int) -> np.ndarray:
+        """Spherical k-means returning unit-norm centroids"""
+        rng = np.random.default_rng(self.seed)
+        centroids = data[rng.choice(len(data), n_lists, replace=False)].copy()
+
+        for _ in range(self.iterations):
+            labels = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, data)
+            counts = np.bincount(labels, minlength=n_lists)
+
+            empty = counts == 0
+            if empty.any():
+                # Re-seed empty cells with random points
+                sums[empty] = data[rng.choice(len(data), int(empty.sum()))]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids = (sums / norms).astype(np.float32)
+
+        return centroids
+
+    def _assign(self, vectors: np.ndarray, chunk_size: int = 8192) -> np.ndarray:
+        """Nearest cell for each vector"""
+        labels = np.empty(len(vectors), dtype=np.int32)
+        for start in range(0, len(vectors), chunk_size):
+            chunk = vectors[start:start + chunk_size]
+            labels[start:start + chunk_size] = np.argmax(chunk @ self.centroids.T, axis=1)
+        return labels
+
+    def _ensure_capacity(self, size: int) -> None:
+        """Grow the assignments array to cover `size` rows"""
+        if size > len(self.assignments):
+            grown = np.full(max(size, 2 * len(self.assignments)), -1, dtype=np.int32)
+            grown[:len(self.assignments)] = self.assignments
+            self.assignments = grown
+
+    def _rebuild_lists(self) -> None:
+        """Group row ids by assigned cell"""
+        n_lists = len(self.centroids)
+        rows = np.flatnonzero(self.assignments >= 0)
+        labels = self.assignments[rows]
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        self._lists = [rows[order[bounds[i]:bounds[i + 1]]] for i in range(n_lists)]
+        self._pending = [[] for _ in range(n_lists)]
+
+    def build(self, vectors: np.ndarray, alive_mask: np.ndarray) -> None:
+        """
+        Train the quantizer and assign every live row
+
+        Args:
+            vectors: (n, dim) unit-normalised matrix
+            alive_mask: Boolean mask of live rows
+        """
+        live = np.flatnonzero(alive_mask)
+        if len(live) == 0:
+            return
+
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(live))))
+        n_lists = min(n_lists, len(live))
+
+        rng = np.random.default_rng(self.seed)
+        sample = live if len(live) <= self.train_sample else rng.choice(live, self.train_sample, replace=False)
+        self.centroids = self._kmeans(np.asarray(vectors[sample], dtype=np.float32), n_lists)
+
+        self.assignments = np.full(len(vectors), -1, dtype=np.int32)
+        self.assignments[live] = self._assign(vectors[live])
+        self.built_size = len(live)
+        self._rebuild_lists()
+
+    def add(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        """
+        Assign new or updated rows to their nearest cell
+
+        Args:
+            rows: Row ids
+            vectors: Their (unit-normalised) vectors
+        """
+        if not self.is_trained or len(rows) == 0:
+            return
+
+        rows = np.asarray(rows)
+        self._ensure_capacity(int(rows.max()) + 1)
+        labels = self._assign(np.asarray(vectors, dtype=np.float32))
+        self._drop(rows)
+        self.assignments[rows] = labels
+        for row, label in zip(rows, labels):
+            self._pending[label].append(int(row))
+
+    def remove(self, rows: np.ndarray) -> None:
+        """
+        Remove rows from the index
+
+        Args:
+            rows: Row ids
+        """
+        self._drop(np.asarray(rows))
+
+    def _drop(self, rows: np.ndarray) -> None:
+        """Take rows out of the lists of the cells they are assigned to"""
+        rows = rows[rows < len(self.assignments)]
+        cells = self.assignments[rows]
+        listed = cells >= 0
+        rows, cells = rows[listed], cells[listed]
+
+        for cell in np.unique(cells):
+            members = self._cell_rows(cell)
+            self._lists[cell] = members[~np.isin(members, rows[cells == cell])]
+        self.assignments[rows] = -1
+
+    def compact(self, kept: np.ndarray) -> None:
+        """
+        Renumber rows after the store dropped its deleted rows
+
+        Args:
+            kept: Old row ids of the surviving rows; new row i was old row kept[i]
+        """
+        if not self.is_trained:
+            return
+
+        kept = np.asarray(kept, dtype=np.int64)
+        if len(kept):
+            self._ensure_capacity(int(kept.max()) + 1)
+        self.assignments = self.assignments[kept].copy()
+        self._rebuild_lists()
+
+    def _cell_rows(self, cell: int) -> np.ndarray:
+        """All row ids currently listed under a cell (pending appends merged)"""
+        if self._pending[cell]:
+            self._lists[cell] = np.concatenate([self._lists[cell], np.asarray(self._pending[cell])])
+            self._pending[cell] = []
+        return self._lists[cell]
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int,
+        vectors: np.ndarray,
+        alive_mask: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Approximate inner product search
+
+        Args:
+            query: (dim,) unit-normalised query
+            k: Number of results
+            vectors: (n, dim) matrix the index was built over
+            alive_mask: Boolean mask of live rows
+
+        Returns:
+            Tuple of (row ids, scores), best first
+        """
+        if not self.is_trained:
+            return exact_search(vectors, query, k, alive_mask)
+
+        cells = top_k(self.centroids @ query, self.n_probe)
+        candidates = np.concatenate([self._cell_rows(cell) for cell in cells])
+        if len(candidates) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        # Rows deleted from the store but not (yet) from the index are skipped
+        candidates = np.unique(candidates[alive_mask[candidates]])
+
+        scores = vectors[candidates] @ query
+        best = top_k(scores, k)
+        return candidates[best], scores[best]
+
+    def save(self, path: str, **extra: np.ndarray) -> None:
+        """
+        Persist the index
+
+        Args:
+            path: Target .npz file
+            **extra: Additional arrays to store alongside (e.g. row keys)
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            path,
+            centroids=self.centroids,
+            assignments=self.assignments,
+            params=np.array([self.n_probe, self.built_size], dtype=np.int64),
+            **extra
+        )
+
+    @classmethod
+    def load(cls, path: str) -> Tuple["IVFIndex", Dict[str, np.ndarray]]:
+        """
+        Load a persisted index
+
+        Args:
+            path: .npz file written by save()
+
+        Returns:
+            Tuple of (index, extra arrays)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+
+        n_probe, built_size = (int(v) for v in arrays.pop("params"))
+        index = cls(n_probe=n_probe)
+        index.centroids = arrays.pop("centroids")
+        index.assignments = arrays.pop("assignments")
+        index.built_size = built_size
+        index._rebuild_lists()
+
+        return index, arrays
+
+
+def create_vector_index(backend: str = "ivf", **options):
+    """
+    Factory function to create a vector index
+
+    Args:
+        backend: 'ivf' or 'exact'
+        **options: Backend specific settings (n_lists, n_probe, ...)
+
+    Returns:
+        Index instance
+    """
+    if backend == "ivf":
+        return IVFIndex(**options)
+    if backend == "exact":
+        return ExactIndex()
+    raise ValueError(f"Unknown vector index backend: {backend}")
+
+
+def category_key(category: Optional[str]) -> str:
+    """
+    Normalised category for lookups (categories compare case-insensitively)
+
+    Shared by CategoryPartitions and the lexical index, so a category
+    filters the same way in vector, keyword and hybrid search.
+
+    Args:
+        category: Category as stored on the incident or given by the caller
+
+    Returns:
+        Lookup key ('' for a missing category)
+    """
+    return (category or '').strip().lower()
+
+
+class CategoryPartitions:
+    """
+    Row ids grouped by category so category-filtered queries only score
+    the matching partition instead of scanning the whole store
+    """
+
+    def __init__(self):
+        """Initialize empty partitions"""
+        self._members: Dict[str, set] = {}
+        self._row_keys: Dict[int, str] = {}
+        self._arrays: Dict[str, np.ndarray] = {}
+
+    key = staticmethod(category_key)
+
+    def assign(self, row: int, category: Optional[str]) -> None:
+        """
+        Put a row in its category's partition, moving it if it changed
+
+        Args:
+            row: Row id
+            category: Category of the incident stored at that row
+        """
+        key = self.key(category)
+        old = self._row_keys.get(row)
+        if old == key:
+            return
+        if old is not None:
+            self.remove(row)
+
+        self._members.setdefault(key, set()).add(row)
+        self._row_keys[row] = key
+        self._arrays.pop(key, None)
+
+    def remove(self, row: int) -> None:
+        """
+        Drop a row from its partition
+
+        Args:
+            row: Row id
+        """
+        key = self._row_keys.pop(row, None)
+        if key is None:
+            return
+
+        members = self._members[key]
+        members.discard(row)
+        if not members:
+            del self._members[key]
+        self._arrays.pop(key, None)
+
+    def rows(self, category: Optional[str]) -> np.ndarray:
+        """
+        Sorted row ids in a category's partition
+
+        Args:
+            category: Category to look up
+
+        Returns:
+            Row id array (empty if the category is unknown)
+        """
+        key = self.key(category)
+        rows = self._arrays.get(key)
+        if rows is None:
+            rows = np.array(sorted(self._members.get(key, ())), dtype=np.int64)
+            self._arrays[key] = rows
+        return rows
+
+    def clear(self) -> None:
+        """Remove all partitions"""
+        self._members = {}
+        self._row_keys = {}
+        self._arrays = {}
+
+    def sizes(self) -> Dict[str, int]:
+        """Number of rows per partition"""
+        return {key: len(members) for key, members in self._members.items()}
+
+    def search(
+        self,
+        category: Optional[str],
+        query: np.ndarray,
+        k: int,
+        vectors: np.ndarray,
+        alive_mask: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact search restricted to one category
+
+        Args:
+            category: Category to search
+            query: (dim,) unit-normalised query
+            k: Number of results
+            vectors: (n, dim) store matrix
+            alive_mask: Boolean mask of live rows
+
+        Returns:
+            Tuple of (row ids, scores), best first
+        """
+        rows = self.rows(category)
+        rows = rows[alive_mask[rows]]
+        if len(rows) == 0:
+            return rows, np.zeros(0, dtype=np.float32)
+
+        scores = vectors[rows] @ query
+        best = top_k(scores, k)
+        return rows[best], scores[best]
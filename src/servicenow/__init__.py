@@ -1,5 +1,7 @@
 """ServiceNow integration package"""
 
 from .client import ServiceNowClient, create_client_from_env
+from .fetcher import PageFetcher, create_session
+from .sync import SyncWatermark
 
-__all__ = ["ServiceNowClient", "create_client_from_env"]
+__all__ = ["ServiceNowClient", "create_client_from_env", "PageFetcher", "create_session", "SyncWatermark"]
@@ -6,41 +6,112 @@ Handles connection to ServiceNow instance and fetches incident data.
 
 import os
 import json
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import List, Dict, Optional
-import requests
+from zoneinfo import ZoneInfo
 from requests.auth import HTTPBasicAuth
 from loguru import logger
 
+from .fetcher import MODE_KEYSET, MODE_OFFSET, PageFetcher, create_session, flatten_display_values
+
+
+# Keyset order of incident fetches; number is unique
+INCIDENT_KEYSET = ("sys_created_on", "number")
+
+# Fields returned as machine values instead of display values: the sync
+# watermark is read from sys_updated_on, keyset positions from
+# sys_created_on, and display dates depend on the user's locale (day-first
+# vs month-first) and timezone
+MACHINE_VALUE_FIELDS = ("sys_created_on", "sys_updated_on")
+
+# Machine format of ServiceNow dates (always UTC)
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 class ServiceNowClient:
     """Client for interacting with ServiceNow API"""
     
-    def __init__(self, instance: str, username: str, password: str):
+    def __init__(
+        self,
+        instance: str,
+        username: str,
+        password: str,
+        page_size: int = 1000,
+        max_workers: int = 4,
+        max_retries: int = 5,
+        backoff_factor: float = 1.0,
+        timeout: float = 60.0,
+        checkpoint_path: Optional[str] = None,
+        pagination: str = MODE_KEYSET,
+        query_timezone: Optional[str] = None
+    ):
         """
         Initialize ServiceNow client
         
         Args:
-            instance: ServiceNow instance URL (e.g., your-instance.service-now.com)
+            instance: ServiceNow instance URL (e.g., your-instance.service-now.com);
+                a scheme may be included (e.g. http://localhost:8080 for a stub)
             username: ServiceNow username
             password: ServiceNow password
+            page_size: Records per Table API request
+            max_workers: Pages fetched concurrently (also the connection pool size)
+            max_retries: Retries per request on connection errors, 429 and 5xx
+            backoff_factor: Exponential backoff base between retries, in seconds
+            timeout: Seconds per request
+            checkpoint_path: File recording fetched pages so an interrupted
+                fetch_incidents() resumes; None disables resuming
+            pagination: "keyset" (pages continue after the last
+                (sys_created_on, number) seen; stable while the table
+                changes) or "offset" (concurrent pages, faster on a
+                quiet table)
+            query_timezone: IANA timezone of the API user's profile (e.g.
+                "Europe/Berlin"); the instance reads dates in encoded queries
+                in it, so UTC machine values are converted before they are
+                written into a query. None means UTC
         """
+        if pagination not in (MODE_KEYSET, MODE_OFFSET):
+            raise ValueError(f"Unknown pagination mode: {pagination}")
         self.instance = instance
-        self.base_url = f"https://{instance}/api/now"
+        if instance.startswith(("http://", "https://")):
+            self.base_url = f"{instance.rstrip('/')}/api/now"
+        else:
+            self.base_url = f"https://{instance}/api/now"
         self.auth = HTTPBasicAuth(username, password)
         self.headers = {
             "Content-Type": "application/json",
             "Accept": "application/json"
         }
+        self.timeout = timeout
+        self.pagination = pagination
+        self.query_timezone = ZoneInfo(query_timezone) if query_timezone else timezone.utc
+        
+        # One pooled, retrying session for every request
+        self.session = create_session(
+            auth=self.auth,
+            headers=self.headers,
+            pool_size=max_workers,
+            max_retries=max_retries,
+            backoff_factor=backoff_factor
+        )
+        self.fetcher = PageFetcher(
+            self.session,
+            f"{self.base_url}/table/incident",
+            page_size=page_size,
+            max_workers=max_workers,
+            timeout=timeout,
+            checkpoint_path=checkpoint_path,
+            record_transform=lambda record: flatten_display_values(record, MACHINE_VALUE_FIELDS),
+            position_transform=lambda key, value: self._query_date(value) if key in MACHINE_VALUE_FIELDS else value
+        )
         
     def test_connection(self) -> bool:
         """Test connection to ServiceNow instance"""
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/table/incident",
-                auth=self.auth,
-                headers=self.headers,
-                params={"sysparm_limit": 1}
+                params={"sysparm_limit": 1},
+                timeout=self.timeout
             )
             response.raise_for_status()
             logger.info("Successfully connected to ServiceNow")
@@ -54,81 +125,96 @@ class ServiceNowClient:
         fields: List[str],
         days_back: int = 90,
         state: str = "closed",
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        updated_since: Optional[str] = None
     ) -> List[Dict]:
         """
         Fetch incidents from ServiceNow
         
+        Pages are fetched by keyset on (sys_created_on, number), or
+        concurrently by offset when the client uses offset pagination. If
+        the fetch is interrupted (e.g. retries exhausted), calling it again
+        with the same arguments resumes from the checkpoint, keeping the
+        original date window.
+        
         Args:
             fields: List of fields to retrieve
             days_back: Number of days to look back
             state: Incident state to filter (default: closed)
             limit: Maximum number of records to fetch
+            updated_since: Only fetch incidents with sys_updated_on after this
+                ("YYYY-MM-DD HH:MM:SS", the machine format records carry
+                sys_updated_on in); replaces the days_back window
             
         Returns:
             List of incident records
+            
+        Raises:
+            requests.RequestException: If a page still fails after retries
         """
-        logger.info(f"Fetching incidents from last {days_back} days")
-        
-        # Calculate date filter
-        start_date = (datetime.now() - timedelta(days=days_back)).strftime("%Y-%m-%d")
+        if updated_since:
+            logger.info(f"Fetching incidents updated since {updated_since}")
+            date_filter = f"sys_updated_on>{self._query_date(updated_since)}"
+        else:
+            logger.info(f"Fetching incidents from last {days_back} days")
+            start_date = (datetime.now(self.query_timezone) - timedelta(days=days_back)).strftime("%Y-%m-%d")
+            date_filter = f"sys_created_on>={start_date}"
         
-        # Build query
+        # Build query; a fixed order keeps offset pages stable, keyset
+        # paging appends its own position and ORDERBY clauses
         query_parts = [
             f"state={self._get_state_value(state)}",
-            f"sys_created_on>={start_date}"
+            date_filter
         ]
+        keys = None
+        if self.pagination == MODE_KEYSET:
+            keys = INCIDENT_KEYSET
+            fields = list(dict.fromkeys([*fields, *keys]))
+        else:
+            query_parts.append("ORDERBYsys_id")
         query = "^".join(query_parts)
         
-        # Build parameters
+        # Build parameters; fields are flattened to display values except
+        # MACHINE_VALUE_FIELDS, whose UTC dates are converted to the user's
+        # timezone wherever they are written into a query
         params = {
             "sysparm_query": query,
             "sysparm_fields": ",".join(fields),
-            "sysparm_display_value": "true"
+            "sysparm_display_value": "all"
         }
         
-        if limit:
-            params["sysparm_limit"] = limit
-        
-        incidents = []
-        offset = 0
-        batch_size = 1000
+        job = {
+            "fields": list(fields),
+            "days_back": days_back,
+            "state": state,
+            "limit": limit,
+            "updated_since": updated_since,
+            "pagination": self.pagination,
+            "display_value": params["sysparm_display_value"]
+        }
         
-        while True:
-            params["sysparm_offset"] = offset
-            params["sysparm_limit"] = batch_size
-            
-            try:
-                response = requests.get(
-                    f"{self.base_url}/table/incident",
-                    auth=self.auth,
-                    headers=self.headers,
-                    params=params
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                batch = data.get("result", [])
-                
-                if not batch:
-                    break
-                
-                incidents.extend(batch)
-                logger.info(f"Fetched {len(incidents)} incidents so far...")
-                
-                if limit and len(incidents) >= limit:
-                    incidents = incidents[:limit]
-                    break
-                
-                offset += batch_size
-                
-            except Exception as e:
+        try:
+            incidents = self.fetcher.fetch_all(params, limit=limit, job=job, keys=keys)
+        except Exception as e:
+            if self.fetcher.checkpoint:
+                logger.error(f"Error fetching incidents: {e}; rerun to resume from {self.fetcher.checkpoint.path}")
+            else:
                 logger.error(f"Error fetching incidents: {e}")
-                break
+            raise
         
-        logger.info(f"Total incidents fetched: {len(incidents)}")
+        logger.info(f"Total incidents fetched: {len(incidents)} ({self.fetcher.requests_made} requests)")
         return incidents
     
+    def _query_date(self, value: str) -> str:
+        """Convert a UTC machine date to the user's timezone, as encoded queries read it"""
+        if not value or self.query_timezone is timezone.utc:
+            return value
+        try:
+            utc = datetime.strptime(value, DATE_FORMAT).replace(tzinfo=timezone.utc)
+        except ValueError:
+            return value
+        return utc.astimezone(self.query_timezone).strftime(DATE_FORMAT)
+    
     def _get_state_value(self, state: str) -> str:
         """Convert state name to ServiceNow state value"""
         state_mapping = {
@@ -152,14 +238,13 @@ class ServiceNowClient:
             Incident record or None if not found
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}/table/incident",
-                auth=self.auth,
-                headers=self.headers,
                 params={
                     "sysparm_query": f"number={incident_number}",
                     "sysparm_limit": 1
-                }
+                },
+                timeout=self.timeout
             )
             response.raise_for_status()
             
@@ -187,4 +272,16 @@ def create_client_from_env() -> ServiceNowClient:
             "SERVICENOW_INSTANCE, SERVICENOW_USERNAME, SERVICENOW_PASSWORD"
         )
     
-    return ServiceNowClient(instance, username, password)
+    return ServiceNowClient(
+        instance,
+        username,
+        password,
+        page_size=int(os.getenv("SERVICENOW_PAGE_SIZE", "1000")),
+        max_workers=int(os.getenv("SERVICENOW_FETCH_WORKERS", "4")),
+        pagination=os.getenv("SERVICENOW_PAGINATION", MODE_KEYSET),
+        query_timezone=os.getenv("SERVICENOW_TIMEZONE") or None,
+        checkpoint_path=os.getenv(
+            "SERVICENOW_CHECKPOINT",
+            str(Path(os.getenv("DATA_DIR", "./data")) / "servicenow_fetch.checkpoint.jsonl")
+        )
+    )
@@ -0,0 +1,488 @@
+"""
+ServiceNow Page Fetcher
+
+Retrieves large Table API result sets page by page over a pooled,
+retrying session, either by keyset (each page continues after the last
+record of the previous one) or by offset, with pages fetched concurrently
+once the total is known (X-Total-Count). Pages are appended to a
+checkpoint file as they arrive, so an interrupted pull resumes with only
+the missing pages.
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from loguru import logger
+
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Paging modes, stored in the checkpoint header
+MODE_OFFSET = 'offset'
+MODE_KEYSET = 'keyset'
+
+
+def keyset_query(base_query: str, keys: Sequence[str], position: Optional[Sequence[str]] = None) -> str:
+    """
+    Encoded query for the records after a position in ascending key order
+
+    ServiceNow has no tuple comparison, so (a, b) > (x, y) is written as
+    one ^NQ group per key prefix: a>x, or a=x and b>y. Each group repeats
+    the base conditions.
+
+    Args:
+        base_query: Encoded query without ORDERBY (may be empty)
+        keys: Sort fields, most significant first; the last must be unique
+        position: Key values of the last record fetched (None for the first page)
+
+    Returns:
+        Encoded query including the ORDERBY clauses
+    """
+    order = "^".join(f"ORDERBY{key}" for key in keys)
+    if position is None:
+        return f"{base_query}^{order}" if base_query else order
+
+    groups = []
+    for i, key in enumerate(keys):
+        conditions = [base_query] if base_query else []
+        conditions += [f"{keys[j]}={position[j]}" for j in range(i)]
+        conditions.append(f"{key}>{position[i]}")
+        groups.append("^".join(conditions))
+    return "^NQ".join(groups) + f"^{order}"
+
+
+def create_session(
+    auth=None,
+    headers: Optional[Dict] = None,
+    pool_size: int = 4,
+    max_retries: int = 5,
+    backoff_factor: float = 1.0
+) -> requests.Session:
+    """
+    Create a pooled requests session that retries transient failures
+
+    Args:
+        auth: requests auth object
+        headers: Default headers
+        pool_size: Connections kept open per host (match the worker count)
+        max_retries: Attempts per request after the first
+        backoff_factor: Exponential backoff base in seconds (0 disables sleeping)
+
+    Returns:
+        Configured requests.Session
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(['GET']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.auth = auth
+    if headers:
+        session.headers.update(headers)
+    return session
+
+
+class PageCheckpoint:
+    """Append-only JSON lines file of completed pages for one fetch job"""
+
+    def __init__(self, path: Path):
+        """
+        Initialize checkpoint
+
+        Args:
+            path: Checkpoint file location
+        """
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self, job: Dict) -> Tuple[Optional[Dict], Dict[int, List[Dict]]]:
+        """
+        Read a previous run of the same job
+
+        Args:
+            job: Description of the fetch; a checkpoint for a different job
+                is discarded
+
+        Returns:
+            Tuple of (stored header or None, offset -> records of completed pages)
+        """
+        if not self.path.exists():
+            return None, {}
+
+        header, pages = None, {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn last line from an interrupted write
+                    if header is None:
+                        header = entry
+                    else:
+                        pages[entry['offset']] = entry['result']
+        except OSError as e:
+            logger.warning(f"Could not read fetch checkpoint {self.path}: {e}")
+            return None, {}
+
+        if header is None or header.get('job') != job:
+            logger.info(f"Ignoring fetch checkpoint for a different job: {self.path}")
+            return None, {}
+
+        return header, pages
+
+    def start(self, header: Dict) -> None:
+        """
+        Begin a new checkpoint (overwrites any previous file)
+
+        Args:
+            header: Job description, query parameters and page layout
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(header) + '\n')
+
+    def rewrite(self, header: Dict, pages: Dict[int, List[Dict]]) -> None:
+        """
+        Rewrite the checkpoint with an updated header and the kept pages
+
+        Args:
+            header: Job description, query parameters and page layout
+            pages: offset -> records of completed pages
+        """
+        self.start(header)
+        for offset in sorted(pages):
+            self.record(offset, pages[offset])
+
+    def record(self, offset: int, records: List[Dict]) -> None:
+        """
+        Persist a completed page (thread-safe)
+
+        Args:
+            offset: sysparm_offset of the page
+            records: Page records
+        """
+        line = json.dumps({'offset': offset, 'result': records}, ensure_ascii=False)
+        with self._lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+            f.flush()
+
+    def clear(self) -> None:
+        """Delete the checkpoint after a complete fetch"""
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def flatten_display_values(record: Dict, value_fields: Sequence[str] = ()) -> Dict:
+    """
+    Collapse a sysparm_display_value=all record to plain field values
+
+    Every field arrives as {"display_value": ..., "value": ...}. Fields in
+    value_fields keep the machine value (dates in UTC, "YYYY-MM-DD
+    HH:MM:SS" whatever the user's locale); all others keep the display
+    value, as sysparm_display_value=true would return them.
+
+    Args:
+        record: Table API record
+        value_fields: Fields to keep as machine values
+
+    Returns:
+        Record with one plain value per field
+    """
+    flat = {}
+    for name, field in record.items():
+        if isinstance(field, dict) and 'display_value' in field:
+            field = field.get('value') if name in value_fields else field.get('display_value')
+        flat[name] = field
+    return flat
+
+
+class PageFetcher:
+    """Concurrent, resumable offset pagination over one ServiceNow table"""
+
+    def __init__(
+        self,
+        session: requests.Session,
+        url: str,
+        page_size: int = 1000,
+        max_workers: int = 4,
+        timeout: float = 60.0,
+        checkpoint_path: Optional[str] = None,
+        record_transform: Optional[Callable[[Dict], Dict]] = None,
+        position_transform: Optional[Callable[[str, str], str]] = None
+    ):
+        """
+        Initialize fetcher
+
+        Args:
+            session: Session from create_session()
+            url: Table API endpoint, e.g. https://x.service-now.com/api/now/table/incident
+            page_size: Records per request (sysparm_limit)
+            max_workers: Pages fetched concurrently
+            timeout: Seconds per request
+            checkpoint_path: File recording completed pages; None disables resuming
+            record_transform: Applied to every record as it arrives, before
+                keyset positions are taken or the page is checkpointed
+            position_transform: Called with (key, value) for each keyset
+                position value; returns the value as written into the
+                query (e.g. a date converted to the user's timezone)
+        """
+        self.session = session
+        self.url = url
+        self.page_size = page_size
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.checkpoint = PageCheckpoint(checkpoint_path) if checkpoint_path else None
+        self.record_transform = record_transform
+        self.position_transform = position_transform
+
+        self.requests_made = 0
+        self.pages_resumed = 0
+
+    def _get_page(self, params: Dict, offset: Optional[int] = None) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Fetch one page
+
+        Returns:
+            Tuple of (records, X-Total-Count or None)
+        """
+        page_params = dict(params, sysparm_limit=self.page_size)
+        if offset is not None:
+            page_params['sysparm_offset'] = offset
+        response = self.session.get(self.url, params=page_params, timeout=self.timeout)
+        self.requests_made += 1
+        response.raise_for_status()
+
+        total = response.headers.get('X-Total-Count')
+        records = response.json().get('result', [])
+        if self.record_transform is not None:
+            records = [self.record_transform(record) for record in records]
+        return records, int(total) if total is not None else None
+
+    def iter_pages(
+        self,
+        params: Dict,
+        limit: Optional[int] = None,
+        job: Optional[Dict] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield result pages in offset order
+
+        A checkpoint left by an interrupted run of the same job is resumed:
+        its query parameters are reused (so a relative date window does not
+        move) and only missing pages are requested. The checkpoint is
+        deleted once every page has been yielded.
+
+        Args:
+            params: Query parameters (sysparm_query, sysparm_fields, ...)
+            limit: Maximum number of records
+            job: Identifies the fetch for resuming (default: params)
+
+        Yields:
+            Lists of records, one per page
+        """
+        job = job if job is not None else params
+        header, done = self.checkpoint.load(job) if self.checkpoint else (None, {})
+
+        if (header is not None and header.get('mode', MODE_OFFSET) == MODE_OFFSET
+                and header.get('page_size') == self.page_size):
+            params = header['params']
+            total = header.get('total')
+            self.pages_resumed = len(done)
+            logger.info(f"Resuming ServiceNow fetch: {len(done)} pages already in {self.checkpoint.path}")
+        else:
+            done = {}
+            total = None
+
+        if total is None:
+            records, total = self._get_page(params, 0)
+            done[0] = records
+            header = {'job': job, 'params': params, 'page_size': self.page_size,
+                      'mode': MODE_OFFSET, 'total': total}
+            if self.checkpoint:
+                self.checkpoint.rewrite(header, {0: records})
+
+        if total is None:
+            # No X-Total-Count (e.g. stripped by a proxy): page sequentially
+            yield from self._iter_sequential(params, limit, done[0])
+        else:
+            if limit is not None:
+                total = min(total, limit)
+            yield from self._iter_concurrent(params, total, done)
+
+        if self.checkpoint:
+            self.checkpoint.clear()
+
+    def _iter_concurrent(self, params: Dict, total: int, done: Dict[int, List[Dict]]) -> Iterator[List[Dict]]:
+        """Fetch missing pages with a bounded worker pool, yielding in order"""
+        offsets = list(range(0, total, self.page_size))
+        missing = iter([offset for offset in offsets if offset not in done])
+        futures = {}
+
+        def fetch(offset: int) -> List[Dict]:
+            records, _ = self._get_page(params, offset)
+            if self.checkpoint:
+                self.checkpoint.record(offset, records)
+            return records
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='servicenow-page') as pool:
+            try:
+                for offset in offsets:
+                    # Keep up to two requests per worker in flight
+                    while len(futures) < self.max_workers * 2:
+                        next_offset = next(missing, None)
+                        if next_offset is None:
+                            break
+                        futures[next_offset] = pool.submit(fetch, next_offset)
+
+                    if offset in done:
+                        records = done.pop(offset)
+                    else:
+                        records = futures.pop(offset).result()
+
+                    # The last page may run past the limit
+                    yield records[:total - offset]
+            finally:
+                for future in futures.values():
+                    future.cancel()
+
+    def _iter_sequential(self, params: Dict, limit: Optional[int], first_page: List[Dict]) -> Iterator[List[Dict]]:
+        """Page until an empty or short page when the total is unknown"""
+        records, offset, fetched = first_page, 0, 0
+        while records:
+            if limit is not None and fetched + len(records) >= limit:
+                yield records[:limit - fetched]
+                return
+            yield records
+            fetched += len(records)
+
+            if len(records) < self.page_size:
+                return
+            offset += self.page_size
+            records, _ = self._get_page(params, offset)
+            if self.checkpoint:
+                self.checkpoint.record(offset, records)
+
+    def iter_keyset_pages(
+        self,
+        params: Dict,
+        keys: Sequence[str],
+        limit: Optional[int] = None,
+        job: Optional[Dict] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Yield result pages in ascending key order using keyset pagination
+
+        Every request filters for records after the last one received
+        instead of skipping an offset, so deep pages cost the same as the
+        first and records inserted during the pull cannot shift pages.
+        Pages are requested one after another (each needs the previous
+        page's last record) and without X-Total-Count, which ServiceNow
+        would otherwise count on every request. A checkpoint of the same
+        job is resumed after its last stored page.
+
+        Args:
+            params: Query parameters; sysparm_query holds the filter
+                without ORDERBY, and sysparm_fields must include the keys
+            keys: Sort fields, most significant first; the last must be unique
+            limit: Maximum number of records
+            job: Identifies the fetch for resuming (default: params)
+
+        Yields:
+            Lists of records, one per page
+        """
+        job = job if job is not None else params
+        header, done = self.checkpoint.load(job) if self.checkpoint else (None, {})
+
+        if header is not None and header.get('mode') == MODE_KEYSET and header.get('page_size') == self.page_size:
+            params = header['params']
+            self.pages_resumed = len(done)
+            logger.info(f"Resuming ServiceNow fetch: {len(done)} pages already in {self.checkpoint.path}")
+        else:
+            done = {}
+            if self.checkpoint:
+                self.checkpoint.start({'job': job, 'params': params, 'page_size': self.page_size, 'mode': MODE_KEYSET})
+
+        base_query = params.get('sysparm_query', '')
+        fetched, index, position = 0, 0, None
+        while limit is None or fetched < limit:
+            # Checkpoint entries are keyed by index * page_size like offset pages
+            offset = index * self.page_size
+            if offset in done:
+                records = done.pop(offset)
+            else:
+                page_params = dict(params, sysparm_query=keyset_query(base_query, keys, position),
+                                   sysparm_no_count='true')
+                records, _ = self._get_page(page_params)
+                if self.checkpoint:
+                    self.checkpoint.record(offset, records)
+
+            page = records if limit is None else records[:limit - fetched]
+            if page:
+                yield page
+            fetched += len(page)
+
+            if len(records) < self.page_size:
+                break
+            position = [records[-1].get(key, '') for key in keys]
+            if self.position_transform:
+                position = [self.position_transform(key, value) for key, value in zip(keys, position)]
+            index += 1
+
+        if self.checkpoint:
+            self.checkpoint.clear()
+
+    def fetch_all(
+        self,
+        params: Dict,
+        limit: Optional[int] = None,
+        job: Optional[Dict] = None,
+        keys: Optional[Sequence[str]] = None
+    ) -> List[Dict]:
+        """
+        Fetch every page into one list, dropping records repeated across pages
+
+        Offset pages can overlap when records are inserted during a long
+        pull; repeats are detected by sys_id, else number.
+
+        Args:
+            params: Query parameters
+            limit: Maximum number of records
+            job: Identifies the fetch for resuming
+            keys: Sort fields for keyset pagination (None pages by offset)
+
+        Returns:
+            List of records in page order
+        """
+        if keys:
+            pages = self.iter_keyset_pages(params, keys, limit=limit, job=job)
+        else:
+            pages = self.iter_pages(params, limit=limit, job=job)
+
+        records, seen = [], set()
+        for page in pages:
+            for record in page:
+                key = record.get('sys_id') or record.get('number')
+                if key is not None:
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                records.append(record)
+        return records
@@ -0,0 +1,140 @@
+"""
+Incremental ServiceNow Sync State
+
+Keeps the sys_updated_on high-water mark of the last successful sync so
+the next run only requests incidents changed since then.
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from loguru import logger
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from data_validation.date_parsing import ISO_FORMAT, parse_with_format
+
+
+# Encoded-query date format of the ServiceNow Table API (also the format of
+# machine values, e.g. sys_updated_on with sysparm_display_value=all)
+SERVICENOW_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def latest_update(incidents: Iterable[Dict]) -> Optional[datetime]:
+    """
+    Highest sys_updated_on among fetched incidents
+
+    Values must be machine values (SERVICENOW_DATE_FORMAT, or ISO). Locale
+    dependent display values are skipped rather than guessed: "03/05/2024"
+    read month-first on a day-first instance would move the watermark
+    months ahead and make the next sync skip records.
+
+    Args:
+        incidents: Incident records
+
+    Returns:
+        Naive datetime, or None if no record carries a parseable value
+    """
+    latest = None
+    skipped = 0
+    for incident in incidents:
+        value = (incident.get("sys_updated_on") or "").strip()
+        if not value:
+            continue
+        updated = parse_with_format(value, SERVICENOW_DATE_FORMAT) or parse_with_format(value, ISO_FORMAT)
+        if updated is None:
+            skipped += 1
+            continue
+        if updated.tzinfo is not None:
+            updated = updated.astimezone(timezone.utc).replace(tzinfo=None)
+        if latest is None or updated > latest:
+            latest = updated
+    if skipped:
+        logger.warning(f"Ignored {skipped} sys_updated_on values not in machine format")
+    return latest
+
+
+class SyncWatermark:
+    """JSON file holding the high-water mark of the last successful sync"""
+
+    def __init__(self, path: str, overlap_minutes: int = 60):
+        """
+        Initialize watermark
+
+        Args:
+            path: State file location
+            overlap_minutes: How far before the watermark the next sync
+                starts; covers clock skew and records committed late
+                (re-fetched records are upserted, so overlap is harmless).
+                The API user's timezone is not covered here: the client
+                converts the UTC watermark (see ServiceNowClient.query_timezone)
+        """
+        self.path = Path(path)
+        self.overlap = timedelta(minutes=overlap_minutes)
+
+    def load(self) -> Optional[Dict]:
+        """
+        Read the stored state
+
+        Returns:
+            Dictionary with sys_updated_on (ISO), last_sync and counts, or
+            None if no sync has completed yet
+        """
+        if not self.path.exists():
+            return None
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"Ignoring unreadable sync state {self.path}: {e}")
+            return None
+
+    def updated_since(self) -> Optional[str]:
+        """
+        Lower bound for the next sync's sys_updated_on filter
+
+        Returns:
+            UTC date string in ServiceNow query format, or None for a full sync
+        """
+        state = self.load()
+        if not state or not state.get("sys_updated_on"):
+            return None
+        watermark = datetime.fromisoformat(state["sys_updated_on"]) - self.overlap
+        return watermark.strftime(SERVICENOW_DATE_FORMAT)
+
+    def advance(self, incidents: Iterable[Dict], stats: Optional[Dict] = None) -> Optional[str]:
+        """
+        Move the watermark to the newest sys_updated_on that was stored
+
+        Call only after the incidents were written, so a failed write is
+        retried by the next sync. The watermark never moves backwards.
+
+        Args:
+            incidents: Incidents written by this sync
+            stats: Optional counts to keep with the state
+
+        Returns:
+            New watermark (ISO) or None if there is none yet
+        """
+        state = self.load() or {}
+        current = state.get("sys_updated_on")
+        latest = latest_update(incidents)
+
+        if latest is not None and (current is None or latest > datetime.fromisoformat(current)):
+            current = latest.isoformat()
+
+        state.update({
+            "sys_updated_on": current,
+            "last_sync": datetime.now().isoformat(),
+            "last_stats": stats or {}
+        })
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        tmp_path.replace(self.path)
+
+        return current
@@ -0,0 +1,133 @@
+"""
+Unit tests for the async MongoDB client and the background event loop
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database.async_mongodb import AsyncMongoDBClient
+from database.event_loop import BackgroundEventLoop
+
+try:
+    from mongomock_motor import AsyncMongoMockClient
+    MONGOMOCK_MOTOR_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_MOTOR_AVAILABLE = False
+
+
+class TestBackgroundEventLoop(unittest.TestCase):
+    """Test cases for BackgroundEventLoop"""
+
+    def setUp(self):
+        self.loop = BackgroundEventLoop(name="test-loop")
+        self.addCleanup(self.loop.stop)
+
+    def test_run_from_sync_code(self):
+        """Coroutines run on the loop thread and return their result"""
+        async def where():
+            return threading.current_thread().name
+
+        self.assertEqual(self.loop.run(where(), timeout=5), "test-loop")
+
+    def test_run_propagates_exceptions(self):
+        """Exceptions raised on the loop reach the caller"""
+        async def fail():
+            raise ValueError("bad cursor")
+
+        with self.assertRaises(ValueError):
+            self.loop.run(fail(), timeout=5)
+
+    def test_gather_from_another_loop(self):
+        """Coroutines awaited from another loop run concurrently on this one"""
+        async def slow(value):
+            await asyncio.sleep(0.2)
+            return value, threading.current_thread().name
+
+        start = time.perf_counter()
+        results = asyncio.run(self.loop.gather(slow(1), slow(2), slow(3)))
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, [(1, "test-loop"), (2, "test-loop"), (3, "test-loop")])
+        self.assertLess(elapsed, 0.5)
+
+    def test_stop_and_restart(self):
+        """A stopped loop starts again on next use"""
+        async def answer():
+            return 42
+
+        self.loop.run(answer(), timeout=5)
+        self.loop.stop()
+        self.assertEqual(self.loop.run(answer(), timeout=5), 42)
+
+
+@unittest.skipUnless(MONGOMOCK_MOTOR_AVAILABLE, "mongomock-motor not installed")
+class TestAsyncMongoDBClient(unittest.IsolatedAsyncioTestCase):
+    """Test cases for AsyncMongoDBClient against mongomock-motor"""
+
+    async def asyncSetUp(self):
+        self.db = AsyncMongoDBClient(database_name="test_db", client=AsyncMongoMockClient())
+        for i in range(5):
+            await self.db.insert_incident({
+                'number': f'INC{i:03d}',
+                'short_description': f'Issue {i}',
+                'category': 'Network' if i % 2 else 'Database',
+                'sys_created_on': f'2024-01-0{i + 1} 10:00:00'
+            })
+
+    async def test_get_and_count(self):
+        """Single reads, counts and categories mirror MongoDBClient"""
+        incident = await self.db.get_incident_by_number('INC002')
+        self.assertEqual(incident['short_description'], 'Issue 2')
+        self.assertIsInstance(incident['_id'], str)
+        self.assertIsNone(await self.db.get_incident_by_number('INC999'))
+
+        self.assertEqual(await self.db.get_incident_count(), 5)
+        self.assertEqual(sorted(await self.db.get_categories()), ['Database', 'Network'])
+
+        found = await self.db.get_incidents_by_numbers(['INC001', 'INC004', 'INC999'])
+        self.assertEqual(sorted(i['number'] for i in found), ['INC001', 'INC004'])
+
+    async def test_insert_duplicate(self):
+        """A second insert of the same number returns None"""
+        await self.db.collection.create_index('number', unique=True)
+        self.assertIsNone(await self.db.insert_incident({'number': 'INC000'}))
+
+    async def test_pages_follow_cursor(self):
+        """Keyset pages cover every incident once, newest first"""
+        numbers, cursor = [], None
+        while True:
+            incidents, cursor = await self.db.get_incidents_page(limit=2, cursor=cursor)
+            numbers.extend(i['number'] for i in incidents)
+            if cursor is None:
+                break
+
+        self.assertEqual(numbers, ['INC004', 'INC003', 'INC002', 'INC001', 'INC000'])
+
+        first = await self.db.get_all_incidents(skip=1, limit=2)
+        self.assertEqual([i['number'] for i in first], ['INC003', 'INC002'])
+
+    async def test_search_by_filters(self):
+        """Category filter and limit"""
+        incidents = await self.db.search_incidents(category='Network', limit=10)
+        self.assertEqual(sorted(i['number'] for i in incidents), ['INC001', 'INC003'])
+        self.assertEqual(len(await self.db.search_incidents(limit=3)), 3)
+
+    async def test_update_and_delete(self):
+        """Updates and deletes report whether an incident changed"""
+        self.assertTrue(await self.db.update_incident('INC001', {'priority': '1 - Critical'}))
+        self.assertEqual((await self.db.get_incident_by_number('INC001'))['priority'], '1 - Critical')
+        self.assertFalse(await self.db.update_incident('INC999', {'priority': '2 - High'}))
+
+        self.assertTrue(await self.db.delete_incident('INC001'))
+        self.assertFalse(await self.db.delete_incident('INC001'))
+        self.assertEqual(await self.db.get_incident_count(), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Unit tests for the incident change watcher
+"""
+
+import time
+import unittest
+from src.database.change_watcher import IncidentChangeWatcher
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+class FakeChangeStream:
+    """Replays change events, then reports idle"""
+    
+    def __init__(self, changes):
+        self.changes = list(changes)
+        self.alive = True
+        self.resume_token = None
+    
+    def try_next(self):
+        if not self.changes:
+            self.alive = False
+            return None
+        change = self.changes.pop(0)
+        self.resume_token = {"_data": str(len(self.changes))}
+        return change
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestIncidentChangeWatcher(unittest.TestCase):
+    """Test cases for IncidentChangeWatcher"""
+    
+    def setUp(self):
+        """Collection with two incidents and a recording listener"""
+        self.collection = mongomock.MongoClient().db.incidents
+        self.collection.insert_many([
+            {"number": "INC001", "sys_updated_on": "2024-01-01T10:00:00", "sys_updated_on_ts": 1704103200.0},
+            {"number": "INC002", "sys_updated_on": "2024-01-01T11:00:00", "sys_updated_on_ts": 1704106800.0},
+        ])
+        self.events = []
+        self.watcher = IncidentChangeWatcher(
+            self.collection, lambda event, numbers: self.events.append((event, sorted(numbers))),
+            poll_interval=0.05
+        )
+    
+    def test_poll_detects_updates_inserts_and_deletes(self):
+        """Polling reports changed and removed numbers only"""
+        self.watcher.prime()
+        self.assertEqual(self.watcher.poll_once(), {"upserted": [], "removed": []})
+        
+        self.collection.update_one(
+            {"number": "INC001"}, {"$set": {"sys_updated_on": "2024-02-01T09:00:00", "sys_updated_on_ts": 1706778000.0}}
+        )
+        self.collection.delete_one({"number": "INC002"})
+        # Imported with an old ServiceNow timestamp: caught by the count check
+        self.collection.insert_one(
+            {"number": "INC003", "sys_updated_on": "2023-06-01 08:00:00", "sys_updated_on_ts": 1685606400.0}
+        )
+        self.collection.insert_one({"number": "INC004"})
+        
+        self.watcher.poll_once()
+        self.assertEqual(self.events, [("upsert", ["INC001", "INC003", "INC004"]), ("remove", ["INC002"])])
+        
+        self.events.clear()
+        self.watcher.poll_once()
+        self.assertEqual(self.events, [])
+    
+    def test_poll_without_timestamps_reports_nothing_unchanged(self):
+        """Documents written before sys_updated_on_ts existed are not re-emitted every poll"""
+        self.collection.update_many({}, {"$unset": {"sys_updated_on_ts": ""}})
+        self.watcher.prime()
+        self.watcher.poll_once()
+        self.watcher.poll_once()
+        self.assertEqual(self.events, [])
+        
+        self.collection.update_one({"number": "INC002"}, {"$set": {"sys_updated_on_ts": 1706778000.0}})
+        self.watcher.poll_once()
+        self.watcher.poll_once()
+        self.assertEqual(self.events, [("upsert", ["INC002"])])
+    
+    def test_change_stream_events_are_batched(self):
+        """Change events are merged per number and deletes resolved via _id"""
+        self.watcher.prime()
+        inc1 = self.collection.find_one({"number": "INC001"})["_id"]
+        inc2 = self.collection.find_one({"number": "INC002"})["_id"]
+        
+        self.watcher._consume(FakeChangeStream([
+            {"operationType": "update", "documentKey": {"_id": inc1}, "fullDocument": {"number": "INC001"}},
+            {"operationType": "insert", "documentKey": {"_id": "new"}, "fullDocument": {"number": "INC005"}},
+            {"operationType": "delete", "documentKey": {"_id": inc2}},
+            {"operationType": "delete", "documentKey": {"_id": "new"}},
+        ]))
+        
+        self.assertEqual(self.events, [("upsert", ["INC001"]), ("remove", ["INC002", "INC005"])])
+    
+    def test_drop_requests_reload(self):
+        """A dropped collection invalidates the stream and asks for a reload"""
+        self.watcher.prime()
+        self.watcher._consume(FakeChangeStream([{"operationType": "drop"}]))
+        self.assertEqual(self.events, [("reload", [])])
+    
+    def test_falls_back_to_polling(self):
+        """Without change stream support the thread polls"""
+        self.watcher.start()
+        self.addCleanup(self.watcher.stop)
+        
+        deadline = time.time() + 2
+        while self.watcher.mode != "polling" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.watcher.mode, "polling")
+        
+        self.collection.insert_one(
+            {"number": "INC006", "sys_updated_on": "2025-01-01T00:00:00", "sys_updated_on_ts": 1735689600.0}
+        )
+        while not self.events and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.events, [("upsert", ["INC006"])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+"""
+Unit tests for the pipelined ChromaDB bulk ingest
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+try:
+    from database.chromadb_client import ChromaDBClient
+    CHROMADB_AVAILABLE = True
+except ImportError:
+    CHROMADB_AVAILABLE = False
+
+RESOLUTION = "Restarted the mail transport service and confirmed delivery"
+
+
+class RecordingModel:
+    """Embedding model stand-in that records each encode call"""
+
+    def __init__(self, events):
+        self.events = events
+        self.encode_started = threading.Event()
+        self.calls = 0
+
+    def encode_cached(self, texts, **kwargs):
+        self.calls += 1
+        self.events.append(('encode', len(texts)))
+        if self.calls > 1:
+            self.encode_started.set()
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+class RecordingCollection:
+    """Collection stand-in that records writes and can fail on demand"""
+
+    def __init__(self, events, model=None, fail_ids=()):
+        self.events = events
+        self.model = model
+        self.fail_ids = set(fail_ids)
+        self.rows = {}
+        self.overlapped = None
+
+    def _write(self, method, ids, embeddings, documents, metadatas):
+        if self.model is not None and self.overlapped is None:
+            # Hold the first write until the next batch is being encoded
+            self.overlapped = self.model.encode_started.wait(timeout=5)
+        if self.fail_ids.intersection(ids):
+            raise ValueError(f"rejected {sorted(self.fail_ids.intersection(ids))}")
+        self.events.append((method, list(ids)))
+        self.rows.update(zip(ids, metadatas))
+
+    def add(self, **payload):
+        self._write('add', **payload)
+
+    def upsert(self, **payload):
+        self._write('upsert', **payload)
+
+
+def make_incidents(count):
+    """Incidents with resolutions long enough to be ingested"""
+    return [
+        {"number": f"INC{i:03d}", "short_description": f"Mail queue stuck {i}",
+         "resolution_notes": RESOLUTION, "category": "Email"}
+        for i in range(count)
+    ]
+
+
+@unittest.skipUnless(CHROMADB_AVAILABLE, "chromadb not installed")
+class TestChromaDBIngest(unittest.TestCase):
+    """Test cases for ChromaDBClient._ingest"""
+
+    def make_client(self, collection, model, batch_size=2):
+        """Client wired to the stand-ins, without opening a Chroma store"""
+        client = ChromaDBClient.__new__(ChromaDBClient)
+        client.collection_name = "test"
+        client.batch_size = batch_size
+        client.encode_batch_size = 64
+        client.normalize_embeddings = False
+        client.last_ingest_stats = {}
+        client.embedding_model = model
+        client.collection = collection
+        return client
+
+    def test_batches_are_written_in_order(self):
+        """Every batch is encoded and written once, in input order"""
+        events = []
+        model = RecordingModel(events)
+        collection = RecordingCollection(events)
+        client = self.make_client(collection, model, batch_size=2)
+
+        added = client.add_incidents_bulk(make_incidents(5))
+
+        self.assertEqual(added, 5)
+        self.assertEqual([e for e in events if e[0] == 'encode'], [('encode', 2), ('encode', 2), ('encode', 1)])
+        self.assertEqual([e[1] for e in events if e[0] == 'add'],
+                         [['INC000', 'INC001'], ['INC002', 'INC003'], ['INC004']])
+        self.assertEqual(client.last_ingest_stats['incidents'], 5)
+        self.assertEqual(client.last_ingest_stats['batch_size'], 2)
+
+    def test_encoding_overlaps_writes(self):
+        """The next batch is encoded while the previous one is being written"""
+        events = []
+        model = RecordingModel(events)
+        collection = RecordingCollection(events, model=model)
+        client = self.make_client(collection, model, batch_size=2)
+
+        client.add_incidents_bulk(make_incidents(4))
+
+        self.assertTrue(collection.overlapped)
+
+    def test_failed_batch_is_retried_row_by_row(self):
+        """A rejected batch loses only its bad rows and keeps the write method"""
+        events = []
+        model = RecordingModel(events)
+        collection = RecordingCollection(events, fail_ids={'INC001'})
+        client = self.make_client(collection, model, batch_size=2)
+
+        added = client._ingest(make_incidents(4), method='upsert')
+
+        self.assertEqual(added, 3)
+        self.assertEqual(sorted(collection.rows), ['INC000', 'INC002', 'INC003'])
+        self.assertEqual({e[0] for e in events if e[0] != 'encode'}, {'upsert'})
+        # The retry reuses the batch's embeddings instead of encoding again
+        self.assertEqual(model.calls, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
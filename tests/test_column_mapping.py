@@ -0,0 +1,78 @@
+"""
+Unit tests for compiled CSV column mapping plans
+"""
+
+import pickle
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from column_mapping import (
+    LAYOUT_EXACT, LAYOUT_SUBSTRING, get_mapping_plan, plan_from_mapping
+)
+
+
+class TestColumnMappingPlan(unittest.TestCase):
+    """Test cases for header compilation and per-row application"""
+    
+    def test_exact_layout_uses_precedence_per_row(self):
+        """The best spelling wins, falling back to the next non-empty column"""
+        headers = (' Number ', 'Short description', 'summary', 'Category', 'Unrelated')
+        plan = get_mapping_plan(headers, LAYOUT_EXACT)
+        
+        self.assertEqual(plan.columns['short_description'], (1, 2))
+        self.assertNotIn('description', plan.columns)
+        
+        fields = plan.apply([' INC1 ', '', 'From summary', 'None', 'x'])
+        self.assertEqual(fields['number'], 'INC1')
+        self.assertEqual(fields['short_description'], 'From summary')
+        self.assertEqual(fields['category'], '')
+    
+    def test_short_rows(self):
+        """Rows with fewer values than headers map missing cells to ''"""
+        plan = get_mapping_plan(('number', 'category'), LAYOUT_EXACT)
+        self.assertEqual(plan.apply(['INC1']), {'number': 'INC1', 'category': ''})
+    
+    def test_substring_layout(self):
+        """Keyword matching assigns each header to its first matching field"""
+        plan = get_mapping_plan(('Ticket ID', 'Summary', 'Fix Description', 'Team'), LAYOUT_SUBSTRING)
+        
+        self.assertEqual(plan.field_mapping(), {
+            'Ticket ID': 'number',
+            'Summary': 'short_description',
+            'Fix Description': 'description',
+            'Team': 'assignment_group'
+        })
+    
+    def test_plans_are_cached_per_layout(self):
+        """Repeat imports of the same header reuse the compiled plan"""
+        headers = ('number', 'short_description', 'resolution_notes')
+        get_mapping_plan.cache_clear()
+        
+        first = get_mapping_plan(headers, LAYOUT_EXACT)
+        self.assertIs(get_mapping_plan(headers, LAYOUT_EXACT), first)
+        self.assertIsNot(get_mapping_plan(headers, LAYOUT_SUBSTRING), first)
+        self.assertEqual(get_mapping_plan.cache_info().hits, 1)
+    
+    def test_explicit_mapping_rightmost_column_wins(self):
+        """Several columns for one field: the rightmost non-empty value is used"""
+        plan = plan_from_mapping(['A', 'B', 'C'], {'A': 'description', 'C': 'description'})
+        
+        self.assertEqual(plan.apply(['left', 'x', 'right']), {'description': 'right'})
+        self.assertEqual(plan.apply(['left', 'x', '']), {'description': 'left'})
+    
+    def test_unknown_layout(self):
+        with self.assertRaises(ValueError):
+            get_mapping_plan(('number',), 'fuzzy')
+    
+    def test_plan_pickles(self):
+        """Plans are shipped to importer worker processes"""
+        plan = get_mapping_plan(('number', 'Description'), LAYOUT_EXACT)
+        copy = pickle.loads(pickle.dumps(plan))
+        self.assertEqual(copy.apply(['INC1', 'Disk full']), plan.apply(['INC1', 'Disk full']))
+
+
+if __name__ == '__main__':
+    unittest.main()
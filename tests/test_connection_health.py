@@ -0,0 +1,126 @@
+"""
+Unit tests for cached MongoDB connection health
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+from pymongo.errors import ServerSelectionTimeoutError
+from pymongo.monitoring import ServerHeartbeatFailedEvent, ServerHeartbeatSucceededEvent
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import connection
+from db import mongodb_handler
+from database.connection_health import STATE_DOWN, STATE_UNKNOWN, STATE_UP, ConnectionHealth
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+SERVER = ("db1", 27017)
+REPLICA = ("db2", 27017)
+
+
+def heartbeat(server, ok):
+    if ok:
+        return ServerHeartbeatSucceededEvent(0.001, {"ok": 1}, server)
+    return ServerHeartbeatFailedEvent(0.001, ServerSelectionTimeoutError("timed out"), server)
+
+
+class TestConnectionHealth(unittest.TestCase):
+    """Test cases for ConnectionHealth"""
+    
+    def setUp(self):
+        self.health = ConnectionHealth(probe_interval=60)
+    
+    def test_heartbeats_drive_state_and_flaps(self):
+        """Lost and restored connections are counted and timestamped"""
+        self.assertEqual(self.health.state, STATE_UNKNOWN)
+        
+        self.health.succeeded(heartbeat(SERVER, True))
+        self.assertEqual(self.health.state, STATE_UP)
+        
+        self.health.failed(heartbeat(SERVER, False))
+        self.health.failed(heartbeat(SERVER, False))
+        self.health.succeeded(heartbeat(SERVER, True))
+        self.health.failed(heartbeat(SERVER, False))
+        
+        stats = self.health.snapshot()
+        self.assertEqual(stats["state"], STATE_DOWN)
+        self.assertEqual(stats["flaps"], 2)
+        self.assertEqual(stats["heartbeat_failures"], 3)
+        self.assertEqual(stats["last_error"], "timed out")
+        self.assertIsNotNone(stats["last_failure"])
+        self.assertEqual(stats["servers"], {"db1:27017": STATE_DOWN})
+    
+    def test_up_while_any_server_answers(self):
+        """One failed replica does not mark the deployment down"""
+        self.health.succeeded(heartbeat(SERVER, True))
+        self.health.failed(heartbeat(REPLICA, False))
+        
+        self.assertEqual(self.health.state, STATE_UP)
+        self.assertEqual(self.health.flaps, 0)
+    
+    def test_no_probe_while_up(self):
+        """The cached state answers without a round-trip"""
+        probe = mock.Mock()
+        self.health.mark_up()
+        
+        self.assertTrue(self.health.is_available(probe))
+        probe.assert_not_called()
+    
+    def test_probes_are_rate_limited_while_down(self):
+        """Callers fail fast between probes; a successful probe restores the state"""
+        probe = mock.Mock(side_effect=ServerSelectionTimeoutError("down"))
+        self.health.mark_down(ServerSelectionTimeoutError("down"))
+        
+        self.assertFalse(self.health.is_available(probe))
+        self.assertFalse(self.health.is_available(probe))
+        self.assertEqual(probe.call_count, 1)
+        
+        self.health.probe_interval = 0
+        probe.side_effect = None
+        self.assertTrue(self.health.is_available(probe))
+        self.assertEqual(self.health.state, STATE_UP)
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestHandlerHealth(unittest.TestCase):
+    """Test cases for MongoDBHandler's use of ConnectionHealth"""
+    
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        self.handler = mongodb_handler.MongoDBHandler()
+    
+    def test_operations_do_not_ping(self):
+        """Reads check the cached state instead of pinging first"""
+        with mock.patch.object(self.handler, '_ping') as ping:
+            self.handler.get_all_incidents()
+            self.handler.get_incident_by_number("INC001")
+        
+        ping.assert_not_called()
+        self.assertEqual(self.handler.connection_stats()["state"], STATE_UP)
+    
+    def test_fail_fast_while_down(self):
+        """While down, operations return without touching the server"""
+        self.handler.health.failed(heartbeat(SERVER, False))
+        
+        with mock.patch.object(self.handler, '_ping') as ping, \
+                mock.patch.object(self.handler.collection, 'find_one') as find_one:
+            self.handler.health._last_probe = float('inf')
+            self.assertIsNone(self.handler.get_incident_by_number("INC001"))
+        
+        ping.assert_not_called()
+        find_one.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
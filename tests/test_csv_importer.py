@@ -0,0 +1,104 @@
+"""
+Unit tests for the CSV incident importer
+"""
+
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+import csv_importer
+from csv_importer import CSVIncidentImporter
+from data_validation import DataValidator
+
+
+class TestCSVIncidentImporter(unittest.TestCase):
+    """Test cases for serial and process pool imports"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """CSV with every fifth row too short to validate"""
+        fd, cls.csv_path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(fd, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['Incident Number', 'Short Description', 'Description',
+                             'Category', 'Resolution Notes', 'Created_On'])
+            for i in range(23):
+                description = 'short' if i % 5 == 4 else f'Application {i} cannot reach the database server'
+                writer.writerow([f'INC{i:04d}', f'Issue {i}', description, 'Database',
+                                 'Restarted the database service and verified connectivity', '2024-01-15 10:30'])
+    
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.csv_path)
+    
+    def setUp(self):
+        # No MongoDB knowledge base needed for parsing
+        patcher = mock.patch.object(csv_importer, 'MONGODB_AVAILABLE', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.validator = DataValidator(
+            required_fields=['number', 'short_description'],
+            min_description_length=20,
+            min_resolution_length=30
+        )
+        self.importer = CSVIncidentImporter(validator=self.validator)
+    
+    @staticmethod
+    def _strip_timestamps(incidents):
+        return [{k: v for k, v in inc.items() if k != 'imported_at'} for inc in incidents]
+    
+    def test_serial_import_attributes_rows(self):
+        """Invalid rows are reported with their file row number"""
+        incidents, errors, warnings = self.importer.import_from_csv(self.csv_path)
+        
+        self.assertEqual(len(incidents), 19)
+        self.assertEqual(errors, [])
+        self.assertEqual([w.split(':')[0] for w in warnings], ['Row 6', 'Row 11', 'Row 16', 'Row 21'])
+        self.assertEqual(incidents[0]['sys_created_on'], '2024-01-15T10:30:00')
+        self.assertIn('sys_created_on_ts', incidents[0])
+    
+    def test_parallel_import_matches_serial(self):
+        """A process pool import returns the same rows in the same order"""
+        serial = self.importer.import_from_csv(self.csv_path)
+        serial_incidents = self._strip_timestamps(serial[0])
+        
+        parallel = self.importer.import_from_csv(self.csv_path, workers=2, chunk_size=4)
+        
+        self.assertEqual(self._strip_timestamps(parallel[0]), serial_incidents)
+        self.assertEqual(parallel[1], serial[1])
+        self.assertEqual(parallel[2], serial[2])
+    
+    def test_parallel_import_stops_at_first_invalid_row(self):
+        """skip_invalid=False fails on the first invalid row, as in serial mode"""
+        incidents, errors, _ = self.importer.import_from_csv(
+            self.csv_path, skip_invalid=False, workers=2, chunk_size=2
+        )
+        
+        self.assertEqual(incidents, [])
+        self.assertTrue(errors[0].startswith('Row 6: Invalid incident'))
+        self.assertTrue(errors[-1].startswith('Failed to read CSV file: Row 6'))
+
+    
+    def test_imports_as_src_package_without_pymongo(self):
+        """src.csv_importer imports from the repo root; MongoDB stays optional"""
+        code = (
+            "import sys; sys.modules['pymongo'] = None\n"
+            "from src.csv_importer import CSVIncidentImporter, MONGODB_AVAILABLE\n"
+            "assert not MONGODB_AVAILABLE"
+        )
+        result = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True)
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Unit tests for streaming CSV reading
+"""
+
+import csv
+import io
+import threading
+import unittest
+from src.database.csv_stream import detect_encoding, iter_prefetched, open_text_stream
+
+
+class TestCSVStream(unittest.TestCase):
+    """Test cases for encoding detection, incremental decoding and prefetching"""
+    
+    def test_detect_encoding(self):
+        """BOM, UTF-8 and Windows exports are told apart from the sample"""
+        self.assertEqual(detect_encoding(b"\xef\xbb\xbfnumber\n"), "utf-8-sig")
+        self.assertEqual(detect_encoding("café\n".encode("utf-8")), "utf-8")
+        self.assertEqual(detect_encoding("“quoted”\n".encode("cp1252")), "cp1252")
+        # 0x81 is undefined in cp1252
+        self.assertEqual(detect_encoding(b"abc\x81\n"), "latin-1")
+    
+    def test_sample_cut_inside_character(self):
+        """A multi-byte character split by the sample boundary is still UTF-8"""
+        data = "abé".encode("utf-8")
+        self.assertEqual(detect_encoding(data[:-1]), "utf-8")
+    
+    def test_open_text_stream_replays_sample(self):
+        """Rows spanning the sample boundary parse intact"""
+        rows = [{"number": f"INC{i:04d}", "short_description": f"café {i}"} for i in range(200)]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=["number", "short_description"])
+        writer.writeheader()
+        writer.writerows(rows)
+        
+        text, encoding = open_text_stream(io.BytesIO(buffer.getvalue().encode("utf-8")), sample_size=37)
+        
+        self.assertEqual(encoding, "utf-8")
+        self.assertEqual(list(csv.DictReader(text)), rows)
+    
+    def test_undecodable_bytes_after_sample_are_replaced(self):
+        """Bad bytes beyond the sample do not fail the read"""
+        text, _ = open_text_stream(io.BytesIO(b"number\nINC1\nINC\xff2\n"), sample_size=8)
+        self.assertEqual(text.read(), "number\nINC1\nINC�2\n")
+    
+    def test_prefetch_is_bounded(self):
+        """The producer stays at most max_pending items ahead"""
+        produced = []
+        
+        def items():
+            for i in range(10):
+                produced.append(i)
+                yield i
+        
+        consumed = []
+        for item in iter_prefetched(items(), max_pending=2):
+            if item == 0:
+                # Give the producer time to run ahead as far as it can
+                threading.Event().wait(0.2)
+                # Queue holds 2, one more is blocked in put()
+                self.assertLessEqual(len(produced), 4)
+            consumed.append(item)
+        
+        self.assertEqual(consumed, list(range(10)))
+    
+    def test_prefetch_reraises_producer_errors(self):
+        """A parse error in the reader thread surfaces in the consumer"""
+        def items():
+            yield 1
+            raise ValueError("bad row")
+        
+        with self.assertRaises(ValueError):
+            list(iter_prefetched(items()))
+    
+    def test_prefetch_stops_producer_when_consumer_breaks(self):
+        """Abandoning the iteration releases the reader thread"""
+        def items():
+            while True:
+                yield 1
+        
+        iterator = iter_prefetched(items(), max_pending=1)
+        next(iterator)
+        iterator.close()
+        
+        self.assertFalse(any(t.name == "csv-stream-reader" for t in threading.enumerate()))
+
+
+if __name__ == '__main__':
+    unittest.main()
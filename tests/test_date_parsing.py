@@ -0,0 +1,78 @@
+"""
+Unit tests for date format inference and normalisation
+"""
+
+import sys
+import unittest
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from data_validation.date_parsing import (
+    ISO_FORMAT, DateNormalizer, add_timestamps, incident_timestamp, infer_format, parse_with_format
+)
+
+
+class TestDateParsing(unittest.TestCase):
+    """Test cases for DateNormalizer and helpers"""
+    
+    def test_infer_format(self):
+        """Day-first is chosen when the sample rules out month-first"""
+        self.assertEqual(infer_format(['2024-01-15 10:30:00', '2024-02-01T08:00:00Z']), ISO_FORMAT)
+        self.assertEqual(infer_format(['01/02/2024 10:30', '03/04/2024 11:00']), '%m/%d/%Y %H:%M')
+        self.assertEqual(infer_format(['01/02/2024 10:30', '25/04/2024 11:00']), '%d/%m/%Y %H:%M')
+        self.assertIsNone(infer_format(['', '  ']))
+        self.assertIsNone(infer_format(['soon', 'later', '2024-01-01']))
+    
+    def test_outliers_fall_back(self):
+        """Values that do not fit the inferred format still parse"""
+        dates = DateNormalizer()
+        dates.infer([{'resolved_at': '15/01/2024 10:30'}, {'resolved_at': '16/01/2024 09:00'}])
+        
+        self.assertEqual(dates.parse('17/01/2024 12:00', 'resolved_at'), datetime(2024, 1, 17, 12, 0))
+        self.assertEqual(dates.parse('2024-01-18T07:00:00', 'resolved_at'), datetime(2024, 1, 18, 7, 0))
+        self.assertEqual(dates.parse('Jan 19 2024 5:00PM', 'resolved_at'), datetime(2024, 1, 19, 17, 0))
+        self.assertIsNone(dates.parse('not a date', 'resolved_at'))
+    
+    def test_normalize_adds_timestamps(self):
+        """Dates become ISO strings with epoch seconds alongside"""
+        incident = {'sys_created_on': '2024-01-15 10:30', 'resolved_at': 'unknown', 'closed_at': ''}
+        DateNormalizer().normalize(incident)
+        
+        self.assertEqual(incident['sys_created_on'], '2024-01-15T10:30:00')
+        self.assertEqual(
+            incident['sys_created_on_ts'],
+            datetime(2024, 1, 15, 10, 30, tzinfo=timezone.utc).timestamp()
+        )
+        self.assertEqual(incident['resolved_at'], 'unknown')
+        self.assertNotIn('resolved_at_ts', incident)
+        self.assertNotIn('closed_at_ts', incident)
+    
+    def test_parses_are_cached(self):
+        """Repeated strings hit the LRU instead of re-parsing"""
+        parse_with_format.cache_clear()
+        for _ in range(3):
+            parse_with_format('2024-03-01 00:00:00', ISO_FORMAT)
+        self.assertEqual(parse_with_format.cache_info().hits, 2)
+    
+    def test_incident_timestamp_prefers_stored_value(self):
+        """Stored *_ts values are used without parsing"""
+        self.assertEqual(incident_timestamp({'resolved_at': 'garbage', 'resolved_at_ts': 42.0}, 'resolved_at'), 42.0)
+        self.assertEqual(
+            incident_timestamp({'resolved_at': '2024-01-01T01:00:00Z'}, 'resolved_at'),
+            datetime(2024, 1, 1, 1, tzinfo=timezone.utc).timestamp()
+        )
+        self.assertIsNone(incident_timestamp({}, 'resolved_at'))
+    
+    def test_add_timestamps_fills_missing_only(self):
+        """Missing *_ts values are computed, stored ones are kept"""
+        incident = add_timestamps({'sys_created_on': '2024-01-01 01:00:00', 'sys_updated_on': 'soon',
+                                   'resolved_at': 'garbage', 'resolved_at_ts': 42.0})
+        self.assertEqual(incident['sys_created_on_ts'], datetime(2024, 1, 1, 1, tzinfo=timezone.utc).timestamp())
+        self.assertNotIn('sys_updated_on_ts', incident)
+        self.assertEqual(incident['resolved_at_ts'], 42.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
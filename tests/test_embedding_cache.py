@@ -0,0 +1,129 @@
+"""
+Unit tests for the persistent embedding cache
+"""
+
+import tempfile
+import unittest
+import numpy as np
+from src.embeddings import EmbeddingCache
+
+
+class CountingModel:
+    """Deterministic fake encoder that records what it was asked to encode"""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def encode(self, sentences, **kwargs):
+        self.calls.append(list(sentences))
+        return np.array([[len(s), s.count("a"), 1.0] for s in sentences], dtype=np.float32)
+
+
+class TestEmbeddingCache(unittest.TestCase):
+    """Test cases for EmbeddingCache"""
+    
+    def setUp(self):
+        """Create a cache in a temporary directory"""
+        self.tmp = tempfile.TemporaryDirectory()
+        self.model = CountingModel()
+        self.cache = EmbeddingCache("fake/model", cache_dir=self.tmp.name, max_entries=4)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_only_misses_are_encoded(self):
+        """Second pass over the same texts does not hit the model"""
+        first = self.cache.encode(self.model, ["alpha", "beta"])
+        second = self.cache.encode(self.model, ["beta", "gamma", "alpha"])
+        
+        self.assertEqual(self.model.calls, [["alpha", "beta"], ["gamma"]])
+        np.testing.assert_array_equal(second[0], first[1])
+        np.testing.assert_array_equal(second[2], first[0])
+        self.assertEqual(self.cache.stats()["hits"], 2)
+        self.assertEqual(self.cache.stats()["misses"], 3)
+    
+    def test_duplicates_in_one_call_encoded_once(self):
+        """Repeated texts within a call are encoded once"""
+        result = self.cache.encode(self.model, ["same", "same", "same"])
+        self.assertEqual(self.model.calls, [["same"]])
+        self.assertEqual(result.shape, (3, 3))
+    
+    def test_persists_across_instances(self):
+        """A new cache instance reads vectors written by a previous one"""
+        self.cache.encode(self.model, ["alpha", "beta"])
+        
+        reopened = EmbeddingCache("fake/model", cache_dir=self.tmp.name, max_entries=4)
+        result = reopened.encode(self.model, ["alpha", "beta"])
+        
+        self.assertEqual(len(self.model.calls), 1)
+        self.assertEqual(result[0][0], 5.0)
+        self.assertEqual(reopened.stats()["entries"], 2)
+    
+    def test_model_name_is_part_of_key(self):
+        """Vectors from another model are never returned"""
+        self.cache.encode(self.model, ["alpha"])
+        other = EmbeddingCache("other-model", cache_dir=self.tmp.name, max_entries=4)
+        other.encode(self.model, ["alpha"])
+        self.assertEqual(len(self.model.calls), 2)
+    
+    def test_lru_eviction(self):
+        """Least recently used entries are evicted when full"""
+        self.cache.encode(self.model, ["a1", "a2", "a3", "a4"])
+        self.cache.encode(self.model, ["a1"])  # refresh a1
+        self.cache.encode(self.model, ["a5"])  # evicts a2
+        
+        stats = self.cache.stats()
+        self.assertEqual(stats["entries"], 4)
+        self.assertEqual(stats["evictions"], 1)
+        
+        self.model.calls = []
+        self.cache.encode(self.model, ["a1", "a2"])
+        self.assertEqual(self.model.calls, [["a2"]])
+
+    
+    def test_instances_share_rows_without_overwriting(self):
+        """Caches on one directory (e.g. two workers) see each other's writes"""
+        other = EmbeddingCache("fake/model", cache_dir=self.tmp.name, max_entries=4)
+        self.cache.encode(self.model, ["alpha"])
+        other.encode(self.model, ["beta"])
+        self.cache.encode(self.model, ["gamma"])
+        
+        self.model.calls = []
+        for cache in (self.cache, other):
+            result = cache.encode(self.model, ["alpha", "beta", "gamma"])
+            np.testing.assert_array_equal(result[:, 0], [5.0, 4.0, 5.0])
+        self.assertEqual(self.model.calls, [])
+        self.assertEqual(other.stats()["entries"], 3)
+    
+    def test_eviction_by_another_instance(self):
+        """A row reused by another process is never served for the old text"""
+        other = EmbeddingCache("fake/model", cache_dir=self.tmp.name, max_entries=4)
+        self.cache.encode(self.model, ["a1"])
+        other.encode(self.model, ["b22", "b333", "b4444", "b55555"])  # evicts a1
+        
+        self.model.calls = []
+        result = self.cache.encode(self.model, ["a1"])
+        self.assertEqual(self.model.calls, [["a1"]])
+        self.assertEqual(result[0][0], 2.0)
+    
+    def test_misses_append_to_log(self):
+        """Each miss appends a record; the log is compacted when it grows"""
+        from src.embeddings import cache as cache_module
+        
+        self.cache.encode(self.model, ["a1", "a2"])
+        size = self.cache.log_path.stat().st_size
+        self.cache.encode(self.model, ["a3"])
+        self.assertEqual(self.cache.log_path.stat().st_size, size + cache_module._RECORD.size)
+        
+        for i in range(20):
+            self.cache.encode(self.model, [f"x{i}"])
+        self.assertLessEqual(self.cache.log_path.stat().st_size,
+                             cache_module.LOG_COMPACT_FACTOR * 4 * cache_module._RECORD.size)
+        reopened = EmbeddingCache("fake/model", cache_dir=self.tmp.name, max_entries=4)
+        self.model.calls = []
+        reopened.encode(self.model, ["x19", "x18"])
+        self.assertEqual(self.model.calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+Unit tests for the shared embedding model registry
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.embeddings import EmbeddingModelRegistry
+from src.embeddings.cache import PROJECT_ROOT
+
+
+class FakeModel:
+    """Minimal stand-in for a sentence transformer"""
+    
+    def __init__(self, name):
+        self.name = name
+    
+    def encode(self, sentences, **kwargs):
+        return [len(s) for s in sentences]
+    
+    def get_sentence_embedding_dimension(self):
+        return 1
+
+
+class TestEmbeddingModelRegistry(unittest.TestCase):
+    """Test cases for EmbeddingModelRegistry"""
+    
+    def setUp(self):
+        """Set up a registry with a counting loader"""
+        self.loads = []
+        
+        def loader(model_name, device):
+            self.loads.append((model_name, device))
+            return FakeModel(model_name)
+        
+        self.registry = EmbeddingModelRegistry(loader=loader)
+    
+    def test_same_key_shares_one_model(self):
+        """Components asking for the same model share a single load"""
+        a = self.registry.acquire("model-a")
+        b = self.registry.acquire("model-a")
+        
+        self.assertIs(a, b)
+        self.assertEqual(a.ref_count, 2)
+        a.encode(["x"])
+        b.encode(["y"])
+        self.assertEqual(self.loads, [("model-a", None)])
+    
+    def test_device_is_part_of_key(self):
+        """Different devices get different handles"""
+        cpu = self.registry.acquire("model-a", "cpu")
+        default = self.registry.acquire("model-a")
+        self.assertIsNot(cpu, default)
+    
+    def test_lazy_loading(self):
+        """Model is not loaded until first use"""
+        handle = self.registry.acquire("model-a")
+        self.assertFalse(handle.is_loaded)
+        self.assertEqual(handle.encode(["abc"]), [3])
+        self.assertTrue(handle.is_loaded)
+    
+    def test_release_unloads_when_unreferenced(self):
+        """Model is dropped once the last reference is released"""
+        a = self.registry.acquire("model-a")
+        b = self.registry.acquire("model-a")
+        a.load()
+        
+        self.registry.release(a)
+        self.assertTrue(b.is_loaded)
+        
+        self.registry.release(b)
+        self.assertFalse(b.is_loaded)
+        self.assertEqual(self.registry.stats(), [])
+    
+    def test_configure_cache_reaches_live_handles(self):
+        """Handles acquired before the configuration is applied use the new cache"""
+        handle = self.registry.acquire("model-a")
+        self.assertIsNone(handle.cache)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            self.registry.configure_cache(enabled=True, directory=tmp)
+            self.assertEqual(handle.cache.directory, Path(tmp) / "model-a")
+            
+            self.registry.configure_cache(directory="data/embedding_cache")
+            self.assertEqual(handle.cache.directory, PROJECT_ROOT / "data" / "embedding_cache" / "model-a")
+            
+            self.registry.configure_cache(enabled=False)
+            self.assertIsNone(handle.cache)
+    
+    def test_warm_up_pins_model(self):
+        """Warmed-up models stay loaded after consumers release them"""
+        self.registry.warm_up(["model-a"])
+        self.assertEqual(len(self.loads), 1)
+        
+        handle = self.registry.acquire("model-a")
+        self.registry.release(handle)
+        
+        self.assertTrue(handle.is_loaded)
+        stats = self.registry.stats()
+        self.assertEqual(len(stats), 1)
+        self.assertTrue(stats[0]["pinned"])
+        
+        # Warming up again does not take another reference
+        self.registry.warm_up(["model-a"])
+        self.assertEqual(stats[0]["ref_count"], 1)
+        self.assertEqual(len(self.loads), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
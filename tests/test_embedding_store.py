@@ -0,0 +1,72 @@
+"""
+Unit tests for the append-optimised embedding store
+"""
+
+import unittest
+import numpy as np
+from src.rag.embedding_store import EmbeddingStore
+
+
+class TestEmbeddingStore(unittest.TestCase):
+    """Test cases for EmbeddingStore"""
+    
+    def setUp(self):
+        """Set up a small store so growth is exercised"""
+        self.store = EmbeddingStore(initial_capacity=2)
+    
+    def test_append_grows_by_doubling(self):
+        """Capacity doubles and rows keep their values"""
+        rows = self.store.append(np.eye(3, dtype=np.float32))
+        self.assertEqual(list(rows), [0, 1, 2])
+        self.assertEqual(self.store.memory_usage()["capacity"], 4)
+        
+        self.store.append(np.ones(3))
+        self.store.append(np.full((1, 3), 2.0))
+        
+        self.assertEqual(self.store.memory_usage()["capacity"], 8)
+        self.assertEqual(len(self.store), 5)
+        np.testing.assert_array_equal(self.store.vectors[1], [0, 1, 0])
+        self.assertEqual(self.store.vectors.dtype, np.float32)
+        self.assertTrue(self.store.vectors.flags["C_CONTIGUOUS"])
+    
+    def test_dimension_mismatch(self):
+        """Appending a different dimension is rejected"""
+        self.store.append(np.zeros((1, 3)))
+        with self.assertRaises(ValueError):
+            self.store.append(np.zeros((1, 4)))
+    
+    def test_delete_tombstones_rows(self):
+        """Deleted rows stay in place but are masked out"""
+        self.store.append(np.eye(4))
+        self.assertEqual(self.store.delete([1, 1, 9]), 1)
+        
+        self.assertEqual(len(self.store), 3)
+        self.assertEqual(self.store.size, 4)
+        self.assertEqual(list(self.store.alive_mask), [True, False, True, True])
+        with self.assertRaises(IndexError):
+            self.store.set(1, np.zeros(4))
+    
+    def test_compact_returns_row_mapping(self):
+        """Compaction closes gaps and reports surviving old rows"""
+        self.store = EmbeddingStore(compact_ratio=0.3)
+        self.store.append(np.arange(12, dtype=np.float32).reshape(4, 3))
+        self.store.delete([0, 2])
+        self.assertTrue(self.store.needs_compaction())
+        
+        kept = self.store.compact()
+        
+        self.assertEqual(list(kept), [1, 3])
+        self.assertEqual(self.store.size, 2)
+        self.assertEqual(self.store.deleted_count, 0)
+        np.testing.assert_array_equal(self.store.vectors, [[3, 4, 5], [9, 10, 11]])
+    
+    def test_memory_usage(self):
+        """Memory usage reflects allocated capacity"""
+        self.store.append(np.zeros((3, 8)))
+        usage = self.store.memory_usage()
+        self.assertEqual(usage["rows"], 3)
+        self.assertEqual(usage["bytes_allocated"], 4 * (8 * 4 + 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""
+Unit tests for the hybrid lexical + semantic retriever
+"""
+
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from embeddings import EmbeddingModelRegistry
+from rag.hybrid_retriever import HybridRetriever
+from rag.lexical_index import InvertedIndex
+from rag.resolution_finder import ResolutionFinder
+
+
+class BagOfWordsModel:
+    """Tiny deterministic encoder: hashed bag of words"""
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def encode(self, sentences, **kwargs):
+        sentences = [sentences] if isinstance(sentences, str) else list(sentences)
+        self.encoded.extend(sentences)
+        
+        vectors = np.zeros((len(sentences), 64), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                vectors[row, sum(map(ord, word)) % 64] += 1.0
+        return vectors
+
+
+def make_incident(number, text, category="Network"):
+    return {
+        "number": number,
+        "short_description": text,
+        "description": text + " reported by users",
+        "category": category,
+        "resolution_notes": f"Resolution for {number}: restarted and verified"
+    }
+
+
+class TestHybridRetriever(unittest.TestCase):
+    """Test cases for HybridRetriever"""
+    
+    def setUp(self):
+        """Index the same incidents lexically and semantically"""
+        self.model = BagOfWordsModel()
+        registry = EmbeddingModelRegistry(loader=lambda name, device: self.model)
+        patcher = mock.patch("embeddings.registry._registry", registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.incidents = [
+            make_incident("INC001", "VPN tunnel disconnects every hour"),
+            make_incident("INC002", "VPN tunnel disconnects after sleep mode"),
+            make_incident("INC003", "Printer jams when printing duplex", category="Hardware"),
+            make_incident("INC004", "Outlook crashes when opening calendar", category="Email"),
+        ]
+        self.index = InvertedIndex()
+        self.index.rebuild(self.incidents)
+        self.finder = ResolutionFinder(use_chromadb=False)
+        self.finder.load_knowledge_base(self.incidents[:3])
+        self.model.encoded = []
+        
+        self.retriever = HybridRetriever(self.index, self.finder, shortlist_size=10)
+    
+    def test_only_shortlist_is_rescored(self):
+        """Stored embeddings are reused; only the query and unknown incidents are encoded"""
+        results = self.retriever.retrieve("VPN tunnel disconnects after sleep", top_k=2)
+        
+        self.assertEqual(results[0]["number"], "INC002")
+        self.assertEqual({r["number"] for r in results}, {"INC001", "INC002"})
+        self.assertEqual(self.model.encoded, ["VPN tunnel disconnects after sleep"])
+        self.assertTrue(all(r["bm25_score"] > 0 and r["fused_score"] > 0 for r in results))
+        
+        # INC004 is not in the finder's knowledge base, so it gets encoded
+        self.retriever.retrieve("Outlook calendar crashes", top_k=1)
+        self.assertEqual(len(self.model.encoded), 3)
+    
+    def test_category_filter(self):
+        """Only incidents of the requested category are returned"""
+        results = self.retriever.retrieve("printing tunnel", category="Hardware")
+        self.assertEqual([r["number"] for r in results], ["INC003"])
+        
+        # Same match whatever the case, as in the finder's vector search
+        results = self.retriever.retrieve("printing tunnel", category="hardware")
+        self.assertEqual([r["number"] for r in results], ["INC003"])
+    
+    def test_incident_removed_after_shortlist(self):
+        """An incident removed between shortlist and scoring is skipped"""
+        shortlist = self.index.shortlist
+        
+        def shortlist_then_remove(*args, **kwargs):
+            candidates = shortlist(*args, **kwargs)
+            self.index.remove("INC001")
+            return candidates
+        
+        with mock.patch.object(self.index, "shortlist", shortlist_then_remove):
+            results = self.retriever.retrieve("VPN tunnel disconnects", top_k=5)
+        self.assertEqual([r["number"] for r in results], ["INC002"])
+    
+    def test_semantic_fallback_without_keyword_hits(self):
+        """No shared keywords falls back to semantic search"""
+        self.finder.upsert_incidents([make_incident("INC005", "Disk full on build server", category="Storage")])
+        results = self.retriever.retrieve("Disk full", top_k=1, min_similarity=0.0)
+        self.assertEqual(results[0]["number"], "INC005")
+        self.assertEqual(results[0]["bm25_score"], 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+"""
+Unit tests for the delta-aware incident cache
+"""
+
+import threading
+import unittest
+from src.database.incident_cache import IncidentCache
+
+
+class FakeCollection:
+    """In-memory stand-in for the incidents collection"""
+    
+    def __init__(self, incidents):
+        self.incidents = {inc["number"]: inc for inc in incidents}
+        self.loads = 0
+    
+    def load(self):
+        self.loads += 1
+        return [dict(inc) for inc in self.incidents.values()]
+    
+    def fetch(self, numbers):
+        return [dict(self.incidents[n]) for n in numbers if n in self.incidents]
+    
+    def count(self):
+        return len(self.incidents)
+
+
+class TestIncidentCache(unittest.TestCase):
+    """Test cases for IncidentCache"""
+    
+    def setUp(self):
+        """Create a cache over a fake collection"""
+        self.db = FakeCollection([{"number": "INC001", "state": "New"}, {"number": "INC002", "state": "New"}])
+        self.events = []
+        self.cache = IncidentCache(
+            loader=self.db.load, fetcher=self.db.fetch, counter=self.db.count, drift_check_interval=0
+        )
+        self.cache.add_listener(lambda event, payload: self.events.append(event))
+    
+    def test_lazy_load(self):
+        """The cache loads once, on first use"""
+        self.assertFalse(self.cache.is_loaded)
+        self.assertEqual(len(self.cache.get_all()), 2)
+        self.cache.get_all()
+        self.assertEqual(self.db.loads, 1)
+        self.assertEqual(self.events, ["reload"])
+    
+    def test_apply_changes_without_reload(self):
+        """Inserts, updates and deletes are applied locally"""
+        self.cache.get_all()
+        generation = self.cache.generation
+        
+        self.db.incidents["INC003"] = {"number": "INC003", "state": "New"}
+        self.db.incidents["INC001"]["state"] = "Closed"
+        del self.db.incidents["INC002"]
+        
+        delta = self.cache.apply_changes(["INC001", "INC002", "INC003"])
+        self.assertEqual(delta, {"upserted": 2, "removed": 1})
+        self.assertEqual(self.cache.get("INC001")["state"], "Closed")
+        self.assertIsNone(self.cache.get("INC002"))
+        self.assertEqual(sorted(inc["number"] for inc in self.cache.get_all()), ["INC001", "INC003"])
+        self.assertEqual(self.db.loads, 1)
+        self.assertEqual(self.cache.generation, generation + 2)
+        self.assertEqual(self.events, ["reload", "upsert", "remove"])
+    
+    def test_failed_fetch_removes_nothing(self):
+        """A read error is not taken for deletion"""
+        self.cache.get_all()
+        
+        def failing_fetch(numbers):
+            raise ConnectionError("server selection timeout")
+        
+        for fetcher in (failing_fetch, lambda numbers: None):
+            self.cache._fetcher = fetcher
+            delta = self.cache.apply_changes(["INC001", "INC002"])
+            self.assertEqual(delta, {"upserted": 0, "removed": 0, "failed": 2})
+            self.assertEqual(len(self.cache.get_all()), 2)
+        self.assertEqual(self.events, ["reload"])
+    
+    def test_drift_triggers_reload(self):
+        """A count mismatch with the database forces a reload"""
+        self.cache.get_all()
+        self.db.incidents["INC009"] = {"number": "INC009"}
+        
+        self.assertTrue(self.cache.has_drifted())
+        self.assertIsNotNone(self.cache.get("INC009"))
+        self.assertEqual(self.db.loads, 2)
+    
+    def test_no_drift_beyond_limit(self):
+        """A capped load that grew through upserts is not reported as drift"""
+        cache = IncidentCache(
+            loader=lambda: self.db.load()[:1], fetcher=self.db.fetch, counter=self.db.count,
+            limit=1, drift_check_interval=0
+        )
+        cache.get_all()
+        self.db.incidents["INC003"] = {"number": "INC003"}
+        cache.apply_changes(["INC003"])
+        
+        self.assertEqual(len(cache), 2)
+        self.assertFalse(cache.has_drifted())
+        self.db.incidents["INC004"] = {"number": "INC004"}
+        self.assertTrue(cache.has_drifted())
+    
+    def test_changes_before_load_are_ignored(self):
+        """Deltas before the first load are picked up by that load instead"""
+        self.cache.upsert([{"number": "INC005"}])
+        self.cache.clear()
+        self.assertEqual(self.events, [])
+        self.assertEqual(len(self.cache.get_all()), 2)
+    
+    def test_listeners_run_outside_the_lock(self):
+        """Readers on other threads are not blocked by a slow listener"""
+        self.cache.get_all()
+        reads = []
+        
+        def listener(event, payload):
+            reader = threading.Thread(target=lambda: reads.append(self.cache.get("INC001")))
+            reader.start()
+            reader.join(timeout=2)
+            reads.append(reader.is_alive())
+        
+        self.cache.add_listener(listener)
+        self.db.incidents["INC003"] = {"number": "INC003"}
+        self.cache.upsert([{"number": "INC003"}])
+        self.assertEqual(reads, [{"number": "INC001", "state": "New"}, False])
+    
+    def test_clear(self):
+        """clear() empties the cache and notifies listeners"""
+        self.cache.get_all()
+        self.db.incidents.clear()
+        self.cache.clear()
+        self.assertEqual(self.cache.get_all(), [])
+        self.assertEqual(self.events[-1], "clear")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Unit tests for bulk knowledge base upserts
+"""
+
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from csv_importer import CSVIncidentImporter
+from database import connection
+from db import mongodb_handler
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+RESOLUTION = "Restarted the mail transport service and confirmed delivery"
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestKnowledgeBaseUpsert(unittest.TestCase):
+    """Test cases for MongoDBHandler.upsert_incidents"""
+    
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        
+        self.handler = mongodb_handler.MongoDBHandler()
+        self.handler.collection.insert_one({"number": "INC001", "added_at": "2024-01-01T00:00:00"})
+        self.writes = []
+        self._use_update_one_for_bulk_write()
+    
+    def _use_update_one_for_bulk_write(self):
+        """mongomock's bulk_write predates pymongo's UpdateOne(sort=...); replay ops one by one"""
+        collection = self.handler.collection
+        
+        def bulk_write(operations, ordered=True):
+            self.writes.append(len(operations))
+            upserted = {}
+            for index, op in enumerate(operations):
+                outcome = collection.update_one(op._filter, op._doc, upsert=op._upsert)
+                if outcome.upserted_id is not None:
+                    upserted[index] = outcome.upserted_id
+            return mock.Mock(upserted_ids=upserted)
+        
+        patcher = mock.patch.object(collection, "bulk_write", bulk_write)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_outcomes_per_incident(self):
+        """New incidents are inserted, existing ones updated, bad rows reported"""
+        incidents = [
+            {"number": "INC001", "resolution_notes": RESOLUTION},
+            {"number": "INC002", "resolution_notes": RESOLUTION},
+            {"short_description": "no number"},
+            {"number": "INC003"},
+        ]
+        outcomes = self.handler.upsert_incidents(incidents, batch_size=2)
+        
+        self.assertEqual([o["status"] for o in outcomes], ["updated", "inserted", "error", "inserted"])
+        self.assertEqual(self.writes, [2, 1])
+        self.assertNotIn("resolution_length", incidents[0])
+        
+        existing = self.handler.collection.find_one({"number": "INC001"})
+        self.assertEqual(existing["added_at"], "2024-01-01T00:00:00")
+        self.assertEqual(existing["resolution_length"], len(RESOLUTION))
+        self.assertIn("added_at", self.handler.collection.find_one({"number": "INC003"}))
+        self.assertEqual(self.handler.collection.find_one({"number": "INC003"})["resolution_length"], 0)
+    
+    def test_batch_add_counts_new_incidents(self):
+        """add_incidents_batch reports only inserts as added"""
+        count_added, errors = self.handler.add_incidents_batch([{"number": "INC001"}, {"number": "INC009"}])
+        
+        self.assertEqual(count_added, 1)
+        self.assertEqual(errors, [])
+    
+    def test_importer_uses_one_bulk_write(self):
+        """The CSV importer saves a whole import with bulk writes"""
+        importer = CSVIncidentImporter()
+        importer.mongodb = self.handler
+        incidents = [{"number": f"INC{i:04d}", "resolution_notes": RESOLUTION} for i in range(50)]
+        incidents.append({"number": "INC9999", "resolution_notes": "n/a"})
+        
+        count_added, errors = importer.add_to_knowledge_base(incidents)
+        
+        self.assertEqual(count_added, 50)
+        self.assertEqual(self.writes, [50])
+        self.assertEqual(errors, ["Incident INC9999 has no resolution - skipped"])
+
+
+
+class TestHandlerImport(unittest.TestCase):
+    """The handler resolves its imports however src/ is loaded"""
+    
+    def test_importer_finds_handler_as_src_package(self):
+        """src.csv_importer still enables the knowledge base handler"""
+        code = (
+            "import src.db.mongodb_handler\n"
+            "from src.csv_importer import MONGODB_AVAILABLE\n"
+            "assert MONGODB_AVAILABLE"
+        )
+        repo_root = os.path.join(os.path.dirname(__file__), '..')
+        result = subprocess.run([sys.executable, '-c', code], cwd=repo_root, capture_output=True, text=True)
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
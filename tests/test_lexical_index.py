@@ -0,0 +1,100 @@
+"""
+Unit tests for the lexical inverted index
+"""
+
+import unittest
+from src.rag.lexical_index import InvertedIndex, tokenize
+
+
+RESOLUTION = "Restarted the service and cleared the queue"
+
+
+def make_incident(number, text, category="Network", resolution=RESOLUTION):
+    return {
+        "number": number,
+        "short_description": text,
+        "description": "",
+        "category": category,
+        "resolution_notes": resolution
+    }
+
+
+def linear_score(query, incident, category):
+    """Reference scoring of the original /suggest_resolution scan"""
+    keywords = set(tokenize(query))
+    words = set(tokenize(InvertedIndex.document_text(incident)))
+    score = len(keywords & words) / len(keywords) if keywords else 0
+    if category and incident.get("category").lower() == category.lower():
+        score += 0.3
+    return min(score, 1.0)
+
+
+class TestInvertedIndex(unittest.TestCase):
+    """Test cases for InvertedIndex"""
+    
+    def setUp(self):
+        """Index a few incidents"""
+        self.incidents = [
+            make_incident("INC001", "VPN tunnel disconnects every hour"),
+            make_incident("INC002", "VPN client install fails on laptop", category="Software"),
+            make_incident("INC003", "Printer jams when printing duplex", category="Hardware"),
+            make_incident("INC004", "Email quota exceeded", category="Email"),
+            make_incident("INC005", "VPN tunnel slow", resolution="too short"),
+        ]
+        self.index = InvertedIndex()
+        self.index.rebuild(self.incidents)
+    
+    def test_short_resolutions_not_indexed(self):
+        """Incidents with resolution notes under 20 characters are skipped"""
+        self.assertEqual(len(self.index), 4)
+        self.assertNotIn("INC005", self.index)
+    
+    def test_scores_match_linear_scan(self):
+        """Scores are the same as the original keyword overlap formula"""
+        for query, category in [("VPN tunnel disconnects", None), ("vpn laptop problem", "Hardware")]:
+            for match in self.index.search(query, category=category, limit=10):
+                self.assertAlmostEqual(match["score"], linear_score(query, match["incident"], category))
+    
+    def test_category_only_matches_included(self):
+        """Incidents matching only on category still get the bonus"""
+        matches = self.index.search("keyboard broken", category="Email")
+        self.assertEqual([m["incident"]["number"] for m in matches], ["INC004"])
+        self.assertAlmostEqual(matches[0]["score"], 0.3)
+    
+    def test_category_is_case_insensitive(self):
+        """Categories compare like CategoryPartitions does in vector search"""
+        self.assertEqual([m["incident"]["number"] for m in self.index.search("keyboard broken", category="email")],
+                         ["INC004"])
+        self.assertEqual([number for number, _ in self.index.shortlist("printing tunnel", category="HARDWARE")],
+                         ["INC003"])
+        self.assertEqual(self.index.first_in_category("software")["number"], "INC002")
+        
+        self.index.add(make_incident("INC006", "Printer toner empty", category="hardware"))
+        self.assertTrue(self.index.remove("INC003"))
+        self.assertEqual(self.index.first_in_category("Hardware")["number"], "INC006")
+    
+    def test_bm25_breaks_ties(self):
+        """Equal coverage is ordered by BM25"""
+        index = InvertedIndex()
+        index.add_many([
+            make_incident("A", "disk full disk full disk full server alert"),
+            make_incident("B", "disk alert"),
+        ])
+        matches = index.search("disk")
+        self.assertEqual(matches[0]["score"], matches[1]["score"])
+        self.assertGreater(matches[0]["bm25"], 0)
+    
+    def test_incremental_updates(self):
+        """Add, replace and remove keep postings consistent"""
+        self.index.add(make_incident("INC001", "Printer offline", category="Hardware"))
+        self.assertNotIn("INC001", [m["incident"]["number"] for m in self.index.search("tunnel disconnects")])
+        self.assertEqual(self.index.search("printer offline")[0]["incident"]["number"], "INC001")
+        
+        self.assertTrue(self.index.remove("INC001"))
+        self.assertFalse(self.index.remove("INC001"))
+        self.assertEqual(self.index.search("offline"), [])
+        self.assertEqual(self.index.first_in_category("Hardware")["number"], "INC003")
+
+
+if __name__ == "__main__":
+    unittest.main()
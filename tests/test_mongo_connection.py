@@ -0,0 +1,91 @@
+"""
+Unit tests for the shared MongoDB connection factory
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import connection, mongodb
+from db import mongodb_handler
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestConnectionFactory(unittest.TestCase):
+    """Test cases for get_mongo_client and pool configuration"""
+    
+    def setUp(self):
+        self.created = []
+        
+        def make_client(*args, **kwargs):
+            self.created.append(kwargs)
+            return mongomock.MongoClient(*args, **kwargs)
+        
+        patcher = mock.patch.object(connection, 'MongoClient', make_client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        self.addCleanup(connection.configure_mongo_pool, {})
+    
+    def test_one_client_per_uri(self):
+        """Trailing slashes do not create a second pool; other URIs do"""
+        first = connection.get_mongo_client("mongodb://db1:27017/")
+        
+        self.assertIs(connection.get_mongo_client("mongodb://db1:27017"), first)
+        self.assertIsNot(connection.get_mongo_client("mongodb://db2:27017"), first)
+        self.assertEqual(len(self.created), 2)
+    
+    def test_pool_settings_from_config(self):
+        """config.yaml pool keys become MongoClient options with the health listener"""
+        connection.configure_mongo_pool_from_config({"database": {"mongodb": {"pool": {
+            "max_pool_size": 7,
+            "read_preference": "secondaryPreferred",
+            "compressors": ["not-a-compressor", "zlib"],
+        }}}})
+        connection.get_mongo_client("mongodb://db1:27017")
+        
+        options = self.created[0]
+        self.assertEqual(options["maxPoolSize"], 7)
+        self.assertEqual(options["serverSelectionTimeoutMS"], 5000)
+        self.assertEqual(options["readPreference"], "secondaryPreferred")
+        self.assertEqual(options["compressors"], "zlib")
+        self.assertIs(options["event_listeners"][0], connection.get_connection_health("mongodb://db1:27017"))
+    
+    def test_uninstalled_compressors_are_skipped(self):
+        """Compressors whose package is missing are left out"""
+        with mock.patch.dict(sys.modules, {"zstandard": None}):
+            self.assertEqual(connection.available_compressors(["zstd", "zlib"]), ["zlib"])
+    
+    def test_clients_are_not_reused_after_fork(self):
+        """A child process creates its own client instead of using the parent's"""
+        parent = connection.get_mongo_client("mongodb://db1:27017")
+        
+        with mock.patch.object(connection.os, 'getpid', return_value=os.getpid() + 1):
+            child = connection.get_mongo_client("mongodb://db1:27017")
+        
+        self.assertIsNot(child, parent)
+    
+    def test_client_and_handler_share_pool(self):
+        """MongoDBClient and MongoDBHandler use the same client for one URI"""
+        db_client = mongodb.MongoDBClient("mongodb://db1:27017/")
+        handler = mongodb_handler.MongoDBHandler("mongodb://db1:27017")
+        
+        self.assertIs(db_client.client, handler.client)
+        self.assertIs(db_client.health, handler.health)
+        self.assertEqual(len(self.created), 1)
+        
+        handler.close()
+        self.assertEqual(db_client.collection.count_documents({}), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
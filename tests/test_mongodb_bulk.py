@@ -0,0 +1,197 @@
+"""
+Unit tests for MongoDBClient bulk inserts
+"""
+
+import io
+import os
+import sys
+import tempfile
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from bson import ObjectId
+from pymongo.errors import AutoReconnect
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import connection
+from database import mongodb
+from database.change_watcher import IncidentChangeWatcher
+from data_validation.date_parsing import utc_now
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestMongoDBBulkInsert(unittest.TestCase):
+    """Test cases for MongoDBClient.bulk_insert_incidents and import_from_csv"""
+    
+    def setUp(self):
+        """Client backed by mongomock with one existing incident"""
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        
+        self.client = mongodb.MongoDBClient(bulk_batch_size=2)
+        self.client.collection.insert_one({"number": "INC001", "short_description": "existing"})
+    
+    def test_bulk_insert_reports_duplicates_per_row(self):
+        """Duplicates do not stop the rest of an unordered batch"""
+        result = self.client.bulk_insert_incidents([
+            {"number": "INC002"},
+            {"number": "INC001"},
+            {"number": "INC003"},
+            {"number": "INC002"},
+            {"number": "INC004"},
+        ])
+        
+        self.assertEqual(result["inserted"], 3)
+        self.assertEqual(result["duplicates"], 2)
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["inserted_numbers"], ["INC002", "INC003", "INC004"])
+        self.assertEqual([f["row"] for f in result["failures"]], [1, 3])
+        self.assertEqual(self.client.collection.count_documents({}), 4)
+        
+        stored = self.client.collection.find_one({"number": "INC003"})
+        self.assertEqual(stored["sys_updated_on"], stored["sys_created_on"])
+    
+    def test_interrupted_batch_keeps_stored_rows(self):
+        """Rows stored before a batch fails outright count as inserted"""
+        collection = self.client.collection
+        insert_many = collection.insert_many
+        
+        def interrupted(documents, ordered=True):
+            insert_many(documents[:1], ordered=ordered)
+            for doc in documents[1:]:
+                doc.setdefault("_id", ObjectId())
+            raise AutoReconnect("connection reset")
+        
+        with mock.patch.object(collection, "insert_many", interrupted):
+            result = self.client.bulk_insert_incidents([{"number": "INC002"}, {"number": "INC003"}])
+        self.assertEqual(result["inserted_numbers"], ["INC002"])
+        self.assertEqual((result["errors"], result["unknown"]), (1, 0))
+        
+        with mock.patch.object(collection, "insert_many", interrupted), \
+                mock.patch.object(collection, "find", side_effect=AutoReconnect("still down")):
+            result = self.client.bulk_insert_incidents([{"number": "INC004"}, {"number": "INC005"}])
+        self.assertEqual(result["inserted"], 0)
+        self.assertEqual((result["errors"], result["unknown"]), (0, 2))
+        self.assertEqual([f["code"] for f in result["failures"]], ["unknown", "unknown"])
+    
+    def test_insert_many_returns_inserted_count(self):
+        """insert_many_incidents keeps returning the number inserted"""
+        count = self.client.insert_many_incidents([{"number": "INC001"}, {"number": "INC005"}])
+        self.assertEqual(count, 1)
+    
+    def test_import_from_csv_batches_rows(self):
+        """CSV rows are written in batches with the same statistics as before"""
+        rows = [
+            "number,short_description,category",
+            "INC001,Already stored,Network",
+            "INC010,Printer jam,Hardware",
+            "INC011,VPN down,Network",
+            ",,",
+            "INC010,Printer jam again,Hardware",
+            "INC012,Disk full,Server",
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as f:
+            f.write("\n".join(rows) + "\n")
+        self.addCleanup(os.remove, f.name)
+        
+        result = self.client.import_from_csv(f.name)
+        
+        self.assertEqual(result["imported"], 3)
+        self.assertEqual(result["skipped"], 3)
+        self.assertEqual(result["errors"], 0)
+        self.assertEqual(result["imported_numbers"], ["INC010", "INC011", "INC012"])
+        self.assertEqual(self.client.collection.count_documents({}), 4)
+    
+    def test_import_from_stream_small_batches(self):
+        """A cp1252 upload is decoded and written in several batches"""
+        lines = ["number,short_description,category"]
+        lines += [f"INC1{i:02d},Caf\u00e9 printer {i},Hardware" for i in range(7)]
+        data = ("\r\n".join(lines) + "\r\n").encode("cp1252")
+        
+        result = self.client.import_from_stream(io.BytesIO(data), batch_size=3)
+        
+        self.assertEqual(result["imported"], 7)
+        self.assertEqual(result["errors"], 0)
+        stored = self.client.collection.find_one({"number": "INC103"})
+        self.assertEqual(stored["short_description"], "Caf\u00e9 printer 3")
+    
+    def test_import_from_stream_reports_batches(self):
+        """on_imported receives each batch's numbers instead of one big list"""
+        lines = ["number,short_description"] + [f"INC2{i:02d},Issue {i}" for i in range(7)]
+        batches = []
+        
+        result = self.client.import_from_stream(
+            io.BytesIO("\n".join(lines).encode("utf-8")), batch_size=3, on_imported=batches.append
+        )
+        
+        self.assertEqual(result["imported"], 7)
+        self.assertEqual([len(batch) for batch in batches], [3, 3, 1])
+        self.assertEqual(result["imported_numbers"], [])
+    
+    def test_upsert_incidents(self):
+        """New numbers are inserted, existing ones updated in place"""
+        self._use_update_one_for_bulk_write()
+        
+        result = self.client.upsert_incidents([
+            {"number": "INC001", "short_description": "existing", "state": "Closed"},
+            {"number": "INC002", "short_description": "new", "sys_updated_on": "2024-03-02 09:00:00"},
+            {"short_description": "no number"},
+        ])
+        
+        self.assertEqual(result, {"inserted": 1, "updated": 1, "unchanged": 0, "skipped": 1, "errors": 0})
+        self.assertEqual(self.client.collection.count_documents({}), 2)
+        self.assertEqual(self.client.collection.find_one({"number": "INC001"})["state"], "Closed")
+        
+        again = self.client.upsert_incidents([
+            {"number": "INC002", "short_description": "new", "sys_updated_on": "2024-03-02 09:00:00"}
+        ])
+        self.assertEqual(again["unchanged"], 1)
+    
+    def test_writes_are_polled_in_time_order(self):
+        """A web edit does not hide later ServiceNow-format updates from the watcher"""
+        self._use_update_one_for_bulk_write()
+        self.client.upsert_incidents([{"number": "INC002", "sys_updated_on": "05/01/2024 10:00"}])
+        events = []
+        watcher = IncidentChangeWatcher(self.client.collection, lambda event, numbers: events.append((event, numbers)))
+        watcher.prime()
+        
+        # Web edit: ISO with a 'T' separator
+        self.client.update_incident("INC001", {"state": "Resolved"})
+        watcher.poll_once()
+        # ServiceNow sync a little later: space separator, sorts below 'T' as a string
+        later = (utc_now() + timedelta(minutes=5)).strftime("%Y-%m-%d %H:%M:%S")
+        self.client.upsert_incidents([{"number": "INC002", "sys_updated_on": later}])
+        watcher.poll_once()
+        
+        self.assertEqual(events, [("upsert", ["INC001"]), ("upsert", ["INC002"])])
+    
+    def _use_update_one_for_bulk_write(self):
+        """mongomock's bulk_write predates pymongo's UpdateOne(sort=...); replay ops one by one"""
+        collection = self.client.collection
+        
+        def bulk_write(operations, ordered=True):
+            counts = {"nUpserted": 0, "nMatched": 0, "nModified": 0, "writeErrors": []}
+            for op in operations:
+                outcome = collection.update_one(op._filter, op._doc, upsert=op._upsert)
+                counts["nMatched"] += outcome.matched_count
+                counts["nModified"] += outcome.modified_count
+                counts["nUpserted"] += 1 if outcome.upserted_id is not None else 0
+            return mock.Mock(bulk_api_result=counts)
+        
+        patcher = mock.patch.object(collection, "bulk_write", bulk_write)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Unit tests for streaming incident reads
+"""
+
+import json
+import os
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import connection
+from database import mongodb
+from db import mongodb_handler
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+def make_incidents(count):
+    return [
+        {
+            "number": f"INC{i:04d}",
+            "short_description": f"Incident {i}",
+            "resolution_notes": "Restarted the service and verified recovery" if i % 2 else "",
+            "resolution_length": 43 if i % 2 else 0,
+            "sys_created_on": f"2024-03-01 10:{i // 60:02d}:{i % 60:02d}"
+        }
+        for i in range(count)
+    ]
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestMongoDBClientStreaming(unittest.TestCase):
+    """Test cases for MongoDBClient.iter_incidents"""
+    
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        
+        self.client = mongodb.MongoDBClient()
+        self.client.collection.insert_many(make_incidents(25))
+    
+    def test_iterator_is_lazy_and_projected(self):
+        """Incidents are yielded one by one with only the requested fields"""
+        stream = self.client.iter_incidents(projection=["number"], batch_size=4, limit=10,
+                                            sort=[("sys_created_on", -1)])
+        self.assertIsInstance(stream, types.GeneratorType)
+        
+        incidents = list(stream)
+        self.assertEqual([inc["number"] for inc in incidents], [f"INC{i:04d}" for i in range(24, 14, -1)])
+        self.assertEqual(set(incidents[0]), {"_id", "number"})
+        self.assertIsInstance(incidents[0]["_id"], str)
+    
+    def test_get_all_incidents_unchanged(self):
+        """The list API keeps skip/limit/sort behaviour"""
+        incidents = self.client.get_all_incidents(skip=5, limit=3, sort_order=1)
+        self.assertEqual([inc["number"] for inc in incidents], ["INC0005", "INC0006", "INC0007"])
+    
+    def test_export_streams_valid_json(self):
+        """export_to_json writes every incident without a cap"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "export.json")
+            self.assertTrue(self.client.export_to_json(path))
+            with open(path, encoding="utf-8") as f:
+                exported = json.load(f)
+        
+        self.assertEqual(len(exported), 25)
+        self.assertEqual(exported[0]["number"], "INC0024")
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestMongoDBHandlerStreaming(unittest.TestCase):
+    """Test cases for MongoDBHandler.iter_incidents and iter_resolved_incidents"""
+    
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        
+        self.handler = mongodb_handler.MongoDBHandler()
+        self.handler.collection.insert_many(make_incidents(10))
+    
+    def test_projection_excludes_id(self):
+        """Field lists are projected and _id is left out like the list methods"""
+        incidents = list(self.handler.iter_incidents(projection=["number", "resolution_length"], batch_size=3))
+        
+        self.assertEqual(len(incidents), 10)
+        self.assertEqual(set(incidents[0]), {"number", "resolution_length"})
+    
+    def test_resolved_stream_matches_list(self):
+        """The streaming and list variants return the same resolved incidents"""
+        streamed = [inc["number"] for inc in self.handler.iter_resolved_incidents(batch_size=2)]
+        
+        self.assertEqual(streamed, [inc["number"] for inc in self.handler.get_resolved_incidents()])
+        self.assertEqual(len(streamed), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
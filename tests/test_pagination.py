@@ -0,0 +1,106 @@
+"""
+Unit tests for keyset pagination of stored incidents
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import connection
+from database import mongodb
+from database.pagination import decode_cursor, encode_cursor, keyset_filter
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+class TestCursorTokens(unittest.TestCase):
+    """Test cases for cursor encoding and keyset filters"""
+    
+    def test_round_trip(self):
+        """A token decodes to the position and order it was made from"""
+        token = encode_cursor(["2024-03-01 10:00:00", "INC0042"], -1)
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token), {"values": ["2024-03-01 10:00:00", "INC0042"], "sort_order": -1})
+    
+    def test_malformed_tokens(self):
+        """Garbage, wrong arity and bad orders are rejected"""
+        for token in ["not-a-cursor", encode_cursor(["x"], 1), encode_cursor(["x", "y"], 0)]:
+            with self.assertRaises(ValueError):
+                decode_cursor(token)
+    
+    def test_descending_filter_includes_missing_dates(self):
+        """Documents without a date sort last when descending"""
+        self.assertEqual(keyset_filter(("created", "number"), ["c", "n"], -1), {"$or": [
+            {"created": {"$lt": "c"}},
+            {"created": None},
+            {"created": "c", "number": {"$lt": "n"}},
+            {"created": "c", "number": None},
+        ]})
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestIncidentPages(unittest.TestCase):
+    """Test cases for MongoDBClient.get_incidents_page"""
+    
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+        
+        self.client = mongodb.MongoDBClient()
+        # Three incidents per timestamp and two without one
+        incidents = [
+            {"number": f"INC{i:04d}", "sys_created_on": f"2024-03-01 10:00:{i // 3:02d}"}
+            for i in range(25)
+        ]
+        incidents += [{"number": "INC9998"}, {"number": "INC9999", "sys_created_on": None}]
+        self.client.collection.insert_many(incidents)
+    
+    def walk(self, page_size, sort_order):
+        numbers, cursor, pages = [], None, 0
+        while True:
+            page, cursor = self.client.get_incidents_page(limit=page_size, cursor=cursor, sort_order=sort_order)
+            numbers += [inc["number"] for inc in page]
+            pages += 1
+            if cursor is None:
+                return numbers, pages
+    
+    def test_descending_pages_cover_every_incident_once(self):
+        """Pages continue after ties on sys_created_on and end with undated incidents"""
+        numbers, pages = self.walk(4, -1)
+        
+        expected = [f"INC{i:04d}" for i in reversed(range(25))] + ["INC9999", "INC9998"]
+        self.assertEqual(numbers, expected)
+        self.assertEqual(pages, 7)
+    
+    def test_ascending_pages(self):
+        """Undated incidents come first when ascending"""
+        numbers, _ = self.walk(5, 1)
+        
+        self.assertEqual(numbers, ["INC9998", "INC9999"] + [f"INC{i:04d}" for i in range(25)])
+    
+    def test_inserts_do_not_shift_later_pages(self):
+        """An incident added before the position is not returned again or skipped over"""
+        first, cursor = self.client.get_incidents_page(limit=10)
+        self.client.collection.insert_one({"number": "INC5000", "sys_created_on": "2024-03-02 00:00:00"})
+        second, _ = self.client.get_incidents_page(limit=10, cursor=cursor)
+        
+        self.assertEqual(second[0]["number"], "INC0014")
+        self.assertFalse({inc["number"] for inc in first} & {inc["number"] for inc in second})
+    
+    def test_invalid_cursor(self):
+        """A malformed cursor raises ValueError for the API to report"""
+        with self.assertRaises(ValueError):
+            self.client.get_incidents_page(cursor="bogus")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Unit tests for named field projections
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from database import connection
+from database import mongodb
+from database.projections import PROJECTIONS, resolve_projection
+
+try:
+    import mongomock
+    MONGOMOCK_AVAILABLE = True
+except ImportError:
+    MONGOMOCK_AVAILABLE = False
+
+
+class TestResolveProjection(unittest.TestCase):
+    """Test cases for resolve_projection"""
+
+    def test_named_projections(self):
+        """Names become inclusion documents without _id; full is everything"""
+        summary = resolve_projection('summary')
+        self.assertEqual(summary['_id'], 0)
+        self.assertEqual(set(summary) - {'_id'}, set(PROJECTIONS['summary']))
+        self.assertNotIn('description', summary)
+        self.assertIn('resolution_notes', resolve_projection('rag'))
+        self.assertIsNone(resolve_projection('full'))
+        self.assertIsNone(resolve_projection(None))
+
+    def test_unknown_name(self):
+        """Unknown names are rejected"""
+        with self.assertRaises(ValueError):
+            resolve_projection('everything')
+
+    def test_required_fields(self):
+        """Required fields are added to inclusion projections only"""
+        self.assertEqual(resolve_projection(['short_description'], required=['number']),
+                         ['short_description', 'number'])
+        self.assertEqual(resolve_projection({'_id': 0, 'category': 1}, required=['number']),
+                         {'_id': 0, 'category': 1, 'number': 1})
+        self.assertEqual(resolve_projection({'work_notes': 0}, required=['number']), {'work_notes': 0})
+        self.assertIsNone(resolve_projection('full', required=['number']))
+
+
+@unittest.skipUnless(MONGOMOCK_AVAILABLE, "mongomock not installed")
+class TestProjectedQueries(unittest.TestCase):
+    """Test cases for MongoDBClient queries with a projection"""
+
+    def setUp(self):
+        patcher = mock.patch.object(connection, 'MongoClient', mongomock.MongoClient)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(connection.close_mongo_clients)
+
+        self.client = mongodb.MongoDBClient()
+        self.client.collection.insert_many([
+            {
+                "number": f"INC{i:04d}",
+                "short_description": f"Issue {i}",
+                "description": "long text " * 100,
+                "work_notes": "notes " * 100,
+                "resolution_notes": "Restarted the service",
+                "category": "Network",
+                "sys_created_on": f"2024-03-01 10:00:{i:02d}"
+            }
+            for i in range(5)
+        ])
+
+    def test_listing_projections(self):
+        """Listings return only the projected fields"""
+        summary = self.client.get_all_incidents(limit=5, fields='summary')
+        self.assertEqual(len(summary), 5)
+        self.assertEqual(set(summary[0]), {'number', 'short_description', 'category', 'sys_created_on'})
+
+        rag = self.client.search_incidents(category='Network', fields='rag')
+        self.assertIn('resolution_notes', rag[0])
+        self.assertNotIn('work_notes', rag[0])
+
+        full = self.client.get_incidents_by_numbers(['INC0001'])
+        self.assertIn('work_notes', full[0])
+        self.assertIsInstance(full[0]['_id'], str)
+
+    def test_pages_keep_sort_keys(self):
+        """Keyset pages work with projections that omit the sort keys"""
+        incidents, cursor = self.client.get_incidents_page(limit=3, fields=['short_description'])
+        self.assertEqual([inc['number'] for inc in incidents], ['INC0004', 'INC0003', 'INC0002'])
+        self.assertNotIn('description', incidents[0])
+
+        incidents, cursor = self.client.get_incidents_page(limit=3, cursor=cursor, fields='summary')
+        self.assertEqual([inc['number'] for inc in incidents], ['INC0001', 'INC0000'])
+        self.assertIsNone(cursor)
+
+    def test_unknown_projection_raises(self):
+        """A bad projection name is an error, not an empty listing"""
+        with self.assertRaises(ValueError):
+            self.client.get_all_incidents(fields='everything')
+
+
+if __name__ == '__main__':
+    unittest.main()
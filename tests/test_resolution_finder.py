@@ -0,0 +1,285 @@
+"""
+Unit tests for the in-memory ResolutionFinder knowledge base
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from embeddings import EmbeddingModelRegistry
+from rag.resolution_finder import ResolutionFinder
+from rag.vector_index import IVFIndex
+
+
+class BagOfWordsModel:
+    """Tiny deterministic encoder: hashed bag of words"""
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def encode(self, sentences, **kwargs):
+        single = isinstance(sentences, str)
+        sentences = [sentences] if single else list(sentences)
+        self.encoded.extend(sentences)
+        
+        vectors = np.zeros((len(sentences), 32), dtype=np.float32)
+        for row, sentence in enumerate(sentences):
+            for word in sentence.lower().split():
+                vectors[row, sum(map(ord, word)) % 32] += 1.0
+        return vectors[0] if single else vectors
+
+
+def make_incident(number, description, category="Network", resolution="Restarted the affected service and verified"):
+    return {
+        "number": number,
+        "short_description": description,
+        "description": description + " reported by several users this morning",
+        "category": category,
+        "resolution_notes": resolution
+    }
+
+
+class FakeChromaClient:
+    """ChromaDBClient stand-in that keeps stored incidents in a dict"""
+    
+    def __init__(self, incidents=()):
+        self.stored = {inc["number"]: inc for inc in incidents}
+    
+    def upsert_incidents(self, incidents):
+        self.stored.update((inc["number"], inc) for inc in incidents)
+        return {"added": len(incidents), "updated": 0, "unchanged": 0}
+    
+    def get_incident_numbers(self):
+        return list(self.stored)
+    
+    def delete_incidents(self, incident_numbers):
+        for number in incident_numbers:
+            self.stored.pop(number, None)
+        return len(incident_numbers)
+    
+    def clear_collection(self):
+        self.stored.clear()
+        return True
+
+
+class TestResolutionFinderInMemory(unittest.TestCase):
+    """Test cases for the in-memory knowledge base"""
+    
+    def setUp(self):
+        """Create a finder backed by a fake embedding model"""
+        self.model = BagOfWordsModel()
+        registry = EmbeddingModelRegistry(loader=lambda name, device: self.model)
+        patcher = mock.patch("embeddings.registry._registry", registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.index_path = Path(tmp.name) / "ann_index.npz"
+        
+        self.finder = ResolutionFinder(use_chromadb=False, ann_index_path=str(self.index_path))
+        self.finder.load_knowledge_base([
+            make_incident("INC001", "VPN connection drops"),
+            make_incident("INC002", "Email quota exceeded", category="Email"),
+        ])
+        self.model.encoded = []
+    
+    def test_upsert_only_embeds_new_and_changed(self):
+        """Unchanged incidents are not re-embedded"""
+        stats = self.finder.upsert_incidents([
+            make_incident("INC001", "VPN connection drops", resolution="New resolution text for the VPN issue"),
+            make_incident("INC002", "Mailbox quota exceeded", category="Email"),
+            make_incident("INC003", "Printer offline on floor 3", category="Hardware"),
+        ])
+        
+        self.assertEqual(stats["unchanged"], 1)
+        self.assertEqual(stats["updated"], 1)
+        self.assertEqual(stats["added"], 1)
+        self.assertEqual(len(self.model.encoded), 2)
+        
+        # Resolution-only change still refreshes the stored record
+        results = self.finder.find_similar_incidents("VPN connection drops", top_k=1, min_similarity=0.1)
+        self.assertEqual(results[0]["resolution_notes"], "New resolution text for the VPN issue")
+    
+    def test_delete_incidents(self):
+        """Deleted incidents are no longer returned"""
+        removed = self.finder.delete_incidents(["INC001", "INC404"])
+        self.assertEqual(removed, 1)
+        
+        results = self.finder.find_similar_incidents("VPN connection drops", top_k=5, min_similarity=0.0)
+        self.assertNotIn("INC001", [r["number"] for r in results])
+    
+    def test_clear_after_delete(self):
+        """Clearing skips deleted rows and leaves nothing to suggest"""
+        self.finder.delete_incidents(["INC001"])
+        removed = self.finder.clear_knowledge_base()
+        self.assertEqual(removed, ["INC002"])
+
+        results = self.finder.find_similar_incidents("Email quota exceeded", top_k=5, min_similarity=0.0)
+        self.assertEqual(results, [])
+
+    def test_concurrent_prunes_keep_file_valid(self):
+        """Workers pruning the knowledge base file at once all take effect"""
+        self.finder.kb_file_path = self.index_path.with_name("knowledge_base.json")
+        numbers = [f"INC{i:03d}" for i in range(20)]
+        self.finder.kb_file_path.write_text(json.dumps([{"number": n} for n in numbers]))
+        
+        threads = [
+            threading.Thread(target=self.finder.prune_knowledge_base_file, args=([number],))
+            for number in numbers[:10]
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        kept = json.loads(self.finder.kb_file_path.read_text())
+        self.assertEqual([inc["number"] for inc in kept], numbers[10:])
+        self.assertFalse(self.finder.kb_file_path.with_name("knowledge_base.json.tmp").exists())
+    
+    def test_append_to_file_leaves_search_alone(self):
+        """Appending to the knowledge base file does not embed the incident again"""
+        self.finder.kb_file_path = self.index_path.with_name("knowledge_base.json")
+        size = len(self.finder.knowledge_base)
+        incident = make_incident("INC009", "Printer offline", category="Hardware")
+        
+        self.assertTrue(self.finder.append_to_knowledge_base_file(incident))
+        self.assertFalse(self.finder.append_to_knowledge_base_file(incident))
+        
+        saved = json.loads(self.finder.kb_file_path.read_text())
+        self.assertEqual([inc["number"] for inc in saved], ["INC009"])
+        self.assertEqual(len(self.finder.knowledge_base), size)
+    
+    def test_upsert_after_delete_reuses_number(self):
+        """A deleted number can be added again"""
+        self.finder.delete_incidents(["INC002"])
+        stats = self.finder.upsert_incidents([make_incident("INC002", "Email quota exceeded", category="Email")])
+        self.assertEqual(stats["added"], 1)
+        
+        results = self.finder.find_similar_incidents("Email quota exceeded", top_k=1, min_similarity=0.1)
+        self.assertEqual(results[0]["number"], "INC002")
+    
+    def test_category_filter_returns_full_top_k(self):
+        """Filtered queries search the category partition, not the global top-k"""
+        self.finder.upsert_incidents(
+            [make_incident(f"NET{i:03d}", f"VPN connection drops site {i}") for i in range(10)] +
+            [make_incident("HW001", "Laptop docking station broken", category="Hardware"),
+             make_incident("HW002", "Monitor flickering after update", category="hardware")]
+        )
+        
+        results = self.finder.find_similar_incidents(
+            "VPN connection drops", category="Hardware", top_k=2, min_similarity=-1.0
+        )
+        self.assertEqual(sorted(r["number"] for r in results), ["HW001", "HW002"])
+        
+        # Re-categorised incidents move partitions
+        self.finder.upsert_incidents([make_incident("HW002", "Monitor flickering after update", category="Email")])
+        results = self.finder.find_similar_incidents("Monitor", category="Hardware", top_k=5, min_similarity=-1.0)
+        self.assertEqual([r["number"] for r in results], ["HW001"])
+    
+    def test_vector_index_tracks_deltas_and_persists(self):
+        """Approximate search sees upserts/deletes and reloads from disk"""
+        self.finder.ann_min_size = 1
+        self.finder.ann_options = {"n_lists": 2, "n_probe": 2}
+        self.finder.find_similar_incidents("VPN connection drops", top_k=1, min_similarity=0.0)
+        self.assertTrue(self.finder.wait_for_index(timeout=10))
+        self.assertIsNotNone(self.finder.vector_index)
+        
+        self.finder.upsert_incidents([make_incident("INC003", "Printer offline on floor 3", category="Hardware")])
+        results = self.finder.find_similar_incidents("Printer offline on floor 3", top_k=1, min_similarity=0.1)
+        self.assertEqual(results[0]["number"], "INC003")
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "ann_index.npz"
+            self.assertTrue(self.finder.save_index(str(path)))
+            self.finder.vector_index = None
+            self.assertTrue(self.finder.load_index(str(path)))
+            
+            self.finder.delete_incidents(["INC003"])
+            results = self.finder.find_similar_incidents("Printer offline on floor 3", top_k=3, min_similarity=0.0)
+            self.assertNotIn("INC003", [r["number"] for r in results])
+            
+            # An index saved for a different row layout is rejected
+            self.finder.load_knowledge_base([make_incident("INC009", "Disk full on server")])
+            self.assertFalse(self.finder.load_index(str(path)))
+    
+    def test_index_builds_in_background_and_is_saved(self):
+        """Searches never wait for training; built and compacted indexes are persisted"""
+        self.finder.ann_min_size = 1
+        self.finder.ann_options = {"n_lists": 2, "n_probe": 2}
+        self.finder.upsert_incidents(
+            [make_incident(f"NET{i:03d}", f"VPN connection drops site {i}") for i in range(8)]
+        )
+        
+        release = threading.Event()
+        build = IVFIndex.build
+        
+        def slow_build(index, vectors, alive_mask):
+            release.wait(timeout=10)
+            build(index, vectors, alive_mask)
+        
+        with mock.patch.object(IVFIndex, "build", slow_build):
+            # Answered by exact search while the index trains
+            results = self.finder.find_similar_incidents("Email quota exceeded", top_k=1, min_similarity=0.1)
+            self.assertEqual(results[0]["number"], "INC002")
+            self.assertIsNone(self.finder.vector_index)
+            
+            # Changes made during training reach the new index
+            self.finder.upsert_incidents([make_incident("HW001", "Printer offline on floor 3", category="Hardware")])
+            self.finder.delete_incidents(["INC002"])
+            release.set()
+            self.assertTrue(self.finder.wait_for_index(timeout=10))
+        
+        self.assertIsNotNone(self.finder.vector_index)
+        self.assertTrue(self.index_path.exists())
+        results = self.finder.find_similar_incidents("Printer offline on floor 3", top_k=2, min_similarity=0.0)
+        self.assertEqual(results[0]["number"], "HW001")
+        self.assertNotIn("INC002", [r["number"] for r in results])
+        
+        # Compaction renumbers the rows and re-saves the index for the new layout
+        self.finder.delete_incidents([f"NET{i:03d}" for i in range(8)])
+        self.assertEqual(len(self.finder.knowledge_base), 2)
+        self.finder.vector_index = None
+        self.assertTrue(self.finder.load_index())
+        results = self.finder.find_similar_incidents("Printer offline on floor 3", top_k=1, min_similarity=0.1)
+        self.assertEqual(results[0]["number"], "HW001")
+
+
+class TestResolutionFinderChromaDB(unittest.TestCase):
+    """Test cases for keeping the ChromaDB collection in step"""
+    
+    def setUp(self):
+        """Create a finder wired to a stand-in ChromaDB client"""
+        registry = EmbeddingModelRegistry(loader=lambda name, device: BagOfWordsModel())
+        patcher = mock.patch("embeddings.registry._registry", registry)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.finder = ResolutionFinder(use_chromadb=False)
+        self.finder.use_chromadb = True
+        self.finder.chroma_client = FakeChromaClient([
+            make_incident("INC001", "VPN connection drops"),
+            make_incident("INC002", "Email quota exceeded", category="Email"),
+        ])
+    
+    def test_reload_deletes_incidents_missing_from_load(self):
+        """Incidents dropped elsewhere leave the collection on reload"""
+        self.finder.load_knowledge_base([make_incident("INC002", "Email quota exceeded", category="Email")])
+        self.assertEqual(list(self.finder.chroma_client.stored), ["INC002"])
+    
+    def test_clear_empties_collection(self):
+        """Clearing removes the whole collection and reports what was there"""
+        removed = self.finder.clear_knowledge_base()
+        self.assertEqual(sorted(removed), ["INC001", "INC002"])
+        self.assertEqual(self.finder.chroma_client.stored, {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,271 @@
+"""
+Unit tests for the ServiceNow page fetcher against a local stub server
+"""
+
+import json
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from servicenow import ServiceNowClient
+from servicenow.fetcher import keyset_query
+from servicenow.sync import latest_update
+
+
+def matches(record, encoded_query):
+    """Evaluate the >=, > and = conditions of an encoded query (^NQ groups are ORed)"""
+    for group in encoded_query.split("^NQ"):
+        for condition in group.split("^"):
+            if not condition or condition.startswith(("ORDERBY", "state=")):
+                continue
+            for op in (">=", ">", "="):
+                field, found, value = condition.partition(op)
+                if found:
+                    break
+            actual = record.get(field, "")
+            if not {">=": actual >= value, ">": actual > value, "=": actual == value}[op]:
+                break
+        else:
+            return True
+    return False
+
+
+def display_value(field, value):
+    """Display value as a day-first instance would render it (dates only)"""
+    if field in ("sys_created_on", "sys_updated_on"):
+        date, time = value.split(" ")
+        year, month, day = date.split("-")
+        return f"{day}/{month}/{year} {time}"
+    return value
+
+
+class StubTableAPI(BaseHTTPRequestHandler):
+    """Serves server.records (sorted by sys_created_on, number) with offset/limit paging"""
+    
+    def do_GET(self):
+        server = self.server
+        query = parse_qs(urlparse(self.path).query)
+        offset = int(query.get("sysparm_offset", ["0"])[0])
+        limit = int(query.get("sysparm_limit", ["10000"])[0])
+        encoded_query = query.get("sysparm_query", [""])[0]
+        
+        with server.lock:
+            server.offsets.append(offset)
+            server.queries.append(encoded_query)
+            failures = server.failures.get(offset, 0)
+            if failures:
+                server.failures[offset] = failures - 1
+            if server.fail_query and server.fail_query in encoded_query:
+                failures = 1
+        
+        if failures:
+            self.send_response(503)
+            self.end_headers()
+            return
+        
+        records = [r for r in server.records if matches(r, encoded_query)][offset:offset + limit]
+        if query.get("sysparm_display_value", [""])[0] == "all":
+            records = [
+                {name: {"display_value": display_value(name, value), "value": value} for name, value in r.items()}
+                for r in records
+            ]
+        body = json.dumps({"result": records}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        if server.send_total:
+            self.send_header("X-Total-Count", str(len(server.records)))
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+class TestServiceNowFetcher(unittest.TestCase):
+    """Test cases for concurrent, retrying, resumable fetches"""
+    
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubTableAPI)
+        self.server.records = [
+            {"sys_id": f"id{i:03d}", "number": f"INC{i:04d}", "sys_created_on": f"2099-01-01 00:00:{i // 3:02d}"}
+            for i in range(95)
+        ]
+        self.server.failures = {}
+        self.server.fail_query = None
+        self.server.offsets = []
+        self.server.queries = []
+        self.server.send_total = True
+        self.server.lock = threading.Lock()
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.checkpoint = Path(self.tmp.name) / "fetch.jsonl"
+    
+    def make_client(self, **options):
+        host, port = self.server.server_address
+        options.setdefault("checkpoint_path", str(self.checkpoint))
+        options.setdefault("pagination", "offset")
+        return ServiceNowClient(
+            f"http://{host}:{port}", "user", "secret",
+            page_size=10, max_workers=3, backoff_factor=0, timeout=5, **options
+        )
+    
+    def test_concurrent_fetch_keeps_order(self):
+        """Every page is requested once and records come back in order"""
+        incidents = self.make_client().fetch_incidents(["number"], days_back=90)
+        
+        self.assertEqual([inc["number"] for inc in incidents], [r["number"] for r in self.server.records])
+        self.assertEqual(sorted(self.server.offsets), list(range(0, 95, 10)))
+        self.assertFalse(self.checkpoint.exists())
+    
+    def test_limit(self):
+        """Only the pages covering the limit are requested"""
+        incidents = self.make_client().fetch_incidents(["number"], limit=25)
+        
+        self.assertEqual(len(incidents), 25)
+        self.assertEqual(sorted(self.server.offsets), [0, 10, 20])
+    
+    def test_transient_errors_are_retried(self):
+        """A 503 is retried on the pooled session"""
+        self.server.failures = {30: 2}
+        incidents = self.make_client().fetch_incidents(["number"])
+        
+        self.assertEqual(len(incidents), 95)
+        self.assertEqual(self.server.offsets.count(30), 3)
+    
+    def test_interrupted_fetch_resumes_from_checkpoint(self):
+        """Only pages missing from the checkpoint are requested again"""
+        self.server.failures = {50: 100}
+        with self.assertRaises(requests.RequestException):
+            self.make_client(max_retries=1).fetch_incidents(["number"])
+        self.assertTrue(self.checkpoint.exists())
+        
+        self.server.failures = {}
+        self.server.offsets = []
+        client = self.make_client()
+        incidents = client.fetch_incidents(["number"])
+        
+        self.assertEqual([inc["number"] for inc in incidents], [r["number"] for r in self.server.records])
+        self.assertIn(50, self.server.offsets)
+        self.assertNotIn(0, self.server.offsets)
+        self.assertGreater(client.fetcher.pages_resumed, 0)
+        self.assertFalse(self.checkpoint.exists())
+    
+    def test_checkpoint_of_other_job_is_ignored(self):
+        """A checkpoint left by a different query starts a fresh fetch"""
+        self.server.failures = {50: 100}
+        with self.assertRaises(requests.RequestException):
+            self.make_client(max_retries=0).fetch_incidents(["number"], days_back=30)
+        
+        self.server.failures = {}
+        self.server.offsets = []
+        incidents = self.make_client().fetch_incidents(["number"], days_back=90)
+        
+        self.assertEqual(len(incidents), 95)
+        self.assertIn(0, self.server.offsets)
+    
+    def test_without_total_count(self):
+        """Falls back to sequential paging when X-Total-Count is missing"""
+        self.server.send_total = False
+        incidents = self.make_client(checkpoint_path=None).fetch_incidents(["number"])
+        
+        self.assertEqual(len(incidents), 95)
+        self.assertEqual(self.server.offsets, list(range(0, 100, 10)))
+    
+    def test_updated_since_replaces_date_window(self):
+        """Incremental fetches filter on sys_updated_on instead of sys_created_on"""
+        self.make_client().fetch_incidents(["number"], updated_since="2024-03-02 08:45:00")
+        
+        query = self.server.queries[0]
+        self.assertIn("sys_updated_on>2024-03-02 08:45:00", query)
+        self.assertNotIn("sys_created_on>=", query)
+    
+    def test_updated_on_arrives_as_machine_value(self):
+        """sys_updated_on keeps its machine value, so the watermark is not read day-first"""
+        for i, record in enumerate(self.server.records):
+            record["sys_updated_on"] = f"2024-03-{1 + i % 12:02d} 10:00:00"
+        incidents = self.make_client().fetch_incidents(["number", "sys_updated_on"])
+        
+        self.assertEqual(incidents[0]["sys_updated_on"], "2024-03-01 10:00:00")
+        self.assertEqual(incidents[0]["number"], "INC0000")
+        self.assertEqual(latest_update(incidents).isoformat(), "2024-03-12T10:00:00")
+
+
+
+class TestServiceNowKeysetFetch(TestServiceNowFetcher):
+    """Test cases for keyset pagination on (sys_created_on, number)"""
+    
+    # Offset-specific cases are not repeated
+    test_concurrent_fetch_keeps_order = test_limit = test_transient_errors_are_retried = None
+    test_interrupted_fetch_resumes_from_checkpoint = test_checkpoint_of_other_job_is_ignored = None
+    test_without_total_count = None
+    
+    def make_client(self, **options):
+        return super().make_client(pagination="keyset", **options)
+    
+    def test_keyset_query(self):
+        """Positions become one ^NQ group per key prefix"""
+        self.assertEqual(keyset_query("state=7", ["a", "b"]), "state=7^ORDERBYa^ORDERBYb")
+        self.assertEqual(
+            keyset_query("state=7", ["a", "b"], ["x", "y"]),
+            "state=7^a>x^NQstate=7^a=x^b>y^ORDERBYa^ORDERBYb"
+        )
+    
+    def test_pages_follow_last_record(self):
+        """Each page filters after the previous page's last record instead of an offset"""
+        incidents = self.make_client().fetch_incidents(["short_description"])
+        
+        self.assertEqual([inc["number"] for inc in incidents], [r["number"] for r in self.server.records])
+        self.assertEqual(len(self.server.queries), 10)
+        self.assertEqual(set(self.server.offsets), {0})
+        self.assertIn("sys_created_on=2099-01-01 00:00:03^number>INC0009", self.server.queries[1])
+        self.assertFalse(self.checkpoint.exists())
+    
+    def test_keyset_limit(self):
+        """Paging stops once the limit is reached"""
+        incidents = self.make_client().fetch_incidents(["number"], limit=25)
+        
+        self.assertEqual(len(incidents), 25)
+        self.assertEqual(len(self.server.queries), 3)
+    
+    def test_keyset_resumes_after_last_stored_page(self):
+        """A rerun continues from the checkpoint's last record"""
+        self.server.fail_query = "number>INC0049"
+        with self.assertRaises(requests.RequestException):
+            self.make_client(max_retries=0).fetch_incidents(["number"])
+        
+        self.server.fail_query = None
+        self.server.queries = []
+        client = self.make_client()
+        incidents = client.fetch_incidents(["number"])
+        
+        self.assertEqual(len(incidents), 95)
+        self.assertIn("number>INC0049", self.server.queries[0])
+        self.assertEqual(client.fetcher.pages_resumed, 5)
+        self.assertFalse(self.checkpoint.exists())
+    
+    def test_query_dates_use_user_timezone(self):
+        """Keyset positions and the watermark are written in the user's timezone"""
+        client = self.make_client(query_timezone="Etc/GMT+5")
+        client.fetch_incidents(["number"], limit=20)
+        self.assertIn("sys_created_on=2098-12-31 19:00:03^number>INC0009", self.server.queries[1])
+        
+        self.server.queries = []
+        client.fetch_incidents(["number"], updated_since="2024-03-02 08:45:00")
+        self.assertIn("sys_updated_on>2024-03-02 03:45:00", self.server.queries[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+"""
+Unit tests for the incremental ServiceNow sync watermark
+"""
+
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(REPO_ROOT / "src"))
+
+from servicenow.sync import SyncWatermark, latest_update
+
+
+class TestSyncWatermark(unittest.TestCase):
+    """Test cases for SyncWatermark"""
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.watermark = SyncWatermark(Path(self.tmp.name) / "state" / "sync.json", overlap_minutes=30)
+    
+    def test_first_sync_is_full(self):
+        """Without stored state there is no lower bound"""
+        self.assertIsNone(self.watermark.updated_since())
+    
+    def test_advance_and_overlap(self):
+        """The next sync starts overlap_minutes before the newest update"""
+        self.watermark.advance([
+            {"number": "INC1", "sys_updated_on": "2024-03-01 08:00:00"},
+            {"number": "INC2", "sys_updated_on": "2024-03-02 09:15:00"},
+            {"number": "INC3", "sys_updated_on": ""},
+        ], {"inserted": 2})
+        
+        self.assertEqual(self.watermark.updated_since(), "2024-03-02 08:45:00")
+        self.assertEqual(self.watermark.load()["last_stats"], {"inserted": 2})
+    
+    def test_never_moves_backwards(self):
+        """An empty or older delta keeps the stored watermark"""
+        self.watermark.advance([{"sys_updated_on": "2024-03-02 09:00:00"}])
+        self.watermark.advance([])
+        self.watermark.advance([{"sys_updated_on": "2024-01-01 00:00:00"}])
+        
+        self.assertEqual(self.watermark.load()["sys_updated_on"], "2024-03-02T09:00:00")
+    
+    def test_latest_update_machine_values_only(self):
+        """Machine and ISO values are compared in UTC; locale display values are not guessed"""
+        latest = latest_update([
+            {"sys_updated_on": "2024-03-04 22:00:00"},
+            {"sys_updated_on": "2024-03-05T00:30:00+01:00"},
+            {"sys_updated_on": "12/05/2024 10:00:00"},
+            {"sys_updated_on": "not a date"},
+        ])
+        self.assertEqual(latest.isoformat(), "2024-03-04T23:30:00")
+    
+    def test_imports_as_src_package(self):
+        """src.servicenow (which re-exports SyncWatermark) imports from the repo root"""
+        code = "from src.servicenow import SyncWatermark, create_client_from_env"
+        result = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, capture_output=True, text=True)
+        
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
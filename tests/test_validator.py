@@ -132,6 +132,24 @@ class TestDataValidator(unittest.TestCase):
         self.assertEqual(report["valid_incidents"], 2)
         self.assertEqual(report["invalid_incidents"], 1)
         self.assertAlmostEqual(report["quality_score"], 66.67, places=1)
+    
+    def test_validate_stream(self):
+        """Test validation of a generator (e.g. a database cursor)"""
+        incidents = (
+            {
+                "number": f"INC{i:04d}",
+                "short_description": "Network issue",
+                "description": "Network connection is unstable and dropping frequently",
+                "resolution_notes": "Replaced the faulty switch port and confirmed stability" if i % 2 else "Fixed",
+                "category": "Network"
+            }
+            for i in range(4)
+        )
+        
+        valid, invalid = self.validator.validate_incidents(incidents)
+        
+        self.assertEqual([inc["number"] for inc in valid], ["INC0001", "INC0003"])
+        self.assertEqual(len(invalid), 2)
 
 
 if __name__ == "__main__":
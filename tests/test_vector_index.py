@@ -0,0 +1,120 @@
+"""
+Unit tests for exact and IVF vector indexes
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+import numpy as np
+from src.rag.vector_index import CategoryPartitions, IVFIndex, exact_search, top_k
+
+
+def clustered_vectors(n=2000, dim=16, clusters=20, seed=0):
+    """Unit vectors drawn around random cluster centres"""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim))
+    vectors = centres[rng.integers(clusters, size=n)] + 0.3 * rng.normal(size=(n, dim))
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float32)
+
+
+class TestVectorIndex(unittest.TestCase):
+    """Test cases for top-k selection and IVFIndex"""
+    
+    def setUp(self):
+        """Build an index over clustered data"""
+        self.vectors = clustered_vectors()
+        self.alive = np.ones(len(self.vectors), dtype=bool)
+        self.index = IVFIndex(n_lists=20, n_probe=4)
+        self.index.build(self.vectors, self.alive)
+    
+    def test_top_k_matches_full_sort(self):
+        """argpartition top-k returns the same order as a full sort"""
+        scores = np.random.default_rng(1).normal(size=500)
+        np.testing.assert_array_equal(top_k(scores, 10), np.argsort(-scores)[:10])
+        self.assertEqual(len(top_k(scores, 1000)), 500)
+    
+    def test_exact_search_skips_dead_rows(self):
+        """Masked rows are never returned and k is capped by live rows"""
+        alive = np.zeros(len(self.vectors), dtype=bool)
+        alive[:3] = True
+        rows, _ = exact_search(self.vectors, self.vectors[10], 5, alive)
+        self.assertEqual(sorted(rows), [0, 1, 2])
+    
+    def test_ivf_recall(self):
+        """IVF finds most of the exact neighbours"""
+        hits = 0
+        for q in range(0, 2000, 100):
+            exact, _ = exact_search(self.vectors, self.vectors[q], 10, self.alive)
+            approx, _ = self.index.search(self.vectors[q], 10, self.vectors, self.alive)
+            hits += len(set(exact) & set(approx))
+        self.assertGreaterEqual(hits / 200, 0.9)
+    
+    def test_add_remove_and_reassign(self):
+        """Removed rows vanish; re-assigned rows are returned once"""
+        self.index.remove([5])
+        rows, _ = self.index.search(self.vectors[5], 5, self.vectors, self.alive)
+        self.assertNotIn(5, rows)
+        
+        # Move row 7 onto row 900's vector
+        vectors = self.vectors.copy()
+        vectors[7] = vectors[900]
+        self.index.add(np.array([7]), vectors[[7]])
+        rows, _ = self.index.search(vectors[900], 5, vectors, self.alive)
+        self.assertIn(7, rows)
+        self.assertEqual(len(rows), len(set(rows)))
+    
+    def test_updates_do_not_grow_lists(self):
+        """Re-added rows leave their old cell, so lists hold each live row once"""
+        rng = np.random.default_rng(2)
+        for _ in range(5):
+            rows = rng.choice(len(self.vectors), 200, replace=False)
+            self.index.add(rows, self.vectors[rng.permutation(rows)])
+        self.index.remove(np.arange(10))
+        
+        listed = np.concatenate([self.index._cell_rows(cell) for cell in range(20)])
+        self.assertEqual(len(listed), len(self.vectors) - 10)
+        self.assertEqual(len(np.unique(listed)), len(listed))
+        for cell in range(20):
+            self.assertTrue((self.index.assignments[self.index._cell_rows(cell)] == cell).all())
+    
+    def test_compact_renumbers_rows(self):
+        """After compaction the index answers with the new row ids"""
+        kept = np.arange(1, len(self.vectors), 2)
+        self.index.compact(kept)
+        vectors = self.vectors[kept]
+        rows, _ = self.index.search(vectors[10], 1, vectors, np.ones(len(kept), dtype=bool))
+        self.assertEqual(list(rows), [10])
+    
+    def test_save_and_load(self):
+        """A reloaded index gives the same results"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "index.npz")
+            self.index.save(path, row_keys=np.array(["a", "b"]))
+            loaded, extra = IVFIndex.load(path)
+        
+        self.assertEqual(list(extra["row_keys"]), ["a", "b"])
+        expected, _ = self.index.search(self.vectors[3], 10, self.vectors, self.alive)
+        actual, _ = loaded.search(self.vectors[3], 10, self.vectors, self.alive)
+        np.testing.assert_array_equal(expected, actual)
+
+    
+    def test_category_partitions(self):
+        """Partition search only scores rows of the requested category"""
+        partitions = CategoryPartitions()
+        for row in range(len(self.vectors)):
+            partitions.assign(row, "Network" if row % 10 else "Hardware")
+        
+        rows, _ = partitions.search("hardware", self.vectors[1], 5, self.vectors, self.alive)
+        self.assertEqual(len(rows), 5)
+        self.assertTrue(all(row % 10 == 0 for row in rows))
+        
+        partitions.assign(0, "Network")
+        partitions.remove(10)
+        self.assertNotIn(0, partitions.rows("Hardware"))
+        self.assertNotIn(10, partitions.rows("Hardware"))
+        self.assertEqual(partitions.sizes()["hardware"], 198)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -5,22 +5,56 @@ Professional UI for incident analysis and SOP creation with MongoDB integration
 
 from flask import Flask, render_template, request, jsonify, send_file
 import sys
+import threading
 from pathlib import Path
 from datetime import datetime
 import os
+import yaml
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent / "src"))
 
 from data_validation import DataValidator
+from embeddings import configure_embeddings_from_config
 from sop_generation import SOPGenerator
-from database import get_db_client
+from database import (
+    get_db_client, get_async_db_client, get_db_loop, IncidentCache, configure_mongo_pool_from_config,
+    PROJECTIONS
+)
+
+try:
+    import asgiref  # Flask runs async views through asgiref (flask[async])
+    ASYNC_VIEWS_AVAILABLE = True
+except ImportError:
+    ASYNC_VIEWS_AVAILABLE = False
 
 app = Flask(__name__)
 
+# Settings from config.yaml: MongoDB pool (one shared pool per worker
+# process), embedding cache, and the `rag` section for the finder and
+# hybrid retriever
+CONFIG_PATH = Path(__file__).parent / "config.yaml"
+config = {}
+if CONFIG_PATH.exists():
+    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f) or {}
+configure_mongo_pool_from_config(config)
+configure_embeddings_from_config(config)
+RAG_CONFIG = config.get('rag') or {}
+
 # Initialize MongoDB client
 db_client = get_db_client()
 
+# Async client for the read endpoints; its coroutines all run on one
+# background loop (one client and pool per process). Flask still serves async
+# views under WSGI, so each request keeps its thread until it finishes; with
+# a threaded server (e.g. gunicorn --threads) the queries of every request a
+# worker is handling are in flight together on that loop, and views that
+# gather several queries also run them concurrently.
+ASYNC_ENDPOINTS = os.getenv('ASYNC_ENDPOINTS', 'true').lower() in ('1', 'true', 'yes')
+async_db_client = get_async_db_client() if ASYNC_ENDPOINTS and ASYNC_VIEWS_AVAILABLE else None
+db_loop = get_db_loop()
+
 # Initialize components (without ML categorizer for faster startup)
 validator = DataValidator(
     required_fields=["short_description"],  # Only short_description required, others optional
@@ -37,35 +71,159 @@ generator = SOPGenerator(
 categorizer = None
 resolution_finder = None
 
-# Cache for incidents (load once, reuse many times)
-incidents_cache = {
-    'data': None,
-    'last_loaded': None,
-    'count': 0
-}
+# Keyword index over cached incidents for /suggest_resolution (built with the cache)
+lexical_index = None
+lexical_index_lock = threading.Lock()
+hybrid_retriever = None
+
+# /suggest_resolution ranking: 'keyword' (lexical index only) or 'hybrid'
+# (BM25 shortlist re-ranked with embeddings); requests may override with 'mode'
+SUGGESTION_MODE = os.getenv('SUGGESTION_MODE', 'keyword').lower()
+
+# Both components share one copy of this model via the embedding registry
+EMBEDDING_MODEL = RAG_CONFIG.get('embedding_model', "all-MiniLM-L6-v2")
+
+# List endpoints send only the fields their views render unless the
+# client asks for ?fields=rag|full (see database.projections)
+LIST_FIELDS = 'summary'
+
+# Everything that feeds resolution search (incidents cache, finder,
+# knowledge base sync) reads only the fields it indexes
+KB_FIELDS = 'rag'
+
+# Cache for incidents (load once, then apply each change locally); it only
+# feeds resolution search, so it holds the 'rag' fields
+INCIDENTS_CACHE_LIMIT = 10000  # Large number to get all
+incidents_cache = IncidentCache(
+    loader=lambda: db_client.get_all_incidents(limit=INCIDENTS_CACHE_LIMIT, fields=KB_FIELDS),
+    fetcher=lambda numbers: db_client.get_incidents_by_numbers(numbers, fields=KB_FIELDS),
+    counter=db_client.get_incident_count,
+    limit=INCIDENTS_CACHE_LIMIT
+)
+
+# Follow writes made by other processes/workers (change stream or polling)
+WATCH_INCIDENT_CHANGES = os.getenv('WATCH_INCIDENT_CHANGES', 'true').lower() in ('1', 'true', 'yes')
+INCIDENT_POLL_INTERVAL = float(os.getenv('INCIDENT_POLL_INTERVAL', '5'))
+change_watcher = None
+
+def invalid_fields(fields, allowed=PROJECTIONS):
+    """400 response for an unknown ?fields= projection name, else None"""
+    if fields in allowed:
+        return None
+    return jsonify({
+        'success': False,
+        'error': f"Unknown fields '{fields}' (expected one of: {', '.join(allowed)})"
+    }), 400
 
 def get_incidents_cache():
     """Get cached incidents or load from database"""
-    global incidents_cache
-    
-    # If cache is empty, load all incidents
-    if incidents_cache['data'] is None:
-        print("[INFO] Loading all incidents into cache (first time)...")
-        incidents_cache['data'] = db_client.get_all_incidents(limit=10000)  # Large number to get all
-        incidents_cache['count'] = len(incidents_cache['data'])
-        incidents_cache['last_loaded'] = datetime.now()
-        print(f"[INFO] Cached {incidents_cache['count']} incidents")
+    start_change_watcher()
+    return incidents_cache.get_all()
+
+def start_change_watcher():
+    """Start the MongoDB change watcher once per process (after any fork)"""
+    global change_watcher
+    if change_watcher is None and WATCH_INCIDENT_CHANGES:
+        from database.change_watcher import IncidentChangeWatcher
+        
+        change_watcher = IncidentChangeWatcher(
+            db_client.collection,
+            apply_incident_changes,
+            poll_interval=INCIDENT_POLL_INTERVAL
+        )
+        change_watcher.start()
+
+def apply_incident_changes(event, numbers):
+    """Change watcher listener: apply writes seen in MongoDB to the incidents cache"""
+    if event == 'upsert':
+        incidents_cache.apply_changes(numbers)
+    elif event == 'remove':
+        incidents_cache.remove(numbers)
+    elif event == 'reload':
+        refresh_incidents_cache()
+
+def sync_resolution_finder(event, payload):
+    """Incidents cache listener that keeps the in-memory RAG knowledge base in step"""
+    if resolution_finder is None:
+        return  # Loaded from MongoDB when first needed
     
-    return incidents_cache['data']
+    if event == 'upsert':
+        resolution_finder.upsert_incidents(payload)
+    elif event == 'remove':
+        resolution_finder.delete_incidents(payload)
+        resolution_finder.prune_knowledge_base_file(payload)
+    elif event == 'reload':
+        # Collection dropped/invalidated or drifted: rebuild from the fresh load
+        resolution_finder.load_knowledge_base(payload)
+    elif event == 'clear':
+        # Every incident was deleted: nothing may be suggested any more
+        numbers = resolution_finder.clear_knowledge_base()
+        resolution_finder.prune_knowledge_base_file(numbers)
+
+incidents_cache.add_listener(sync_resolution_finder)
 
 def refresh_incidents_cache():
-    """Refresh the incidents cache (call after adding/updating incidents)"""
-    global incidents_cache
+    """Force a full reload of the incidents cache"""
     print("[INFO] Refreshing incidents cache...")
-    incidents_cache['data'] = db_client.get_all_incidents(limit=10000)  # Large number to get all
-    incidents_cache['count'] = len(incidents_cache['data'])
-    incidents_cache['last_loaded'] = datetime.now()
-    print(f"[INFO] Cache refreshed with {incidents_cache['count']} incidents")
+    count = incidents_cache.reload()
+    print(f"[INFO] Cache refreshed with {count} incidents")
+
+def sync_lexical_index(event, payload):
+    """Incidents cache listener that mirrors every change into the lexical index"""
+    if event == 'reload':
+        indexed = lexical_index.rebuild(payload)
+        print(f"[INFO] Lexical index built with {indexed} incidents")
+    elif event == 'upsert':
+        lexical_index.add_many(payload)
+    elif event == 'remove':
+        for number in payload:
+            lexical_index.remove(number)
+    elif event == 'clear':
+        lexical_index.clear()
+
+def get_lexical_index():
+    """Get the lexical index, building it from the incidents cache on first use"""
+    global lexical_index
+    if lexical_index is None:
+        # Concurrent first requests build the index and register its
+        # listener once; otherwise every later change would be applied twice
+        with lexical_index_lock:
+            if lexical_index is None:
+                from rag.lexical_index import InvertedIndex
+                
+                index = InvertedIndex(min_resolution_length=20)
+                index.rebuild(get_incidents_cache())
+                lexical_index = index
+                incidents_cache.add_listener(sync_lexical_index)
+    return lexical_index
+
+def get_hybrid_retriever():
+    """Lazy load the hybrid retriever (needs the RAG resolution finder)"""
+    global hybrid_retriever
+    if hybrid_retriever is None:
+        finder = get_resolution_finder()
+        if finder is None:
+            return None
+        
+        from rag import create_hybrid_retriever
+        hybrid_retriever = create_hybrid_retriever(get_lexical_index(), finder, RAG_CONFIG.get('hybrid'))
+    return hybrid_retriever
+
+def warm_up_embeddings():
+    """
+    Load the shared embedding model once, before requests arrive.
+    
+    With gunicorn --preload this runs in the master, so forked workers share
+    the same weights instead of each loading their own copy.
+    """
+    from embeddings import get_embedding_registry
+    print(f"[INFO] Warming up embedding model: {EMBEDDING_MODEL}")
+    get_embedding_registry().warm_up([EMBEDDING_MODEL])
+    print("[INFO] Embedding model ready")
+
+
+if os.getenv('WARM_UP_EMBEDDINGS', '').lower() in ('1', 'true', 'yes'):
+    warm_up_embeddings()
 
 def get_categorizer():
     """Lazy load the ML categorizer"""
@@ -74,7 +232,7 @@ def get_categorizer():
         print("[INFO] Loading ML categorizer (first time only)...")
         from categorization import IncidentCategorizer
         categorizer = IncidentCategorizer(
-            embedding_model="all-MiniLM-L6-v2",
+            embedding_model=EMBEDDING_MODEL,
             min_cluster_size=2,
             min_samples=1
         )
@@ -88,19 +246,17 @@ def get_resolution_finder():
         try:
             print("[INFO] Loading RAG resolution finder (first time only)...")
             
-            from rag import ResolutionFinder
+            from rag import create_resolution_finder
             
-            # Initialize with in-memory storage (disable ChromaDB for web app)
-            resolution_finder = ResolutionFinder(
-                embedding_model="all-MiniLM-L6-v2",
-                use_chromadb=False  # Disable ChromaDB to avoid loading issues
-            )
+            # In-memory storage unless rag.chromadb.enabled is set in config.yaml
+            chromadb_config = dict({'enabled': False}, **(RAG_CONFIG.get('chromadb') or {}))
+            resolution_finder = create_resolution_finder(dict(RAG_CONFIG, chromadb=chromadb_config))
             
             # Check if ChromaDB is empty - if so, load from MongoDB
             # Disabled for now as we're using in-memory
             # Fallback to in-memory: Load from MongoDB
             print("[INFO] Using in-memory storage. Loading from MongoDB...")
-            incidents_from_db = db_client.get_all_incidents(limit=1000)  # Limit to 1000 for faster loading
+            incidents_from_db = db_client.get_all_incidents(limit=1000, fields=KB_FIELDS)  # Limit to 1000 for faster loading
             if incidents_from_db:
                 resolution_finder.load_knowledge_base(incidents_from_db)
                 print(f"[INFO] Loaded {len(incidents_from_db)} incidents into memory")
@@ -187,15 +343,15 @@ def add_incident():
                 'error': 'Failed to insert incident (duplicate number?)'
             }), 400
         
-        # Refresh cache after adding new incident
-        refresh_incidents_cache()
+        # Apply the new incident to the cache; its sync_resolution_finder
+        # listener also upserts it into the RAG knowledge base
+        incidents_cache.apply_changes([incident['number']])
         
-        # Add resolution to RAG if available and has meaningful content
+        # Save resolution to the knowledge base file if it has meaningful content
         if incident.get('resolution_notes') and len(incident.get('resolution_notes', '').strip()) > 20:
             try:
                 finder = get_resolution_finder()
-                finder.add_to_knowledge_base(incident)
-                print(f"[INFO] Incident {incident['number']} added to knowledge base")
+                finder.append_to_knowledge_base_file(incident)
             except Exception as kb_error:
                 print(f"[WARNING] Failed to add to knowledge base: {str(kb_error)}")
                 # Don't fail the request if knowledge base update fails
@@ -270,25 +426,52 @@ def generate_sop():
 
 @app.route('/get_incidents', methods=['GET'])
 def get_incidents():
-    """Get all stored incidents from MongoDB"""
+    """
+    Get stored incidents from MongoDB, newest first
+    
+    Pass the returned next_cursor as ?cursor= to get the following page
+    (keyset pagination; null on the last page). ?page= still selects
+    numbered pages with skip/limit for existing callers. ?fields= picks
+    the projection (summary by default, rag or full).
+    """
     try:
-        # Get pagination parameters
-        page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 100))
-        skip = (page - 1) * per_page
+        fields = request.args.get('fields', LIST_FIELDS)
+        error = invalid_fields(fields)
+        if error:
+            return error
+        
+        if 'page' in request.args:
+            page = int(request.args.get('page', 1))
+            skip = (page - 1) * per_page
+            incidents = db_client.get_all_incidents(skip=skip, limit=per_page, fields=fields)
+            
+            return jsonify({
+                'success': True,
+                'incidents': incidents,
+                'count': len(incidents),
+                'total': db_client.get_incident_count(),
+                'page': page,
+                'per_page': per_page
+            })
         
-        # Get incidents from MongoDB
-        incidents = db_client.get_all_incidents(skip=skip, limit=per_page)
-        total_count = db_client.get_incident_count()
+        cursor = request.args.get('cursor')
+        try:
+            incidents, next_cursor = db_client.get_incidents_page(limit=per_page, cursor=cursor, fields=fields)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        return jsonify({
+        response = {
             'success': True,
             'incidents': incidents,
             'count': len(incidents),
-            'total': total_count,
-            'page': page,
-            'per_page': per_page
-        })
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        }
+        if not cursor:
+            # Counting every page would cost more than the page itself
+            response['total'] = db_client.get_incident_count()
+        return jsonify(response)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -309,8 +492,8 @@ def update_incident_by_number(incident_number):
         success = db_client.update_incident(incident_number, update_data)
         
         if success:
-            # Refresh cache after update
-            refresh_incidents_cache()
+            # Apply the update to the cache
+            incidents_cache.apply_changes([incident_number])
             return jsonify({
                 'success': True,
                 'message': f'Incident {incident_number} updated successfully'
@@ -335,8 +518,8 @@ def delete_incident_by_number(incident_number):
         success = db_client.delete_incident(incident_number)
         
         if success:
-            # Refresh cache after delete
-            refresh_incidents_cache()
+            # Remove from the cache
+            incidents_cache.remove([incident_number])
             return jsonify({
                 'success': True,
                 'message': f'Incident {incident_number} deleted successfully'
@@ -362,12 +545,17 @@ def search_incidents():
         query = data.get('query', '')
         category = data.get('category')
         priority = data.get('priority')
+        fields = data.get('fields', LIST_FIELDS)
+        error = invalid_fields(fields)
+        if error:
+            return error
         
         incidents = db_client.search_incidents(
             query=query if query else None,
             category=category,
             priority=priority,
-            limit=200
+            limit=200,
+            fields=fields
         )
         
         return jsonify({
@@ -401,36 +589,19 @@ def import_csv():
                 'error': 'No file selected'
             }), 400
         
-        # Save temporarily
-        temp_path = Path('temp_import.csv')
-        file.save(str(temp_path))
-        
-        # Import from CSV
-        result = db_client.import_from_csv(str(temp_path))
+        # Stream the upload straight into bulk inserts (no temp copy). Each
+        # inserted batch is applied to the cache as it lands, so no query
+        # grows with the file; cache listeners update the RAG indexes
+        cache_delta = {'upserted': 0, 'removed': 0, 'failed': 0}
         
-        # Clean up
-        temp_path.unlink()
+        def apply_batch(numbers):
+            delta = incidents_cache.apply_changes(numbers)
+            for key, value in delta.items():
+                cache_delta[key] = cache_delta.get(key, 0) + value
         
-        # Refresh cache after importing incidents
-        if result.get('imported', 0) > 0:
-            refresh_incidents_cache()
-            print(f"[INFO] Cache refreshed after importing {result['imported']} incidents")
-        
-        # If import was successful, update RAG knowledge base
-        if result.get('imported', 0) > 0:
-            try:
-                print(f"[INFO] Syncing {result['imported']} new incidents to RAG knowledge base...")
-                finder = get_resolution_finder()
-                incidents_from_db = get_incidents_cache()  # Use cache instead of re-querying DB
-                if incidents_from_db:
-                    finder.load_knowledge_base(incidents_from_db)
-                    print(f"[INFO] RAG knowledge base updated with {len(incidents_from_db)} total incidents")
-                    result['rag_synced'] = True
-                    result['rag_total'] = len(incidents_from_db)
-            except Exception as e:
-                print(f"[WARNING] Failed to sync to RAG: {e}")
-                result['rag_synced'] = False
-                result['rag_error'] = str(e)
+        result = db_client.import_from_stream(file.stream, on_imported=apply_batch)
+        if result['imported']:
+            print(f"[INFO] Cache updated after importing {result['imported']} incidents: {cache_delta}")
         
         return jsonify({
             'success': True,
@@ -451,7 +622,11 @@ def export_csv():
         import csv
         from io import StringIO
         
-        incidents = db_client.get_all_incidents(limit=10000)
+        fieldnames = ['number', 'short_description', 'description', 'category', 
+                     'subcategory', 'priority', 'state', 'resolution_notes', 
+                     'close_notes', 'assignment_group', 'assigned_to',
+                     'sys_created_on', 'sys_updated_on', 'resolved_at']
+        incidents = db_client.get_all_incidents(limit=10000, fields=fieldnames)
         
         if not incidents:
             return jsonify({
@@ -461,10 +636,6 @@ def export_csv():
         
         # Create CSV in memory
         output = StringIO()
-        fieldnames = ['number', 'short_description', 'description', 'category', 
-                     'subcategory', 'priority', 'state', 'resolution_notes', 
-                     'close_notes', 'assignment_group', 'assigned_to',
-                     'sys_created_on', 'sys_updated_on', 'resolved_at']
         
         writer = csv.DictWriter(output, fieldnames=fieldnames, extrasaction='ignore')
         writer.writeheader()
@@ -496,7 +667,7 @@ def get_stats():
         categories = db_client.get_categories()
         
         # Get recent incidents
-        recent = db_client.get_all_incidents(limit=10)
+        recent = db_client.get_all_incidents(limit=10, fields=LIST_FIELDS)
         
         return jsonify({
             'success': True,
@@ -619,10 +790,11 @@ def suggest_resolution():
                 'error': 'Please provide problem description'
             }), 400
         
-        # Get incidents from cache (loaded once at startup)
+        # Get incidents from cache (loaded once at startup) and its keyword index
         print("[DEBUG] Getting incidents from cache...")
         incidents_from_db = get_incidents_cache()
-        print(f"[DEBUG] Using {len(incidents_from_db)} cached incidents")
+        index = get_lexical_index()
+        print(f"[DEBUG] Using {len(incidents_from_db)} cached incidents, {len(index)} indexed")
         
         if not incidents_from_db:
             return jsonify({
@@ -631,49 +803,27 @@ def suggest_resolution():
                 'suggested_resolution': 'Database is empty. Please add incidents to knowledge base first.'
             })
         
-        # Find similar incidents using simple keyword matching
-        combined_description = f"{short_description} {problem_description}".lower()
-        keywords = set(word for word in combined_description.split() if len(word) > 3)  # Only words > 3 chars
-        
-        print(f"[DEBUG] Search keywords: {keywords}")
-        
-        similar_incidents = []
-        for incident in incidents_from_db:
-            inc_desc = f"{incident.get('short_description', '')} {incident.get('description', '')}".lower()
-            inc_resolution = incident.get('resolution_notes', '')
-            
-            # Skip incidents without resolution
-            if not inc_resolution or len(inc_resolution) < 20:
-                continue
-            
-            # Calculate similarity score (simple keyword matching)
-            inc_words = set(word for word in inc_desc.split() if len(word) > 3)
-            common_words = keywords.intersection(inc_words)
-            
-            # Calculate similarity as percentage of matching keywords
-            if len(keywords) > 0:
-                similarity_score = len(common_words) / len(keywords)
-            else:
-                similarity_score = 0
-            
-            # Also check category match
-            if category and incident.get('category') == category:
-                similarity_score += 0.3
-            
-            # Cap similarity at 1.0
-            similarity_score = min(similarity_score, 1.0)
-            
-            # Lower threshold to 0.01 (1%) to catch more matches
-            if similarity_score > 0.01:
-                similar_incidents.append({
-                    'incident': incident,
-                    'score': similarity_score
-                })
-        
-        print(f"[DEBUG] Found {len(similar_incidents)} incidents with similarity > 0.01")
-        
-        # Sort by similarity score
-        similar_incidents.sort(key=lambda x: x['score'], reverse=True)
+        # Find similar incidents by keyword overlap (share of query words > 3
+        # chars found in the incident, +0.3 for same category, BM25 tie-break).
+        # Only incidents with a resolution of 20+ characters are indexed.
+        combined_description = f"{short_description} {problem_description}"
+        retriever = get_hybrid_retriever() if data.get('mode', SUGGESTION_MODE) == 'hybrid' else None
+        
+        if retriever is not None:
+            # Hybrid: same candidates, re-ranked by embeddings; confidence is
+            # the embedding similarity of each match
+            similar_incidents = [
+                {'incident': inc, 'score': inc['similarity_score']}
+                for inc in retriever.retrieve(combined_description, category=category or None, top_k=4, min_similarity=0.01)
+            ]
+        else:
+            similar_incidents = index.search(
+                combined_description,
+                category=category or None,
+                category_bonus=0.3,
+                min_score=0.01,  # Lower threshold to 0.01 (1%) to catch more matches
+                limit=4  # Best match + 3 alternatives
+            )
         
         print(f"[DEBUG] Found {len(similar_incidents)} similar incidents with scores")
         
@@ -692,12 +842,11 @@ def suggest_resolution():
         # If best match has very low score, try to get any incident from same category
         if similar_incidents[0]['score'] < 0.1 and category:
             print(f"[DEBUG] Low score ({similar_incidents[0]['score']:.2f}), trying category fallback")
-            for incident in incidents_from_db:
-                if incident.get('category') == category and incident.get('resolution_notes') and len(incident.get('resolution_notes', '')) > 30:
-                    best_match = incident
-                    suggested_resolution = incident.get('resolution_notes', '')
-                    print(f"[DEBUG] Using category fallback: {incident.get('number')}")
-                    break
+            incident = index.first_in_category(category, min_resolution_length=30)
+            if incident:
+                best_match = incident
+                suggested_resolution = incident.get('resolution_notes', '')
+                print(f"[DEBUG] Using category fallback: {incident.get('number')}")
         
         print(f"[DEBUG] Found {len(similar_incidents)} similar incidents")
         print(f"[DEBUG] Best match: {best_match.get('number')} (score: {similar_incidents[0]['score']:.2f})")
@@ -765,10 +914,15 @@ def add_to_knowledge_base():
 
 @app.route('/get_knowledge_base', methods=['GET'])
 def get_knowledge_base():
-    """Get all incidents from knowledge base (MongoDB)"""
+    """Get all incidents from knowledge base (MongoDB); ?fields=full for whole documents"""
     try:
+        fields = request.args.get('fields', KB_FIELDS)
+        error = invalid_fields(fields, allowed=('rag', 'full'))
+        if error:
+            return error
+        
         # Get incidents from MongoDB with resolutions
-        incidents = db_client.search_incidents(limit=1000)
+        incidents = db_client.search_incidents(limit=1000, fields=fields)
         
         # Filter only incidents with resolutions
         with_resolutions = [
@@ -790,6 +944,48 @@ def get_knowledge_base():
         }), 500
 
 
+@app.route('/rag_stats', methods=['GET'])
+def rag_stats():
+    """Get memory usage of the RAG knowledge base and shared embedding models, and MongoDB connection health"""
+    try:
+        from embeddings import get_embedding_registry
+        
+        # Don't force-load the finder just to report on it
+        knowledge_base = resolution_finder.memory_usage() if resolution_finder is not None else None
+        
+        return jsonify({
+            'success': True,
+            'knowledge_base': knowledge_base,
+            'models': get_embedding_registry().stats(),
+            'incidents_cache': incidents_cache.stats(),
+            'change_watcher': change_watcher.stats() if change_watcher is not None else None,
+            'mongodb_connection': db_client.health.snapshot()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+@app.route('/refresh_cache', methods=['POST'])
+def refresh_cache():
+    """Force a full reload of the incidents cache (normally only deltas are applied)"""
+    try:
+        refresh_incidents_cache()
+        return jsonify({
+            'success': True,
+            'cache': incidents_cache.stats()
+        })
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
 @app.route('/kb/update_incident/<incident_number>', methods=['PUT'])
 def update_kb_incident(incident_number):
     """Update an existing incident in MongoDB (deprecated route for compatibility)"""
@@ -807,7 +1003,7 @@ def sync_knowledge_base():
     """Sync MongoDB incidents to knowledge base for RAG system"""
     try:
         # Get all incidents with resolutions from MongoDB
-        incidents = db_client.get_all_incidents(limit=10000)
+        incidents = db_client.get_all_incidents(limit=10000, fields=KB_FIELDS)
         
         # Filter incidents with resolutions
         with_resolutions = [
@@ -830,8 +1026,9 @@ def sync_knowledge_base():
             json.dump(with_resolutions, f, indent=2, ensure_ascii=False)
         
         # Reload RAG system
-        global resolution_finder
+        global resolution_finder, hybrid_retriever
         resolution_finder = None
+        hybrid_retriever = None
         
         return jsonify({
             'success': True,
@@ -857,8 +1054,8 @@ def clear_all_incidents():
         # Delete all documents in collection
         result = db_client.collection.delete_many({})
         
-        # Refresh cache after clearing all
-        refresh_incidents_cache()
+        # Empty the cache after clearing all
+        incidents_cache.clear()
         
         return jsonify({
             'success': True,
@@ -893,6 +1090,9 @@ def bulk_update():
             if db_client.update_incident(number, update_fields):
                 updated_count += 1
         
+        if updated_count:
+            incidents_cache.apply_changes(incident_numbers)
+        
         return jsonify({
             'success': True,
             'updated_count': updated_count,
@@ -930,6 +1130,149 @@ def get_incident(incident_number):
         }), 500
 
 
+# Async versions of the read endpoints (same URLs and responses),
+# registered in place of the sync views when an async driver and asgiref
+# are installed
+
+async def get_incidents_async():
+    """Async /get_incidents: the page and the total are fetched concurrently"""
+    try:
+        per_page = int(request.args.get('per_page', 100))
+        fields = request.args.get('fields', LIST_FIELDS)
+        error = invalid_fields(fields)
+        if error:
+            return error
+        
+        if 'page' in request.args:
+            page = int(request.args.get('page', 1))
+            skip = (page - 1) * per_page
+            incidents, total = await db_loop.gather(
+                async_db_client.get_all_incidents(skip=skip, limit=per_page, fields=fields),
+                async_db_client.get_incident_count()
+            )
+            
+            return jsonify({
+                'success': True,
+                'incidents': incidents,
+                'count': len(incidents),
+                'total': total,
+                'page': page,
+                'per_page': per_page
+            })
+        
+        cursor = request.args.get('cursor')
+        try:
+            if cursor:
+                incidents, next_cursor = await db_loop.call(
+                    async_db_client.get_incidents_page(limit=per_page, cursor=cursor, fields=fields)
+                )
+            else:
+                (incidents, next_cursor), total = await db_loop.gather(
+                    async_db_client.get_incidents_page(limit=per_page, fields=fields),
+                    async_db_client.get_incident_count()
+                )
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+        
+        response = {
+            'success': True,
+            'incidents': incidents,
+            'count': len(incidents),
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        }
+        if not cursor:
+            response['total'] = total
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+async def search_incidents_async():
+    """Async /search_incidents"""
+    try:
+        data = request.json
+        query = data.get('query', '')
+        fields = data.get('fields', LIST_FIELDS)
+        error = invalid_fields(fields)
+        if error:
+            return error
+        
+        incidents = await db_loop.call(async_db_client.search_incidents(
+            query=query if query else None,
+            category=data.get('category'),
+            priority=data.get('priority'),
+            limit=200,
+            fields=fields
+        ))
+        
+        return jsonify({
+            'success': True,
+            'incidents': incidents,
+            'count': len(incidents)
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+async def get_stats_async():
+    """Async /get_stats: the three queries run concurrently"""
+    try:
+        total_count, categories, recent = await db_loop.gather(
+            async_db_client.get_incident_count(),
+            async_db_client.get_categories(),
+            async_db_client.get_all_incidents(limit=5, fields=LIST_FIELDS)
+        )
+        
+        return jsonify({
+            'success': True,
+            'total_incidents': total_count,
+            'categories': categories,
+            'category_count': len(categories),
+            'recent_incidents': recent
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+async def get_incident_async(incident_number):
+    """Async /get_incident/<incident_number>"""
+    try:
+        incident = await db_loop.call(async_db_client.get_incident_by_number(incident_number))
+        
+        if incident:
+            return jsonify({
+                'success': True,
+                'incident': incident
+            })
+        return jsonify({
+            'success': False,
+            'error': 'Incident not found'
+        }), 404
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+
+if async_db_client is not None:
+    app.view_functions.update({
+        'get_incidents': get_incidents_async,
+        'search_incidents': search_incidents_async,
+        'get_stats': get_stats_async,
+        'get_incident': get_incident_async,
+    })
+
 
 if __name__ == '__main__':
     print("\n" + "="*70)
@@ -938,6 +1281,7 @@ if __name__ == '__main__':
     print(f"\nMongoDB Database: {db_client.database_name}")
     print(f"Total Incidents: {db_client.get_incident_count()}")
     print(f"Categories: {', '.join(db_client.get_categories()[:10])}")
+    print(f"Async read endpoints: {'on' if async_db_client is not None else 'off'}")
     print("\nAccess the application at: http://127.0.0.1:5000")
     print("\nPress CTRL+C to stop the server")
     print("="*70 + "\n")